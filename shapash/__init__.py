@@ -1,10 +1,32 @@
 """Top-level package."""
 
+import importlib
+
 __author__ = (
     """Yann Golhen, Yann Lagré, Sebastien Bidault, Maxime Gendre, Thomas Bouche, Johann Martin, Guillaume Vignal"""
 )
 __email__ = "yann.golhen@maif.fr, yann.lagre@maif.fr, sebabstien.bidault.marketing@maif.fr, thomas.bouche@maif.fr, guillaume.vignal@maif.fr"
 
-from shapash.explainer.smart_explainer import SmartExplainer
-
 from .__version__ import __version__
+
+# Public objects and the module defining them. They are imported on first access, so that
+# importing a submodule (e.g. shapash.utils.load_smartpredictor) does not import the
+# plotting and webapp dependencies of the SmartExplainer.
+_LAZY_OBJECTS = {
+    "SmartExplainer": "shapash.explainer.smart_explainer",
+}
+
+__all__ = ["SmartExplainer", "__version__"]
+
+
+def __getattr__(name):
+    if name in _LAZY_OBJECTS:
+        module = importlib.import_module(_LAZY_OBJECTS[name])
+        value = getattr(module, name)
+        globals()[name] = value
+        return value
+    raise AttributeError(f"module {__name__!r} has no attribute {name!r}")
+
+
+def __dir__():
+    return sorted(set(globals()) | set(_LAZY_OBJECTS))
@@ -5,6 +5,7 @@ import numpy as np
 import pandas as pd
 
 from shapash.utils.check import check_contribution_object, check_model
+from shapash.utils.class_values import NegatedPair
 from shapash.utils.transform import adapt_contributions, get_preprocessing_mapping
 from shapash.utils.utils import choose_state
 
@@ -135,7 +136,9 @@ class BaseBackend(ABC):
         """
         state = choose_state(contributions)
         if subset is not None:
-            if isinstance(contributions, list):
+            if isinstance(contributions, NegatedPair):
+                contributions = NegatedPair(contributions.positive.loc[subset])
+            elif isinstance(contributions, list):
                 contributions = [c.loc[subset] for c in contributions]
             else:
                 contributions = contributions.loc[subset]
@@ -171,7 +174,7 @@ class BaseBackend(ABC):
         contributions_cols = (
             contributions.columns.to_list()
             if isinstance(contributions, pd.DataFrame)
-            else contributions[0].columns.to_list()
+            else contributions[-1].columns.to_list()
         )
         if _needs_preprocessing(contributions_cols, x, self.preprocessing):
             contributions = self._apply_preprocessing(contributions)
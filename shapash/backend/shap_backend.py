@@ -1,6 +1,5 @@
 import numpy as np
 import pandas as pd
-import shap
 
 from shapash.backend.base_backend import BaseBackend
 
@@ -19,27 +18,65 @@ class ShapBackend(BaseBackend):
         self.explainer_args = explainer_args if explainer_args else {}
         self.explainer_compute_args = explainer_compute_args if explainer_compute_args else {}
 
+        # The explainer is built eagerly so that unsupported models are detected at init
+        self._explainer = self._build_explainer()
+        self._explainer_is_built = True
+
+    @property
+    def explainer(self):
+        """
+        Shap explainer of the model. It is not pickled when it was built by the backend,
+        and is built again on first use after loading.
+        """
+        if self._explainer is None:
+            self._explainer = self._build_explainer()
+            self._explainer_is_built = True
+        return self._explainer
+
+    @explainer.setter
+    def explainer(self, explainer):
+        self._explainer = explainer
+        self._explainer_is_built = False
+
+    def __getstate__(self):
+        state = self.__dict__.copy()
+        if state.get("_explainer_is_built"):
+            state["_explainer"] = None
+        return state
+
+    def __setstate__(self, state):
+        # Backends pickled by previous versions store the explainer itself
+        if "explainer" in state:
+            state["_explainer"] = state.pop("explainer")
+            state["_explainer_is_built"] = False
+        self.__dict__.update(state)
+
+    def _build_explainer(self):
+        """
+        Build the shap explainer from the explainer_args, or the most suitable one for the model.
+        """
+        # shap is imported on first use: loading a saved backend does not need it
+        import shap  # noqa: PLC0415
+
+        model = self.model
         if self.explainer_args:
             if "explainer" in self.explainer_args.keys():
                 shap_parameters = {k: v for k, v in self.explainer_args.items() if k != "explainer"}
-                self.explainer = self.explainer_args["explainer"](**shap_parameters)
-            else:
-                self.explainer = shap.Explainer(**self.explainer_args)
-        else:
-            if shap.explainers.Linear.supports_model_with_masker(model, self.masker):
-                self.explainer = shap.Explainer(model=model, masker=self.masker)
-            elif shap.explainers.Tree.supports_model_with_masker(model, None):
-                self.explainer = shap.Explainer(model=model)
-            elif shap.explainers.Additive.supports_model_with_masker(model, self.masker):
-                self.explainer = shap.Explainer(model=model, masker=self.masker)
-            # otherwise use a model agnostic method
-            elif hasattr(model, "predict_proba"):
-                self.explainer = shap.Explainer(model=model.predict_proba, masker=self.masker)
-            elif hasattr(model, "predict"):
-                self.explainer = shap.Explainer(model=model.predict, masker=self.masker)
-            # if we get here then we don't know how to handle what was given to us
-            else:
-                raise ValueError("The model is not recognized by Shapash! Model: " + str(model))
+                return self.explainer_args["explainer"](**shap_parameters)
+            return shap.Explainer(**self.explainer_args)
+        if shap.explainers.Linear.supports_model_with_masker(model, self.masker):
+            return shap.Explainer(model=model, masker=self.masker)
+        elif shap.explainers.Tree.supports_model_with_masker(model, None):
+            return shap.Explainer(model=model)
+        elif shap.explainers.Additive.supports_model_with_masker(model, self.masker):
+            return shap.Explainer(model=model, masker=self.masker)
+        # otherwise use a model agnostic method
+        elif hasattr(model, "predict_proba"):
+            return shap.Explainer(model=model.predict_proba, masker=self.masker)
+        elif hasattr(model, "predict"):
+            return shap.Explainer(model=model.predict, masker=self.masker)
+        # if we get here then we don't know how to handle what was given to us
+        raise ValueError("The model is not recognized by Shapash! Model: " + str(model))
 
     def run_explainer(self, x: pd.DataFrame) -> dict:
         """
@@ -78,6 +115,8 @@ def get_shap_interaction_values(x_df, explainer):
     shap_interaction_values : np.ndarray
         Shap interaction values for each sample as an array of shape (# samples x # features x # features).
     """
+    import shap  # noqa: PLC0415
+
     if not isinstance(explainer, shap.TreeExplainer):
         raise ValueError(
             f"Explainer type ({type(explainer)}) is not a TreeExplainer. "
@@ -5,8 +5,10 @@ Contributions
 import numpy as np
 import pandas as pd
 
+from shapash.manipulation.mask import compute_masked_contributions
 from shapash.utils.category_encoder_backend import calc_inv_contrib_ce
 from shapash.utils.columntransformer_backend import calc_inv_contrib_ct
+from shapash.utils.sparse import is_sparse_frame, rank_sparse_contributions
 from shapash.utils.transform import check_transformers, preprocessing_tolist
 
 
@@ -61,7 +63,34 @@ def inverse_transform_contributions(contributions, preprocessing=None, agg_colum
         return x_contrib_invers
 
 
-def rank_contributions(s_df, x_df):
+def argsort_top_k(values, n_top):
+    """
+    Indices of the n_top largest absolute values along the second axis, by decreasing absolute values.
+
+    The full sort is only done when all the values are kept, otherwise the n_top largest values
+    are selected with argpartition before being sorted.
+
+    Parameters
+    ----------
+    values : numpy.ndarray
+        Array with at least 2 dimensions, sorted along the second axis.
+    n_top : int
+        Number of indices kept.
+
+    Returns
+    -------
+    numpy.ndarray
+        Indices of shape (values.shape[0], n_top, ...).
+    """
+    neg_abs = -np.abs(values)
+    if n_top >= values.shape[1]:
+        return np.argsort(neg_abs, axis=1)
+    top = np.argpartition(neg_abs, n_top - 1, axis=1)[:, :n_top]
+    order = np.argsort(np.take_along_axis(neg_abs, top, axis=1), axis=1)
+    return np.take_along_axis(top, order, axis=1)
+
+
+def rank_contributions(s_df, x_df, keep_top_k=None):
     """
     Function to sort contributions and input features
     by decreasing contribution absolute values
@@ -72,6 +101,9 @@ def rank_contributions(s_df, x_df):
         Local contributions dataframe.
     x_df: pandas.DataFrame
         Input features.
+    keep_top_k: int, optional
+        Number of contributions kept for each row. All the contributions are kept if None,
+        otherwise the sum of the contributions that are not kept is returned as a residual.
 
     Returns
     -------
@@ -82,18 +114,29 @@ def rank_contributions(s_df, x_df):
     pandas.DataFrame
         Input features names sorted for each observation
         by decreasing contributions absolute values.
+    pandas.DataFrame
+        Only if keep_top_k is given: sum of the negative (masked_neg) and
+        positive (masked_pos) contributions that are not kept.
     """
-    argsort = np.argsort(-np.abs(s_df.values), axis=1)
+    if is_sparse_frame(s_df):
+        return rank_sparse_contributions(s_df, x_df, keep_top_k)
+    n_top = s_df.shape[1] if keep_top_k is None else min(keep_top_k, s_df.shape[1])
+    argsort = argsort_top_k(s_df.values, n_top)
     sorted_contrib = np.take_along_axis(s_df.values, argsort, axis=1)
     sorted_features = np.take_along_axis(x_df.values, argsort, axis=1)
 
-    contrib_col = ["contribution_" + str(i) for i in range(s_df.shape[1])]
-    col = ["feature_" + str(i) for i in range(s_df.shape[1])]
+    contrib_col = ["contribution_" + str(i) for i in range(n_top)]
+    col = ["feature_" + str(i) for i in range(n_top)]
 
     s_dict = pd.DataFrame(data=argsort, columns=col, index=x_df.index)
     s_ord = pd.DataFrame(data=sorted_contrib, columns=contrib_col, index=x_df.index)
     x_ord = pd.DataFrame(data=sorted_features, columns=col, index=x_df.index)
-    return [s_ord, x_ord, s_dict]
+    if keep_top_k is None:
+        return [s_ord, x_ord, s_dict]
+    kept = np.zeros(s_df.shape, dtype=bool)
+    np.put_along_axis(kept, argsort, True, axis=1)
+    residual = compute_masked_contributions(s_df, kept).set_axis(x_df.index)
+    return [s_ord, x_ord, s_dict, residual]
 
 
 def assign_contributions(ranked):
@@ -109,14 +152,19 @@ def assign_contributions(ranked):
     -------
     dict
         Same data but rearrange into a dict with explicit names.
+        The residual of the contributions that are not kept, if any, is under the "residual" key.
 
     Raises
     ------
     ValueError
-        The output of rank_contributions should always be of length three.
+        The output of rank_contributions should always be of length three,
+        or four with the residual of the contributions that are not kept.
     """
-    if len(ranked) != 3:
+    if len(ranked) not in (3, 4):
         raise ValueError(
-            f"Expected length : 3, observed length : {len(ranked)}, please check the outputs of rank_contributions."
+            f"Expected length : 3 or 4, observed length : {len(ranked)}, please check the outputs of rank_contributions."
         )
-    return {"contrib_sorted": ranked[0], "x_sorted": ranked[1], "var_dict": ranked[2]}
+    assigned = {"contrib_sorted": ranked[0], "x_sorted": ranked[1], "var_dict": ranked[2]}
+    if len(ranked) == 4:
+        assigned["residual"] = ranked[3]
+    return assigned
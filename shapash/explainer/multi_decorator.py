@@ -2,17 +2,70 @@
 Multi Decorator module
 """
 
+import threading
+import weakref
+from concurrent.futures import ProcessPoolExecutor, ThreadPoolExecutor
+
+import numpy as np
+import pandas as pd
+
+from shapash.decomposition.contributions import argsort_top_k
 from shapash.explainer.smart_state import SmartState
+from shapash.manipulation.summarize import format_features_import, group_contributions, summarize_classes
+from shapash.utils.class_values import ClassesArray, NegatedPair
 
 
 class MultiDecorator:
     """
     Decorator pattern. It simply iterates the method of its member as many times as needed.
     It thus extends any class to apply its methods to a list of arguments.
+
+    The calls of the member method, one per class, can be dispatched concurrently to a pool
+    of workers. The results are returned in the order of the classes. The pool is created on
+    the first concurrent call and reused by the next ones. It is shut down with the decorator,
+    i.e. with the explainer owning it, or by calling shutdown.
+
+    Parameters
+    ----------
+    member : object
+        Object whose methods are applied to each element of a list (SmartState).
+    n_jobs : int or None (default: 1)
+        Number of workers running the calls of the member method concurrently. 1 or None runs them
+        sequentially, -1 uses all the processors, -2 all the processors but one, and so on.
+    executor : str (default: "thread")
+        Pool of workers used when n_jobs is not 1:
+            - "thread": a thread pool, suited to the methods spending their time in NumPy,
+              which releases the GIL.
+            - "process": a process pool, suited to the methods running Python code.
+              The arguments and the results are pickled.
     """
 
-    def __init__(self, member):
+    # Default values for the decorators pickled before n_jobs was available
+    n_jobs = 1
+    executor = "thread"
+    _pool = None
+
+    def __init__(self, member, n_jobs=1, executor="thread"):
+        if n_jobs is not None and (not isinstance(n_jobs, int) or n_jobs == 0):
+            raise ValueError(f"n_jobs must be None or a non-zero integer, got {n_jobs!r}.")
+        if executor not in ("thread", "process"):
+            raise ValueError(f"executor must be 'thread' or 'process', got {executor!r}.")
         self.member = member
+        self.n_jobs = n_jobs
+        self.executor = executor
+        self._pool_lock = threading.Lock()
+
+    def __getstate__(self):
+        # The pool of workers is created again when needed
+        state = self.__dict__.copy()
+        state.pop("_pool", None)
+        state.pop("_pool_lock", None)
+        return state
+
+    def __setstate__(self, state):
+        # Also called for the decorators pickled before the pool existed
+        self.__dict__.update(state)
+        self._pool_lock = threading.Lock()
 
     def __getattr__(self, item):
         if item in [x for x in dir(SmartState) if not x.startswith("__")]:
@@ -53,10 +106,63 @@ class MultiDecorator:
         first_arg, other_args = args[0], args[1:]
         self.check_first_arg(first_arg, func)
         if isinstance(first_arg[0], tuple):
-            output_list = [method(*elem, *other_args, **kwargs) for elem in first_arg]
+            calls = [(*elem, *other_args) for elem in first_arg]
         else:
-            output_list = [method(elem, *other_args, **kwargs) for elem in first_arg]
-        return output_list
+            calls = [(elem, *other_args) for elem in first_arg]
+        n_workers = min(self.effective_n_jobs(), len(calls))
+        if n_workers < 2:
+            return [method(*call_args, **kwargs) for call_args in calls]
+        executor = self.get_executor()
+        futures = [executor.submit(method, *call_args, **kwargs) for call_args in calls]
+        return [future.result() for future in futures]
+
+    def effective_n_jobs(self):
+        """
+        Number of workers corresponding to n_jobs, see shapash.utils.utils.effective_n_jobs.
+
+        Returns
+        -------
+        int
+            Number of workers, 1 when the calls are run sequentially.
+        """
+        # shapash.utils.utils imports this module
+        from shapash.utils.utils import effective_n_jobs  # noqa: PLC0415
+
+        return effective_n_jobs(self.n_jobs)
+
+    def get_executor(self):
+        """
+        Return the pool of workers running the calls of the member methods, created on first use
+        with effective_n_jobs workers.
+
+        Returns
+        -------
+        concurrent.futures.Executor
+        """
+        with self._pool_lock:
+            if self._pool is None:
+                if self.executor == "process":
+                    pool = ProcessPoolExecutor(max_workers=self.effective_n_jobs())
+                else:
+                    pool = ThreadPoolExecutor(max_workers=self.effective_n_jobs(), thread_name_prefix="shapash")
+                # The pool does not refer to the decorator: it is shut down when the decorator is deleted
+                weakref.finalize(self, pool.shutdown, wait=False)
+                self._pool = pool
+            return self._pool
+
+    def shutdown(self, wait=True):
+        """
+        Shut down the pool of workers. A new pool is created by the next concurrent call.
+
+        Parameters
+        ----------
+        wait : bool (default: True)
+            Wait for the running calls to finish.
+        """
+        with self._pool_lock:
+            pool, self._pool = self._pool, None
+        if pool is not None:
+            pool.shutdown(wait=wait)
 
     def check_args(self, args, name):
         """
@@ -200,6 +306,25 @@ class MultiDecorator:
         arg_tup = list(zip(s_contrib, masks, strict=False))
         return self.delegate("compute_masked_contributions", arg_tup)
 
+    def add_residual_contributions(self, masked_contributions, residual):
+        """
+        Override add_residual_contributions. Add each residual to the masked contributions of its class.
+
+        Parameters
+        ----------
+        masked_contributions : list
+            List of masked contributions (pandas.DataFrames).
+        residual : list
+            List of residuals of the contributions that are not kept (pandas.DataFrames, same order).
+
+        Returns
+        -------
+        list
+            List of the sums (pandas.DataFrames).
+        """
+        arg_tup = list(zip(masked_contributions, residual, strict=False))
+        return self.delegate("add_residual_contributions", arg_tup)
+
     def summarize(self, s_contribs, var_dicts, xs_sorted, masks, columns_dict, features_dict):
         """
         Compute the summarized contributions of hidden features.
@@ -253,11 +378,362 @@ class MultiDecorator:
         ----------
         contributions : list
             List of contributions of each unique feature.
-        features_groups : dict
-            Python dict that inform which features to regroup.
+        features_groups : dict or GroupsMembership
+            Python dict that inform which features to regroup, or its compiled membership.
 
         Returns
         -------
         pd.DataFrame
         """
         return self.delegate("compute_grouped_contributions", contributions, features_groups)
+
+
+class BinaryDecorator(MultiDecorator):
+    """
+    MultiDecorator for binary classifications whose contributions are a NegatedPair.
+
+    The contributions of the negative class are the opposite of the contributions of the
+    positive class: both classes share the same ranking, features importance and, except
+    for the sign filter, the same masks. These are computed once on the positive class and
+    shared by the two classes, the contributions of the negative class are derived on access.
+    Lists of contributions that are not a NegatedPair are handled as by MultiDecorator.
+    """
+
+    @staticmethod
+    def is_shared(values):
+        """
+        Check if a list of values per class holds the same object for the two classes.
+        """
+        return isinstance(values, list) and len(values) == 2 and values[0] is values[1]
+
+    def validate_contributions(self, contributions, x_init):
+        """
+        Override validate_contributions, see SmartState.validate_contributions.
+        """
+        if isinstance(contributions, NegatedPair):
+            return NegatedPair(self.member.validate_contributions(contributions.positive, x_init))
+        return self.delegate("validate_contributions", contributions, x_init)
+
+    def inverse_transform_contributions(self, contributions, preprocessing, agg_columns="sum"):
+        """
+        Override inverse_transform_contributions, see SmartState.inverse_transform_contributions.
+        The aggregations of contributions ('sum' or 'first') commute with the negation.
+        """
+        if isinstance(contributions, NegatedPair):
+            return NegatedPair(
+                self.member.inverse_transform_contributions(contributions.positive, preprocessing, agg_columns)
+            )
+        return self.delegate("inverse_transform_contributions", contributions, preprocessing, agg_columns)
+
+    def check_contributions(self, contributions, x_init, features_names=True):
+        """
+        Override check_contributions, see MultiDecorator.check_contributions.
+        """
+        if isinstance(contributions, NegatedPair):
+            return self.member.check_contributions(contributions.positive, x_init, features_names)
+        return super().check_contributions(contributions, x_init, features_names)
+
+    def rank_contributions(self, contributions, x_init, keep_top_k=None):
+        """
+        Override rank_contributions. The contributions are sorted by decreasing absolute values,
+        so the two classes of a NegatedPair have the same order: the ranking is computed once.
+
+        Returns
+        -------
+        list
+            [sorted contributions (NegatedPair), sorted features, features names]
+            where the sorted features and features names are shared by the two classes.
+        """
+        if not isinstance(contributions, NegatedPair):
+            return self.delegate("rank_contributions", contributions, x_init, keep_top_k)
+        ranked = self.member.rank_contributions(contributions.positive, x_init, keep_top_k)
+        contrib_sorted, x_sorted, var_dict = ranked[:3]
+        shared = [NegatedPair(contrib_sorted), [x_sorted, x_sorted], [var_dict, var_dict]]
+        if keep_top_k is None:
+            return shared
+        return shared + [[self.mirror_masked(ranked[3]), ranked[3]]]
+
+    def assign_contributions(self, ranked):
+        """
+        Override assign_contributions, see MultiDecorator.assign_contributions.
+        """
+        if isinstance(ranked[0], NegatedPair):
+            return self.member.assign_contributions(ranked)
+        return super().assign_contributions(ranked)
+
+    def hide_contributions(self, var_dict, features_list):
+        """
+        Override hide_contributions. The mask is computed once when the features names are shared.
+        """
+        if self.is_shared(var_dict):
+            mask = self.member.hide_contributions(var_dict[1], features_list)
+            return [mask, mask]
+        return self.delegate("hide_contributions", var_dict, features_list)
+
+    def cap_contributions(self, s_contrib, threshold=0.1):
+        """
+        Override cap_contributions. The absolute values of a NegatedPair are the same for the two classes.
+        """
+        if isinstance(s_contrib, NegatedPair):
+            mask = self.member.cap_contributions(s_contrib.positive, threshold)
+            return [mask, mask]
+        return self.delegate("cap_contributions", s_contrib, threshold)
+
+    def init_mask(self, s_contrib, value=True):
+        """
+        Override init_mask. The mask is shared by the two classes of a NegatedPair.
+        """
+        if isinstance(s_contrib, NegatedPair):
+            mask = self.member.init_mask(s_contrib.positive, value)
+            return [mask, mask]
+        return self.delegate("init_mask", s_contrib, value)
+
+    def combine_masks(self, masks):
+        """
+        Override combine_masks. Masks shared by the two classes are combined once.
+        """
+        if all(self.is_shared(mask) for mask in masks):
+            mask = self.member.combine_masks([mask[1] for mask in masks])
+            return [mask, mask]
+        return super().combine_masks(masks)
+
+    def cutoff_contributions(self, dataframe, max_contrib):
+        """
+        Override cutoff_contributions. A mask shared by the two classes is cut once.
+        """
+        if self.is_shared(dataframe):
+            mask = self.member.cutoff_contributions(dataframe[1], max_contrib)
+            return [mask, mask]
+        return self.delegate("cutoff_contributions", dataframe, max_contrib)
+
+    def compute_masked_contributions(self, s_contrib, masks):
+        """
+        Override compute_masked_contributions. With a mask shared by the two classes of a NegatedPair,
+        the hidden negative (positive) contributions of the negative class are the opposite of the
+        hidden positive (negative) contributions of the positive class.
+        """
+        if isinstance(s_contrib, NegatedPair) and self.is_shared(masks):
+            masked = self.member.compute_masked_contributions(s_contrib.positive, masks[1])
+            return [self.mirror_masked(masked), masked]
+        return super().compute_masked_contributions(s_contrib, masks)
+
+    @staticmethod
+    def mirror_masked(masked):
+        """
+        Masked contributions (or residual) of the negative class from the ones of the positive class.
+        """
+        return pd.DataFrame(
+            {"masked_neg": -masked["masked_pos"], "masked_pos": -masked["masked_neg"]}, index=masked.index
+        )
+
+    def compute_features_import(self, contributions, norm=1):
+        """
+        Override compute_features_import. The importance is the same for the two classes of a NegatedPair.
+        """
+        if isinstance(contributions, NegatedPair):
+            features_import = self.member.compute_features_import(contributions.positive, norm)
+            return [features_import, features_import]
+        return super().compute_features_import(contributions, norm)
+
+    def compute_grouped_contributions(self, contributions, features_groups):
+        """
+        Override compute_grouped_contributions. Grouped contributions are sums, they commute with the negation.
+        """
+        if isinstance(contributions, NegatedPair):
+            return NegatedPair(self.member.compute_grouped_contributions(contributions.positive, features_groups))
+        return super().compute_grouped_contributions(contributions, features_groups)
+
+
+class ClassesArrayDecorator(MultiDecorator):
+    """
+    MultiDecorator for classifications whose contributions are a ClassesArray.
+
+    The contributions of all the classes are a single array of shape (n_rows, n_features, n_classes):
+    ranking, masks, features importance and summaries are computed at once for all the classes
+    with vectorized operations on this array, instead of class by class. Their results are also
+    ClassesArray, whose DataFrame of a class is only built when it is accessed.
+    Lists of contributions that are not a ClassesArray are handled as by MultiDecorator.
+    """
+
+    def validate_contributions(self, contributions, x_init):
+        """
+        Override validate_contributions, see SmartState.validate_contributions.
+        """
+        if isinstance(contributions, ClassesArray):
+            if contributions.labelled:
+                return contributions
+            return ClassesArray(contributions.values, x_init.index, x_init.columns)
+        return self.delegate("validate_contributions", contributions, x_init)
+
+    def inverse_transform_contributions(self, contributions, preprocessing, agg_columns="sum"):
+        """
+        Override inverse_transform_contributions, see SmartState.inverse_transform_contributions.
+        """
+        inverse = self.delegate("inverse_transform_contributions", contributions, preprocessing, agg_columns)
+        if isinstance(contributions, ClassesArray):
+            return ClassesArray.from_frames(inverse)
+        return inverse
+
+    def check_contributions(self, contributions, x_init, features_names=True):
+        """
+        Override check_contributions, see MultiDecorator.check_contributions.
+        """
+        if not isinstance(contributions, ClassesArray):
+            return super().check_contributions(contributions, x_init, features_names)
+        if x_init.shape != contributions.shape or not x_init.index.equals(contributions.index):
+            return False
+        if features_names:
+            return x_init.columns.equals(contributions.columns)
+        return True
+
+    def rank_contributions(self, contributions, x_init, keep_top_k=None):
+        """
+        Override rank_contributions. The contributions of all the classes are sorted at once.
+
+        Returns
+        -------
+        list
+            [sorted contributions, sorted features, features names] as ClassesArray,
+            and the residual of the contributions that are not kept if keep_top_k is given.
+        """
+        if not isinstance(contributions, ClassesArray):
+            return self.delegate("rank_contributions", contributions, x_init, keep_top_k)
+        values = contributions.values
+        n_top = values.shape[1] if keep_top_k is None else min(keep_top_k, values.shape[1])
+        argsort = argsort_top_k(values, n_top)
+        sorted_contrib = np.take_along_axis(values, argsort, axis=1)
+        sorted_features = np.take_along_axis(x_init.values[:, :, np.newaxis], argsort, axis=1)
+        contrib_col = pd.Index(["contribution_" + str(i) for i in range(n_top)])
+        col = pd.Index(["feature_" + str(i) for i in range(n_top)])
+        ranked = [
+            ClassesArray(sorted_contrib, x_init.index, contrib_col),
+            ClassesArray(sorted_features, x_init.index, col),
+            ClassesArray(argsort, x_init.index, col),
+        ]
+        if keep_top_k is None:
+            return ranked
+        kept = np.zeros(values.shape, dtype=bool)
+        np.put_along_axis(kept, argsort, True, axis=1)
+        residual = self.compute_masked_contributions(contributions, contributions.with_labels(kept))
+        return ranked + [ClassesArray(residual.values, x_init.index, residual.columns)]
+
+    def assign_contributions(self, ranked):
+        """
+        Override assign_contributions, see MultiDecorator.assign_contributions.
+        """
+        if isinstance(ranked[0], ClassesArray):
+            return self.member.assign_contributions(ranked)
+        return super().assign_contributions(ranked)
+
+    def hide_contributions(self, var_dict, features_list):
+        """
+        Override hide_contributions, see SmartState.hide_contributions.
+        """
+        if isinstance(var_dict, ClassesArray):
+            return var_dict.with_labels(~np.isin(var_dict.values, features_list))
+        return self.delegate("hide_contributions", var_dict, features_list)
+
+    def cap_contributions(self, s_contrib, threshold=0.1):
+        """
+        Override cap_contributions, see SmartState.cap_contributions.
+        """
+        if isinstance(s_contrib, ClassesArray):
+            return s_contrib.with_labels(np.abs(s_contrib.values) >= threshold)
+        return self.delegate("cap_contributions", s_contrib, threshold)
+
+    def sign_contributions(self, dataframe, positive=True):
+        """
+        Override sign_contributions, see SmartState.sign_contributions.
+        """
+        if isinstance(dataframe, ClassesArray):
+            return dataframe.with_labels(dataframe.values >= 0 if positive else dataframe.values < 0)
+        return self.delegate("sign_contributions", dataframe, positive)
+
+    def init_mask(self, s_contrib, value=True):
+        """
+        Override init_mask, see SmartState.init_mask.
+        """
+        if isinstance(s_contrib, ClassesArray):
+            return s_contrib.with_labels(np.full(s_contrib.values.shape, bool(value)))
+        return self.delegate("init_mask", s_contrib, value)
+
+    def combine_masks(self, masks):
+        """
+        Override combine_masks. Combine a list of ClassesArray masks with the AND operator.
+        """
+        if not all(isinstance(mask, ClassesArray) for mask in masks):
+            return super().combine_masks(masks)
+        if len({mask.values.shape for mask in masks}) != 1:
+            raise ValueError("Masks must have same dimensions.")
+        combined = np.logical_and.reduce([mask.values for mask in masks])
+        return masks[0].with_labels(combined, pd.Index([f"contrib_{i + 1}" for i in range(combined.shape[1])]))
+
+    def cutoff_contributions(self, dataframe, max_contrib):
+        """
+        Override cutoff_contributions. Keep the max_contrib first True values of each row of the mask.
+        """
+        if isinstance(dataframe, ClassesArray):
+            mask = dataframe.values
+            return dataframe.with_labels(mask & (np.cumsum(mask, axis=1) <= max_contrib))
+        return self.delegate("cutoff_contributions", dataframe, max_contrib)
+
+    def compute_masked_contributions(self, s_contrib, masks):
+        """
+        Override compute_masked_contributions, see SmartState.compute_masked_contributions.
+        """
+        if not (isinstance(s_contrib, ClassesArray) and isinstance(masks, ClassesArray)):
+            return super().compute_masked_contributions(s_contrib, masks)
+        values, hidden = s_contrib.values, ~masks.values
+        # Same conditions as mask.compute_masked_contributions: a missing contribution is on both sides
+        hidden_neg = np.where(hidden & ~(values > 0), values, 0).sum(axis=1)
+        hidden_pos = np.where(hidden & ~(values < 0), values, 0).sum(axis=1)
+        return s_contrib.with_labels(np.stack([hidden_neg, hidden_pos], axis=1), pd.Index(["masked_neg", "masked_pos"]))
+
+    def add_residual_contributions(self, masked_contributions, residual):
+        """
+        Override add_residual_contributions, see SmartState.add_residual_contributions.
+        """
+        if isinstance(masked_contributions, ClassesArray) and isinstance(residual, ClassesArray):
+            return masked_contributions.with_labels(masked_contributions.values + residual.values)
+        return super().add_residual_contributions(masked_contributions, residual)
+
+    def summarize(self, s_contribs, var_dicts, xs_sorted, masks, columns_dict, features_dict):
+        """
+        Override summarize. The summaries of all the classes are computed at once.
+        """
+        summaries = None
+        if all(isinstance(arg, ClassesArray) for arg in (s_contribs, var_dicts, xs_sorted, masks)):
+            summaries = summarize_classes(
+                s_contribs.values,
+                var_dicts.values,
+                xs_sorted.values,
+                masks.values,
+                s_contribs.index,
+                columns_dict,
+                features_dict,
+            )
+        if summaries is None:
+            return super().summarize(s_contribs, var_dicts, xs_sorted, masks, columns_dict, features_dict)
+        return summaries
+
+    def compute_features_import(self, contributions, norm=1):
+        """
+        Override compute_features_import. The importance of all the classes is computed at once.
+        """
+        if not isinstance(contributions, ClassesArray):
+            return super().compute_features_import(contributions, norm)
+        abs_contributions = np.abs(contributions.values)
+        if norm == 1:
+            importance = abs_contributions.sum(axis=0)
+        else:
+            importance = (abs_contributions**norm).sum(axis=0) ** (1 / norm)
+        return format_features_import(importance.T.reshape(-1), contributions.columns, multiclass=True)
+
+    def compute_grouped_contributions(self, contributions, features_groups):
+        """
+        Override compute_grouped_contributions. The groups of all the classes are summed at once,
+        with a single product by the membership matrix of the groups.
+        """
+        if not isinstance(contributions, ClassesArray):
+            return super().compute_grouped_contributions(contributions, features_groups)
+        return group_contributions(contributions, features_groups)
@@ -4,6 +4,7 @@ Smart explainer module
 
 import copy
 import logging
+import os
 import shutil
 import tempfile
 
@@ -13,25 +14,44 @@ import pandas as pd
 import shapash.explainer.smart_predictor
 from shapash.backend import BaseBackend, get_backend_cls_from_name
 from shapash.backend.shap_backend import get_shap_interaction_values
+from shapash.manipulation.filters import mask_params_key
 from shapash.manipulation.select_lines import keep_right_contributions
-from shapash.manipulation.summarize import create_grouped_features_values
+from shapash.manipulation.summarize import (
+    LINEAR_PROJECTIONS,
+    GroupsMembership,
+    SubsetFeaturesImportance,
+    compute_contributions_power_sums,
+    create_grouped_features_references,
+    create_grouped_features_values,
+    format_features_import,
+    project_feature_values_1d,
+)
 from shapash.report import check_report_requirements
 from shapash.style.style_utils import colors_loading, select_palette
 from shapash.utils.check import (
     check_additional_data,
     check_columns_order,
+    check_dtype,
     check_features_name,
     check_label_dict,
     check_model,
     check_postprocessing,
     check_y,
 )
+from shapash.utils.compile_cache import CompileCache
 from shapash.utils.custom_thread import CustomThread
 from shapash.utils.explanation_metrics import find_neighbors, get_distance, get_min_nb_features, shap_neighbors
-from shapash.utils.io import load_pickle, save_pickle
+from shapash.utils.io import load_dir, load_pickle, save_dir, save_pickle
+from shapash.utils.memory import MemoryReport
 from shapash.utils.model import predict, predict_error, predict_proba
-from shapash.utils.transform import apply_postprocessing, handle_categorical_missing, inverse_transform
-from shapash.utils.utils import get_host_name
+from shapash.utils.transform import (
+    apply_postprocessing,
+    cast_float_values,
+    copy_frame,
+    handle_categorical_missing,
+    inverse_transform,
+)
+from shapash.utils.utils import choose_state, concat_rows, get_host_name
 from shapash.webapp.smart_app import SmartApp
 
 from .smart_plotter import SmartPlotter
@@ -110,12 +130,22 @@ class SmartExplainer:
     colors_dict : dict, optional
         Dictionary containing the full color palette configuration.
         Can be used to override default plot colors.
+    n_jobs : int or None (default: 1)
+        Number of workers computing the classes of a multiclass problem concurrently
+        (ranking, masks and summary of the contributions of each class). -1 uses all the processors.
+        Contributions stored as a single array are computed for all the classes at once and do not use it.
+    dtype : str or numpy dtype, optional
+        Floating point type of the contributions, predictions and probabilities, e.g. "float32".
+        They are cast once after the backend, and the ranked contributions, masks, plots and saved
+        explainer keep this type: "float32" halves their memory. The prediction errors and the sums
+        of the features importance are computed in float64. None keeps the types given by the backend.
     **backend_kwargs : dict
         Additional keyword arguments passed to the backend.
 
     Attributes
     ----------
     data: dict
+        Computed on first access after compile, see Notes.
         Data dictionary has 3 entries. Each key returns a pd.DataFrame (regression) or a list of pd.DataFrame
         (classification - The length of the lists is equivalent to the number of labels).
         All pd.DataFrame have she same shape (n_samples, n_features).
@@ -162,7 +192,7 @@ class SmartExplainer:
     model : object
         The model being explained.
     features_desc : dict
-        Number of unique values per feature in `x_init`.
+        Number of unique values per feature in `x_init`. Computed on first access after compile.
     features_imp : pandas.Series or list
         Computed feature importance values.
     local_neighbors : dict
@@ -177,6 +207,17 @@ class SmartExplainer:
         Postprocessing rules applied after inverse preprocessing.
     y_target : pandas.Series or pandas.DataFrame, optional
         True target values.
+    groups_values : GroupsValues or None
+        Values of the features of each group of features. The columns of the groups in `x_init_groups`
+        hold the positions of the rows in these values: the dicts of values of the groups are only
+        built for the rows displayed by `to_pandas`.
+
+    Notes
+    -----
+    `data`, `data_groups` and `features_desc` are derived from the contributions and `x_init`.
+    They are computed on first access and cached, so that `compile` does not pay for them when
+    only the features importance or a SmartPredictor is needed. They are computed again after a
+    new compilation.
 
     Example
     -------
@@ -185,6 +226,17 @@ class SmartExplainer:
     >>> xpl.plot.features_importance()
     """
 
+    # Derived attributes computed on first access: {attribute: method computing it}
+    _LAZY_ATTRIBUTES = {
+        "data": "_compute_data",
+        "data_groups": "_compute_data_groups",
+        "features_desc": "_compute_features_desc",
+    }
+    # Number of masks memoized by filter, see _get_mask
+    _MAX_MEMOIZED_MASKS = 8
+    # Number of t-SNE projections of groups of features memoized, see _project_group
+    _MAX_MEMOIZED_PROJECTIONS = 16
+
     def __init__(
         self,
         model,
@@ -197,6 +249,8 @@ class SmartExplainer:
         title_story: str = None,
         palette_name=None,
         colors_dict=None,
+        n_jobs=1,
+        dtype=None,
         **backend_kwargs,
     ):
         if features_dict is not None and not isinstance(features_dict, dict):
@@ -224,6 +278,8 @@ class SmartExplainer:
             raise NotImplementedError(f"Unknown backend : {backend}")
 
         self.backend_kwargs = backend_kwargs
+        self.n_jobs = n_jobs
+        self.dtype = check_dtype(dtype)
         self.features_dict = dict() if features_dict is None else copy.deepcopy(features_dict)
         self.label_dict = label_dict
         self.title_story = title_story if title_story is not None else ""
@@ -246,6 +302,12 @@ class SmartExplainer:
         self.contributions = None
         self.explain_data = None
         self.features_imp = None
+        self._importance_engines = dict()
+        self._masks = dict()
+        self._group_projections = dict()
+        self._groups_membership = None
+        self.groups_values = None
+        self.keep_top_k = None
 
     def compile(
         self,
@@ -257,6 +319,9 @@ class SmartExplainer:
         columns_order=None,
         additional_data=None,
         additional_features_dict=None,
+        cache_dir=None,
+        report_memory=False,
+        keep_top_k=None,
     ):
         """
         Prepare and structure all data needed for interpreting the model and its predictions.
@@ -307,65 +372,440 @@ class SmartExplainer:
             Mapping of additional feature names (technical names) to user-friendly
             domain names, used to improve readability in plots and dashboards.
             Must have the same index as `x_init`.
+        cache_dir : str, optional
+            Directory of an on-disk cache of the predictions, probabilities and contributions
+            computed during the compilation. They are reused when the model, the preprocessing,
+            the backend, the features and labels dictionaries and the content of `x` are the same,
+            which avoids running the predictions and the backend again.
+            Values given by the user (`y_pred`, `contributions`, ...) are always used instead.
+        report_memory : bool, default=False
+            If True, the duration and the memory used by each stage of the compilation are measured:
+            resident set size at the end of the stage, peak resident set size during the stage,
+            memory allocated during the stage and its peak (traced with tracemalloc,
+            which slows down the compilation).
+        keep_top_k : int, optional
+            Number of contributions kept for each row in the ranked contributions (`data` and `data_groups`),
+            instead of all the features. Only the top-K contributions, their features and their values are
+            kept, with the sums of the negative and positive contributions of the other features, which are
+            displayed as hidden contributions. This reduces the memory of models with thousands of features
+            when only the top contributions are displayed (`to_pandas`, `local_plot`): `filter` then selects
+            among the top-K contributions only. The features importance is still computed from all the
+            contributions.
+
+        Returns
+        -------
+        pandas.DataFrame or None
+            If `report_memory` is True, the memory report with one row per stage
+            and sizes in MB, else None.
 
         Example
         -------
         >>> xpl.compile(x=x_test)
         >>> xpl.plot.features_importance()
+        >>> xpl.compile(x=x_test, cache_dir="shapash_cache")
+        >>> report = xpl.compile(x=x_test, report_memory=True)
         """
-        if isinstance(self.backend_name, str):
-            backend_cls = get_backend_cls_from_name(self.backend_name)
-            self.backend = backend_cls(
-                model=self.model, preprocessing=self.preprocessing, masker=x, **self.backend_kwargs
+        if keep_top_k is not None and (not isinstance(keep_top_k, int) or keep_top_k < 1):
+            raise ValueError(
+                f"""
+                keep_top_k must be None or a positive integer, got {keep_top_k}
+                """
             )
-        self.x_encoded = handle_categorical_missing(x)
-        x_init = inverse_transform(self.x_encoded, self.preprocessing)
-        self.x_init = handle_categorical_missing(x_init)
-        self.y_pred = check_y(self.x_init, y_pred, y_name="y_pred")
-        if (self.y_pred is None) and (hasattr(self.model, "predict")):
-            self.predict()
-
-        self.proba_values = check_y(self.x_init, proba_values, y_name="proba_values")
-        if (self._case == "classification") and (self.proba_values is None) and (hasattr(self.model, "predict_proba")):
-            self.predict_proba()
+        self.keep_top_k = keep_top_k
+        with MemoryReport(enabled=report_memory) as memory:
+            if isinstance(self.backend_name, str):
+                backend_cls = get_backend_cls_from_name(self.backend_name)
+                self.backend = backend_cls(
+                    model=self.model, preprocessing=self.preprocessing, masker=x, **self.backend_kwargs
+                )
+                memory.checkpoint("backend")
+            cache = CompileCache.from_explainer(cache_dir, self, x) if cache_dir is not None else None
+            self._invalidate_lazy_attributes()
+            # Under pandas copy-on-write, the columns of x are shared until they are replaced
+            self.x_encoded = handle_categorical_missing(copy_frame(x))
+            x_init = inverse_transform(self.x_encoded, self.preprocessing)
+            self.x_init = handle_categorical_missing(x_init)
+            memory.checkpoint("inverse_transform")
+            self.y_pred = check_y(self.x_init, y_pred, y_name="y_pred")
+            if (self.y_pred is None) and (cache is not None):
+                self.y_pred = cache.get("y_pred")
+            if (self.y_pred is None) and (hasattr(self.model, "predict")):
+                # The cache keeps the outputs of the model, they are cast below like the ones given by the user
+                self.y_pred = predict(self.model, self.x_encoded)
+                if cache is not None:
+                    cache.set("y_pred", self.y_pred)
+
+            self.proba_values = check_y(self.x_init, proba_values, y_name="proba_values")
+            if (self._case == "classification") and (self.proba_values is None) and (cache is not None):
+                self.proba_values = cache.get("proba_values")
+            if (
+                (self._case == "classification")
+                and (self.proba_values is None)
+                and (hasattr(self.model, "predict_proba"))
+            ):
+                self.proba_values = predict_proba(self.model, self.x_encoded, self._classes)
+                if cache is not None:
+                    cache.set("proba_values", self.proba_values)
+
+            self.y_target = check_y(self.x_init, y_target, y_name="y_target")
+            self.prediction_error = predict_error(
+                self.y_target, self.y_pred, self._case, proba_values=self.proba_values, classes=self._classes
+            )
+            # Cast once, after the prediction errors are computed in float64
+            self.y_pred = cast_float_values(self.y_pred, self.dtype)
+            self.proba_values = cast_float_values(self.proba_values, self.dtype)
+            memory.checkpoint("predictions")
+
+            self._get_contributions_from_backend_or_user(x, contributions, cache)
+            if cache is not None:
+                cache.save()
+            self.check_contributions()
+            self.features_imp = None
+            self._features_imp_sums = dict()
+            self._features_uniques = None
+            memory.checkpoint("contributions")
+
+            self.columns_dict = {i: col for i, col in enumerate(self.x_init.columns)}
+            self.check_features_dict()
+            self.inv_features_dict = {v: k for k, v in self.features_dict.items()}
+            self._apply_all_postprocessing_modifications()
+            memory.checkpoint("postprocessing")
+
+            if self.features_groups is not None:
+                self._compile_features_groups(self.features_groups)
+                memory.checkpoint("features_groups")
+            self.additional_features_dict = (
+                dict()
+                if additional_features_dict is None
+                else self._compile_additional_features_dict(additional_features_dict)
+            )
+            self.additional_data = self._compile_additional_data(additional_data)
+            self.columns_order = self._compile_columns_order(columns_order)
+            self.plot._tuning_round_digit()
+            memory.checkpoint("additional_data")
+        return memory.report
+
+    def append(self, x, contributions=None, y_pred=None, proba_values=None, y_target=None, additional_data=None):
+        """
+        Add new rows to a compiled SmartExplainer.
+
+        Only the new rows are processed: their inverse preprocessing, postprocessing, predictions,
+        contributions, rankings and filters are computed and appended to the existing attributes,
+        so the cost of `append` depends on the number of new rows, not on the size of the explainer.
+        The features importance already computed is updated from running sums of the absolute
+        contributions, without reading the previous rows again.
+
+        Parameters
+        ----------
+        x : pandas.DataFrame
+            New rows of the prediction dataset, with the same columns as the dataset given to `compile`.
+            Their index must not overlap the index of the explainer.
+        contributions : pandas.DataFrame, numpy.ndarray, or list, optional
+            Local contributions of the new rows. Computed with the backend if not given.
+        y_pred : pandas.Series or pandas.DataFrame, optional
+            Predictions of the new rows. Computed with the model if not given.
+        proba_values : pandas.Series or pandas.DataFrame, optional
+            Prediction probabilities of the new rows. Computed with the model if not given.
+        y_target : pandas.Series or pandas.DataFrame, optional
+            True target values of the new rows. Required if `y_target` was given to `compile`.
+        additional_data : pandas.DataFrame, optional
+            Additional data of the new rows. Required if `additional_data` was given to `compile`.
 
-        self.y_target = check_y(self.x_init, y_target, y_name="y_target")
+        Example
+        -------
+        >>> xpl.compile(x=x_history, y_target=y_history)
+        >>> xpl.append(x=x_today, y_target=y_today)
+        """
+        if not hasattr(self, "x_init"):
+            raise ValueError("append requires a compiled SmartExplainer, please use compile first.")
+        if set(x.columns) != set(self.x_encoded.columns):
+            raise ValueError(
+                """
+                The new rows must have the same columns as the dataset given to compile.
+                """
+            )
+        x = x[self.x_encoded.columns]
+        if not x.index.is_unique or len(self.x_init.index.intersection(x.index)) > 0:
+            raise ValueError(
+                """
+                The index of the new rows must be unique and must not overlap the index of the explainer.
+                """
+            )
+        for name, compiled, new in [
+            ("y_target", self.y_target, y_target),
+            ("additional_data", self.additional_data, additional_data),
+        ]:
+            if (compiled is None) != (new is None):
+                raise ValueError(f"{name} must be given to append if and only if it was given to compile.")
+
+        # Computations on the new rows only
+        x_encoded = handle_categorical_missing(x)
+        x_init = handle_categorical_missing(inverse_transform(x_encoded, self.preprocessing))
+        y_pred = check_y(x_init, y_pred, y_name="y_pred")
+        if y_pred is None and self.y_pred is not None:
+            y_pred = predict(self.model, x_encoded)
+        proba_values = check_y(x_init, proba_values, y_name="proba_values")
+        if proba_values is None and self.proba_values is not None:
+            proba_values = predict_proba(self.model, x_encoded, self._classes)
+        y_target = check_y(x_init, y_target, y_name="y_target")
+
+        if contributions is None:
+            explain_data = self.backend.run_explainer(x=x)
+            contributions = self.backend.get_local_contributions(x=x, explain_data=explain_data)
+        else:
+            explain_data = contributions
+            contributions = self.backend.format_and_aggregate_local_contributions(x=x, contributions=contributions)
+        contributions = cast_float_values(contributions, self.dtype)
+        y_pred = self._align_appended_columns("y_pred", self.y_pred, cast_float_values(y_pred, self.dtype))
+        proba_values = self._align_appended_columns(
+            "proba_values", self.proba_values, cast_float_values(proba_values, self.dtype)
+        )
+        y_target = self._align_appended_columns("y_target", self.y_target, y_target)
+        if not self.state.check_contributions(contributions, x_init):
+            raise ValueError(
+                """
+                The new rows and their contributions should have exactly the same number of lines
+                and number of columns. the order of the columns must be the same
+                """
+            )
+
+        x_contrib_plot = x_init if self.postprocessing_modifications else None
+        if self.postprocessing:
+            x_init = apply_postprocessing(x_init, self.postprocessing)
+        # The rankings of the new rows are only computed if they have already been computed for the others
+        has_mask = getattr(self, "mask", None) is not None
+        display_groups = getattr(self, "_mask_display_groups", False)
+        data = None
+        if "data" in self.__dict__ or (has_mask and not display_groups):
+            data = self.state.assign_contributions(
+                self.state.rank_contributions(contributions, x_init, self.keep_top_k)
+            )
+        if self.features_groups is not None:
+            contributions_groups = self.state.compute_grouped_contributions(
+                contributions, self._groups_membership or self.features_groups
+            )
+            groups_values = self.groups_values
+            if groups_values is not None:
+                x_init_groups, groups_values = create_grouped_features_references(
+                    x_init=x_init,
+                    x_encoded=x_encoded,
+                    preprocessing=self.preprocessing,
+                    features_groups=self.features_groups,
+                    features_dict=self.features_dict,
+                    start=groups_values.n_rows,
+                )
+            else:
+                # Explainer saved before the groups values were stored as references
+                x_init_groups = create_grouped_features_values(
+                    x_init=x_init,
+                    x_encoded=x_encoded,
+                    preprocessing=self.preprocessing,
+                    features_groups=self.features_groups,
+                    features_dict=self.features_dict,
+                    how="dict_of_values",
+                )
+            data_groups = None
+            if "data_groups" in self.__dict__ or (has_mask and display_groups):
+                data_groups = self.state.assign_contributions(
+                    self.state.rank_contributions(contributions_groups, x_init_groups, self.keep_top_k)
+                )
+        if additional_data is not None:
+            check_additional_data(x_init, additional_data)
+            additional_data = additional_data.add_prefix("_")[self.additional_data.columns]
+
+        # Updates computed from the new rows and the running sums
+        if "features_desc" in self.__dict__:
+            self._append_features_desc(x_init)
+        self._append_features_import(
+            "contributions",
+            self.contributions,
+            contributions,
+            {1: "features_imp", 3: "features_imp_local_lev1", 7: "features_imp_local_lev2"},
+        )
+        if self.features_groups is not None:
+            self._append_features_import(
+                "contributions_groups",
+                self.contributions_groups,
+                contributions_groups,
+                {1: "features_imp_groups", 3: "features_imp_groups_local_lev1", 7: "features_imp_groups_local_lev2"},
+            )
+
+        self.x_encoded = pd.concat([self.x_encoded, x_encoded])
+        self.x_init = pd.concat([self.x_init, x_init])
+        if x_contrib_plot is not None:
+            self.x_contrib_plot = pd.concat([self.x_contrib_plot, x_contrib_plot])
+        self.y_pred = concat_rows(self.y_pred, y_pred)
+        self.proba_values = concat_rows(self.proba_values, proba_values)
+        self.y_target = concat_rows(self.y_target, y_target)
         self.prediction_error = predict_error(
             self.y_target, self.y_pred, self._case, proba_values=self.proba_values, classes=self._classes
         )
+        try:
+            self.explain_data = concat_rows(self.explain_data, explain_data)
+        except (TypeError, ValueError, KeyError):
+            self.explain_data = None
+        self.contributions = concat_rows(self.contributions, contributions)
+        # The summary stored by to_pandas is computed again on its next call
+        if "data" in self.__dict__:
+            self.data.pop("summary", None)
+            self.data = concat_rows(self.data, data)
+        if self.features_groups is not None:
+            self.contributions_groups = concat_rows(self.contributions_groups, contributions_groups)
+            self.x_init_groups = pd.concat([self.x_init_groups, x_init_groups])
+            if groups_values is not None:
+                self.groups_values = self.groups_values.concat(groups_values)
+            if "data_groups" in self.__dict__:
+                self.data_groups.pop("summary", None)
+                self.data_groups = concat_rows(self.data_groups, data_groups)
+        if additional_data is not None:
+            self.additional_data = pd.concat([self.additional_data, additional_data])
 
-        self._get_contributions_from_backend_or_user(x, contributions)
-        self.check_contributions()
+        if has_mask:
+            mask, masked_contributions = self._compute_mask(
+                data_groups if display_groups else data,
+                display_groups=display_groups,
+                **self.mask_params,
+            )
+            self.mask = concat_rows(self.mask, mask)
+            self.masked_contributions = concat_rows(self.masked_contributions, masked_contributions)
+        self._masks = dict()
+        self._group_projections = dict()
+        self.plot._tuning_round_digit()
+
+    @staticmethod
+    def _align_appended_columns(name, compiled, new):
+        """
+        Give the columns of an attribute of the explainer to the same attribute of new rows,
+        e.g. the predictions computed by append are named "pred" while the y_pred given to compile
+        may have another name. Raise a ValueError, before any attribute is modified, if the
+        number of columns differs.
+        """
+        if compiled is None or new is None:
+            return new
+        if new.shape[1] != compiled.shape[1]:
+            raise ValueError(
+                f"""
+                The {name} of the new rows must have {compiled.shape[1]} column(s), like the {name} of the explainer.
+                """
+            )
+        return new.set_axis(compiled.columns, axis=1)
 
-        self.columns_dict = {i: col for i, col in enumerate(self.x_init.columns)}
-        self.check_features_dict()
-        self.inv_features_dict = {v: k for k, v in self.features_dict.items()}
-        self._apply_all_postprocessing_modifications()
+    def _append_features_desc(self, x_init):
+        """
+        Update the number of unique values of each feature with new rows.
+        The unique values of each feature are kept in sets, so that only the new rows are read.
+        """
+        if getattr(self, "_features_uniques", None) is None:
+            self._features_uniques = {col: set(self.x_init[col].dropna().unique()) for col in self.x_init.columns}
+        for col in x_init.columns:
+            self._features_uniques[col].update(x_init[col].dropna().unique())
+            self.features_desc[col] = len(self._features_uniques[col])
 
-        self.data = self.state.assign_contributions(self.state.rank_contributions(self.contributions, self.x_init))
-        self.features_desc = dict(self.x_init.nunique())
-        if self.features_groups is not None:
-            self._compile_features_groups(self.features_groups)
-        self.additional_features_dict = (
-            dict()
-            if additional_features_dict is None
-            else self._compile_additional_features_dict(additional_features_dict)
+    def _append_features_import(self, name, contributions, new_contributions, attributes):
+        """
+        Update the features importance already computed with the contributions of new rows.
+
+        Parameters
+        ----------
+        name : str
+            'contributions' or 'contributions_groups'
+        contributions : pd.DataFrame or list of pd.DataFrame
+            Contributions before the new rows
+        new_contributions : pd.DataFrame or list of pd.DataFrame
+            Contributions of the new rows
+        attributes : dict
+            {norm: name of the attribute of the features importance}
+        """
+        computed = {norm: attr for norm, attr in attributes.items() if getattr(self, attr, None) is not None}
+        if not computed:
+            return
+        if (
+            name == "contributions"
+            and type(self.backend).get_global_features_importance is not BaseBackend.get_global_features_importance
+        ):
+            # The backend defines its own importance: it is computed again when needed
+            for attr in computed.values():
+                setattr(self, attr, None)
+            return
+        if getattr(self, "_features_imp_sums", None) is None:
+            self._features_imp_sums = dict()
+        sums = self._features_imp_sums.setdefault(name, dict())
+        multiclass = isinstance(contributions, list)
+        columns = (contributions[0] if multiclass else contributions).columns
+        for norm, attr in computed.items():
+            if norm not in sums:
+                sums[norm] = compute_contributions_power_sums(contributions, norm)
+            sums[norm] = sums[norm] + compute_contributions_power_sums(new_contributions, norm)
+            setattr(self, attr, format_features_import(sums[norm] ** (1 / norm), columns, multiclass))
+
+    def __getattr__(self, name):
+        # Only called for missing attributes: computes the derived attributes of a compiled explainer
+        method = type(self)._LAZY_ATTRIBUTES.get(name)
+        if method is not None and "contributions" in self.__dict__ and "x_init" in self.__dict__:
+            value = getattr(self, method)()
+            if value is not None:
+                self.__dict__[name] = value
+                return value
+        raise AttributeError(f"'{type(self).__name__}' object has no attribute '{name}'")
+
+    def _invalidate_lazy_attributes(self):
+        """
+        Drop the derived attributes computed from the previous contributions, see _LAZY_ATTRIBUTES.
+        """
+        for name in type(self)._LAZY_ATTRIBUTES:
+            self.__dict__.pop(name, None)
+        self._masks = dict()
+        self._group_projections = dict()
+
+    def _compute_data(self):
+        """
+        Rank the contributions of each row, see data attribute.
+        """
+        return self.state.assign_contributions(
+            self.state.rank_contributions(self.contributions, self.x_init, self.keep_top_k)
         )
-        self.additional_data = self._compile_additional_data(additional_data)
-        self.columns_order = self._compile_columns_order(columns_order)
-        self.plot._tuning_round_digit()
 
-    def _get_contributions_from_backend_or_user(self, x, contributions):
+    def _compute_data_groups(self):
+        """
+        Rank the contributions of the groups of features of each row. None without groups of features.
+        """
+        if self.features_groups is None or getattr(self, "contributions_groups", None) is None:
+            return None
+        return self.state.assign_contributions(
+            self.state.rank_contributions(self.contributions_groups, self.x_init_groups, self.keep_top_k)
+        )
+
+    def _compute_features_desc(self):
+        """
+        Count the unique values of each feature. Groups of features count as 1000 values.
+        """
+        features_desc = dict(self.x_init.nunique())
+        for group_name in (self.features_groups or dict()).keys():
+            features_desc[group_name] = 1000
+        return features_desc
+
+    def _get_contributions_from_backend_or_user(self, x, contributions, cache=None):
+        # Reusing the contributions computed by the backend during a previous compilation
+        if contributions is None and cache is not None and cache.get("contributions") is not None:
+            self.explain_data = cache.get("explain_data")
+            self.contributions = cache.get("contributions")
         # Computing contributions using backend
-        if contributions is None:
+        elif contributions is None:
             self.explain_data = self.backend.run_explainer(x=x)
             self.contributions = self.backend.get_local_contributions(x=x, explain_data=self.explain_data)
+            if cache is not None:
+                cache.set("explain_data", self.explain_data)
+                cache.set("contributions", self.contributions)
         else:
             self.explain_data = contributions
             self.contributions = self.backend.format_and_aggregate_local_contributions(
                 x=x,
                 contributions=contributions,
             )
+        # Cast once: the cache keeps the contributions of the backend
+        self.contributions = cast_float_values(self.contributions, self.dtype)
+        # The classes of a multiclass problem are computed with n_jobs workers
+        self.backend.state = choose_state(self.contributions, n_jobs=self.n_jobs)
         self.state = self.backend.state
 
     def _apply_all_postprocessing_modifications(self):
@@ -374,7 +814,8 @@ class SmartExplainer:
         self.postprocessing_modifications = self.check_postprocessing_modif_strings(postprocessing)
         self.postprocessing = postprocessing
         if self.postprocessing_modifications:
-            self.x_contrib_plot = copy.deepcopy(self.x_init)
+            # apply_postprocessing returns a copy: x_init before postprocessing is kept without copy
+            self.x_contrib_plot = self.x_init
         self.x_init = self.apply_postprocessing(postprocessing)
 
     def _compile_features_groups(self, features_groups):
@@ -383,23 +824,22 @@ class SmartExplainer:
         """
         if self.backend.support_groups is False:
             raise AssertionError(f"Selected backend ({self.backend.name}) does not support groups of features.")
-        # Compute contributions for groups of features
-        self.contributions_groups = self.state.compute_grouped_contributions(self.contributions, features_groups)
+        # Compute contributions for groups of features, with the membership of the features compiled once
+        contributions = self.contributions[-1] if isinstance(self.contributions, list) else self.contributions
+        self._groups_membership = GroupsMembership(contributions.columns, features_groups)
+        self.contributions_groups = self.state.compute_grouped_contributions(
+            self.contributions, self._groups_membership
+        )
         self.features_imp_groups = None
         # Update features dict with groups names
         self._update_features_dict_with_groups(features_groups=features_groups)
-        # Compute t-sne projections for groups of features
-        self.x_init_groups = create_grouped_features_values(
+        # Values of the groups of features, referenced by position: their dicts are only built when displayed
+        self.x_init_groups, self.groups_values = create_grouped_features_references(
             x_init=self.x_init,
             x_encoded=self.x_encoded,
             preprocessing=self.preprocessing,
             features_groups=self.features_groups,
             features_dict=self.features_dict,
-            how="dict_of_values",
-        )
-        # Compute data attribute for groups of features
-        self.data_groups = self.state.assign_contributions(
-            self.state.rank_contributions(self.contributions_groups, self.x_init_groups)
         )
         self.columns_dict_groups = {i: col for i, col in enumerate(self.x_init_groups.columns)}
 
@@ -539,9 +979,9 @@ class SmartExplainer:
         >>> xpl.plot.local_plot(index=5)
         """
         if y_pred is not None:
-            self.y_pred = check_y(self.x_init, y_pred, y_name="y_pred")
+            self.y_pred = cast_float_values(check_y(self.x_init, y_pred, y_name="y_pred"), self.dtype)
         if proba_values is not None:
-            self.proba_values = check_y(self.x_init, proba_values, y_name="proba_values")
+            self.proba_values = cast_float_values(check_y(self.x_init, proba_values, y_name="proba_values"), self.dtype)
         if y_target is not None:
             self.y_target = check_y(self.x_init, y_target, y_name="y_target")
         if hasattr(self, "y_target") and self.y_target is not None:
@@ -741,7 +1181,8 @@ class SmartExplainer:
         Add groups into features dict and inv_features_dict if not present.
         """
         for group_name in features_groups.keys():
-            self.features_desc[group_name] = 1000
+            if "features_desc" in self.__dict__:
+                self.features_desc[group_name] = 1000
             if group_name not in self.features_dict.keys():
                 self.features_dict[group_name] = group_name
                 self.inv_features_dict[group_name] = group_name
@@ -929,6 +1370,76 @@ class SmartExplainer:
             data = self.data_groups
         else:
             data = self.data
+        self.mask, self.masked_contributions = self._get_mask(
+            data, features_to_hide, threshold, positive, max_contrib, display_groups
+        )
+        self._mask_display_groups = display_groups
+        self.mask_params = {
+            "features_to_hide": features_to_hide,
+            "threshold": threshold,
+            "positive": positive,
+            "max_contrib": max_contrib,
+        }
+
+    def _get_mask(self, data, features_to_hide, threshold, positive, max_contrib, display_groups):
+        """
+        Return the mask and the masked contributions of data for the filter parameters.
+        They are memoized per parameters, so that switching back to parameters already used is free.
+        The memoized masks are only used while data["contrib_sorted"] is the same object.
+        """
+        masks = getattr(self, "_masks", None)
+        if masks is None:
+            masks = self._masks = dict()
+        key = mask_params_key(features_to_hide, threshold, positive, max_contrib) + (display_groups,)
+        cached = masks.get(key)
+        if cached is not None and cached[0] is data["contrib_sorted"]:
+            return cached[1:]
+        mask, masked_contributions = self._compute_mask(
+            data, features_to_hide, threshold, positive, max_contrib, display_groups
+        )
+        masks.pop(key, None)
+        if len(masks) >= self._MAX_MEMOIZED_MASKS:
+            del masks[next(iter(masks))]
+        masks[key] = (data["contrib_sorted"], mask, masked_contributions)
+        return mask, masked_contributions
+
+    def _project_group(self, group, index, how="tsne"):
+        """
+        Values of a group of features projected in 1 dimension for the rows of index,
+        see project_feature_values_1d.
+
+        The linear projections ("pca", "random_projection") project all the rows once and are then
+        selected for each index. A t-SNE projection depends on the projected rows: it is memoized
+        per sample of rows. The projections are computed again after a new compilation or append.
+        """
+        projections = getattr(self, "_group_projections", None)
+        if projections is None:
+            projections = self._group_projections = dict()
+        linear = how in LINEAR_PROJECTIONS
+        key = (group, how) if linear else (group, how, tuple(index))
+        projected = projections.get(key)
+        if projected is None:
+            feature_values = self.x_init[self.features_groups[group]]
+            projected = project_feature_values_1d(
+                feature_values if linear else feature_values.loc[index],
+                group,
+                self.x_init,
+                self.x_encoded,
+                self.preprocessing,
+                features_dict=self.features_dict,
+                how=how,
+            )
+            samples = [k for k in projections if len(k) == 3]
+            if not linear and len(samples) >= self._MAX_MEMOIZED_PROJECTIONS:
+                del projections[samples[0]]
+            projections[key] = projected
+        return projected.loc[index] if linear else projected
+
+    def _compute_mask(self, data, features_to_hide, threshold, positive, max_contrib, display_groups):
+        """
+        Compute the mask and the masked contributions of the rows of data, see filter.
+        All the filters are computed row by row.
+        """
         mask = [self.state.init_mask(data["contrib_sorted"], True)]
         if features_to_hide:
             mask.append(
@@ -941,48 +1452,76 @@ class SmartExplainer:
             mask.append(self.state.cap_contributions(data["contrib_sorted"], threshold=threshold))
         if positive is not None:
             mask.append(self.state.sign_contributions(data["contrib_sorted"], positive=positive))
-        self.mask = self.state.combine_masks(mask)
+        mask = self.state.combine_masks(mask)
         if max_contrib:
-            self.mask = self.state.cutoff_contributions(self.mask, max_contrib=max_contrib)
-        self.masked_contributions = self.state.compute_masked_contributions(data["contrib_sorted"], self.mask)
-        self.mask_params = {
-            "features_to_hide": features_to_hide,
-            "threshold": threshold,
-            "positive": positive,
-            "max_contrib": max_contrib,
-        }
+            mask = self.state.cutoff_contributions(mask, max_contrib=max_contrib)
+        masked_contributions = self.state.compute_masked_contributions(data["contrib_sorted"], mask)
+        if data.get("residual") is not None:
+            # The contributions that are not kept by keep_top_k are hidden
+            masked_contributions = self.state.add_residual_contributions(masked_contributions, data["residual"])
+        return mask, masked_contributions
 
-    def save(self, path):
+    def save(self, path, format="pickle"):  # noqa: A002
         """
-        Save the SmartExplainer object to disk as a pickle file.
+        Save the SmartExplainer object to disk.
+
+        This method serializes the current `SmartExplainer` instance. It allows users
+        to reload an explainer later without recompiling, which is especially useful
+        for large datasets or models.
 
-        This method serializes the current `SmartExplainer` instance and saves it
-        to a `.pkl` file. It allows users to reload an explainer later without
-        recompiling, which is especially useful for large datasets or models.
+        Two formats are available:
+            - "pickle": the whole object is saved in a single `.pkl` file.
+            - "dir": the DataFrames and arrays (x_init, contributions, data, ...) are saved
+              in separate .npy or Arrow files of the `path` directory, and the other attributes
+              in a small metadata pickle. Such a directory can be loaded with memory-mapping,
+              which avoids reading the whole dataset when the explainer is loaded.
 
         Parameters
         ----------
         path : str
-            Destination file path where the pickle file will be saved.
+            Destination file path where the pickle file will be saved, or destination
+            directory when format="dir".
+        format : str (default: "pickle")
+            "pickle" or "dir".
 
         Notes
         -----
         - The `smartapp` attribute is removed before saving to avoid serialization issues.
         - The saved object can be reloaded using the `load` method.
+        - With format="dir", the numeric columns (numbers, booleans and dates) are saved as .npy files,
+          one per column when a DataFrame mixes several types (e.g. x_init). The object, string and
+          categorical columns are saved as Arrow files when pyarrow is installed, in the metadata
+          pickle otherwise.
 
         Example
         -------
         >>> xpl.save("path_to_file/xpl.pkl")
         >>> xpl_loaded = SmartExplainer.load("path_to_file/xpl.pkl")
+        >>> xpl.save("path_to_dir", format="dir")
+        >>> xpl_loaded = SmartExplainer.load("path_to_dir")
         """
+        if format not in ("pickle", "dir"):
+            raise ValueError(
+                f"""
+                format must be "pickle" or "dir", got {format}
+                """
+            )
         if hasattr(self, "smartapp"):
             self.smartapp = None
-        save_pickle(self, path)
+        self._importance_engines = dict()
+        self._masks = dict()
+        self._group_projections = dict()
+        if format == "dir":
+            # The plotter refers to the explainer: it is created again when loading
+            attributes = {key: value for key, value in self.__dict__.items() if key != "plot"}
+            save_dir(attributes, path)
+        else:
+            save_pickle(self, path)
 
     @classmethod
-    def load(cls, path):
+    def load(cls, path, mmap=True):
         """
-        Load a previously saved SmartExplainer object from a pickle file.
+        Load a previously saved SmartExplainer object from a pickle file or a directory.
 
         This class method restores a `SmartExplainer` instance that was saved
         using the `save` method. It allows users to quickly reload a compiled
@@ -991,7 +1530,14 @@ class SmartExplainer:
         Parameters
         ----------
         path : str
-            File path to the pickle file containing the saved `SmartExplainer` object.
+            File path to the pickle file containing the saved `SmartExplainer` object,
+            or directory written by `save(path, format="dir")`.
+        mmap : bool (default: True)
+            Only used for a directory. Memory-map the saved DataFrames instead of reading them:
+            the data is only read from disk when it is used, and the memory is shared by the
+            processes loading the same directory. The mapped data is copy-on-write, changes
+            are never written to disk. Only the numeric columns are mapped: the object, string
+            and categorical columns saved as Arrow files are read in memory.
 
         Returns
         -------
@@ -1008,6 +1554,14 @@ class SmartExplainer:
         >>> xpl = SmartExplainer.load("path_to_file/xpl.pkl")
         >>> xpl.plot.features_importance()
         """
+        if isinstance(path, str) and os.path.isdir(path):
+            attributes = load_dir(path, mmap=mmap)
+            if "model" not in attributes:
+                raise ValueError("The provided directory does not contain a SmartExplainer object.")
+            smart_explainer = cls(model=attributes["model"])
+            smart_explainer.__dict__.update(attributes)
+            smart_explainer.plot = SmartPlotter(smart_explainer, smart_explainer.colors_dict)
+            return smart_explainer
         xpl = load_pickle(path)
         if isinstance(xpl, SmartExplainer):
             smart_explainer = cls(model=xpl.model)
@@ -1037,7 +1591,7 @@ class SmartExplainer:
         >>> xpl.predict_proba()
         >>> xpl.proba_values.head()
         """
-        self.proba_values = predict_proba(self.model, self.x_encoded, self._classes)
+        self.proba_values = cast_float_values(predict_proba(self.model, self.x_encoded, self._classes), self.dtype)
 
     def predict(self):
         """
@@ -1060,11 +1614,12 @@ class SmartExplainer:
         >>> xpl.y_pred.head()
         >>> xpl.prediction_error
         """
-        self.y_pred = predict(self.model, self.x_encoded)
+        y_pred = predict(self.model, self.x_encoded)
         if hasattr(self, "y_target"):
             self.prediction_error = predict_error(
-                self.y_target, self.y_pred, self._case, proba_values=self.proba_values, classes=self._classes
+                self.y_target, y_pred, self._case, proba_values=self.proba_values, classes=self._classes
             )
+        self.y_pred = cast_float_values(y_pred, self.dtype)
 
     def to_pandas(
         self,
@@ -1168,7 +1723,7 @@ class SmartExplainer:
                 )
                 or (
                     isinstance(data["contrib_sorted"], list)
-                    and len(data["contrib_sorted"][0].columns) == len(self.mask[0].columns)
+                    and len(data["contrib_sorted"][-1].columns) == len(self.mask[-1].columns)
                 )
             )
         ):
@@ -1199,6 +1754,8 @@ class SmartExplainer:
         y_pred, summary = keep_right_contributions(
             self.y_pred, data["summary"], self._case, self._classes, self.label_dict, proba_values
         )
+        if use_groups and self.groups_values is not None:
+            summary = self.groups_values.resolve(summary, self.features_dict)
 
         return pd.concat([y_pred, summary], axis=1)
 
@@ -1248,27 +1805,81 @@ class SmartExplainer:
         >>> xpl.compute_features_import(local=True)
         >>> xpl.features_imp.head()
         """
-        self.features_imp = self.backend.get_global_features_importance(
-            contributions=self.contributions, explain_data=self.explain_data, subset=None, norm=1
-        )
+        norms = (1, 3, 7) if local else (1,)
+        engine = self._get_importance_engine(self.contributions)
+        if engine is not None:
+            features_imp = engine.compute(norms=norms)
+        else:
+            features_imp = {
+                norm: self.backend.get_global_features_importance(
+                    contributions=self.contributions, explain_data=self.explain_data, subset=None, norm=norm
+                )
+                for norm in norms
+            }
+        self.features_imp = features_imp[1]
+        if local:
+            self.features_imp_local_lev1 = features_imp[3]
+            self.features_imp_local_lev2 = features_imp[7]
+
+        if self.features_groups is not None and (self.features_imp_groups is None or local):
+            engine = self._get_importance_engine(self.contributions_groups)
+            if engine is not None:
+                # Same engine and same rows as the features: the sums are read once
+                features_imp_groups = engine.compute(norms=norms, use_groups=True)
+            else:
+                features_imp_groups = {
+                    norm: self.state.compute_features_import(self.contributions_groups, norm=norm) for norm in norms
+                }
+            self.features_imp_groups = features_imp_groups[1]
+            if local:
+                self.features_imp_groups_local_lev1 = features_imp_groups[3]
+                self.features_imp_groups_local_lev2 = features_imp_groups[7]
 
-        if self.features_groups is not None and self.features_imp_groups is None:
-            self.features_imp_groups = self.state.compute_features_import(self.contributions_groups, norm=1)
+    def _get_importance_engine(self, contributions):
+        """
+        Return the cached features importance engine of a contributions object.
 
-        if local:
-            self.features_imp_local_lev1 = self.backend.get_global_features_importance(
-                contributions=self.contributions, explain_data=self.explain_data, subset=None, norm=3
-            )
-            self.features_imp_local_lev2 = self.backend.get_global_features_importance(
-                contributions=self.contributions, explain_data=self.explain_data, subset=None, norm=7
-            )
-            if self.features_groups is not None:
-                self.features_imp_groups_local_lev1 = self.state.compute_features_import(
-                    self.contributions_groups, norm=3
-                )
-                self.features_imp_groups_local_lev2 = self.state.compute_features_import(
-                    self.contributions_groups, norm=7
-                )
+        The engine stores the absolute contributions of all classes once and computes
+        the features importance of any subset of rows in a single pass,
+        see SubsetFeaturesImportance. With groups of features, a single engine stores
+        the contributions of the features and of the groups: the importance of the groups
+        is then computed with use_groups=True.
+
+        Parameters
+        ----------
+        contributions : pd.DataFrame or list of pd.DataFrame
+            self.contributions or self.contributions_groups
+
+        Returns
+        -------
+        SubsetFeaturesImportance or None
+            None if the backend defines its own global features importance,
+            or if the contributions cannot be indexed by position.
+        """
+        if contributions is self.contributions:
+            if type(self.backend).get_global_features_importance is not BaseBackend.get_global_features_importance:
+                return None
+        elif contributions is not getattr(self, "contributions_groups", None):
+            return None
+        index = (contributions[-1] if isinstance(contributions, list) else contributions).index
+        if not index.is_unique:
+            return None
+
+        engines = getattr(self, "_importance_engines", None)
+        if engines is None:
+            engines = self._importance_engines = dict()
+        groups = None
+        if self.features_groups is not None and hasattr(self, "contributions_groups"):
+            if self.__dict__.get("_groups_membership") is None:
+                columns = (
+                    self.contributions[-1] if isinstance(self.contributions, list) else self.contributions
+                ).columns
+                self._groups_membership = GroupsMembership(columns, self.features_groups)
+            groups = self._groups_membership
+        engine = engines.get("contributions")
+        if engine is None or engine.contributions is not self.contributions or engine.groups is not groups:
+            engine = engines["contributions"] = SubsetFeaturesImportance(self.contributions, groups=groups)
+        return engine
 
     def compute_features_stability(self, selection):
         """
@@ -1599,7 +2210,7 @@ class SmartExplainer:
             self.mask_params = {"features_to_hide": None, "threshold": None, "positive": None, "max_contrib": None}
         params_smartpredictor.append(self.mask_params)
 
-        return shapash.explainer.smart_predictor.SmartPredictor(*params_smartpredictor)
+        return shapash.explainer.smart_predictor.SmartPredictor(*params_smartpredictor, dtype=self.dtype)
 
     def check_x_y_attributes(self, x_str, y_str):
         """
@@ -3,7 +3,7 @@ Smart plotter module
 """
 
 import math
-import random
+import threading
 
 import numpy as np
 import pandas as pd
@@ -12,14 +12,11 @@ from plotly import graph_objs as go
 from plotly.offline import plot
 
 from shapash.manipulation.select_lines import select_lines
-from shapash.manipulation.summarize import project_feature_values_1d
 from shapash.plots import plot_compacity
 from shapash.plots.plot_bar_chart import plot_bar_chart
 from shapash.plots.plot_contribution import plot_scatter, plot_violin
 from shapash.plots.plot_correlations import plot_correlations
 from shapash.plots.plot_evaluation_metrics import (
-    compute_kmeans_labels,
-    compute_tsne_projection,
     plot_clustering_by_explainability,
     plot_confusion_matrix,
     plot_scatter_prediction,
@@ -30,7 +27,9 @@ from shapash.plots.plot_line_comparison import plot_line_comparison
 from shapash.plots.plot_stability import plot_amplitude_vs_stability, plot_stability_distribution
 from shapash.plots.plot_univariate import plot_distribution
 from shapash.style.style_utils import colors_loading, define_style, select_palette
-from shapash.utils.sampling import subset_sampling
+from shapash.utils.clustering import ProjectionCache
+from shapash.utils.sampling import SubsetSampler
+from shapash.utils.sparse import to_dense
 from shapash.utils.utils import (
     add_line_break,
     add_text,
@@ -44,6 +43,9 @@ from shapash.utils.utils import (
     tuning_round_digit,
 )
 
+# Names of the projections of the groups of features displayed by contribution_plot
+_PROJECTION_NAMES = {"tsne": "TSNE", "pca": "PCA", "random_projection": "a random projection"}
+
 
 class SmartPlotter:
     """
@@ -68,8 +70,21 @@ class SmartPlotter:
             self._style_dict = define_style(select_palette(colors_loading(), palette_name))
         self._last_stability_selection = False
         self._last_compacity_selection = False
+        self._cluster_lock = threading.RLock()
         self._tuning_round_digit()
 
+    def __getstate__(self):
+        # The sampler and the projections are caches computed again after loading
+        state = self.__dict__.copy()
+        state.pop("_sampler", None)
+        state.pop("_projection_cache", None)
+        state.pop("_cluster_lock", None)
+        return state
+
+    def __setstate__(self, state):
+        self.__dict__.update(state)
+        self._cluster_lock = threading.RLock()
+
     def define_style_attributes(self, colors_dict):
         """
         define_style_attributes allows shapash user to change the color of plot
@@ -300,7 +315,7 @@ class SmartPlotter:
                 )
                 or (
                     isinstance(data["contrib_sorted"], list)
-                    and len(data["contrib_sorted"][0].columns) != len(self._explainer.mask[0].columns)
+                    and len(data["contrib_sorted"][-1].columns) != len(self._explainer.mask[-1].columns)
                 )
             ):
                 self._explainer.filter(max_contrib=20, display_groups=display_groups)
@@ -392,6 +407,8 @@ class SmartPlotter:
         file_name=None,
         auto_open=False,
         zoom=False,
+        compact=False,
+        projection="tsne",
     ):
         """
         Display a contribution plot using Plotly for a selected feature.
@@ -433,6 +450,14 @@ class SmartPlotter:
             Whether to automatically open the saved plot in a web browser.
         zoom : bool, default=False
             Indicates whether the plot should start in a zoomed-in state.
+        compact : bool, default=False
+            Whether to build the hover labels from customdata columns instead of one hover text
+            per point. Used by the webapp to reduce the size of the figures.
+        projection : str, default="tsne"
+            Method projecting the values of a group of features on the x axis: "tsne", "pca"
+            or "random_projection". The projections are cached on the explainer: "pca" and
+            "random_projection" are computed once per group for all the rows, and are much faster
+            than "tsne", which is computed once per group and sample of rows.
 
         Returns
         -------
@@ -453,6 +478,8 @@ class SmartPlotter:
 
         if not isinstance(col, str | int):
             raise ValueError("parameter col must be string or int.")
+        if projection not in _PROJECTION_NAMES:
+            raise ValueError(f"parameter projection must be one of {list(_PROJECTION_NAMES)}, got {projection}.")
         if hasattr(self._explainer, "inv_features_dict"):
             col = self._explainer.inv_features_dict.get(col, col)
         col_is_group = self._explainer.features_groups and col in self._explainer.features_groups.keys()
@@ -474,8 +501,8 @@ class SmartPlotter:
             else:
                 col_label = col_name
 
-        list_ind, addnote = subset_sampling(
-            self._explainer.x_init, selection, max_points, None if col_is_group else col, col_value_count
+        list_ind, addnote = self._get_sampler().sample(
+            selection, max_points, None if col_is_group else col, col_value_count
         )
 
         col_value = None
@@ -532,15 +559,8 @@ class SmartPlotter:
                 feature_values = feature_values.astype(int)
 
         if col_is_group:
-            feature_values = project_feature_values_1d(
-                feature_values,
-                col,
-                self._explainer.x_init,
-                self._explainer.x_encoded,
-                self._explainer.preprocessing,
-                features_dict=self._explainer.features_dict,
-            )
-            contrib = subcontrib.loc[list_ind, col].to_frame()
+            feature_values = self._explainer._project_group(col, list_ind, how=projection)
+            contrib = to_dense(subcontrib.loc[list_ind, col].to_frame())
             if self._explainer.features_imp is None:
                 self._explainer.compute_features_import()
             features_imp = (
@@ -555,14 +575,14 @@ class SmartPlotter:
                 self._explainer.features_dict[f_name]: self._explainer.x_init.loc[list_ind, f_name]
                 for f_name in top_features_of_group
             }
-            text_group = "Features values were projected on the x axis using TSNE"
+            text_group = f"Features values were projected on the x axis using {_PROJECTION_NAMES[projection]}"
             # if group don't show addnote, if not, it's too long
             # if addnote is not None:
             #    addnote = add_text([addnote, text_group], sep=' - ')
             # else:
             addnote = text_group
         else:
-            contrib = subcontrib.loc[list_ind, col_name].to_frame()
+            contrib = to_dense(subcontrib.loc[list_ind, col_name].to_frame())
             metadata = None
         feature_values = feature_values.to_frame()
 
@@ -603,6 +623,7 @@ class SmartPlotter:
                 file_name,
                 auto_open,
                 zoom,
+                compact=compact,
             )
         else:
             fig = plot_violin(
@@ -625,6 +646,7 @@ class SmartPlotter:
                 file_name,
                 auto_open,
                 zoom,
+                compact=compact,
             )
 
         return fig
@@ -810,7 +832,7 @@ class SmartPlotter:
             local_imp_lev1, local_imp_lev2 = self._get_local_feature_importance(
                 global_feat_imp.index, local_imp_lev1, local_imp_lev2, label_num
             )
-        subset_feat_imp = self._get_subset_importance(contributions_case, selection)
+        subset_feat_imp = self._get_subset_importance(contributions, selection, label_num)
         if subset_feat_imp is not None:
             subset_feat_imp = subset_feat_imp.reindex(global_feat_imp.index)
             if subset_feat_imp.dropna().shape[0] == 0:
@@ -871,13 +893,21 @@ class SmartPlotter:
 
         return local_imp_lev1, local_imp_lev2
 
-    def _get_subset_importance(self, contributions, selection):
+    def _get_subset_importance(self, contributions, selection, label_num=None):
         """Retrieve feature importance for a subset of features, if specified."""
-        if selection is not None:
-            return self._explainer.backend.get_global_features_importance(
-                contributions=contributions, explain_data=self._explainer.explain_data, subset=selection
-            )
-        return None
+        if selection is None:
+            return None
+        engine = self._explainer._get_importance_engine(contributions)
+        if engine is not None:
+            # All the classes are computed at once and cached, a change of label is free
+            use_groups = contributions is not self._explainer.contributions
+            subset_feat_imp = engine.compute(subset=selection, use_groups=use_groups)[1]
+            return subset_feat_imp[label_num] if label_num is not None else subset_feat_imp
+        return self._explainer.backend.get_global_features_importance(
+            contributions=contributions[label_num] if label_num is not None else contributions,
+            explain_data=self._explainer.explain_data,
+            subset=selection,
+        )
 
     def _build_additional_notes(self, subset_feat_imp, selection, max_features):
         """Generate additional notes to display in the plot."""
@@ -999,7 +1029,7 @@ class SmartPlotter:
 
         new_contrib = list()
         for ident in line_reference:
-            new_contrib.append(contrib.loc[ident])
+            new_contrib.append(to_dense(contrib.loc[ident]))
         new_contrib = np.array(new_contrib).T
 
         # Well labels if available
@@ -1034,6 +1064,103 @@ class SmartPlotter:
 
         return fig
 
+    def _get_sampler(self):
+        """
+        Sampler of the rows of x_init displayed by the plots, see SubsetSampler.
+        It is created again when x_init changes (compile or append), so that its strata stay valid.
+        """
+        sampler = self.__dict__.get("_sampler")
+        if sampler is None or sampler.df is not self._explainer.x_init:
+            sampler = self._sampler = SubsetSampler(self._explainer.x_init)
+        return sampler
+
+    def _get_clustering_values(self, selection, max_points, label_num, threshold_top_features):
+        """
+        Rows and contributions projected by clustering_by_explainability_plot.
+
+        Returns
+        -------
+        tuple
+            The sampled indices, the note of the sampling and the contributions of the top features.
+        """
+        list_ind, addnote = self._get_sampler().sample(selection, max_points)
+
+        if self._explainer.features_imp is None or getattr(self._explainer, "features_imp_local_lev2", None) is None:
+            self._explainer.compute_features_import(local=True)
+
+        features_imp = (
+            self._explainer.features_imp
+            if isinstance(self._explainer.features_imp, pd.Series)
+            else self._explainer.features_imp[0]
+        )
+        features_imp_local_lev2 = (
+            self._explainer.features_imp_local_lev2
+            if isinstance(self._explainer.features_imp_local_lev2, pd.Series)
+            else self._explainer.features_imp_local_lev2[0]
+        )
+
+        top_global_contributors_col = top_contributors(features_imp, threshold=threshold_top_features)
+        top_local_contributors_col = top_contributors(features_imp_local_lev2, threshold=threshold_top_features)
+        top_contributors_col = list(set(top_global_contributors_col) | set(top_local_contributors_col))
+
+        if self._explainer._case == "classification" and len(self._explainer.contributions) > 2:
+            contribs = [
+                to_dense(df.loc[list_ind, top_contributors_col]).rename(columns=lambda c, i=i: f"{c}_{i}")
+                for i, df in enumerate(self._explainer.contributions)
+            ]
+            values_to_project = pd.concat(contribs, axis=1, ignore_index=False)
+        elif self._explainer._case == "classification":
+            values_to_project = to_dense(self._explainer.contributions[label_num].loc[list_ind, top_contributors_col])
+        else:
+            values_to_project = to_dense(self._explainer.contributions.loc[list_ind, top_contributors_col])
+        return list_ind, addnote, values_to_project
+
+    def _get_cluster_projection(self, values_to_project, list_ind, label_num, projection, random_state, n_clusters):
+        """
+        Projection of the contributions of clustering_by_explainability_plot and its clusters,
+        memoized per selected rows, label, features and method, see ProjectionCache.
+        The cache and the cluster attributes are shared by the threads of the webapp jobs,
+        they are updated under a lock.
+        """
+        key = (tuple(list_ind), label_num, tuple(sorted(map(str, values_to_project.columns))))
+        with self._cluster_lock:
+            cache = self.__dict__.get("_projection_cache")
+            if cache is None:
+                cache = self._projection_cache = ProjectionCache()
+            projections, labels, centers = cache.get(
+                key,
+                self._explainer.contributions,
+                values_to_project,
+                method=projection,
+                random_state=random_state,
+                n_clusters=n_clusters,
+            )
+            self.cluster_projections, self.cluster_labels, self.cluster_centers = projections, labels, centers
+        return projections, labels, centers
+
+    def _project_clusters(
+        self,
+        selection=None,
+        max_points=2000,
+        label=-1,
+        threshold_top_features=0.95,
+        random_state=79,
+        n_clusters=10,
+        projection="tsne",
+    ):
+        """
+        Compute the projection and the clusters of clustering_by_explainability_plot without drawing it.
+        The plot called afterwards with the same arguments reuses them, which lets the webapp
+        split the computation in steps.
+        """
+        label_num = self._explainer.check_label_name(label)[0] if self._explainer._case == "classification" else None
+        list_ind, _, values_to_project = self._get_clustering_values(
+            selection, max_points, label_num, threshold_top_features
+        )
+        return self._get_cluster_projection(
+            values_to_project, list_ind, label_num, projection, random_state, n_clusters
+        )
+
     def _select_indices_interactions_plot(self, selection, max_points):
         """
         Method used for sampling indices.
@@ -1061,7 +1188,7 @@ class SmartPlotter:
             elif self._explainer.x_init.shape[0] <= max_points:
                 list_ind = self._explainer.x_init.index.tolist()
             else:
-                list_ind = random.sample(self._explainer.x_init.index.tolist(), max_points)
+                list_ind = self._get_sampler().sample(None, max_points)[0]
                 addnote = "Length of random Subset : "
         elif isinstance(selection, list):
             if len(selection) <= max_points:
@@ -1071,7 +1198,7 @@ class SmartPlotter:
                 if set(selection).issubset(set(self.interaction_selection)):
                     list_ind = self.interaction_selection
             else:
-                list_ind = random.sample(selection, max_points)
+                list_ind = self._get_sampler().sample(selection, max_points)[0]
                 addnote = "Length of random Subset : "
         else:
             raise ValueError("parameter selection must be a list")
@@ -1646,9 +1773,7 @@ class SmartPlotter:
         if selection is None:
             # By default, don't compute calculation if it has already been done
             if (self._explainer.features_stability is None) or self._last_stability_selection or force:
-                list_ind = self._explainer.x_init.index.tolist()
-                if self._explainer.x_init.shape[0] > max_points:
-                    list_ind = random.sample(list_ind, max_points)
+                list_ind = self._get_sampler().sample(None, max_points)[0]
                 self._explainer.compute_features_stability(list_ind)
             else:
                 print("Computed values from previous call are used")
@@ -1768,10 +1893,7 @@ class SmartPlotter:
         """
         # Sampling
         if selection is None:
-            if self._explainer.x_init.shape[0] <= max_points:
-                list_ind = self._explainer.x_init.index.tolist()
-            else:
-                list_ind = random.sample(self._explainer.x_init.index.tolist(), max_points)
+            list_ind = self._get_sampler().sample(None, max_points)[0]
             # By default, don't compute calculation if it has already been done
             if (self._explainer.features_compacity is None) or self.last_compacity_selection or force:
                 self._explainer.compute_features_compacity(list_ind, 1 - approx, nb_features)
@@ -2020,6 +2142,7 @@ class SmartPlotter:
         height=600,
         file_name=None,
         auto_open=False,
+        projection="tsne",
     ):
         """
         Generate a 2D TSNE projection plot (or multiple plots) based on SHAP-like feature contributions.
@@ -2090,6 +2213,12 @@ class SmartPlotter:
         auto_open : bool, optional, default=False
             If True and file_name is provided, the plot will be opened in the default web browser.
 
+        projection : str, optional, default="tsne"
+            Method of the 2D projection: "tsne", "tsne_exact", "tsne_pca", "tsne_fast" or "pca"
+            for a fast preview, see shapash.utils.clustering.PROJECTION_METHODS. The projection of the
+            selected rows, label and features is cached: changing the colors, the number of clusters
+            or the style of the plot does not compute it again.
+
         Returns
         -------
         plotly.graph_objects.Figure
@@ -2128,27 +2257,11 @@ class SmartPlotter:
         elif self._explainer._case == "regression":
             label_num, label_code, label_value = None, None, None
 
-        list_ind, addnote = subset_sampling(self._explainer.x_init, selection, max_points)
-
         subtitle = None
-        if self._explainer.features_imp is None or getattr(self._explainer, "features_imp_local_lev2", None) is None:
-            self._explainer.compute_features_import(local=True)
-
-        features_imp = (
-            self._explainer.features_imp
-            if isinstance(self._explainer.features_imp, pd.Series)
-            else self._explainer.features_imp[0]
-        )
-        features_imp_local_lev2 = (
-            self._explainer.features_imp_local_lev2
-            if isinstance(self._explainer.features_imp_local_lev2, pd.Series)
-            else self._explainer.features_imp_local_lev2[0]
+        list_ind, addnote, values_to_project = self._get_clustering_values(
+            selection, max_points, label_num, threshold_top_features
         )
 
-        top_global_contributors_col = top_contributors(features_imp, threshold=threshold_top_features)
-        top_local_contributors_col = top_contributors(features_imp_local_lev2, threshold=threshold_top_features)
-        top_contributors_col = list(set(top_global_contributors_col) | set(top_local_contributors_col))
-
         if not isinstance(color_value, list):
             color_value = [color_value]
         color_value_data = []
@@ -2174,37 +2287,9 @@ class SmartPlotter:
             return fig
 
         if self._explainer._case == "classification":
-            if len(self._explainer.contributions) <= 2:
-                values_to_project = self._explainer.contributions[label_num].loc[list_ind, top_contributors_col]
-            else:
-                contribs = [
-                    df.loc[list_ind, top_contributors_col].rename(columns=lambda c, i=i: f"{c}_{i}")
-                    for i, df in enumerate(self._explainer.contributions)
-                ]
-                values_to_project = pd.concat(contribs, axis=1, ignore_index=False)
-
-            to_compute = False
-            if not hasattr(self, "cluster_projections"):
-                to_compute = True
-            elif self.cluster_projections.shape[0] != len(list_ind):
-                to_compute = True
-
-            if not pd.Index(list_ind).equals(getattr(self, "cluster_index", None)):
-                to_compute = True
-                self.cluster_index = pd.Index(list_ind)
-
-            if n_clusters != getattr(self, "n_clusters", None):
-                to_compute = True
-                self.n_clusters = n_clusters
-
-            if to_compute:
-                self.cluster_projections = compute_tsne_projection(
-                    values_to_project=values_to_project,
-                    random_state=random_state,
-                )
-                self.cluster_labels, self.cluster_centers = compute_kmeans_labels(
-                    self.cluster_projections, n_clusters=n_clusters
-                )
+            cluster_projections, cluster_labels, cluster_centers = self._get_cluster_projection(
+                values_to_project, list_ind, label_num, projection, random_state, n_clusters
+            )
 
             y_proba_values = self._explainer.proba_values.copy()
 
@@ -2224,7 +2309,7 @@ class SmartPlotter:
                     y_pred = y_pred.replace(self._explainer.label_dict)
 
                 # --- Base DataFrame parts
-                dfs = [y_proba_target, y_pred, pd.Series(self.cluster_labels)]
+                dfs = [y_proba_target, y_pred, pd.Series(cluster_labels)]
                 cols = ["proba_values", "predict_class", "cluster"]
 
                 # --- Add target and error only if available
@@ -2274,8 +2359,8 @@ class SmartPlotter:
                         hv_text_el.append(text)
                     hv_text["points"].append(hv_text_el)
 
-                    for c in sorted(np.unique(self.cluster_labels)):
-                        hv_text_cluster = f"Cluster {c}<br />Number of points: {np.sum(self.cluster_labels == c)}"
+                    for c in sorted(np.unique(cluster_labels)):
+                        hv_text_cluster = f"Cluster {c}<br />Number of points: {np.sum(cluster_labels == c)}"
                         if el not in ["predictions", "targets", "errors"]:
                             is_num = is_numeric_dtype(df_pred[el]) and not is_bool_dtype(df_pred[el])
                             n_unique = df_pred[el].nunique(dropna=True)
@@ -2335,32 +2420,9 @@ class SmartPlotter:
                             )
 
         elif self._explainer._case == "regression":
-            # Base data: contributions and top contributors
-            values_to_project = self._explainer.contributions.loc[list_ind, top_contributors_col]
-
-            to_compute = False
-            if not hasattr(self, "cluster_projections"):
-                to_compute = True
-            elif self.cluster_projections.shape[0] != len(list_ind):
-                to_compute = True
-
-            if not pd.Index(list_ind).equals(getattr(self, "cluster_index", None)):
-                to_compute = True
-                self.cluster_index = pd.Index(list_ind)
-
-            if n_clusters != getattr(self, "n_clusters", None):
-                to_compute = True
-                self.n_clusters = n_clusters
-
-            if to_compute:
-                self.cluster_projections = compute_tsne_projection(
-                    values_to_project=values_to_project,
-                    random_state=random_state,
-                )
-
-                self.cluster_labels, self.cluster_centers = compute_kmeans_labels(
-                    self.cluster_projections, n_clusters=n_clusters
-                )
+            cluster_projections, cluster_labels, cluster_centers = self._get_cluster_projection(
+                values_to_project, list_ind, label_num, projection, random_state, n_clusters
+            )
 
             # Always available
             y_pred = self._explainer.y_pred.loc[list_ind, :]
@@ -2370,7 +2432,7 @@ class SmartPlotter:
             prediction_error = getattr(self._explainer, "prediction_error", None)
 
             # --- Base DataFrame parts
-            dfs = [y_pred.reset_index(drop=True), pd.Series(self.cluster_labels)]
+            dfs = [y_pred.reset_index(drop=True), pd.Series(cluster_labels)]
             cols = ["predict_value", "cluster"]
 
             # If y_target exists, prediction_error must also exist
@@ -2418,8 +2480,8 @@ class SmartPlotter:
                     hv_text_el.append(text)
                 hv_text["points"].append(hv_text_el)
 
-                for c in sorted(np.unique(self.cluster_labels)):
-                    hv_text_cluster = f"Cluster {c}<br />Number of points: {np.sum(self.cluster_labels == c)}"
+                for c in sorted(np.unique(cluster_labels)):
+                    hv_text_cluster = f"Cluster {c}<br />Number of points: {np.sum(cluster_labels == c)}"
                     if el not in ["predictions", "targets", "errors"]:
                         is_num = is_numeric_dtype(df_pred[el]) and not is_bool_dtype(df_pred[el])
                         n_unique = df_pred[el].nunique(dropna=True)
@@ -2480,9 +2542,9 @@ class SmartPlotter:
             show_points=show_points,
             active_cluster=active_cluster,
             n_clusters=n_clusters,
-            projections=self.cluster_projections,
-            labels=self.cluster_labels,
-            centers=self.cluster_centers,
+            projections=cluster_projections,
+            labels=cluster_labels,
+            centers=cluster_centers,
             keep_quantile=keep_quantile,
             random_state=random_state,
             marker_size=marker_size,
@@ -3,25 +3,32 @@ Smart predictor module
 """
 
 import copy
+import os
 from typing import Any
 
 import pandas as pd
 
-import shapash.explainer.smart_explainer
 from shapash.decomposition.contributions import assign_contributions, rank_contributions
 from shapash.manipulation.filters import (
     cap_contributions,
     combine_masks,
     cutoff_contributions,
     hide_contributions,
+    mask_params_key,
     sign_contributions,
 )
 from shapash.manipulation.mask import compute_masked_contributions, init_mask
 from shapash.manipulation.select_lines import keep_right_contributions
-from shapash.manipulation.summarize import create_grouped_features_values, group_contributions, summarize
+from shapash.manipulation.summarize import (
+    GroupsMembership,
+    create_grouped_features_references,
+    group_contributions,
+    summarize,
+)
 from shapash.utils.check import (
     check_consistency_model_features,
     check_consistency_model_label,
+    check_dtype,
     check_features_name,
     check_label_dict,
     check_mask_params,
@@ -31,9 +38,29 @@ from shapash.utils.check import (
     check_y,
 )
 from shapash.utils.columntransformer_backend import columntransformer
-from shapash.utils.io import _build_predictor_manifest, _save_manifest, save_pickle
+from shapash.utils.io import (
+    PREDICTOR_ARTIFACT_VERSION,
+    _build_predictor_manifest,
+    _decode_mapping,
+    _encode_mapping,
+    _load_native_model,
+    _save_manifest,
+    _save_native_model,
+    load_json,
+    load_pickle,
+    load_pickle_with_external,
+    save_json,
+    save_pickle,
+    save_pickle_with_external,
+)
 from shapash.utils.model import predict_proba
-from shapash.utils.transform import adapt_contributions, apply_postprocessing, apply_preprocessing, preprocessing_tolist
+from shapash.utils.transform import (
+    adapt_contributions,
+    apply_postprocessing,
+    apply_preprocessing,
+    cast_float_values,
+    preprocessing_tolist,
+)
 
 
 def _dtypes_compatible(actual_dtype: Any, expected_str: str) -> bool:
@@ -111,6 +138,9 @@ class SmartPredictor:
         List of labels if the model used is for classification problem, None otherwise.
     mask_params: dict (optional)
         Dictionary that specify how to summarize the explainability.
+    dtype: str (optional)
+        Floating point type of the contributions computed by the predictor, e.g. "float32".
+        None keeps the types given by the backend.
 
     How to declare a new SmartPredictor object?
 
@@ -133,6 +163,9 @@ class SmartPredictor:
         SmartExplainer instance to point to.
     """
 
+    # Default of the predictors saved before the dtype option
+    dtype = None
+
     def __init__(
         self,
         features_dict,
@@ -145,6 +178,7 @@ class SmartPredictor:
         postprocessing=None,
         features_groups=None,
         mask_params=None,
+        dtype=None,
     ):
         params_dict = [features_dict, features_types, label_dict, columns_dict, postprocessing]
 
@@ -172,6 +206,7 @@ class SmartPredictor:
             else {"features_to_hide": None, "threshold": None, "positive": None, "max_contrib": None}
         )
         self.check_mask_params()
+        self.dtype = check_dtype(dtype)
         self.postprocessing = postprocessing
         self.features_groups = features_groups
         list_preprocessing = preprocessing_tolist(self.preprocessing)
@@ -284,19 +319,42 @@ class SmartPredictor:
         and stores it in data_groups attribute
         """
         self.data_groups = dict()
-        self.data_groups["x_postprocessed"] = create_grouped_features_values(
+        self.data_groups["x_postprocessed"], self.data_groups["groups_values"] = create_grouped_features_references(
             x_init=self.data["x_postprocessed"],
             x_encoded=self.data["x_preprocessed"],
             preprocessing=self.preprocessing,
             features_groups=self.features_groups,
             features_dict=self.features_dict,
-            how="dict_of_values",
         )
         self.data_groups["ypred"] = self.data["ypred"]
         self.data_groups["contributions"] = group_contributions(
-            contributions=self.data["contributions"], features_groups=self.features_groups
+            contributions=self.data["contributions"],
+            features_groups=self._get_groups_membership(self.data["contributions"].columns),
         )
 
+    def _get_groups_membership(self, columns):
+        """
+        Membership of the features in the groups of features, compiled on first use and reused
+        by each computation of grouped contributions, see GroupsMembership.
+
+        Parameters
+        ----------
+        columns : pd.Index
+            Features of the contributions.
+
+        Returns
+        -------
+        GroupsMembership
+        """
+        membership = self.__dict__.get("_groups_membership")
+        if (
+            membership is None
+            or membership.features_groups is not self.features_groups
+            or not membership.columns.equals(columns)
+        ):
+            membership = self._groups_membership = GroupsMembership(columns, self.features_groups)
+        return membership
+
     def check_dataset_type(self, x=None):
         """
         Check if dataset x given respect the expected format.
@@ -478,7 +536,7 @@ class SmartPredictor:
         >>> predictor.predict_proba()
 
         """
-        return predict_proba(self.model, self.data["x_preprocessed"], self._classes)
+        return cast_float_values(predict_proba(self.model, self.data["x_preprocessed"], self._classes), self.dtype)
 
     def compute_contributions(self, contributions=None, use_groups=None):
         """
@@ -522,13 +580,16 @@ class SmartPredictor:
             contributions = self.backend.format_and_aggregate_local_contributions(
                 x=self.data["x_preprocessed"], contributions=contributions
             )
+        contributions = cast_float_values(contributions, self.dtype)
         self.check_contributions(contributions)
         proba_values = self.predict_proba() if self._case == "classification" else None
         y_pred, match_contrib = keep_right_contributions(
             self.data["ypred_init"], contributions, self._case, self._classes, self.label_dict, proba_values
         )
         if use_groups:
-            match_contrib = group_contributions(match_contrib, features_groups=self.features_groups)
+            match_contrib = group_contributions(
+                match_contrib, features_groups=self._get_groups_membership(match_contrib.columns)
+            )
 
         return y_pred, match_contrib
 
@@ -559,7 +620,7 @@ class SmartPredictor:
         y_pred, detail_contrib = self.compute_contributions(contributions=contributions, use_groups=use_groups)
         return pd.concat([y_pred, detail_contrib], axis=1)
 
-    def save(self, path):
+    def save(self, path, format="pickle"):  # noqa: A002
         """
         Save method allows users to save SmartPredictor object on disk using a pickle file.
         Save method can be useful: you don't have to recompile to display results later.
@@ -569,7 +630,10 @@ class SmartPredictor:
         Parameters
         ----------
         path : str
-            File path to store the pickle file
+            File path to store the pickle file, or directory of the artifact when format="dir"
+        format : str (default: "pickle")
+            "pickle": the predictor, its model, backend and encoders are saved in a single pickle file.
+            "dir": versioned artifact directory, see Notes. The datasets given to add_input are not saved.
 
         Example
         --------
@@ -584,9 +648,141 @@ class SmartPredictor:
         load time. The pickle remains a valid standalone artifact: predictors saved by
         older versions of shapash without a manifest still load, with a
         ``DeprecationWarning``.
+
+        Notes
+        -----
+        The "dir" artifact contains:
+            - the model in the native format of its framework (XGBoost JSON, CatBoost .cbm,
+              LightGBM booster text, joblib for the other models),
+            - schema.json: the features, types, columns, labels, groups and mask parameters,
+            - objects.pkl: the preprocessing and postprocessing,
+            - backend.pkl: the backend, without the model and the shap explainer,
+            - predictor.manifest.json: the manifest, with the description of the artifact.
+        When loaded, the model and the backend are only read on first use, and the shap
+        explainer is built again when contributions are computed.
         """
-        save_pickle(self, path)
-        _save_manifest(_build_predictor_manifest(self), path)
+        if format == "dir":
+            self._save_artifact(path)
+        elif format == "pickle":
+            save_pickle(self, path)
+            _save_manifest(_build_predictor_manifest(self), path)
+        else:
+            raise ValueError(
+                f"""
+                format must be "pickle" or "dir", got {format}
+                """
+            )
+
+    def _save_artifact(self, path):
+        """
+        Save the predictor as a versioned artifact directory, see save.
+        """
+        os.makedirs(path, exist_ok=True)
+        schema = {
+            "features_dict": _encode_mapping(self.features_dict),
+            "features_types": _encode_mapping(self.features_types),
+            "columns_dict": _encode_mapping(self.columns_dict),
+            "label_dict": _encode_mapping(self.label_dict),
+            "features_groups": _encode_mapping(self.features_groups),
+            "mask_params": self.mask_params,
+            "dtype": self.dtype,
+            "case": self._case,
+            "classes": self._classes,
+        }
+        try:
+            save_json(schema, os.path.join(path, "schema.json"))
+        except TypeError as err:
+            raise ValueError(
+                f"""
+                The SmartPredictor schema cannot be saved in json, use format="pickle": {err}
+                """
+            ) from err
+        save_pickle(
+            {
+                "preprocessing": self.preprocessing,
+                "postprocessing": self.postprocessing,
+                "drop_option": self._drop_option,
+            },
+            os.path.join(path, "objects.pkl"),
+        )
+        save_pickle_with_external(
+            self.backend,
+            os.path.join(path, "backend.pkl"),
+            external={"model": self.model, "preprocessing": self.preprocessing},
+        )
+        manifest = _build_predictor_manifest(self)
+        manifest["artifact"] = {
+            "format_version": PREDICTOR_ARTIFACT_VERSION,
+            "model": _save_native_model(self.model, path),
+        }
+        _save_manifest(manifest, os.path.join(path, "predictor"))
+
+    @classmethod
+    def _load_artifact(cls, path, manifest):
+        """
+        Load a predictor saved with save(path, format="dir").
+        The model and the backend are loaded on first use.
+
+        Parameters
+        ----------
+        path : str
+            Directory of the artifact
+        manifest : dict
+            Manifest of the artifact
+
+        Returns
+        -------
+        SmartPredictor
+        """
+        artifact = manifest.get("artifact") or {}
+        if artifact.get("format_version", 0) > PREDICTOR_ARTIFACT_VERSION:
+            raise ValueError(
+                f"""
+                {path} was saved with a more recent version of shapash
+                """
+            )
+        schema = load_json(os.path.join(path, "schema.json"))
+        objects = load_pickle(os.path.join(path, "objects.pkl"))
+
+        predictor = cls.__new__(cls)
+        predictor.features_dict = _decode_mapping(schema["features_dict"])
+        predictor.features_types = _decode_mapping(schema["features_types"])
+        predictor.columns_dict = _decode_mapping(schema["columns_dict"])
+        predictor.label_dict = _decode_mapping(schema["label_dict"])
+        predictor.features_groups = _decode_mapping(schema["features_groups"])
+        predictor.mask_params = schema["mask_params"]
+        predictor.dtype = schema.get("dtype")
+        predictor._case = schema["case"]
+        predictor._classes = schema["classes"]
+        predictor.preprocessing = objects["preprocessing"]
+        predictor.postprocessing = objects["postprocessing"]
+        predictor._drop_option = objects["drop_option"]
+        predictor._lazy_loaders = {
+            "model": lambda: _load_native_model(path, artifact["model"]),
+            "backend": lambda: load_pickle_with_external(
+                os.path.join(path, "backend.pkl"),
+                external={"model": lambda: predictor.model, "preprocessing": lambda: predictor.preprocessing},
+            ),
+        }
+        return predictor
+
+    def __getattr__(self, name):
+        # Only called for missing attributes: loads the model and backend of a predictor loaded from a directory
+        loaders = self.__dict__.get("_lazy_loaders")
+        if loaders is not None and name in loaders:
+            setattr(self, name, loaders.pop(name)())
+            return self.__dict__[name]
+        raise AttributeError(f"'{type(self).__name__}' object has no attribute '{name}'")
+
+    def __getstate__(self):
+        for name in list(self.__dict__.get("_lazy_loaders", {})):
+            getattr(self, name)
+        state = self.__dict__.copy()
+        state.pop("_lazy_loaders", None)
+        state.pop("_masks", None)
+        state.pop("_ranked", None)
+        state.pop("_groups_membership", None)
+        return state
 
     def apply_preprocessing(self):
         """
@@ -598,7 +794,17 @@ class SmartPredictor:
         """
         The filter method is an important method which allows to summarize the local explainability
         by using the user defined mask_params parameters which correspond to its use case.
+
+        The masks are memoized per mask_params while the summary stays the same,
+        so that switching back to parameters already used is free.
         """
+        masks = self.__dict__.get("_masks")
+        if masks is None or masks[0] is not self.summary["contrib_sorted"]:
+            masks = self._masks = (self.summary["contrib_sorted"], dict())
+        key = mask_params_key(**self.mask_params)
+        if key in masks[1]:
+            self.mask, self.masked_contributions = masks[1][key]
+            return
         mask = [init_mask(self.summary["contrib_sorted"], True)]
         if self.mask_params["features_to_hide"] is not None:
             mask.append(
@@ -615,6 +821,7 @@ class SmartPredictor:
         if self.mask_params["max_contrib"] is not None:
             self.mask = cutoff_contributions(mask=self.mask, k=self.mask_params["max_contrib"])
         self.masked_contributions = compute_masked_contributions(self.summary["contrib_sorted"], self.mask)
+        masks[1][key] = (self.mask, self.masked_contributions)
 
     def summarize(self, use_groups=None):
         """
@@ -680,7 +887,17 @@ class SmartPredictor:
         columns_dict = {i: col for i, col in enumerate(x_preprocessed.columns)}
         features_dict = {k: v for k, v in self.features_dict.items() if k in x_preprocessed.columns}
 
-        self.summary = assign_contributions(rank_contributions(data["contributions"], x_preprocessed))
+        # The ranking is computed again only for new contributions, so that the memoized masks can be reused
+        ranked = self.__dict__.get("_ranked")
+        if (
+            ranked is None
+            or ranked[0] is not data["contributions"]
+            or ranked[1] is not data["x_postprocessed"]
+            or not ranked[2].equals(x_preprocessed.columns)
+        ):
+            summary = assign_contributions(rank_contributions(data["contributions"], x_preprocessed))
+            ranked = self._ranked = (data["contributions"], data["x_postprocessed"], x_preprocessed.columns, summary)
+        self.summary = ranked[3]
         # Apply filter method with mask_params attributes parameters
         self.filter()
 
@@ -694,8 +911,12 @@ class SmartPredictor:
             features_dict,
         )
 
+        summary = data["summary"]
+        if use_groups and data.get("groups_values") is not None:
+            summary = data["groups_values"].resolve(summary, features_dict)
+
         # Matching with y_pred
-        return pd.concat([data["ypred"], data["summary"]], axis=1)
+        return pd.concat([data["ypred"], summary], axis=1)
 
     def modify_mask(self, features_to_hide=None, threshold=None, positive=None, max_contrib=None):
         """
@@ -828,7 +1049,10 @@ class SmartPredictor:
             if str(type(enc)) in columntransformer:
                 raise ValueError("SmartPredictor can't switch to SmartExplainer for ColumnTransformer preprocessing.")
 
-        xpl = shapash.explainer.smart_explainer.SmartExplainer(
+        # Imported here: the SmartExplainer and its plotting dependencies are not needed to serve predictions
+        from shapash.explainer.smart_explainer import SmartExplainer  # noqa: PLC0415
+
+        xpl = SmartExplainer(
             model=self.model,
             backend=self.backend,
             preprocessing=self.preprocessing,
@@ -836,6 +1060,7 @@ class SmartPredictor:
             features_groups=self.features_groups,
             features_dict=copy.deepcopy(self.features_dict),
             label_dict=copy.deepcopy(self.label_dict),
+            dtype=self.dtype,
         )
         xpl.compile(x=copy.deepcopy(self.data["x_preprocessed"]), y_pred=copy.deepcopy(self.data["ypred_init"]))
         return xpl
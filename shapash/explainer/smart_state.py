@@ -4,6 +4,7 @@ Smart State Module
 
 import numpy as np
 import pandas as pd
+import scipy.sparse
 
 from shapash.decomposition.contributions import (
     assign_contributions,
@@ -19,6 +20,7 @@ from shapash.manipulation.filters import (
 )
 from shapash.manipulation.mask import compute_masked_contributions, init_mask
 from shapash.manipulation.summarize import compute_features_import, group_contributions, summarize
+from shapash.utils.sparse import sparse_frame
 
 
 class SmartState:
@@ -33,8 +35,8 @@ class SmartState:
 
         Parameters
         ----------
-        contributions : pandas.DataFrame or np.ndarray
-            Local contributions
+        contributions : pandas.DataFrame, np.ndarray or scipy.sparse matrix
+            Local contributions. A scipy.sparse matrix is turned into a DataFrame of sparse columns.
         x_init : pandas.DataFrame
             Prediction set.
 
@@ -43,8 +45,10 @@ class SmartState:
         pandas.DataFrame
             Local contributions on the original feature space (no encoding).
         """
+        if scipy.sparse.issparse(contributions):
+            return sparse_frame(contributions, x_init.index, x_init.columns)
         if not isinstance(contributions, np.ndarray | pd.DataFrame):
-            raise ValueError("Type of contributions must be pd.DataFrame or np.ndarray")
+            raise ValueError("Type of contributions must be pd.DataFrame, np.ndarray or scipy.sparse matrix")
         if isinstance(contributions, np.ndarray):
             return pd.DataFrame(contributions, columns=x_init.columns, index=x_init.index)
         else:
@@ -99,7 +103,7 @@ class SmartState:
                 return False
         return True
 
-    def rank_contributions(self, contributions, x_init):
+    def rank_contributions(self, contributions, x_init, keep_top_k=None):
         """
         Rank contributions line by line and build a reference dictionary to the prediction set.
 
@@ -109,6 +113,8 @@ class SmartState:
             Local contributions to sort.
         x_init : pandas.DataFrame
             Prediction set.
+        keep_top_k : int, optional
+            Number of contributions kept for each row, all of them if None.
 
         Returns
         -------
@@ -119,8 +125,10 @@ class SmartState:
         pandas.DataFrame
             Input features names sorted for each observation
             by decreasing contributions absolute values.
+        pandas.DataFrame
+            Only if keep_top_k is given: sums of the negative and positive contributions that are not kept.
         """
-        return rank_contributions(contributions, x_init)
+        return rank_contributions(contributions, x_init, keep_top_k)
 
     def assign_contributions(self, ranked):
         """
@@ -258,6 +266,25 @@ class SmartState:
         """
         return compute_masked_contributions(s_contrib, masks)
 
+    def add_residual_contributions(self, masked_contributions, residual):
+        """
+        Add the residual of the contributions that are not kept by rank_contributions
+        to the masked contributions.
+
+        Parameters
+        ----------
+        masked_contributions : pd.DataFrame
+            Sums of the hidden negative and positive contributions, see compute_masked_contributions.
+        residual : pd.DataFrame
+            Sums of the negative and positive contributions that are not kept, with the same columns.
+
+        Returns
+        -------
+        pd.DataFrame
+            Sums of the hidden and not kept contributions.
+        """
+        return masked_contributions + residual
+
     def init_mask(self, s_contrib, value=True):
         """
         Initialize a True mask for the dataset.
@@ -328,8 +355,8 @@ class SmartState:
         ----------
         contributions : pd.DataFrame
             Contributions of each unique feature.
-        features_groups : dict
-            Python dict that inform which features to regroup.
+        features_groups : dict or GroupsMembership
+            Python dict that inform which features to regroup, or its compiled membership.
 
         Returns
         -------
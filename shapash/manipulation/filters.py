@@ -114,11 +114,10 @@ def cutoff_contributions(mask, k=10):
     pd.Dataframe
         Mask where only the k-top contributions are considered.
     """
-    # Convert False values to np.nan explicitly without changing data type
-    mask_nan = mask.astype(float).replace(0, np.nan)
-
-    # Compute the cumulative sum and check if the index is within the top-k
-    return mask_nan.cumsum(axis=1).isin(range(1, k + 1))
+    # The k first True of each row are the ones whose cumulative count is at most k
+    values = np.asarray(mask, dtype=bool)
+    top_k = values & (np.cumsum(values, axis=1) <= k)
+    return pd.DataFrame(top_k, columns=mask.columns, index=mask.index)
 
 
 def combine_masks(masks_list):
@@ -141,9 +140,35 @@ def combine_masks(masks_list):
     if len(set(map(lambda x: x.shape, masks_list))) != 1:
         raise ValueError("Masks must have same dimensions.")
 
-    masks_cube = np.dstack(masks_list)
-    mask_final = np.min(masks_cube, axis=2)
+    mask_final = np.array(masks_list[0], dtype=bool)
+    for mask in masks_list[1:]:
+        np.logical_and(mask_final, mask, out=mask_final)
 
     return pd.DataFrame(
         mask_final, columns=[f"contrib_{i + 1}" for i in range(mask_final.shape[1])], index=masks_list[0].index
     )
+
+
+def mask_params_key(features_to_hide=None, threshold=None, positive=None, max_contrib=None):
+    """
+    Hashable key identifying the mask computed from filter parameters.
+    Parameters that do not filter anything (None, 0 or an empty list) share the same key.
+
+    Parameters
+    ----------
+    features_to_hide : list, optional
+        Features to hide.
+    threshold : float, optional
+        Threshold below which contributions are hidden in absolute value.
+    positive : bool, optional
+        Sign of the contributions kept.
+    max_contrib : int, optional
+        Number of contributions kept per row.
+
+    Returns
+    -------
+    tuple
+    """
+    if isinstance(features_to_hide, list | tuple | set | np.ndarray | pd.Index):
+        features_to_hide = tuple(features_to_hide)
+    return (features_to_hide or None, threshold or None, positive, max_contrib or None)
@@ -3,7 +3,6 @@ Mask module
 """
 
 import numpy as np
-import numpy.ma as ma
 import pandas as pd
 
 
@@ -24,8 +23,11 @@ def compute_masked_contributions(s_contrib, mask):
         Sum of contributions of hidden features.
     """
     colname = ["masked_neg", "masked_pos"]
-    hidden_neg = np.sum(ma.array(s_contrib, mask=np.max(np.dstack([mask, (s_contrib > 0)]), axis=2)), axis=1)
-    hidden_pos = np.sum(ma.array(s_contrib, mask=np.max(np.dstack([mask, (s_contrib < 0)]), axis=2)), axis=1)
+    values = np.asarray(s_contrib)
+    hidden = ~np.asarray(mask, dtype=bool)
+    zero = np.zeros((), dtype=values.dtype)
+    hidden_neg = np.where(hidden & ~(values > 0), values, zero).sum(axis=1)
+    hidden_pos = np.where(hidden & ~(values < 0), values, zero).sum(axis=1)
     hidden_contrib = np.array([hidden_neg, hidden_pos])
     return pd.DataFrame(hidden_contrib.T, columns=colname, index=s_contrib.index)
 
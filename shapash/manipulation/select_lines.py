@@ -53,8 +53,8 @@ def keep_right_contributions(y_pred, contributions, _case, _classes, label_dict,
         indexclas = [_classes.index(x) for x in list(flatten(y_pred.values))]
         summary = pd.DataFrame(
             [summar[ind] for ind, summar in zip(indexclas, complete_sum, strict=False)],
-            columns=contributions[0].columns,
-            index=contributions[0].index,
+            columns=contributions[-1].columns,
+            index=contributions[-1].index,
             dtype=object,
         )
         if label_dict is not None:
@@ -6,10 +6,12 @@ import warnings
 
 import numpy as np
 import pandas as pd
+import scipy.sparse
 from pandas.core.common import flatten
-from sklearn.manifold import TSNE
 
 from shapash._optional import import_optional_module
+from shapash.utils.class_values import ClassesArray, NegatedPair
+from shapash.utils.sparse import is_sparse_frame, sparse_frame, sparse_power_sums, to_csr
 from shapash.utils.transform import get_features_transform_mapping
 
 
@@ -61,11 +63,235 @@ def compute_features_import(dataframe, norm=1):
         feature importance One row by feature,
         index of the serie = dataframe.columns
     """
-    feat_imp = (((dataframe.abs() ** norm).sum()) ** (1 / norm)).sort_values(ascending=True)
+    if is_sparse_frame(dataframe):
+        # Only the non-zero contributions are read
+        feat_imp = pd.Series(sparse_power_sums(dataframe, norm) ** (1 / norm), index=dataframe.columns)
+        feat_imp = feat_imp.sort_values(ascending=True)
+    else:
+        feat_imp = (((dataframe.abs() ** norm).sum()) ** (1 / norm)).sort_values(ascending=True)
     tot = feat_imp.sum()
     return feat_imp / tot
 
 
+def compute_contributions_power_sums(contributions, norm=1):
+    """
+    Compute the sum of the absolute contributions raised to the power norm, for each feature.
+    These sums are additive over rows: the features importance of a growing dataset can be
+    updated from the sums of its new rows, see format_features_import.
+
+    Parameters
+    ----------
+    contributions : pd.DataFrame or list of pd.DataFrame
+        Contributions of the regression, or list of contributions of each class.
+    norm : int (default: 1)
+        Norm of the importance, see compute_features_import.
+
+    Returns
+    -------
+    np.ndarray
+        Sums of shape (n_classes * n_features,), in float64.
+    """
+    if isinstance(contributions, NegatedPair):
+        # Both classes have the same absolute contributions
+        return np.tile(compute_contributions_power_sums(contributions.positive, norm), 2)
+    return _power_sums(abs(_classes_matrix(contributions, np.float64)), norm)
+
+
+def _power_sums(abs_values, norm):
+    """
+    Sums of the columns of a matrix (dense or scipy.sparse) raised to the power norm, in float64.
+    """
+    if scipy.sparse.issparse(abs_values):
+        powered = abs_values if norm == 1 else abs_values.power(norm)
+        return np.asarray(powered.sum(axis=0, dtype=np.float64)).ravel()
+    if norm == 1:
+        return abs_values.sum(axis=0, dtype=np.float64)
+    return np.power(abs_values, norm, dtype=np.float64).sum(axis=0)
+
+
+def _classes_matrix(contributions, dtype):
+    """
+    Stack the contributions of all classes horizontally, in a matrix of shape (n_rows, n_classes * n_features).
+    The matrix is a scipy.sparse CSR matrix if contributions have sparse columns.
+    """
+    if isinstance(contributions, ClassesArray):
+        values = contributions.values
+        return values.transpose(0, 2, 1).reshape(values.shape[0], -1).astype(dtype, copy=False)
+    frames = contributions if isinstance(contributions, list) else [contributions]
+    if any(is_sparse_frame(frame) for frame in frames):
+        blocks = [to_csr(frame) if is_sparse_frame(frame) else frame.to_numpy(dtype=dtype) for frame in frames]
+        return scipy.sparse.hstack(blocks, format="csr", dtype=dtype)
+    return np.hstack([frame.to_numpy(dtype=dtype) for frame in frames])
+
+
+def format_features_import(importance, columns, multiclass):
+    """
+    Split the importance of all classes and normalize each one, as compute_features_import.
+
+    Parameters
+    ----------
+    importance : np.ndarray
+        Importance of shape (n_classes * n_features,)
+    columns : pd.Index
+        Features names
+    multiclass : bool
+        Whether a list of pd.Series (one per class) is returned
+
+    Returns
+    -------
+    pd.Series or list of pd.Series
+    """
+    result = []
+    for class_importance in importance.reshape(-1, len(columns)):
+        feat_imp = pd.Series(class_importance, index=columns).sort_values(ascending=True)
+        result.append(feat_imp / feat_imp.sum())
+    return result if multiclass else result[0]
+
+
+class SubsetFeaturesImportance:
+    """
+    Features importance engine for subsets of rows.
+
+    The absolute values of the contributions of all classes are stored once, as a
+    positional float32 matrix of shape (n_rows, n_classes * n_features), a scipy.sparse
+    matrix for contributions with sparse columns. The importance
+    of a subset is computed with a single row selection of this matrix for all classes,
+    and the levels of several norms are computed from the same selection.
+    The results of the last subset are kept, so that changing the label or asking for
+    another norm on the same subset does not compute anything.
+
+    With groups of features, the absolute grouped contributions of the groups are stored
+    in the same matrix, after the features: the importance of the features and of the groups
+    of a subset are computed from the same row selection.
+
+    Parameters
+    ----------
+    contributions : pd.DataFrame or list of pd.DataFrame
+        Contributions of the regression, or list of contributions of each class.
+        All the DataFrames must share the same index and columns.
+    dtype : numpy dtype (default: np.float32)
+        Type of the stored absolute contributions. Sums are computed in float64.
+    groups : GroupsMembership, optional
+        Membership of the features in the groups, compiled for the columns of contributions.
+    """
+
+    def __init__(self, contributions, dtype=np.float32, groups=None):
+        self.contributions = contributions
+        self.groups = groups
+        self.multiclass = isinstance(contributions, list)
+        frames = contributions if self.multiclass else [contributions]
+        # The two classes of a NegatedPair have the same absolute contributions: they are stored once
+        self._n_copies = 2 if isinstance(contributions, NegatedPair) else 1
+        if self._n_copies > 1:
+            frames = [contributions.positive]
+        elif isinstance(contributions, ClassesArray):
+            frames = contributions
+        self.index = frames[0].index
+        self.columns = frames[0].columns
+        self.n_classes = len(frames) * self._n_copies
+        matrix = _classes_matrix(frames, dtype)
+        self._n_features_columns = matrix.shape[1]
+        if groups is not None:
+            matrix = self._append_groups(matrix, groups, len(frames))
+        self.abs_contributions = abs(matrix)
+        self._last_positions = None
+        self._last_sums = dict()
+        self._last_results = dict()
+
+    def _append_groups(self, matrix, groups, n_frames):
+        """
+        Append the grouped contributions of the groups of all the classes to the matrix of the features,
+        with a single product by the block diagonal membership matrix of the classes.
+        """
+        groups_matrix = groups.groups_matrix.astype(matrix.dtype)
+        n_features, n_groups = groups_matrix.shape
+        grouped = matrix @ scipy.sparse.block_diag([groups_matrix] * n_frames, format="csr")
+        # Positions of the grouped columns of each class: the features that are not in a group, then the groups
+        self._groups_positions = np.concatenate(
+            [
+                np.concatenate(
+                    [position * n_features + groups.kept, matrix.shape[1] + position * n_groups + np.arange(n_groups)]
+                )
+                for position in range(n_frames)
+            ]
+        )
+        if scipy.sparse.issparse(matrix):
+            return scipy.sparse.hstack([matrix, scipy.sparse.csr_matrix(grouped)], format="csr")
+        return np.hstack([matrix, np.asarray(grouped)])
+
+    def get_positions(self, subset):
+        """
+        Convert a list of row ids to row positions.
+
+        Parameters
+        ----------
+        subset : list
+            Row ids
+
+        Returns
+        -------
+        np.ndarray
+        """
+        positions = self.index.get_indexer(subset)
+        if (positions < 0).any():
+            missing = list(np.asarray(subset)[positions < 0][:5])
+            raise KeyError(f"{missing} not in index")
+        return positions
+
+    def compute(self, subset=None, norms=(1,), use_groups=False):
+        """
+        Compute the features importance of a subset of rows for several norms.
+
+        Parameters
+        ----------
+        subset : list, optional
+            Row ids of the subset. All the rows are used if None.
+        norms : tuple of int (default: (1,))
+            Norms of the importance, see compute_features_import.
+        use_groups : bool (default: False)
+            Whether the importance of the grouped contributions is returned.
+            The engine must have been created with groups.
+
+        Returns
+        -------
+        dict
+            {norm: features importance}, a pd.Series in the regression case,
+            a list of pd.Series (one per class) in the classification case.
+        """
+        if use_groups and self.groups is None:
+            raise ValueError("The features importance engine has no groups of features.")
+        positions = None if subset is None else self.get_positions(subset)
+        same_subset = (positions is None and self._last_positions is None and self._last_sums) or (
+            positions is not None
+            and self._last_positions is not None
+            and np.array_equal(positions, self._last_positions)
+        )
+        if not same_subset:
+            self._last_positions = positions
+            self._last_sums = dict()
+            self._last_results = dict()
+
+        missing_norms = [norm for norm in norms if norm not in self._last_sums]
+        if missing_norms:
+            abs_contributions = self.abs_contributions if positions is None else self.abs_contributions[positions]
+            for norm in missing_norms:
+                self._last_sums[norm] = _power_sums(abs_contributions, norm) ** (1 / norm)
+        for norm in norms:
+            if (norm, use_groups) not in self._last_results:
+                self._last_results[(norm, use_groups)] = self._format(self._last_sums[norm], use_groups)
+        return {norm: self._last_results[(norm, use_groups)] for norm in norms}
+
+    def _format(self, importance, use_groups=False):
+        """
+        Split the importance of all classes and normalize each one, as compute_features_import.
+        """
+        if use_groups:
+            importance, columns = importance[self._groups_positions], self.groups.grouped_columns
+        else:
+            importance, columns = importance[: self._n_features_columns], self.columns
+        return format_features_import(np.tile(importance, self._n_copies), columns, self.multiclass)
+
+
 def summarize(s_contrib, var_dict, x_sorted, mask, columns_dict, features_dict):
     """
     Compute the summarized contributions of features.
@@ -95,14 +321,217 @@ def summarize(s_contrib, var_dict, x_sorted, mask, columns_dict, features_dict):
         lambda x: features_dict[columns_dict[x]] if not np.isnan(x) else x
     )
     x_sorted_sum = summarize_el(x_sorted, mask, "value_")
+    return _assemble_summary(contrib_sum, var_dict_sum, x_sorted_sum)
 
-    # Concatenate pd.DataFrame
-    summary = pd.concat([contrib_sum, var_dict_sum, x_sorted_sum], axis=1)
 
-    # Ordering columns
+def _assemble_summary(contrib_sum, var_dict_sum, x_sorted_sum):
+    """
+    Concatenate the summarized contributions, features names and values, ordered feature by feature.
+    """
+    summary = pd.concat([contrib_sum, var_dict_sum, x_sorted_sum], axis=1)
     ordered_columns = list(flatten(zip(var_dict_sum.columns, x_sorted_sum.columns, contrib_sum.columns, strict=False)))
-    summary = summary[ordered_columns]
-    return summary
+    return summary[ordered_columns]
+
+
+def summarize_el_classes(values, mask, index, prefix, labels=None):
+    """
+    Compute the summarized matrices of all the classes at once, see summarize_el.
+
+    The kept values of each row are moved to the left with a single stable sort
+    of the mask for all the classes, instead of a Python loop over the elements.
+
+    Parameters
+    ----------
+    values : np.ndarray
+        Array of shape (n_rows, n_columns, n_classes) to summarize.
+    mask : np.ndarray
+        Boolean array of the same shape, False elements are hidden.
+    index : pd.Index
+        Index of the rows.
+    prefix : str
+        prefix used for columns name
+    labels : np.ndarray, optional
+        If given, values are positions in labels, and the summary contains the labels.
+
+    Returns
+    -------
+    list of pd.DataFrame
+        Result of the summarize step for each class
+    """
+    if labels is not None:
+        keep = mask
+    else:
+        # Same conversions as DataFrame.where in summarize_el
+        if values.dtype.kind in "iu":
+            values = values.astype(np.float64)
+        elif values.dtype.kind == "b":
+            values = values.astype(object)
+        keep = mask.copy()
+        if values.dtype.kind == "f":
+            keep &= ~np.isnan(values)
+        else:
+            keep[mask] = ~np.frompyfunc(lambda x: str(x) == "nan", 1, 1)(values[mask]).astype(bool)
+    order = np.argsort(~keep, axis=1, kind="stable")
+    packed = np.take_along_axis(values, order, axis=1)
+    counts = keep.sum(axis=1)
+    summaries = []
+    for num_class in range(values.shape[2]):
+        width = int(counts[:, num_class].max()) if len(counts) else 0
+        matrix = packed[:, :width, num_class]
+        matrix = labels[matrix] if labels is not None else matrix.astype(object)
+        matrix[np.arange(width) >= counts[:, num_class, None]] = np.nan
+        col_list = [prefix + str(x + 1) for x in range(width)]
+        if labels is not None:
+            # Types of the labels are inferred as DataFrame.map does in summarize
+            summaries.append(pd.DataFrame(matrix.tolist(), index=list(index), columns=col_list))
+        else:
+            summaries.append(pd.DataFrame(matrix, index=list(index), columns=col_list, dtype=object))
+    return summaries
+
+
+def summarize_classes(s_contrib, var_dict, x_sorted, mask, index, columns_dict, features_dict):
+    """
+    Compute the summarized contributions of features of all the classes at once, see summarize.
+
+    Parameters
+    ----------
+    s_contrib: np.ndarray
+        Sorted contributions of shape (n_rows, n_features, n_classes)
+    var_dict: np.ndarray
+        Positions of the sorted features, same shape
+    x_sorted: np.ndarray
+        Values of the sorted features, same shape
+    mask: np.ndarray
+        Mask to apply during the summary step, same shape
+    index : pd.Index
+        Index of the rows.
+    columns_dict:
+        Dict of column Names, matches column num with column name
+    features_dict:
+        Dict of column Label, matches column name with column label
+
+    Returns
+    -------
+    list of pd.DataFrame or None
+        Result of the summarize step for each class.
+        None if the values of the features cannot be summarized at once (e.g. dates).
+    """
+    if x_sorted.dtype.kind not in "fiubO":
+        return None
+    labels = np.empty(len(columns_dict), dtype=object)
+    for position in np.unique(var_dict[mask]):
+        labels[position] = features_dict[columns_dict[position]]
+    contrib_sums = summarize_el_classes(s_contrib, mask, index, "contribution_")
+    var_dict_sums = summarize_el_classes(var_dict, mask, index, "feature_", labels=labels)
+    x_sorted_sums = summarize_el_classes(x_sorted, mask, index, "value_")
+    return [
+        _assemble_summary(contrib_sum, var_dict_sum, x_sorted_sum)
+        for contrib_sum, var_dict_sum, x_sorted_sum in zip(contrib_sums, var_dict_sums, x_sorted_sums, strict=True)
+    ]
+
+
+class GroupsMembership:
+    """
+    Membership of the features in the groups of features, compiled once from features_groups.
+
+    The membership is a sparse matrix of shape (n_features, n_grouped_columns): the grouped
+    contributions are the product of the contributions with this matrix, computed for all the
+    classes at once, instead of a sum and a copy of the DataFrame for each group.
+    The grouped columns are the features that are not in a group, in the order of the columns,
+    followed by the groups, in the order of features_groups.
+
+    Parameters
+    ----------
+    columns : pandas.Index
+        Features of the contributions.
+    features_groups : dict
+        Python dict that inform which features to regroup.
+    """
+
+    def __init__(self, columns, features_groups):
+        self.columns = pd.Index(columns)
+        self.features_groups = features_groups
+        members = [self.columns.get_indexer(features) for features in features_groups.values()]
+        missing = [
+            feature
+            for features, positions in zip(features_groups.values(), members, strict=True)
+            for feature, position in zip(features, positions, strict=True)
+            if position < 0
+        ]
+        if missing:
+            raise KeyError(f"{missing} not in index")
+        grouped = np.zeros(len(self.columns), dtype=bool)
+        for positions in members:
+            grouped[positions] = True
+        self.kept = np.flatnonzero(~grouped)
+        self.grouped_columns = self.columns[self.kept].append(pd.Index(list(features_groups.keys())))
+        n_kept = len(self.kept)
+        rows = np.concatenate([self.kept, *members]).astype(np.intp)
+        cols = np.concatenate(
+            [np.arange(n_kept)] + [np.full(len(positions), n_kept + i) for i, positions in enumerate(members)]
+        ).astype(np.intp)
+        self.matrix = scipy.sparse.csr_matrix(
+            (np.ones(len(rows)), (rows, cols)), shape=(len(self.columns), len(self.grouped_columns))
+        )
+
+    @property
+    def groups_matrix(self):
+        """
+        Columns of the membership matrix of the groups only, of shape (n_features, n_groups).
+        """
+        return self.matrix[:, len(self.kept) :]
+
+    def group(self, contributions):
+        """
+        Compute the grouped contributions.
+
+        Parameters
+        ----------
+        contributions : pd.DataFrame, NegatedPair, ClassesArray or list of pd.DataFrame
+            Contributions of each feature, with columns equal to self.columns.
+            DataFrames of sparse columns give DataFrames of sparse columns.
+
+        Returns
+        -------
+        object of the same type as contributions
+            Contributions with grouped features.
+        """
+        if isinstance(contributions, NegatedPair):
+            # Grouped contributions are sums, they commute with the negation
+            return NegatedPair(self.group(contributions.positive))
+        if isinstance(contributions, ClassesArray):
+            values = contributions.values
+            n_rows, n_features, n_classes = values.shape
+            # Stored as (n_classes, n_features, n_rows): a single product for all the classes
+            stacked = values.transpose(1, 2, 0).reshape(n_features, n_classes * n_rows)
+            grouped = self._product_transposed(stacked).reshape(-1, n_classes, n_rows)
+            grouped = np.ascontiguousarray(grouped.transpose(1, 0, 2)).transpose(2, 1, 0)
+            return contributions.with_labels(grouped, self.grouped_columns)
+        if isinstance(contributions, list):
+            return [self.group(frame) for frame in contributions]
+        if is_sparse_frame(contributions):
+            values = to_csr(contributions)
+            return sparse_frame(values @ self._typed_matrix(values.dtype), contributions.index, self.grouped_columns)
+        values = contributions.to_numpy()
+        if values.dtype.kind not in "fiub":
+            # Contributions of the predicted classes are stored as objects, see keep_right_contributions
+            values = values.astype(np.float64)
+        return pd.DataFrame(
+            values @ self._typed_matrix(values.dtype), index=contributions.index, columns=self.grouped_columns
+        )
+
+    def _typed_matrix(self, dtype, matrix=None):
+        """
+        Membership matrix in the floating point type of the contributions, so that float32 stays float32.
+        """
+        matrix = self.matrix if matrix is None else matrix
+        return matrix.astype(dtype if np.dtype(dtype).kind == "f" else np.float64, copy=False)
+
+    def _product_transposed(self, stacked):
+        """
+        Grouped values of a matrix of shape (n_features, n) stacking the values of features in rows.
+        """
+        return np.asarray(self._typed_matrix(stacked.dtype).T @ stacked)
 
 
 def group_contributions(contributions, features_groups):
@@ -111,26 +540,110 @@ def group_contributions(contributions, features_groups):
 
     Parameters
     ----------
-    contributions : pd.DataFrame
+    contributions : pd.DataFrame, NegatedPair, ClassesArray or list of pd.DataFrame
         Contributions of each unique feature.
-    features_groups : dict
-        Python dict that inform which features to regroup.
+    features_groups : dict or GroupsMembership
+        Python dict that inform which features to regroup, or its membership
+        compiled for the columns of contributions, which is then reused.
 
     Returns
     -------
     contributions : pd.DataFrame
         Contributions with grouped features.
     """
-    new_contributions = contributions.copy()
-    # Computing features groups that are the sum of their corresponding features contributions
-    for group_name in features_groups.keys():
-        new_contributions[group_name] = new_contributions[features_groups[group_name]].sum(axis=1)
+    columns = (contributions[-1] if isinstance(contributions, list) else contributions).columns
+    membership = features_groups if isinstance(features_groups, GroupsMembership) else None
+    if membership is None or not membership.columns.equals(columns):
+        membership = GroupsMembership(columns, getattr(features_groups, "features_groups", features_groups))
+    return membership.group(contributions)
+
+
+def get_encoded_columns(columns, x_init, x_encoded, preprocessing):
+    """
+    Names of the encoded columns of features: the categorical features are replaced
+    by their corresponding encoded variables.
+
+    Parameters
+    ----------
+    columns : list
+        Names of the features in x_init.
+    x_init : pd.DataFrame
+        Pandas dataframe before preprocessing transformations
+    x_encoded : pd.DataFrame
+        Pandas dataframe after preprocessing transformations
+    preprocessing : category_encoders or ColumnTransformer or list or dict or list of dict
+        The processing apply to the original data
+
+    Returns
+    -------
+    list
+    """
+    # Getting mapping of variables to transform categorical features with corresponding encoded variables
+    encoding_mapping = get_features_transform_mapping(x_init, x_encoded, preprocessing)
+    encoded_columns = list()
+    for c in columns:
+        encoded_columns.extend(encoding_mapping.get(c, [c]))
+    return encoded_columns
 
-    # Dropping features that are part of the group of features
-    for features_grouped in features_groups.values():
-        new_contributions = new_contributions.drop(features_grouped, axis=1)
 
-    return new_contributions
+# Projections of project_group_values, which are fitted once and can project any row
+LINEAR_PROJECTIONS = ("pca", "random_projection")
+
+
+def project_group_values(feature_values, col, how="pca", fit_size=10000, random_state=79):
+    """
+    Project the encoded values of the features of a group in 1 dimension with a linear projection.
+
+    The features are standardized, then the projection is fitted on at most fit_size rows
+    and applied to all the rows: unlike t-SNE, the projection of a row does not depend on
+    the other rows, so that the values of a group can be projected once for all the plots.
+
+    Parameters
+    ----------
+    feature_values : pd.DataFrame
+        Encoded values of the features of the group.
+    col : str
+        Name of the group of features.
+    how : str (default: "pca")
+        "pca" projects on the first principal component, "random_projection" on a gaussian random direction.
+    fit_size : int (default: 10000)
+        Maximum number of rows used to fit the projection, sampled with random_state.
+    random_state : int (default: 79)
+        Seed of the sampling and of the projection.
+
+    Returns
+    -------
+    pd.Series
+        Projected values, with the index of feature_values.
+    """
+    if how not in LINEAR_PROJECTIONS:
+        raise NotImplementedError(f"Unknown method: {how}")
+    try:
+        values = feature_values.to_numpy(dtype=np.float64)
+        scale = values.std(axis=0)
+        scale[scale == 0] = 1
+        values = (values - values.mean(axis=0)) / scale
+        fit_values = values
+        if len(values) > fit_size:
+            rows = np.random.default_rng(random_state).choice(len(values), fit_size, replace=False)
+            fit_values = values[np.sort(rows)]
+        if how == "pca":
+            from sklearn.decomposition import PCA  # noqa: PLC0415
+
+            projection = PCA(n_components=1, random_state=random_state).fit(fit_values)
+        else:
+            from sklearn.random_projection import GaussianRandomProjection  # noqa: PLC0415
+
+            projection = GaussianRandomProjection(n_components=1, random_state=random_state).fit(fit_values)
+        projected = projection.transform(values)[:, 0]
+    except Exception as e:
+        warnings.warn(
+            f"Could not project group features values with {how}: {e}",
+            UserWarning,
+            stacklevel=2,
+        )
+        projected = feature_values.iloc[:, 0].to_numpy()
+    return pd.Series(projected, name=col, index=feature_values.index)
 
 
 def project_feature_values_1d(feature_values, col, x_init, x_encoded, preprocessing, features_dict, how="tsne"):
@@ -156,22 +669,25 @@ def project_feature_values_1d(feature_values, col, x_init, x_encoded, preprocess
     features_dict: dict, optional (default: None)
         Dictionary mapping technical feature names to domain names.
     how : str
-        Method used to compute groups of features values in one column. Options: "tsne", "dict_of_values"
+        Method used to compute groups of features values in one column.
+        Options: "tsne", "pca", "random_projection", "dict_of_values".
+        See project_group_values for "pca" and "random_projection".
 
     Returns
     -------
     feature_values : pd.Series
         Series containing the projected feature values.
     """
-    # Getting mapping of variables to transform categorical features with corresponding encoded variables
-    encoding_mapping = get_features_transform_mapping(x_init, x_encoded, preprocessing)
-    col_names_in_xinit = list()
-    for c in feature_values.columns:
-        col_names_in_xinit.extend(encoding_mapping.get(c, [c]))
+    col_names_in_xinit = get_encoded_columns(feature_values.columns, x_init, x_encoded, preprocessing)
     feature_values = x_encoded.loc[feature_values.index, col_names_in_xinit]
 
     # Project in 1D the feature values
-    if how == "tsne":
+    if how in LINEAR_PROJECTIONS:
+        feature_values = project_group_values(feature_values, col, how=how)
+
+    elif how == "tsne":
+        from sklearn.manifold import TSNE  # noqa: PLC0415
+
         try:
             n_samples = feature_values.shape[0]
             perplexity = min(30, max(2, n_samples // 3))
@@ -280,3 +796,140 @@ def create_grouped_features_values(
                 df.drop(f, axis=1, inplace=True)
 
     return df
+
+
+class GroupsValues:
+    """
+    Values of the features of each group of features, kept as references to their columns.
+
+    In the grouped features values built by create_grouped_features_references, the column of
+    a group holds the position of each row in these values instead of a dict of the features
+    values of the row. The dicts are only built for the rows that are displayed, see resolve.
+
+    Parameters
+    ----------
+    values : dict
+        Values of the features of each group (pd.DataFrame), with the features labels as columns.
+    """
+
+    def __init__(self, values):
+        self.values = values
+
+    @property
+    def n_rows(self):
+        """
+        Number of rows referenced, the position of the next appended row.
+        """
+        return len(next(iter(self.values.values()))) if self.values else 0
+
+    def to_dicts(self, group, positions):
+        """
+        Dicts of the features values of a group for some rows.
+
+        Parameters
+        ----------
+        group : str
+            Name of the group of features.
+        positions : array-like
+            Positions of the rows, as stored in the column of the group.
+
+        Returns
+        -------
+        list of dict
+        """
+        positions = np.asarray(positions, dtype=np.intp)
+        return self.values[group].iloc[positions].to_dict("records")
+
+    def concat(self, other):
+        """
+        Values of the rows of self followed by the rows of other, whose positions
+        must start at self.n_rows (see create_grouped_features_references).
+
+        Returns
+        -------
+        GroupsValues
+        """
+        return GroupsValues({group: pd.concat([values, other.values[group]]) for group, values in self.values.items()})
+
+    def resolve(self, summary, features_dict):
+        """
+        Replace the positions of the groups in a summary of the contributions by the dicts
+        of the features values of the groups.
+
+        Parameters
+        ----------
+        summary : pd.DataFrame
+            Summary with feature_i and value_i columns, see summarize.
+        features_dict : dict
+            Dict of column Label, matches column name with column label
+
+        Returns
+        -------
+        pd.DataFrame
+            Copy of the summary where the value_i of the groups are dicts.
+        """
+        summary = summary.copy()
+        groups_labels = {features_dict.get(group, group): group for group in self.values}
+        for feature_col in [col for col in summary.columns if str(col).startswith("feature_")]:
+            value_col = "value_" + feature_col[len("feature_") :]
+            if value_col not in summary.columns:
+                continue
+            labels = summary[feature_col].to_numpy()
+            resolved = None
+            for label, group in groups_labels.items():
+                rows = np.flatnonzero(labels == label)
+                if len(rows) == 0:
+                    continue
+                if resolved is None:
+                    resolved = summary[value_col].to_numpy(dtype=object, copy=True)
+                dicts = np.empty(len(rows), dtype=object)
+                dicts[:] = self.to_dicts(group, resolved[rows])
+                resolved[rows] = dicts
+            if resolved is not None:
+                summary[value_col] = resolved
+        return summary
+
+
+def create_grouped_features_references(x_init, x_encoded, preprocessing, features_groups, features_dict, start=0):
+    """
+    Compute the features values of the groups of features as references to the
+    values of their features, see GroupsValues.
+
+    The column of each group holds the positions of the rows in the GroupsValues, so that
+    no dict of values is built: the same DataFrame as create_grouped_features_values
+    with how="dict_of_values" is obtained with GroupsValues.resolve.
+
+    Parameters
+    ----------
+    x_init : pd.DataFrame
+        x_encoded dataset with inverse transformation with eventual postprocessing modifications.
+    x_encoded : pd.DataFrame
+        preprocessed dataset used by the model to perform the prediction.
+    preprocessing : category_encoders, ColumnTransformer, list, dict, optional
+        Preprocessing used to encode categorical variables.
+    features_groups : dict
+        Groups names and corresponding list of features
+    features_dict: dict, optional (default: None)
+        Dictionary mapping technical feature names to domain names.
+    start : int (default: 0)
+        Position of the first row, the number of rows already referenced when the values are appended.
+
+    Returns
+    -------
+    df : pd.DataFrame
+        features values with the positions of the rows used for groups of features
+    groups_values : GroupsValues
+        values of the features of each group
+    """
+    features_dict = features_dict or dict()
+    grouped = {feature for group in features_groups for feature in features_groups[group]}
+    df = x_init[[col for col in x_init.columns if col not in grouped]].copy()
+    positions = np.arange(start, start + len(x_init), dtype=np.int64)
+    values = dict()
+    for group in features_groups.keys():
+        if not isinstance(features_groups[group], list):
+            raise ValueError(f"features_groups[{group}] should be a list of features")
+        encoded_columns = get_encoded_columns(features_groups[group], x_init, x_encoded, preprocessing)
+        values[group] = x_encoded[encoded_columns].set_axis([features_dict.get(x, x) for x in encoded_columns], axis=1)
+        df[group] = positions
+    return df, GroupsValues(values)
@@ -34,6 +34,7 @@ def plot_scatter(
     file_name=None,
     auto_open=False,
     zoom=False,
+    compact=False,
 ):
     """
     Scatter plot of one feature contribution across the prediction set.
@@ -76,6 +77,9 @@ def plot_scatter(
         open automatically the plot
     zoom: bool (default=False)
         graph is currently zoomed
+    compact: bool (default=False)
+        build the hover labels from customdata columns instead of one hovertext string per point,
+        which reduces the size of the figure sent to the browser
     """
     fig = go.Figure()
 
@@ -92,12 +96,17 @@ def plot_scatter(
     feature_values_str = feature_values.iloc[:, 0].apply(add_line_break, args=args)
     feature_values = pd.DataFrame({column_name: feature_values_str})
 
-    if pred is not None:
-        hv_text = [
-            f"Id: {x}<br />Predict: {y}" for x, y in zip(feature_values.index, pred.values.flatten(), strict=False)
-        ]
+    if compact:
+        hv_text = None
+        hover_title = "Id: %{customdata[1]}" + ("<br />Predict: %{customdata[2]}" if pred is not None else "")
     else:
-        hv_text = [f"Id: {x}" for x in feature_values.index]
+        if pred is not None:
+            hv_text = [
+                f"Id: {x}<br />Predict: {y}" for x, y in zip(feature_values.index, pred.values.flatten(), strict=False)
+            ]
+        else:
+            hv_text = [f"Id: {x}" for x in feature_values.index]
+        hover_title = "%{hovertext}"
 
     if metadata:
         metadata = {
@@ -113,7 +122,7 @@ def plot_scatter(
         text_groups_features_keys = list(metadata.keys())
 
         hovertemplate = (
-            "<b>%{hovertext}</b><br />"
+            f"<b>{hover_title}</b><br />"
             + "Contribution: %{y:.4f} <br />"
             + "<br />".join(
                 [f"{text_groups_features_keys[i]}: %{{text[{i}]}}" for i in range(len(text_groups_features_keys))]
@@ -122,7 +131,7 @@ def plot_scatter(
         )
     else:
         hovertemplate = (
-            "<b>%{hovertext}</b><br />"
+            f"<b>{hover_title}</b><br />"
             + f"{feature_name}: "
             + "%{customdata[0]}<br />Contribution: %{y:.4f}<extra></extra>"
         )
@@ -202,7 +211,13 @@ def plot_scatter(
     if has_nan_numeric:
         customdata_values = feature_values_array.astype(object).copy()
         customdata_values[nan_mask_arr] = "missing"
-    customdata = np.stack((customdata_values, feature_values.index.values), axis=-1)
+    if compact:
+        customdata_columns = [customdata_values, feature_values.index.values]
+        if pred is not None:
+            customdata_columns.append(pred.values.flatten())
+        customdata = np.column_stack([np.asarray(column, dtype=object) for column in customdata_columns])
+    else:
+        customdata = np.stack((customdata_values, feature_values.index.values), axis=-1)
 
     fig.update_traces(customdata=customdata, hovertemplate=hovertemplate)
 
@@ -248,6 +263,7 @@ def plot_violin(
     file_name=None,
     auto_open=False,
     zoom=False,
+    compact=False,
 ):
     """
     Violin plot of one feature contribution across the prediction set.
@@ -290,6 +306,9 @@ def plot_violin(
         open automatically the plot
     zoom: bool (default=False)
         graph is currently zoomed
+    compact: bool (default=False)
+        build the hover labels from customdata columns instead of one hovertext string per point,
+        which reduces the size of the figure sent to the browser
     """
     fig = make_subplots(specs=[[{"secondary_y": True}]])
 
@@ -307,7 +326,7 @@ def plot_violin(
     if proba_values is not None:
         proba_values = proba_values.loc[feature_values.index]
 
-    hv_text_df, hovertemplate = _prepare_hover_text(feature_values, pred, feature_name)
+    hv_text_df, hovertemplate = _prepare_hover_text(feature_values, pred, feature_name, compact)
 
     feature_values_counts = feature_values.value_counts(dropna=False)
     xs = feature_values_counts.index.get_level_values(0).sort_values()
@@ -366,6 +385,7 @@ def plot_violin(
                 line_color=style_dict["violin_area_classif"][0],
                 secondary_y=True,
                 side="negative",
+                compact=compact,
             )
 
             # Positive case
@@ -386,6 +406,7 @@ def plot_violin(
                 line_color=style_dict["violin_area_classif"][1],
                 secondary_y=True,
                 side="positive",
+                compact=compact,
             )
         else:
             # General case
@@ -406,6 +427,7 @@ def plot_violin(
                 line_color=style_dict["violin_default"],
                 secondary_y=True,
                 side="both",
+                compact=compact,
             )
 
     if colorpoints is not None:
@@ -692,7 +714,7 @@ def _create_jittered_points(numerical_features, percentages, mean=0, std=0.6, cl
     return jittered_points
 
 
-def _prepare_hover_text(feature_values, pred, feature_name):
+def _prepare_hover_text(feature_values, pred, feature_name, compact=False):
     """
     Prepares the hover text for a Plotly plot based on feature values and predictions.
 
@@ -700,11 +722,23 @@ def _prepare_hover_text(feature_values, pred, feature_name):
     - feature_values: A pandas DataFrame of feature values.
     - pred: A pandas Series of predictions, can be None.
     - feature_name: The name of the feature for which the hover text is being prepared.
+    - compact: If True, the hover labels are built from customdata columns instead of hover texts.
 
     Returns:
-    - A pandas DataFrame containing the hover text.
+    - A pandas DataFrame containing the hover text, or the extra customdata columns if compact is True.
     - The hover template to be used in Plotly.
     """
+    hv_temp = f"{feature_name} :<br />%{{customdata[0]}}<br />Contribution: %{{y:.4f}}<extra></extra>"
+
+    if compact:
+        # The id and the prediction are read from the customdata columns 1 and 2
+        hv_text_df = pd.DataFrame(index=feature_values.index)
+        hover_title = "Id: %{customdata[1]}"
+        if pred is not None:
+            hv_text_df["pred"] = pred.values.flatten()
+            hover_title += "<br />Predict: %{customdata[2]}"
+        return hv_text_df, f"<b>{hover_title}</b><br />{hv_temp}"
+
     # Building the base text for hover
     hv_text = [
         f"Id: {id_val}{f'<br />Predict: {pred_val}' if pred is not None else ''}"
@@ -719,7 +753,6 @@ def _prepare_hover_text(feature_values, pred, feature_name):
     hv_text_df = pd.DataFrame(hv_text, columns=["text"], index=feature_values.index)
 
     # Hover template with contribution and custom data
-    hv_temp = f"{feature_name} :<br />%{{customdata[0]}}<br />Contribution: %{{y:.4f}}<extra></extra>"
     hovertemplate = f"<b>%{{hovertext}}</b><br />{hv_temp}"
 
     return hv_text_df, hovertemplate
@@ -741,12 +774,13 @@ def _add_violin_and_scatter(
     line_color,
     secondary_y=True,
     side="both",
+    compact=False,
 ):
     """Adds a Violin trace and a Scatter trace based on specified conditions."""
     y = contributions.loc[feature_cond].iloc[:, 0].values
     if len(y) > 0:
         x = [i] * len(y)
-        hovertext = hovertext_df.loc[feature_cond].values.flatten()
+        hovertext = None if compact else hovertext_df.loc[feature_cond].values.flatten()
 
         _add_violin_trace(fig, c, x, y, side, line_color, hovertext, secondary_y)
 
@@ -754,10 +788,19 @@ def _add_violin_and_scatter(
         x = _create_jittered_points(x, percentage_series, side=side)
         if colorpoints is not None:
             colorpoints_selected = colorpoints.loc[feature_cond].values.flatten()
-        customdata = np.stack(
-            (feature_values.loc[feature_cond].values.flatten(), contributions.loc[feature_cond].index.values),
-            axis=-1,
-        )
+        if compact:
+            customdata = np.column_stack(
+                [
+                    feature_values.loc[feature_cond].values.flatten().astype(object),
+                    contributions.loc[feature_cond].index.values.astype(object),
+                    hovertext_df.loc[feature_cond].values.astype(object),
+                ]
+            )
+        else:
+            customdata = np.stack(
+                (feature_values.loc[feature_cond].values.flatten(), contributions.loc[feature_cond].index.values),
+                axis=-1,
+            )
         marker = None
         if colorpoints is not None:
             marker = {
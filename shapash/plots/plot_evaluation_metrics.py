@@ -8,9 +8,9 @@ from sklearn.neighbors import KernelDensity
 from shapash.style.style_utils import define_style, get_palette
 from shapash.utils.clustering import (
     build_tsne_title,
-    compute_concave_hull,
+    compute_cluster_polygons,
     compute_kmeans_labels,
-    compute_tsne_projection,
+    compute_projection,
     encode_color_value,
     expand_polygons_independently,
     move_points_towards_centroid,
@@ -671,6 +671,7 @@ def plot_clustering_by_explainability(
     colorbar_title=None,
     file_name=None,
     auto_open=False,
+    projection="tsne",
 ):
     """
     Generate a 2D scatter plot using TSNE projection of high-dimensional data.
@@ -723,6 +724,8 @@ def plot_clustering_by_explainability(
         Path to save the interactive plot as an HTML file. If None, the plot is not saved.
     auto_open : bool, optional, default=False
         Whether to open the plot automatically in a web browser after saving.
+    projection : str, optional, default="tsne"
+        Method of the 2D projection computed when projections is None, see compute_projection.
 
     Returns
     -------
@@ -746,8 +749,9 @@ def plot_clustering_by_explainability(
 
     ### Dimensional Reduction with TSNE
     if projections is None:
-        projections = compute_tsne_projection(
+        projections = compute_projection(
             values_to_project=values_to_project,
+            method=projection,
             random_state=random_state,
         )
 
@@ -756,6 +760,24 @@ def plot_clustering_by_explainability(
 
     projections_moved = move_points_towards_centroid(projections, labels, centers, factor=1.0)
 
+    ### Outlines of the clusters, which do not depend on the color values
+    raw_polys, centroids, valid_labels = compute_cluster_polygons(projections_moved, labels, alpha=5)
+    cluster_label_to_index = {label: i for i, label in enumerate(valid_labels)}
+
+    expanded_polys, scales = expand_polygons_independently(
+        raw_polys,
+        centroids,
+        eps=0.02,
+        max_iter=600,
+    )
+
+    projections_final = scale_points_within_cluster(
+        projections_moved, labels, centers, scales * 0.8, cluster_label_to_index
+    )
+    contours = []
+    if show_clusters:
+        contours = [tuple(map(list, smooth_polygon_contour(poly).exterior.xy)) for poly in expanded_polys]
+
     figures = []
 
     color_series, _, _ = encode_color_value(color_value[0].iloc[:, 0])
@@ -778,48 +800,12 @@ def plot_clustering_by_explainability(
         ### Plotting
         fig = go.Figure()
 
-        raw_polys = []
-        centroids = []
-        valid_labels = []
-        cluster_color = []
-
         color_series, _, _ = encode_color_value(color_value_el.iloc[:, 0])
         point_values = color_series.values
-        for c in sorted(np.unique(labels)):
-            pts = projections_moved[labels == c]
-            cluster_color.append(point_values[labels == c].mean())
-
-            if pts.shape[0] < 3:
-                continue
-
-            poly = compute_concave_hull(pts, alpha=5)
-            if poly is None:
-                continue
-
-            poly = smooth_polygon_contour(poly)
-
-            raw_polys.append(poly)
-            centroids.append(pts.mean(axis=0))
-            valid_labels.append(c)
-
-        valid_labels = np.array(valid_labels)
-        cluster_label_to_index = {label: i for i, label in enumerate(valid_labels)}
-
-        expanded_polys, scales = expand_polygons_independently(
-            raw_polys,
-            centroids,
-            eps=0.02,
-            max_iter=600,
-        )
-
-        projections_final = scale_points_within_cluster(
-            projections_moved, labels, centers, scales * 0.8, cluster_label_to_index
-        )
+        cluster_color = [point_values[labels == c].mean() for c in sorted(np.unique(labels))]
 
         if show_clusters:
-            for c, poly in enumerate(expanded_polys):
-                sx, sy = map(list, smooth_polygon_contour(poly).exterior.xy)
-
+            for c, (sx, sy) in enumerate(contours):
                 # Couleurs dynamiques pour le hover
                 c_n = c  # curve number
                 if c_n == active_cluster:
@@ -2,6 +2,7 @@ import copy
 
 import numpy as np
 import pandas as pd
+import scipy.sparse
 
 from shapash.utils.category_encoder_backend import supported_category_encoder
 from shapash.utils.columntransformer_backend import columntransformer, get_list_features_names
@@ -83,6 +84,31 @@ def check_label_dict(label_dict, case, classes=None):
             )
 
 
+def check_dtype(dtype):
+    """
+    Check if dtype is a floating point type to store the contributions.
+
+    Parameters
+    ----------
+    dtype : str, numpy dtype or None
+        Floating point type, e.g. "float32". None keeps the types of the contributions.
+
+    Returns
+    -------
+    str or None
+        Name of the type, e.g. "float32".
+    """
+    if dtype is None:
+        return None
+    try:
+        checked = np.dtype(dtype)
+    except TypeError as err:
+        raise ValueError(f"dtype must be None or a floating point type, got {dtype}") from err
+    if checked.kind != "f":
+        raise ValueError(f"dtype must be None or a floating point type, got {dtype}")
+    return checked.name
+
+
 def check_mask_params(mask_params):
     """
     Check if mask_params given respect the expected format.
@@ -159,7 +185,9 @@ def check_contribution_object(case, classes, contributions):
         List of labels if the model used is for classification problem, None otherwise.
     contributions : pandas.DataFrame, np.ndarray or list
     """
-    if (case == "regression") and (not isinstance(contributions, np.ndarray | pd.DataFrame)):
+    if (case == "regression") and not (
+        isinstance(contributions, np.ndarray | pd.DataFrame) or scipy.sparse.issparse(contributions)
+    ):
         raise ValueError(
             """
             Type of contributions parameter specified is not compatible with
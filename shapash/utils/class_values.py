@@ -0,0 +1,286 @@
+"""
+Class values module
+"""
+
+import abc
+import copy
+import operator
+
+import numpy as np
+import pandas as pd
+
+
+def _read_only(name):
+    def method(self, *args, **kwargs):
+        raise TypeError(
+            f"{type(self).__name__} is read-only, {name} is not supported. Use list(values) to get a modifiable list."
+        )
+
+    method.__name__ = name
+    return method
+
+
+class ClassValues(list, abc.ABC):
+    """
+    Read-only list of the values of each class of a classification (contributions,
+    sorted contributions, masks...), stored in a compact form.
+
+    The value of a class is built from the compact storage each time it is accessed.
+    ClassValues is a list so that it can be used everywhere a list of values per class is expected.
+    Subclasses implement _get, which returns the value of a class from its position.
+
+    Parameters
+    ----------
+    n_classes : int
+        Number of classes.
+    """
+
+    def __new__(cls, *args, **kwargs):
+        """
+        Refuse to create a subclass without _get: list.__new__ does not check the abstract methods.
+        """
+        if cls.__abstractmethods__:
+            raise TypeError(f"Can't instantiate abstract class {cls.__name__} without an implementation of _get")
+        return super().__new__(cls)
+
+    def __init__(self, n_classes):
+        # The slots of the list only keep its length, they are never read
+        super().__init__([None] * n_classes)
+
+    @abc.abstractmethod
+    def _get(self, index):
+        """
+        Return the value of the class at a non-negative position.
+        """
+
+    def __getitem__(self, index):
+        if isinstance(index, slice):
+            return [self._get(i) for i in range(*index.indices(len(self)))]
+        index = operator.index(index)
+        if not -len(self) <= index < len(self):
+            raise IndexError("list index out of range")
+        return self._get(index % len(self))
+
+    def __iter__(self):
+        for index in range(len(self)):
+            yield self._get(index)
+
+    def __reversed__(self):
+        for index in reversed(range(len(self))):
+            yield self._get(index)
+
+    def __contains__(self, value):
+        return any(value is elem or value == elem for elem in self)
+
+    def __eq__(self, other):
+        return list(self) == other
+
+    def __ne__(self, other):
+        return not self == other
+
+    __hash__ = None
+
+    def __add__(self, other):
+        return list(self) + list(other)
+
+    def __radd__(self, other):
+        return list(other) + list(self)
+
+    def __mul__(self, value):
+        return list(self) * value
+
+    __rmul__ = __mul__
+
+    def __copy__(self):
+        return self.copy()
+
+    def index(self, value, *args):
+        """
+        Return the first index of value, see list.index.
+        """
+        return list(self).index(value, *args)
+
+    def count(self, value):
+        """
+        Return the number of occurrences of value, see list.count.
+        """
+        return list(self).count(value)
+
+    __setitem__ = _read_only("__setitem__")
+    __delitem__ = _read_only("__delitem__")
+    __iadd__ = _read_only("__iadd__")
+    __imul__ = _read_only("__imul__")
+    append = _read_only("append")
+    extend = _read_only("extend")
+    insert = _read_only("insert")
+    pop = _read_only("pop")
+    remove = _read_only("remove")
+    clear = _read_only("clear")
+    sort = _read_only("sort")
+    reverse = _read_only("reverse")
+
+
+class NegatedPair(ClassValues):
+    """
+    Values of the two classes of a binary classification, where the values of
+    the negative class are the opposite of the values of the positive class.
+
+    Only the values of the positive class are stored: the values of the negative class
+    are negated each time they are accessed.
+
+    Parameters
+    ----------
+    positive : pandas.DataFrame, pandas.Series or numpy.ndarray
+        Values of the positive class.
+    """
+
+    def __init__(self, positive):
+        super().__init__(2)
+        self._positive = positive
+
+    @property
+    def positive(self):
+        """
+        Values of the positive class, stored without copy.
+        """
+        return self._positive
+
+    @property
+    def negative(self):
+        """
+        Values of the negative class, computed from the positive class.
+        """
+        return -self._positive
+
+    def _get(self, index):
+        return self.positive if index else self.negative
+
+    def __eq__(self, other):
+        if isinstance(other, NegatedPair) and self.positive is other.positive:
+            return True
+        return super().__eq__(other)
+
+    __hash__ = None
+
+    def __repr__(self):
+        return f"NegatedPair({self.positive!r})"
+
+    def __reduce__(self):
+        return NegatedPair, (self.positive,)
+
+    def copy(self):
+        """
+        Return a shallow copy, which shares the values of the positive class.
+        """
+        return NegatedPair(self.positive)
+
+    def __deepcopy__(self, memo):
+        return NegatedPair(copy.deepcopy(self.positive, memo))
+
+
+class ClassesArray(ClassValues):
+    """
+    DataFrames of the classes of a classification stored as a single array
+    of shape (n_rows, n_columns, n_classes).
+
+    The DataFrame of a class is a view of the array, built on access. All the classes
+    share the same index and columns, so that computations can be vectorized across classes
+    on the array (see ClassesArrayDecorator).
+
+    Parameters
+    ----------
+    values : numpy.ndarray
+        Array of shape (n_rows, n_columns, n_classes).
+    index : pandas.Index, optional
+        Index of the DataFrames. A RangeIndex is used if None.
+    columns : pandas.Index, optional
+        Columns of the DataFrames. A RangeIndex is used if None.
+    """
+
+    def __init__(self, values, index=None, columns=None):
+        if values.ndim != 3:
+            raise ValueError(f"ClassesArray values must have 3 dimensions, got an array of shape {values.shape}.")
+        super().__init__(values.shape[2])
+        self.values = values
+        self.index = pd.RangeIndex(values.shape[0]) if index is None else pd.Index(index)
+        self.columns = pd.RangeIndex(values.shape[1]) if columns is None else pd.Index(columns)
+        self.labelled = index is not None and columns is not None
+
+    @classmethod
+    def from_frames(cls, frames, dtype=None):
+        """
+        Stack DataFrames or 2-D arrays of the same shape.
+
+        Each class is stored contiguously in column-major order, so that the DataFrame
+        views of the classes hold contiguous columns.
+
+        Parameters
+        ----------
+        frames : list of pandas.DataFrame or numpy.ndarray
+            Values of each class. DataFrames must share the same index and columns.
+        dtype : numpy dtype, optional
+            Type of the array. The type of the frames is kept if None.
+
+        Returns
+        -------
+        ClassesArray
+        """
+        index = columns = None
+        if isinstance(frames[0], pd.DataFrame):
+            index, columns = frames[0].index, frames[0].columns
+        stacked = np.stack([np.asarray(frame, dtype=dtype).T for frame in frames])
+        return cls(stacked.transpose(2, 1, 0), index, columns)
+
+    @staticmethod
+    def can_stack(frames):
+        """
+        Check if a list of DataFrames or 2-D arrays can be stored as a ClassesArray.
+        """
+        if len(frames) < 2 or not all(isinstance(frame, np.ndarray | pd.DataFrame) for frame in frames):
+            return False
+        if any(np.ndim(frame) != 2 or frame.shape != frames[0].shape for frame in frames):
+            return False
+        if isinstance(frames[0], pd.DataFrame):
+            return all(
+                isinstance(frame, pd.DataFrame)
+                and frame.index.equals(frames[0].index)
+                and frame.columns.equals(frames[0].columns)
+                for frame in frames
+            )
+        return not any(isinstance(frame, pd.DataFrame) for frame in frames)
+
+    @property
+    def shape(self):
+        """
+        Shape (n_rows, n_columns) of the DataFrame of each class.
+        """
+        return self.values.shape[:2]
+
+    def with_labels(self, values, columns=None):
+        """
+        Return a ClassesArray of new values with the same index, and the same columns if not given.
+        """
+        return ClassesArray(values, self.index, self.columns if columns is None else columns)
+
+    def _get(self, index):
+        return pd.DataFrame(self.values[:, :, index], index=self.index, columns=self.columns, copy=False)
+
+    def __repr__(self):
+        return f"ClassesArray(shape={self.values.shape}, dtype={self.values.dtype})"
+
+    def __reduce__(self):
+        return ClassesArray, (
+            self.values,
+            self.index if self.labelled else None,
+            self.columns if self.labelled else None,
+        )
+
+    def copy(self):
+        """
+        Return a shallow copy, which shares the array.
+        """
+        return ClassesArray(*self.__reduce__()[1])
+
+    def __deepcopy__(self, memo):
+        values, index, columns = self.__reduce__()[1]
+        return ClassesArray(values.copy(), index, columns)
@@ -1,17 +1,19 @@
 import logging
 import re
+from concurrent.futures import ThreadPoolExecutor
 
 import numpy as np
 import pandas as pd
+import shapely
 from plotly.colors import get_colorscale
 from scipy.interpolate import splev, splprep
 from shapely.geometry import MultiPoint, Polygon
-from shapely.ops import triangulate
 from sklearn.cluster import KMeans
+from sklearn.decomposition import PCA
 from sklearn.manifold import TSNE
 from sklearn.preprocessing import LabelEncoder
 
-from shapash.utils.utils import adjust_title_height
+from shapash.utils.utils import adjust_title_height, effective_n_jobs
 
 logger = logging.getLogger(__name__)
 
@@ -20,6 +22,7 @@ def compute_tsne_projection(
     values_to_project: pd.DataFrame,
     random_state: int = 79,
     perplexity: int | None = None,
+    **tsne_params,
 ) -> tuple[np.ndarray, np.ndarray]:
     """
     Compute a 2D TSNE projection of high-dimensional data.
@@ -33,6 +36,9 @@ def compute_tsne_projection(
     perplexity : int or None, default=None
         Perplexity parameter for TSNE. If None, it is automatically set to
         ``min(30, max(2, n_samples // 3))`` to match the original logic.
+    **tsne_params : dict
+        Other parameters of sklearn.manifold.TSNE (init, method, angle, max_iter...),
+        see PROJECTION_METHODS.
 
     Returns
     -------
@@ -45,17 +51,135 @@ def compute_tsne_projection(
     if perplexity is None:
         perplexity = min(30, max(2, n_samples // 3))
 
+    params = {"learning_rate": "auto", "init": "random"} | tsne_params
     projections = TSNE(
         n_components=2,
         perplexity=perplexity,
-        learning_rate="auto",
-        init="random",
         random_state=random_state,
+        **params,
     ).fit_transform(values_to_project)
 
     return projections
 
 
+# Methods of compute_projection: parameters of compute_tsne_projection, or None for a linear projection
+PROJECTION_METHODS = {
+    # Barnes-Hut t-SNE with a random initialization
+    "tsne": {"init": "random"},
+    # Exact t-SNE, quadratic in the number of points: for small samples
+    "tsne_exact": {"init": "random", "method": "exact"},
+    # Barnes-Hut t-SNE initialized with the principal components, which keeps the global structure
+    "tsne_pca": {"init": "pca"},
+    # Barnes-Hut t-SNE with a coarser approximation and fewer iterations
+    "tsne_fast": {"init": "pca", "angle": 0.8, "max_iter": 500, "n_jobs": -1},
+    # First two principal components: a preview computed in milliseconds
+    "pca": None,
+}
+
+
+def compute_projection(
+    values_to_project: pd.DataFrame,
+    method: str = "tsne",
+    random_state: int = 79,
+) -> np.ndarray:
+    """
+    Compute a 2D projection of high-dimensional data with one of the PROJECTION_METHODS.
+
+    Parameters
+    ----------
+    values_to_project : pd.DataFrame
+        DataFrame containing the high-dimensional data to be projected.
+    method : str, default="tsne"
+        "tsne", "tsne_exact", "tsne_pca", "tsne_fast" or "pca", see PROJECTION_METHODS.
+    random_state : int, default=79
+        Random seed for reproducibility of the projection.
+
+    Returns
+    -------
+    np.ndarray
+        Array of shape (n_samples, 2) containing the coordinates of the projection.
+    """
+    if method not in PROJECTION_METHODS:
+        raise ValueError(f"Unknown projection method: {method}. Available methods: {list(PROJECTION_METHODS)}")
+    tsne_params = PROJECTION_METHODS[method]
+    if tsne_params is not None:
+        return compute_tsne_projection(values_to_project, random_state=random_state, **tsne_params)
+
+    values = np.asarray(values_to_project, dtype=np.float64)
+    projections = np.zeros((values.shape[0], 2))
+    n_components = min(2, *values.shape)
+    if n_components > 0:
+        pca = PCA(n_components=n_components, random_state=random_state)
+        projections[:, :n_components] = pca.fit_transform(values)
+    return projections
+
+
+class ProjectionCache:
+    """
+    Memoized 2D projections of contributions and their KMeans clusters, see compute_projection.
+
+    A projection is identified by a key built by the caller from the projected rows, the label,
+    the projected features and the method. It is computed again when the contributions change.
+    The clusters of a projection are memoized per number of clusters: changing the colors,
+    the number of clusters or the style of the plot does not compute the projection again.
+
+    Parameters
+    ----------
+    max_size : int, default=8
+        Number of projections kept, the least recently computed is dropped first.
+    """
+
+    def __init__(self, max_size=8):
+        self.max_size = max_size
+        self._entries = dict()
+
+    def get(self, key, contributions, values_to_project, method="tsne", random_state=79, n_clusters=10):
+        """
+        Return the projection and the clusters of values_to_project, computed on first request.
+
+        Parameters
+        ----------
+        key : tuple
+            Hashable identifier of values_to_project.
+        contributions : object
+            Contributions values_to_project was selected from: the memoized projection is only used
+            while they are the same object.
+        values_to_project : pd.DataFrame
+            DataFrame containing the high-dimensional data to be projected.
+        method : str, default="tsne"
+            Projection method, see compute_projection.
+        random_state : int, default=79
+            Random seed of the projection.
+        n_clusters : int, default=10
+            Number of KMeans clusters.
+
+        Returns
+        -------
+        tuple
+            (projections, labels, centers), see compute_projection and compute_kmeans_labels.
+        """
+        key = (key, method, random_state)
+        entry = self._entries.get(key)
+        if entry is None or entry["contributions"] is not contributions:
+            projections = compute_projection(values_to_project, method=method, random_state=random_state)
+            self._entries.pop(key, None)
+            if len(self._entries) >= self.max_size:
+                del self._entries[next(iter(self._entries))]
+            entry = self._entries[key] = {"contributions": contributions, "projections": projections, "clusters": {}}
+        clusters = entry["clusters"].get(n_clusters)
+        if clusters is None:
+            clusters = entry["clusters"][n_clusters] = compute_kmeans_labels(
+                entry["projections"], n_clusters=n_clusters
+            )
+        return (entry["projections"], *clusters)
+
+    def clear(self):
+        """
+        Drop all the memoized projections.
+        """
+        self._entries = dict()
+
+
 def build_tsne_title(
     title: str | None,
     subtitle: str | None,
@@ -158,19 +282,16 @@ def move_points_towards_centroid(
     np.ndarray
         Moved points.
     """
-    X_moved = np.zeros_like(X)
-
-    for i in range(len(X)):
-        c = centers[labels[i]]
-        p = X[i]
-        X_moved[i] = c + factor * (p - c)
-
-    return X_moved
+    X = np.asarray(X)
+    c = np.asarray(centers)[labels]
+    return (c + factor * (X - c)).astype(X.dtype, copy=False)
 
 
 def compute_concave_hull(
     points: np.ndarray,
     alpha: float = 5.0,
+    max_points: int | None = None,
+    random_state: int = 79,
 ) -> Polygon:
     """
     Compute a concave hull (alpha shape) from points, with robust fallbacks.
@@ -185,7 +306,14 @@ def compute_concave_hull(
     points : np.ndarray of shape (n_points, 2)
         Input points.
     alpha : float, default=5.0
-        Alpha parameter controlling concavity.
+        Alpha parameter controlling concavity: the Delaunay triangles whose area
+        is lower than alpha are merged.
+    max_points : int or None, default=None
+        Point budget of the triangulation. Larger clusters are triangulated on the vertices
+        of their convex hull and a random sample of their points, and alpha is scaled
+        by the sampling ratio so that the shape keeps the same scale.
+    random_state : int, default=79
+        Random seed of the sampling.
 
     Returns
     -------
@@ -196,13 +324,17 @@ def compute_concave_hull(
 
     # --- Attempt concave hull ---
     try:
-        triangles = triangulate(pts)
-        filtered = [tri for tri in triangles if tri.area < alpha]
-
-        if filtered:
-            merged = filtered[0]
-            for tri in filtered[1:]:
-                merged = merged.union(tri)
+        sample = pts
+        if max_points is not None and len(points) > max_points:
+            hull_vertices = shapely.get_coordinates(pts.convex_hull)
+            rows = np.random.default_rng(random_state).choice(len(points), max_points, replace=False)
+            sample = MultiPoint(np.vstack([hull_vertices, points[rows]]))
+            alpha = alpha * len(points) / max_points
+        triangles = shapely.get_parts(shapely.delaunay_triangles(sample))
+        filtered = triangles[shapely.area(triangles) < alpha]
+
+        if len(filtered):
+            merged = shapely.union_all(filtered)
 
             if merged.geom_type == "Polygon" and merged.area > 0:
                 return Polygon(merged.exterior.coords)
@@ -240,6 +372,57 @@ def compute_concave_hull(
     return Polygon(circle)
 
 
+def compute_cluster_polygons(
+    points: np.ndarray,
+    labels: np.ndarray,
+    alpha: float = 5.0,
+    max_points: int | None = 2000,
+    n_jobs: int | None = -1,
+) -> tuple[list[Polygon], list[np.ndarray], np.ndarray]:
+    """
+    Compute the smoothed concave hull of each cluster, see compute_concave_hull and smooth_polygon_contour.
+
+    The clusters are independent: their hulls are computed concurrently in threads,
+    shapely releasing the GIL during the geometric operations.
+
+    Parameters
+    ----------
+    points : np.ndarray of shape (n_points, 2)
+        Input points.
+    labels : np.ndarray
+        Cluster label of each point.
+    alpha : float, default=5.0
+        Alpha parameter of compute_concave_hull.
+    max_points : int or None, default=2000
+        Point budget of the hull of each cluster, see compute_concave_hull.
+    n_jobs : int or None, default=-1
+        Number of threads, following the joblib convention (-1 uses all the processors).
+
+    Returns
+    -------
+    polys : list of Polygon
+        Smoothed hull of each cluster with at least 3 points.
+    centroids : list of np.ndarray
+        Mean point of each of these clusters.
+    valid_labels : np.ndarray
+        Labels of these clusters, in increasing order.
+    """
+    clusters = [(c, points[labels == c]) for c in sorted(np.unique(labels))]
+    clusters = [(c, pts) for c, pts in clusters if pts.shape[0] >= 3]
+
+    def outline(pts):
+        return smooth_polygon_contour(compute_concave_hull(pts, alpha=alpha, max_points=max_points))
+
+    n_workers = min(effective_n_jobs(n_jobs), len(clusters))
+    if n_workers < 2:
+        polys = [outline(pts) for _, pts in clusters]
+    else:
+        with ThreadPoolExecutor(max_workers=n_workers) as executor:
+            polys = list(executor.map(outline, [pts for _, pts in clusters]))
+    centroids = [pts.mean(axis=0) for _, pts in clusters]
+    return polys, centroids, np.array([c for c, _ in clusters])
+
+
 def smooth_polygon_contour(
     poly: Polygon,
     smoothing: float = 0.02,
@@ -370,7 +553,8 @@ def expand_polygons_independently(
     """
     n = len(polys)
     scales = np.ones(n)
-    curr_polys = polys.copy()
+    curr_polys = np.array(polys, dtype=object)
+    shapely.prepare(curr_polys)
     active = [True] * n
 
     for _ in range(max_iter):
@@ -382,19 +566,21 @@ def expand_polygons_independently(
 
             candidate = _scale_polygon(polys[i], centers[i], scales[i] + eps)
 
-            collision = any(candidate.intersects(curr_polys[j]) for j in range(n) if j != i)
+            others = np.delete(curr_polys, i)
+            collision = bool(shapely.intersects(others, candidate).any())
 
             if collision:
                 active[i] = False
             else:
                 scales[i] += eps
+                shapely.prepare(candidate)
                 curr_polys[i] = candidate
                 any_growth = True
 
         if not any_growth:
             break
 
-    return curr_polys, scales
+    return list(curr_polys), scales
 
 
 def scale_points_within_cluster(
@@ -427,16 +613,13 @@ def scale_points_within_cluster(
     """
     X_scaled = X.copy()
 
-    for i in range(len(X)):
-        lab = labels[i]
-
-        if lab not in label_to_index:
-            continue  # cluster without valid patate
-
-        idx = label_to_index[lab]
-        c = centers[idx]
-        X_scaled[i] = c + scales[idx] * (X[i] - c)
+    # Index of the cluster of each point in centers/scales, -1 for the clusters without polygon
+    unique_labels, inverse = np.unique(labels, return_inverse=True)
+    idx = np.array([label_to_index.get(lab, -1) for lab in unique_labels], dtype=int)[inverse]
+    found = idx >= 0
 
+    c = np.asarray(centers)[idx[found]]
+    X_scaled[found] = c + np.asarray(scales)[idx[found], np.newaxis] * (X[found] - c)
     return X_scaled
 
 
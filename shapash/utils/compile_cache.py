@@ -0,0 +1,157 @@
+"""
+Compile cache module
+"""
+
+import logging
+import os
+import shutil
+import types
+import warnings
+
+from shapash.__version__ import __version__ as shapash_version
+from shapash.utils.io import (
+    _compute_dataframe_fingerprint,
+    _compute_object_fingerprint,
+    _compute_schema_fingerprint,
+    _detect_model_framework,
+    load_dir,
+    save_dir,
+)
+
+logger = logging.getLogger(__name__)
+
+# Backend attributes that are fingerprinted separately or change when the explainer is compiled
+_BACKEND_RUNTIME_ATTRIBUTES = ("model", "preprocessing", "state", "explain_data", "_explainer", "_explainer_is_built")
+
+
+def _backend_description(explainer):
+    """
+    Return a picklable description of the backend of an explainer.
+    """
+    if explainer.backend_name is not None:
+        return explainer.backend_name, explainer.backend_kwargs
+    backend = explainer.backend
+    attributes = {k: v for k, v in vars(backend).items() if k not in _BACKEND_RUNTIME_ATTRIBUTES}
+    return type(backend).__module__, type(backend).__qualname__, attributes
+
+
+def compute_compile_key(explainer, x):
+    """
+    Compute the key of the compile cache of an explainer for a dataset.
+
+    The key is a fingerprint of everything the cached results depend on:
+    the model and its framework version, the preprocessing, the backend,
+    the schema of the explainer (features, types and labels) and the content of x.
+
+    Parameters
+    ----------
+    explainer : SmartExplainer
+        Explainer being compiled
+    x : pandas.DataFrame
+        Dataset given to compile
+
+    Returns
+    -------
+    str
+        Hexadecimal SHA-256 key
+    """
+    schema = types.SimpleNamespace(
+        features_dict=explainer.features_dict,
+        features_types={str(col): str(dtype) for col, dtype in x.dtypes.items()},
+        columns_dict=dict(enumerate(str(col) for col in x.columns)),
+        label_dict=explainer.label_dict,
+    )
+    fingerprints = [
+        shapash_version,
+        str(_detect_model_framework(explainer.model)),
+        _compute_object_fingerprint(explainer.model),
+        _compute_object_fingerprint(explainer.preprocessing),
+        _compute_object_fingerprint(_backend_description(explainer)),
+        _compute_schema_fingerprint(schema),
+        _compute_dataframe_fingerprint(x),
+    ]
+    return _compute_object_fingerprint(fingerprints).split(":")[1]
+
+
+class CompileCache:
+    """
+    On-disk cache of the expensive results of SmartExplainer.compile
+    (predictions, probabilities and contributions computed by the backend).
+
+    Each entry is a directory of cache_dir named after the key of the compilation,
+    see compute_compile_key. It is written with save_dir.
+
+    Parameters
+    ----------
+    cache_dir : str
+        Directory of the cache
+    key : str
+        Key of the compilation
+    """
+
+    def __init__(self, cache_dir, key):
+        self.cache_dir = cache_dir
+        self.key = key
+        self.path = os.path.join(cache_dir, key)
+        self._values = self._read()
+        self._modified = False
+
+    @classmethod
+    def from_explainer(cls, cache_dir, explainer, x):
+        """
+        Open the cache entry of an explainer for a dataset.
+        Return None, with a warning, if the explainer cannot be fingerprinted (e.g. an unpicklable model).
+        """
+        try:
+            key = compute_compile_key(explainer, x)
+        except Exception as e:
+            warnings.warn(
+                f"Compile cache disabled, the explainer cannot be fingerprinted: {e}", UserWarning, stacklevel=3
+            )
+            return None
+        return cls(cache_dir, key)
+
+    def _read(self):
+        if not os.path.isdir(self.path):
+            return dict()
+        try:
+            values = load_dir(self.path, mmap=False)
+        except Exception as e:
+            logger.warning(f"Ignoring unreadable compile cache entry {self.path}: {e}")
+            return dict()
+        logger.info(f"Compile cache hit: {self.path}")
+        return values
+
+    def get(self, name):
+        """
+        Return the cached value of name, or None.
+        """
+        return self._values.get(name)
+
+    def set(self, name, value):
+        """
+        Store a value in the entry. It is written on disk by save.
+        """
+        if value is not None:
+            self._values[name] = value
+            self._modified = True
+
+    def save(self):
+        """
+        Write the entry on disk if it has been modified.
+        The entry is written in a temporary directory first, so that readers never see a partial entry.
+        """
+        if not self._modified:
+            return
+        tmp_path = f"{self.path}.tmp-{os.getpid()}"
+        try:
+            if os.path.isdir(tmp_path):
+                shutil.rmtree(tmp_path)
+            save_dir(self._values, tmp_path)
+            if os.path.isdir(self.path):
+                shutil.rmtree(self.path)
+            os.replace(tmp_path, self.path)
+        except OSError as e:
+            logger.warning(f"Could not write the compile cache entry {self.path}: {e}")
+            shutil.rmtree(tmp_path, ignore_errors=True)
+        self._modified = False
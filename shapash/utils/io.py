@@ -4,16 +4,23 @@ IO module
 
 import datetime
 import hashlib
+import itertools
 import json
 import os
 import pickle
+import re
 import sys
 import warnings
 from importlib.metadata import PackageNotFoundError
 from importlib.metadata import version as _pkg_version
 from typing import Any
 
+import numpy as np
+import pandas as pd
+
 from shapash.__version__ import __version__ as shapash_version
+from shapash._optional import import_optional_module
+from shapash.utils.class_values import ClassesArray, NegatedPair
 
 try:
     import yaml
@@ -23,6 +30,9 @@ except ImportError:
     _is_yaml_available = False
 
 MANIFEST_SUFFIX = ".manifest.json"
+DIR_METADATA_FILE = "metadata.pkl"
+DIR_FORMAT_VERSION = 2
+PREDICTOR_ARTIFACT_VERSION = 1
 
 _MODEL_FRAMEWORK_MAP = {
     "sklearn": "scikit-learn",
@@ -87,6 +97,473 @@ def load_pickle(path):
     return pklobj
 
 
+class _StoredData:
+    """
+    Placeholder of a DataFrame, Series or array saved in its own file by save_dir.
+
+    Parameters
+    ----------
+    file : str
+        Name of the file in the directory
+    kind : str
+        'frame', 'series', 'array' or 'classes' (ClassesArray)
+    storage : str
+        'npy' (memory-mappable numpy file), 'arrow' (Arrow IPC file) or 'columns'
+        (one .npy file per numeric column, the other columns in the Arrow file)
+    index : pd.Index, optional
+        Index of the DataFrame or Series
+    columns : pd.Index, optional
+        Columns of the DataFrame
+    name : object, optional
+        Name of the Series
+    column_files : list, optional
+        With the 'columns' storage, the .npy file of each column, None for the columns of the Arrow file
+    """
+
+    def __init__(self, file, kind, storage, index=None, columns=None, name=None, column_files=None):
+        self.file = file
+        self.kind = kind
+        self.storage = storage
+        self.index = index
+        self.columns = columns
+        self.name = name
+        self.column_files = column_files
+
+
+def _import_pyarrow():
+    """
+    Import pyarrow and its IPC module, or return None if pyarrow is not installed.
+    """
+    pyarrow = import_optional_module("pyarrow", errors="ignore")
+    if pyarrow is not None:
+        import_optional_module("pyarrow.ipc")
+    return pyarrow
+
+
+def _is_numpy_numeric(dtype):
+    return isinstance(dtype, np.dtype) and dtype.kind in "biufcmM"
+
+
+def _write_arrow(frame, file_path, pyarrow):
+    """
+    Write the columns of a DataFrame in an Arrow IPC file. Return False if they cannot be converted.
+    """
+    table_frame = frame.set_axis([str(i) for i in range(frame.shape[1])], axis=1).reset_index(drop=True)
+    try:
+        table = pyarrow.Table.from_pandas(table_frame, preserve_index=False)
+    except (pyarrow.ArrowException, TypeError, ValueError):
+        return False
+    with pyarrow.OSFile(file_path, "wb") as sink:
+        with pyarrow.ipc.new_file(sink, table.schema) as writer:
+            writer.write_table(table)
+    return True
+
+
+def _read_arrow(file_path, mmap, pyarrow):
+    """
+    Read a DataFrame written by _write_arrow. Its columns are converted to pandas, hence read in memory.
+    """
+    if pyarrow is None:
+        pyarrow = import_optional_module("pyarrow", extra="It is required to load this explainer.")
+        import_optional_module("pyarrow.ipc")
+    source = pyarrow.memory_map(file_path, "r") if mmap else pyarrow.OSFile(file_path, "rb")
+    with source:
+        return pyarrow.ipc.open_file(source).read_all().to_pandas()
+
+
+def _store_data(value, path, file_prefix, counter, files, pyarrow):
+    """
+    Write the DataFrames, Series and numeric arrays found in value to files,
+    and return value where they are replaced by _StoredData placeholders.
+    """
+    if isinstance(value, dict) and type(value) is dict:
+        return {
+            key: _store_data(val, path, f"{file_prefix}_{key}", counter, files, pyarrow) for key, val in value.items()
+        }
+    if isinstance(value, NegatedPair):
+        return NegatedPair(_store_data(value.positive, path, f"{file_prefix}_1", counter, files, pyarrow))
+    if isinstance(value, ClassesArray):
+        stored = _store_data(value.values, path, file_prefix, counter, files, pyarrow)
+        if not isinstance(stored, _StoredData):
+            return value
+        stored.kind = "classes"
+        if value.labelled:
+            stored.index, stored.columns = value.index, value.columns
+        return stored
+    if type(value) in (list, tuple):
+        return type(value)(
+            _store_data(val, path, f"{file_prefix}_{i}", counter, files, pyarrow) for i, val in enumerate(value)
+        )
+    if not isinstance(value, pd.DataFrame | pd.Series | np.ndarray) or value.size == 0:
+        return value
+
+    file_name = f"{next(counter):04d}_{re.sub(r'[^0-9a-zA-Z_]', '_', str(file_prefix))[:60]}"
+    if isinstance(value, np.ndarray):
+        if not _is_numpy_numeric(value.dtype):
+            return value
+        stored = _StoredData(file_name + ".npy", "array", "npy")
+        np.save(os.path.join(path, stored.file), value, allow_pickle=False)
+    else:
+        frame = value.to_frame() if isinstance(value, pd.Series) else value
+        kind = "series" if isinstance(value, pd.Series) else "frame"
+        is_numeric = [_is_numpy_numeric(dtype) for dtype in frame.dtypes]
+        if all(is_numeric) and len(set(frame.dtypes)) == 1:
+            # Column-major layout: pandas uses the transposed array as a single block, without copy
+            stored = _StoredData(file_name + ".npy", kind, "npy")
+            np.save(os.path.join(path, stored.file), np.asfortranarray(frame.to_numpy()), allow_pickle=False)
+        elif all(is_numeric) or pyarrow is not None:
+            # Each numeric column in its own .npy file, so that they are all memory-mapped when loaded
+            stored = _StoredData(None, kind, "columns")
+            if not all(is_numeric):
+                stored.file = file_name + ".arrow"
+                others = frame.iloc[:, [i for i, numeric in enumerate(is_numeric) if not numeric]]
+                if not _write_arrow(others, os.path.join(path, stored.file), pyarrow):
+                    # Mixed types in object columns cannot be converted: kept in the metadata pickle
+                    return value
+            stored.column_files = [f"{file_name}_{i}.npy" if numeric else None for i, numeric in enumerate(is_numeric)]
+            for i, column_file in enumerate(stored.column_files):
+                if column_file is not None:
+                    np.save(os.path.join(path, column_file), frame.iloc[:, i].to_numpy(), allow_pickle=False)
+        else:
+            return value
+        stored.index = value.index
+        if kind == "frame":
+            stored.columns = value.columns
+        else:
+            stored.name = value.name
+    files.extend(file for file in [stored.file, *(stored.column_files or [])] if file is not None)
+    return stored
+
+
+def _load_data(value, path, mmap, pyarrow):
+    """
+    Replace the _StoredData placeholders found in value by the data read from their files.
+    """
+    if isinstance(value, dict) and type(value) is dict:
+        return {key: _load_data(val, path, mmap, pyarrow) for key, val in value.items()}
+    if isinstance(value, NegatedPair):
+        return NegatedPair(_load_data(value.positive, path, mmap, pyarrow))
+    if type(value) in (list, tuple):
+        return type(value)(_load_data(val, path, mmap, pyarrow) for val in value)
+    if not isinstance(value, _StoredData):
+        return value
+
+    # Copy-on-write mapping: pages are shared between processes until they are modified
+    mmap_mode = "c" if mmap else None
+    if value.storage == "npy":
+        array = np.load(os.path.join(path, value.file), mmap_mode=mmap_mode, allow_pickle=False)
+        if value.kind == "array":
+            return array
+        if value.kind == "classes":
+            return ClassesArray(array, value.index, value.columns)
+        frame = pd.DataFrame(array, index=value.index, copy=False)
+    elif value.storage == "columns":
+        others = None
+        if value.file is not None:
+            others = _read_arrow(os.path.join(path, value.file), mmap, pyarrow)
+            others.index = value.index
+        columns = dict()
+        position = 0
+        for i, column_file in enumerate(value.column_files):
+            if column_file is None:
+                columns[i] = others.iloc[:, position]
+                position += 1
+            else:
+                array = np.load(os.path.join(path, column_file), mmap_mode=mmap_mode, allow_pickle=False)
+                columns[i] = array.view(np.ndarray)
+        # The numeric columns stay memory-mapped: pandas keeps each array as its own block, without copy
+        frame = pd.DataFrame(columns, index=value.index, copy=False)
+    else:
+        frame = _read_arrow(os.path.join(path, value.file), mmap, pyarrow)
+        frame.index = value.index
+    if value.kind == "series":
+        series = frame.iloc[:, 0]
+        series.name = value.name
+        return series
+    frame.columns = value.columns
+    return frame
+
+
+def save_dir(attributes, path):
+    """
+    Save a dict of attributes in a directory.
+
+    DataFrames, Series and numeric arrays, including the ones nested in lists or dicts,
+    are written in separate files. The numeric data (numbers, booleans and dates) is written
+    as .npy files: a single file for the DataFrames whose columns all have the same type,
+    one file per column for the others. The object, string and categorical columns are written
+    in an Arrow file when pyarrow is installed. Everything else is saved in a small metadata pickle.
+
+    Parameters
+    ----------
+    attributes : dict
+        Attributes to save
+    path : str
+        Directory where the files are written. It is created if needed.
+    """
+    if not isinstance(path, str):
+        raise ValueError(
+            """
+            path parameter must be a string
+            """
+        )
+    metadata_path = os.path.join(path, DIR_METADATA_FILE)
+    if os.path.isdir(path) and os.listdir(path):
+        if not os.path.exists(metadata_path):
+            raise ValueError(
+                f"""
+                {path} is not empty and does not contain a saved object
+                """
+            )
+        # Remove the files of the previous save
+        for file in load_pickle(metadata_path)["files"]:
+            if os.path.exists(os.path.join(path, file)):
+                os.remove(os.path.join(path, file))
+    os.makedirs(path, exist_ok=True)
+
+    pyarrow = _import_pyarrow()
+
+    files = []
+    counter = itertools.count()
+    stored = {key: _store_data(value, path, key, counter, files, pyarrow) for key, value in attributes.items()}
+    save_pickle({"format_version": DIR_FORMAT_VERSION, "attributes": stored, "files": files}, metadata_path)
+
+
+def load_dir(path, mmap=True):
+    """
+    Load a dict of attributes saved with save_dir.
+
+    Parameters
+    ----------
+    path : str
+        Directory written by save_dir
+    mmap : bool (default: True)
+        Memory-map the data files instead of reading them. The pages are only read when they are used
+        and are shared by the processes opening the same directory. Only the numeric data, saved
+        as .npy files, is mapped: the object, string and categorical columns of the Arrow files
+        are read in memory when they are converted to pandas.
+
+    Returns
+    -------
+    dict
+        Saved attributes
+    """
+    if not isinstance(path, str):
+        raise ValueError(
+            """
+            path parameter must be a string
+            """
+        )
+    metadata = load_pickle(os.path.join(path, DIR_METADATA_FILE))
+    if metadata.get("format_version", 0) > DIR_FORMAT_VERSION:
+        raise ValueError(
+            f"""
+            {path} was saved with a more recent version of shapash
+            """
+        )
+    pyarrow = _import_pyarrow()
+    return _load_data(metadata["attributes"], path, mmap, pyarrow)
+
+
+def _save_native_model(model, path, file_prefix="model"):
+    """
+    Save a model in the native format of its framework.
+
+    XGBoost models are saved as JSON, CatBoost models as .cbm files and LightGBM boosters
+    as text files. Other models (scikit-learn, LightGBM scikit-learn wrappers, ...) are
+    saved with joblib.
+
+    Parameters
+    ----------
+    model : model object
+        Model to save
+    path : str
+        Directory where the model file is written
+    file_prefix : str (default: "model")
+        Name of the model file, without extension
+
+    Returns
+    -------
+    dict
+        Description of the saved model, used by _load_native_model
+    """
+    model_type = type(model)
+    top = (model_type.__module__ or "").split(".")[0]
+    if top == "xgboost" and hasattr(model, "save_model"):
+        model_format, extension = "xgboost-json", ".json"
+    elif top == "catboost" and hasattr(model, "save_model"):
+        model_format, extension = "catboost-cbm", ".cbm"
+    elif top == "lightgbm" and model_type.__name__ == "Booster":
+        model_format, extension = "lightgbm-text", ".txt"
+    else:
+        model_format, extension = "joblib", ".joblib"
+
+    model_info = {
+        "file": file_prefix + extension,
+        "format": model_format,
+        "module": model_type.__module__,
+        "class": model_type.__qualname__,
+    }
+    file_path = os.path.join(path, model_info["file"])
+    if model_format == "joblib":
+        joblib = import_optional_module("joblib")
+        joblib.dump(model, file_path)
+    else:
+        model.save_model(file_path)
+    return model_info
+
+
+def _load_native_model(path, model_info):
+    """
+    Load a model saved with _save_native_model.
+
+    Parameters
+    ----------
+    path : str
+        Directory of the model file
+    model_info : dict
+        Description of the saved model returned by _save_native_model
+
+    Returns
+    -------
+    model object
+    """
+    file_path = os.path.join(path, model_info["file"])
+    if model_info["format"] == "joblib":
+        joblib = import_optional_module("joblib")
+        return joblib.load(file_path)
+    module = import_optional_module(model_info["module"], extra="It is required to load this model.")
+    model_class = getattr(module, model_info["class"])
+    if model_info["format"] == "lightgbm-text":
+        return model_class(model_file=file_path)
+    model = model_class()
+    model.load_model(file_path)
+    return model
+
+
+def _json_default(obj):
+    """
+    Convert the numpy objects that json cannot serialize.
+    """
+    if isinstance(obj, np.generic):
+        return obj.item()
+    if isinstance(obj, np.ndarray):
+        return obj.tolist()
+    raise TypeError(f"Object of type {type(obj).__name__} is not JSON serializable")
+
+
+def _encode_mapping(mapping):
+    """
+    Encode a dict as a list of [key, value] pairs, so that non string keys survive the json round trip.
+    """
+    if mapping is None:
+        return None
+    return [[key, value] for key, value in mapping.items()]
+
+
+def _decode_mapping(pairs):
+    """
+    Decode a list of [key, value] pairs written by _encode_mapping.
+    """
+    if pairs is None:
+        return None
+    return {(tuple(key) if isinstance(key, list) else key): value for key, value in pairs}
+
+
+def save_json(obj, path):
+    """
+    Save a python object in a json file. Numpy scalars and arrays are converted to python objects.
+
+    Parameters
+    ----------
+    obj : dict or list
+    path : str
+        File path where the json file will be stored.
+    """
+    with open(path, "w", encoding="utf-8") as f:
+        json.dump(obj, f, indent=2, ensure_ascii=False, default=_json_default)
+
+
+def load_json(path):
+    """
+    Load a json file.
+
+    Parameters
+    ----------
+    path : str
+        File path where the json file is stored.
+
+    Returns
+    -------
+    object that the json file contains
+    """
+    with open(path, encoding="utf-8") as f:
+        return json.load(f)
+
+
+class _ExternalPickler(pickle.Pickler):
+    """
+    Pickler that replaces some objects by a reference, so that they are not pickled twice.
+    """
+
+    def __init__(self, file, external, protocol=pickle.HIGHEST_PROTOCOL):
+        super().__init__(file, protocol=protocol)
+        self._external = {id(value): key for key, value in external.items() if value is not None}
+
+    def persistent_id(self, obj):
+        return self._external.get(id(obj))
+
+
+class _ExternalUnpickler(pickle.Unpickler):
+    """
+    Unpickler that resolves the references written by _ExternalPickler.
+    """
+
+    def __init__(self, file, external):
+        super().__init__(file)
+        self._external = external
+
+    def persistent_load(self, pid):
+        if pid not in self._external:
+            raise pickle.UnpicklingError(f"Unknown external object {pid}")
+        return self._external[pid]()
+
+
+def save_pickle_with_external(obj, path, external):
+    """
+    Save a python object in a pickle file, without the objects of external.
+
+    Parameters
+    ----------
+    obj : any Python Object
+    path : str
+        File path where the pickled object will be stored.
+    external : dict
+        {name: object} objects saved elsewhere. They are stored as references to their name.
+    """
+    with open(path, "wb") as file:
+        _ExternalPickler(file, external).dump(obj)
+
+
+def load_pickle_with_external(path, external):
+    """
+    Load a pickle file written by save_pickle_with_external.
+
+    Parameters
+    ----------
+    path : str
+        File path where the pickled object is stored.
+    external : dict
+        {name: callable} functions returning the external objects.
+
+    Returns
+    -------
+    object that pickle file contains
+    """
+    with open(path, "rb") as file:
+        return _ExternalUnpickler(file, external).load()  # noqa: S301 — caller is responsible for providing trusted paths
+
+
 def load_yml(path):
     """
     Loads a yml file
@@ -133,8 +610,15 @@ def _detect_model_framework(model: Any) -> dict:
     Recognised frameworks: scikit-learn, xgboost, lightgbm, catboost. Anything else falls
     through with the top-level module name as the framework name.
     """
-    module = type(model).__module__ or ""
-    top = module.split(".")[0]
+    return _detect_module_framework(type(model).__module__)
+
+
+def _detect_module_framework(module: str | None) -> dict:
+    """
+    Return the ``{"name", "version"}`` dict of the framework of a model defined in ``module``,
+    see ``_detect_model_framework``.
+    """
+    top = (module or "").split(".")[0]
     name = _MODEL_FRAMEWORK_MAP.get(top, top or "unknown")
     version = _try_package_version(top) if top else None
     return {"name": name, "version": version}
@@ -163,6 +647,25 @@ def _compute_schema_fingerprint(predictor: Any) -> str:
     return f"sha256:{digest}"
 
 
+def _compute_object_fingerprint(obj: Any) -> str:
+    """
+    Return a SHA-256 fingerprint of the pickled content of ``obj`` (a model, a preprocessing, ...).
+    Raises ``pickle.PicklingError`` or ``TypeError`` if the object cannot be pickled.
+    """
+    digest = hashlib.sha256(pickle.dumps(obj, protocol=pickle.HIGHEST_PROTOCOL)).hexdigest()
+    return f"sha256:{digest}"
+
+
+def _compute_dataframe_fingerprint(df: pd.DataFrame) -> str:
+    """
+    Return a SHA-256 fingerprint of the content of ``df``: its values, index, columns and dtypes.
+    """
+    sha = hashlib.sha256()
+    sha.update(json.dumps([[str(col), str(dtype)] for col, dtype in df.dtypes.items()]).encode("utf-8"))
+    sha.update(pd.util.hash_pandas_object(df, index=True).to_numpy().tobytes())
+    return f"sha256:{sha.hexdigest()}"
+
+
 def _build_predictor_manifest(predictor: Any) -> dict:
     """Return the manifest dict describing the runtime state used to save ``predictor``."""
     return {
@@ -205,11 +708,12 @@ def _parse_major_minor(version_str: str) -> tuple | None:
     return (major, minor)
 
 
-def _check_predictor_manifest(manifest: dict, predictor: Any) -> None:
+def _check_predictor_manifest(manifest: dict, predictor: Any, model_framework: dict | None = None) -> None:
     """
     Validate ``manifest`` against the loaded ``predictor``. Raises ``ValueError`` on
     critical mismatches (schema fingerprint, major shapash version) and emits
     ``UserWarning`` for minor skews (minor shapash version, model framework version).
+    ``model_framework`` is the framework of the model when it is not loaded yet.
     """
     expected_fp = manifest.get("schema_fingerprint")
     actual_fp = _compute_schema_fingerprint(predictor)
@@ -238,7 +742,7 @@ def _check_predictor_manifest(manifest: dict, predictor: Any) -> None:
             )
 
     saved_fw = manifest.get("model_framework") or {}
-    current_fw = _detect_model_framework(predictor.model)
+    current_fw = model_framework if model_framework is not None else _detect_model_framework(predictor.model)
     if (
         saved_fw.get("name")
         and saved_fw.get("name") == current_fw.get("name")
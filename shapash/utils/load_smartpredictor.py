@@ -2,10 +2,11 @@
 load_smartpredictor module
 """
 
+import os
 import warnings
 
 from shapash.explainer.smart_predictor import SmartPredictor
-from shapash.utils.io import _check_predictor_manifest, _load_manifest, load_pickle
+from shapash.utils.io import _check_predictor_manifest, _detect_module_framework, _load_manifest, load_pickle
 
 
 def load_smartpredictor(path: str) -> SmartPredictor:
@@ -15,11 +16,12 @@ def load_smartpredictor(path: str) -> SmartPredictor:
     Parameters
     ----------
     path : str
-        File path of the pickle file.
+        File path of the pickle file, or directory saved with ``predictor.save(path, format="dir")``.
 
     Example
     --------
     >>> predictor = load_smartpredictor('path_to_pkl/predictor.pkl')
+    >>> predictor = load_smartpredictor('path_to_dir')
 
     Notes
     -----
@@ -29,7 +31,19 @@ def load_smartpredictor(path: str) -> SmartPredictor:
     ``ValueError`` is raised. Minor shapash and model-framework version skews emit a
     ``UserWarning``. Predictors saved without a manifest still load, with a
     ``DeprecationWarning``.
+
+    A directory artifact always contains its manifest, which is checked the same way.
+    Its model and backend are only loaded on first use.
     """
+    if os.path.isdir(path):
+        manifest = _load_manifest(os.path.join(path, "predictor"))
+        if manifest is None or "artifact" not in manifest:
+            raise ValueError(f"{path} does not contain a SmartPredictor artifact")
+        predictor = SmartPredictor._load_artifact(path, manifest)
+        model_framework = _detect_module_framework(manifest["artifact"]["model"]["module"])
+        _check_predictor_manifest(manifest, predictor, model_framework=model_framework)
+        return predictor
+
     predictor = load_pickle(path)
     if not isinstance(predictor, SmartPredictor):
         raise ValueError(f"{predictor} is not an instance of type SmartPredictor")
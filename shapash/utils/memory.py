@@ -0,0 +1,165 @@
+"""
+Memory report module
+"""
+
+import sys
+import time
+import tracemalloc
+
+import pandas as pd
+
+_PROC_STATUS = "/proc/self/status"
+_PROC_CLEAR_REFS = "/proc/self/clear_refs"
+_REPORT_COLUMNS = ["stage", "seconds", "rss_mb", "peak_rss_mb", "allocated_mb", "peak_allocated_mb"]
+
+
+def _read_proc_status(field):
+    """
+    Read a memory field of /proc/self/status (Linux), in bytes. Return None if not available.
+    """
+    try:
+        with open(_PROC_STATUS) as status:
+            for line in status:
+                if line.startswith(field + ":"):
+                    return int(line.split()[1]) * 1024
+    except OSError:
+        return None
+    return None
+
+
+def get_current_rss():
+    """
+    Return the resident set size of the current process in bytes, or None if it cannot be read.
+    """
+    return _read_proc_status("VmRSS")
+
+
+def get_peak_rss():
+    """
+    Return the peak resident set size of the current process in bytes, or None if it cannot be read.
+
+    The peak is read from /proc on Linux, where it can be reset with reset_peak_rss.
+    Other platforms use resource.getrusage, which gives the peak since the start of the process.
+    """
+    peak = _read_proc_status("VmHWM")
+    if peak is not None:
+        return peak
+    try:
+        import resource  # noqa: PLC0415
+    except ImportError:
+        return None
+    max_rss = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    # ru_maxrss is given in bytes on macOS and in kilobytes elsewhere
+    return max_rss if sys.platform == "darwin" else max_rss * 1024
+
+
+def reset_peak_rss():
+    """
+    Reset the peak resident set size of the current process when the platform allows it.
+
+    Returns
+    -------
+    bool
+        True if the peak has been reset.
+    """
+    try:
+        with open(_PROC_CLEAR_REFS, "w") as clear_refs:
+            clear_refs.write("5")
+    except OSError:
+        return False
+    return True
+
+
+class MemoryReport:
+    """
+    Per-stage memory report of a computation.
+
+    The computation calls `checkpoint` at the end of each stage. The figures of a stage are:
+        - the duration of the stage,
+        - the resident set size of the process at the end of the stage,
+        - the peak resident set size during the stage (since the start of the process
+          on platforms where the peak cannot be reset),
+        - the memory allocated by Python and numpy during the stage and its peak, traced with tracemalloc.
+
+    A disabled report does nothing, so that it can be created unconditionally.
+    Used as a context manager, the report is stopped when the computation ends, even on error.
+
+    Parameters
+    ----------
+    enabled : bool (default: True)
+        Whether the figures are recorded.
+    """
+
+    def __init__(self, enabled=True):
+        self.enabled = enabled
+        self.stages = list()
+        self.report = None
+        self._started_tracemalloc = False
+        if not enabled:
+            return
+        if not tracemalloc.is_tracing():
+            tracemalloc.start()
+            self._started_tracemalloc = True
+        self._peak_reset = reset_peak_rss()
+        tracemalloc.reset_peak()
+        self._traced_start = tracemalloc.get_traced_memory()[0]
+        self._time_start = time.perf_counter()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc_value, traceback):
+        self.stop()
+        return False
+
+    def checkpoint(self, stage):
+        """
+        Record the figures of the stage that ends now and start the next one.
+
+        Parameters
+        ----------
+        stage : str
+            Name of the stage that ends.
+        """
+        if not self.enabled:
+            return
+        traced, traced_peak = tracemalloc.get_traced_memory()
+        now = time.perf_counter()
+        peak_rss = get_peak_rss()
+        self.stages.append(
+            {
+                "stage": stage,
+                "seconds": now - self._time_start,
+                "rss_mb": _to_mb(get_current_rss()),
+                "peak_rss_mb": _to_mb(peak_rss),
+                "allocated_mb": _to_mb(traced - self._traced_start),
+                "peak_allocated_mb": _to_mb(traced_peak - self._traced_start),
+            }
+        )
+        self._peak_reset = reset_peak_rss()
+        tracemalloc.reset_peak()
+        self._traced_start = traced
+        self._time_start = time.perf_counter()
+
+    def stop(self):
+        """
+        Stop tracing the allocations if the report started it, and return the report.
+
+        Returns
+        -------
+        pandas.DataFrame or None
+            One row per stage, indexed by the name of the stage. None if the report is disabled.
+        """
+        if not self.enabled:
+            return None
+        if self._started_tracemalloc:
+            tracemalloc.stop()
+            self._started_tracemalloc = False
+        self.report = pd.DataFrame(self.stages, columns=_REPORT_COLUMNS).set_index("stage")
+        # False when the peak RSS could not be reset: it is then the peak since the start of the process
+        self.report.attrs["peak_rss_per_stage"] = self._peak_reset
+        return self.report
+
+
+def _to_mb(value):
+    return None if value is None else value / 1024**2
@@ -129,10 +129,14 @@ def predict_error(y_target, y_pred, model_type, proba_values=None, classes=None)
 
     # ================= REGRESSION =================
     if model_type == "regression":
+        # Computed in float64 even if the predictions are stored in a smaller type
+        y_pred_values = y_pred.values
+        if y_pred_values.dtype.kind == "f":
+            y_pred_values = y_pred_values.astype(np.float64, copy=False)
         if (y_target == 0).any().iloc[0]:
-            prediction_error = abs(y_target.values - y_pred.values)
+            prediction_error = abs(y_target.values - y_pred_values)
         else:
-            prediction_error = abs((y_target.values - y_pred.values) / y_target.values)
+            prediction_error = abs((y_target.values - y_pred_values) / y_target.values)
 
         return pd.DataFrame(prediction_error, index=y_target.index, columns=["_error_"])
 
@@ -151,7 +155,7 @@ def predict_error(y_target, y_pred, model_type, proba_values=None, classes=None)
         except KeyError as err:
             raise ValueError(f"Unknown label in y_target: {err}") from err
 
-        proba_true = proba_values.to_numpy()[np.arange(len(proba_values)), col_indices.to_numpy()]
+        proba_true = proba_values.to_numpy(dtype=np.float64)[np.arange(len(proba_values)), col_indices.to_numpy()]
 
         # Erreur = 1 - proba de la vraie classe
         errors = np.abs(1 - proba_true)
@@ -1,8 +1,5 @@
-import random
-
 import numpy as np
 import pandas as pd
-from sklearn.cluster import KMeans
 
 
 def subset_sampling(df, selection=None, max_points=2000, col=None, col_value_count=0):
@@ -25,94 +22,140 @@ def subset_sampling(df, selection=None, max_points=2000, col=None, col_value_cou
     tuple
         A tuple containing the selected indices and an additional note.
     """
-    random_seed = 79
-    random.seed(random_seed)
-
-    # Determine the sampling strategy
-    selected_indices, additional_note = _determine_sampling_strategy(
-        df, selection, max_points, col, col_value_count, random_seed
-    )
-
-    # Format the additional note
-    if additional_note is not None:
-        additional_note = _format_additional_note(df, selected_indices, additional_note)
+    return SubsetSampler(df).sample(selection, max_points, col, col_value_count)
 
-    return selected_indices, additional_note
 
-
-def _determine_sampling_strategy(df, selection, max_points, col, col_value_count, random_seed):
-    """
-    Determines the sampling strategy based on the input parameters.
+class SubsetSampler:
     """
-    if selection is None:
-        return _no_selection_sampling(df, max_points, col, col_value_count, random_seed)
-    elif isinstance(selection, list):
-        return _list_selection_sampling(df, selection, max_points, col, col_value_count, random_seed)
-    else:
-        raise ValueError("Parameter 'selection' must be a list.")
+    Sampler of the rows of a DataFrame displayed by the plots, see subset_sampling.
 
+    Without column, the rows are drawn uniformly. With a column, the rows are drawn with
+    weights 1 / sqrt(size of their stratum), which favours the rare values of the column.
+    The strata of a column are its values, or the labels of a KMeans on its values
+    for the numeric columns with many values. They are computed once per column and reused
+    by every sampling, so that a plot drawn again does not fit the KMeans again.
 
-def _no_selection_sampling(df, max_points, col, col_value_count, random_seed):
-    """
-    Handles sampling when no specific selection is made.
-    """
-    if df.shape[0] <= max_points:
-        return df.index.tolist(), None
-    elif col is None:
-        selected_indices = random.sample(df.index.tolist(), max_points)
-        return selected_indices, "Length of random Subset: "
-    else:
-        selected_indices = _intelligent_sampling(df, max_points, col, col_value_count, random_seed)
-        return selected_indices, "Length of smart Subset: "
+    The rows are drawn by position with a numpy Generator seeded at each call:
+    the same arguments always return the same sample.
 
-
-def _list_selection_sampling(df, selection, max_points, col, col_value_count, random_seed):
-    """
-    Handles sampling when a specific list of indices is provided.
-    """
-    if len(selection) <= max_points:
-        return selection, "Length of user-defined Subset: "
-    elif col is None:
-        selected_indices = random.sample(selection, max_points)
-        return selected_indices, "Length of random Subset: "
-    else:
-        subset = df.loc[selection]
-        selected_indices = _intelligent_sampling(subset, max_points, col, col_value_count, random_seed)
-        return selected_indices, "Length of smart Subset: "
-
-
-def _intelligent_sampling(data, max_points, col, col_value_count, random_seed):
-    """
-    Performs intelligent sampling based on the distribution of values in the specified column.
+    Parameters
+    ----------
+    df : pandas.DataFrame
+        DataFrame whose rows are sampled.
+    random_seed : int (default: 79)
+        Seed of the draws and of the KMeans.
+    kmeans_fit_size : int (default: 100000)
+        Maximum number of rows used to fit the KMeans of a column, the other rows are
+        assigned to the nearest cluster.
     """
-    rng = np.random.default_rng(seed=random_seed)
-    is_col_str = True
-    if data[col].dtype.kind in "fc":
-        try:
-            if data[col].str.isnumeric().all():
+
+    def __init__(self, df, random_seed=79, kmeans_fit_size=100000):
+        self.df = df
+        self.random_seed = random_seed
+        self.kmeans_fit_size = kmeans_fit_size
+        self._strata = dict()
+
+    def sample(self, selection=None, max_points=2000, col=None, col_value_count=0):
+        """
+        Samples a subset of indices for plotting, see subset_sampling.
+
+        Returns
+        -------
+        tuple
+            A tuple containing the selected indices (list) and an additional note.
+        """
+        if selection is None:
+            if self.df.shape[0] <= max_points:
+                return self.df.index.tolist(), None
+            candidates = self.df.index
+            positions = np.arange(self.df.shape[0])
+        elif isinstance(selection, list):
+            if len(selection) <= max_points:
+                return selection, self._format_note("Length of user-defined Subset: ", selection)
+            candidates = selection
+            positions = None
+        else:
+            raise ValueError("Parameter 'selection' must be a list.")
+
+        rng = np.random.default_rng(seed=self.random_seed)
+        if col is None:
+            drawn = np.sort(rng.choice(len(candidates), max_points, replace=False))
+            note = "Length of random Subset: "
+        else:
+            if positions is None:
+                positions = self.df.index.get_indexer(candidates)
+                if (positions < 0).any():
+                    raise KeyError("Some indices of the selection are not in the DataFrame.")
+            strata = self.get_strata(col, col_value_count)[positions]
+            weights = np.bincount(strata)[strata] ** -0.5
+            drawn = np.sort(rng.choice(len(candidates), max_points, p=weights / weights.sum(), replace=False))
+            note = "Length of smart Subset: "
+
+        if selection is None:
+            selected_indices = self.df.index[drawn].tolist()
+        else:
+            selected_indices = [selection[i] for i in drawn]
+        return selected_indices, self._format_note(note, selected_indices)
+
+    def get_strata(self, col, col_value_count=0):
+        """
+        Stratum of each row of the DataFrame for a column, computed on first use.
+
+        Parameters
+        ----------
+        col : str
+            Name of the column.
+        col_value_count : int, optional
+            The count of unique values in the column. The values of the column are its strata
+            when it is lower than 1/20 of the number of rows.
+
+        Returns
+        -------
+        numpy.ndarray
+            Non-negative integer code of the stratum of each row.
+        """
+        key = (col, col_value_count < len(self.df) / 20)
+        strata = self._strata.get(key)
+        if strata is None:
+            strata = self._strata[key] = self._compute_strata(self.df[col], col_value_count)
+        return strata
+
+    def _compute_strata(self, values, col_value_count):
+        """
+        Codes of the values of a column, or labels of a KMeans on its values, see get_strata.
+        """
+        is_col_str = True
+        if values.dtype.kind in "fc":
+            try:
+                if values.str.isnumeric().all():
+                    is_col_str = False
+            except AttributeError:
                 is_col_str = False
-        except AttributeError:
-            is_col_str = False
-
-    if (col_value_count < len(data[col]) / 20) or is_col_str:
-        cluster_labels = data[col]
-        cluster_counts = cluster_labels.value_counts()
-    else:
-        n_clusters = min(100, len(data[col]) // 20)
-        kmeans = KMeans(n_clusters=n_clusters, random_state=random_seed, n_init="auto")
-        cluster_labels = pd.Series(kmeans.fit_predict(data[col].values.reshape(-1, 1)))
-        cluster_counts = cluster_labels.value_counts()
-
-    weights = cluster_counts.apply(lambda x: (x**0.5) / x).to_dict()
-    selection_weights = cluster_labels.apply(lambda x: weights[x])
-    selection_weights /= selection_weights.sum()
-    selected_indices = rng.choice(data.index.tolist(), max_points, p=selection_weights, replace=False)
-    return selected_indices
-
-
-def _format_additional_note(df, selected_indices, additional_note):
-    """
-    Formats the additional note with the length and percentage of the selected subset.
-    """
-    percentage = int(np.round(100 * len(selected_indices) / df.shape[0]))
-    return f"{additional_note}{len(selected_indices)} ({percentage}%)"
+
+        if (col_value_count < len(values) / 20) or is_col_str:
+            codes, _ = pd.factorize(values, use_na_sentinel=False)
+            return codes
+
+        n_clusters = min(100, len(values) // 20)
+        from sklearn.cluster import KMeans  # noqa: PLC0415
+
+        column = values.to_numpy(dtype=np.float64, na_value=np.nan).reshape(-1, 1)
+        # The missing values are a stratum of their own
+        is_missing = np.isnan(column[:, 0])
+        strata = np.full(len(column), n_clusters)
+        fit_values = column[~is_missing]
+        if len(fit_values) < n_clusters:
+            return strata
+        if len(fit_values) > self.kmeans_fit_size:
+            rng = np.random.default_rng(seed=self.random_seed)
+            fit_values = fit_values[rng.choice(len(fit_values), self.kmeans_fit_size, replace=False)]
+        kmeans = KMeans(n_clusters=n_clusters, random_state=self.random_seed, n_init="auto").fit(fit_values)
+        strata[~is_missing] = kmeans.predict(column[~is_missing])
+        return strata
+
+    def _format_note(self, additional_note, selected_indices):
+        """
+        Formats the additional note with the length and percentage of the selected subset.
+        """
+        percentage = int(np.round(100 * len(selected_indices) / self.df.shape[0]))
+        return f"{additional_note}{len(selected_indices)} ({percentage}%)"
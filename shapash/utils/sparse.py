@@ -0,0 +1,194 @@
+"""
+Sparse module
+"""
+
+import numpy as np
+import pandas as pd
+import scipy.sparse
+
+
+def is_sparse_frame(dataframe):
+    """
+    Check if a DataFrame only has sparse columns (pandas.SparseDtype).
+
+    Parameters
+    ----------
+    dataframe : object
+        Object to check.
+
+    Returns
+    -------
+    bool
+    """
+    return (
+        isinstance(dataframe, pd.DataFrame)
+        and dataframe.shape[1] > 0
+        and all(isinstance(dtype, pd.SparseDtype) for dtype in dataframe.dtypes)
+    )
+
+
+def sparse_frame(matrix, index, columns):
+    """
+    Build a DataFrame of sparse columns from a scipy sparse matrix, without densifying it.
+
+    Parameters
+    ----------
+    matrix : scipy.sparse matrix or array
+        Values of shape (len(index), len(columns)).
+    index : pandas.Index
+        Index of the DataFrame.
+    columns : pandas.Index
+        Columns of the DataFrame.
+
+    Returns
+    -------
+    pandas.DataFrame
+        DataFrame whose columns are pandas.SparseDtype with a fill value of 0.
+    """
+    matrix = scipy.sparse.csc_matrix(matrix)
+    matrix.sort_indices()
+    n_rows = matrix.shape[0]
+    # pandas.DataFrame.sparse.from_spmatrix may use NaN as fill value for floats: the columns are built here
+    dtype = pd.SparseDtype(matrix.dtype, matrix.dtype.type(0))
+    int_index = type(pd.arrays.SparseArray([0.0, 1.0]).sp_index)
+    arrays = {}
+    for position, column in enumerate(columns):
+        start, end = matrix.indptr[position], matrix.indptr[position + 1]
+        sparse_index = int_index(n_rows, matrix.indices[start:end].astype(np.int32))
+        arrays[column] = pd.arrays.SparseArray(matrix.data[start:end], sparse_index=sparse_index, dtype=dtype)
+    return pd.DataFrame(arrays, index=index, columns=columns)
+
+
+def to_csr(dataframe):
+    """
+    Values of a DataFrame of sparse columns as a CSR matrix without explicit zeros.
+
+    Parameters
+    ----------
+    dataframe : pandas.DataFrame
+        DataFrame whose columns are all sparse, see is_sparse_frame.
+
+    Returns
+    -------
+    scipy.sparse.csr_matrix
+    """
+    matrix = scipy.sparse.csr_matrix(dataframe.sparse.to_coo())
+    matrix.eliminate_zeros()
+    return matrix
+
+
+def sparse_power_sums(dataframe, norm=1):
+    """
+    Sum of the absolute values raised to the power norm of each column of a DataFrame of sparse columns.
+    Only the non-zero values are read.
+
+    Returns
+    -------
+    numpy.ndarray
+        Sums of shape (n_columns,), in float64.
+    """
+    matrix = to_csr(dataframe).astype(np.float64)
+    values = np.abs(matrix.data)
+    matrix.data = values if norm == 1 else np.power(values, norm)
+    return np.asarray(matrix.sum(axis=0)).ravel()
+
+
+def rank_sparse_contributions(s_df, x_df, keep_top_k=None):
+    """
+    Sort the contributions of a DataFrame of sparse columns and the features values
+    by decreasing contribution absolute values, see rank_contributions.
+
+    Only the non-zero contributions of each row are sorted. The number of ranked contributions
+    is the largest number of non-zero contributions of a row (at most keep_top_k). The rows with
+    fewer non-zero contributions are completed with features whose contribution is zero,
+    in the order of the columns.
+
+    Parameters
+    ----------
+    s_df : pandas.DataFrame
+        Local contributions, with sparse columns.
+    x_df : pandas.DataFrame
+        Input features. They are read from their non-zero values if all the columns are sparse.
+    keep_top_k : int, optional
+        Number of contributions kept for each row. The sums of the contributions that are not kept
+        are returned as a residual if it is given.
+
+    Returns
+    -------
+    list
+        [sorted contributions, sorted features, features names], and the residual if keep_top_k is given.
+    """
+    matrix = to_csr(s_df)
+    n_rows, n_cols = matrix.shape
+    nnz_per_row = np.diff(matrix.indptr)
+    width = int(nnz_per_row.max()) if n_rows else 0
+    if keep_top_k is not None:
+        width = min(width, keep_top_k)
+    width = max(width, 1)
+    rows = np.repeat(np.arange(n_rows), nnz_per_row)
+
+    # Position of each non-zero contribution in its row, by decreasing absolute values
+    order = np.lexsort((-np.abs(matrix.data), rows))
+    rank = np.arange(matrix.nnz) - matrix.indptr[rows]
+    kept = rank < width
+    kept_order = order[kept]
+
+    var_dict = np.empty((n_rows, width), dtype=np.intp)
+    sorted_contrib = np.zeros((n_rows, width), dtype=matrix.dtype)
+    var_dict[rows[kept], rank[kept]] = matrix.indices[kept_order]
+    sorted_contrib[rows[kept], rank[kept]] = matrix.data[kept_order]
+
+    # Completion with the first columns whose contribution is zero
+    n_candidates = min(n_cols, 2 * width)
+    candidates = np.zeros((n_rows, n_candidates), dtype=bool)
+    in_candidates = matrix.indices < n_candidates
+    candidates[rows[in_candidates], matrix.indices[in_candidates]] = True
+    zero_columns = np.argsort(candidates, axis=1, kind="stable")
+    padding = np.arange(width)[np.newaxis, :] - np.minimum(nnz_per_row, width)[:, np.newaxis]
+    is_padding = padding >= 0
+    var_dict[is_padding] = np.take_along_axis(zero_columns, np.maximum(padding, 0), axis=1)[is_padding]
+
+    if is_sparse_frame(x_df):
+        x_values = scipy.sparse.csr_matrix(x_df.sparse.to_coo())
+        sorted_features = np.asarray(x_values[np.repeat(np.arange(n_rows), width), var_dict.ravel()])
+        sorted_features = sorted_features.reshape(n_rows, width)
+    else:
+        sorted_features = np.take_along_axis(x_df.values, var_dict, axis=1)
+
+    contrib_col = ["contribution_" + str(i) for i in range(width)]
+    col = ["feature_" + str(i) for i in range(width)]
+    ranked = [
+        pd.DataFrame(data=sorted_contrib, columns=contrib_col, index=x_df.index),
+        pd.DataFrame(data=sorted_features, columns=col, index=x_df.index),
+        pd.DataFrame(data=var_dict, columns=col, index=x_df.index),
+    ]
+    if keep_top_k is None:
+        return ranked
+    dropped = matrix.data[order[~kept]]
+    dropped_rows = rows[~kept]
+    residual = np.zeros((n_rows, 2), dtype=matrix.dtype if matrix.dtype.kind == "f" else np.float64)
+    residual[:, 0] = np.bincount(dropped_rows, weights=np.minimum(dropped, 0), minlength=n_rows)
+    residual[:, 1] = np.bincount(dropped_rows, weights=np.maximum(dropped, 0), minlength=n_rows)
+    return ranked + [pd.DataFrame(residual, columns=["masked_neg", "masked_pos"], index=x_df.index)]
+
+
+def to_dense(data):
+    """
+    Dense copy of a DataFrame or a Series with sparse columns, other objects are returned unchanged.
+
+    Parameters
+    ----------
+    data : object
+        DataFrame, Series or any other object.
+
+    Returns
+    -------
+    object
+    """
+    if isinstance(data, pd.Series) and isinstance(data.dtype, pd.SparseDtype):
+        return data.sparse.to_dense()
+    if isinstance(data, pd.DataFrame) and any(isinstance(dtype, pd.SparseDtype) for dtype in data.dtypes):
+        return data.astype(
+            {col: dtype.subtype for col, dtype in data.dtypes.items() if isinstance(dtype, pd.SparseDtype)}
+        )
+    return data
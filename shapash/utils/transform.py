@@ -6,6 +6,7 @@ import re
 
 import numpy as np
 import pandas as pd
+import scipy.sparse
 from sklearn.preprocessing import FunctionTransformer
 
 from shapash.utils.category_encoder_backend import (
@@ -14,6 +15,7 @@ from shapash.utils.category_encoder_backend import (
     supported_category_encoder,
     transform_ce,
 )
+from shapash.utils.class_values import ClassesArray, NegatedPair
 from shapash.utils.columntransformer_backend import (
     columntransformer,
     get_col_mapping_ct,
@@ -67,8 +69,8 @@ def inverse_transform(x_init, preprocessing=None):
         # Check encoding are supported
         use_ct, use_ce = check_transformers(list_encoding)
 
-        # Apply Inverse Transform
-        x_inverse = x_init.copy()
+        # Apply Inverse Transform. The inverse encoders only replace whole columns of the copy
+        x_inverse = copy_frame(x_init)
 
         for encoding in list_encoding:
             if use_ct:
@@ -240,7 +242,8 @@ def apply_postprocessing(x_init, postprocessing):
     pandas.Dataframe
         Modified DataFrame.
     """
-    new_preds = x_init.copy()
+    # Only the postprocessed columns are replaced, the other columns are shared with x_init under copy-on-write
+    new_preds = copy_frame(x_init)
     for feature_name in postprocessing.keys():
         dict_postprocessing = postprocessing[feature_name]
         data_modif = new_preds[feature_name]
@@ -282,6 +285,10 @@ def adapt_contributions(case, contributions):
     If _case is "classification" and contributions a np.array or pd.DataFrame
     this function transform contributions matrix in a list of 2 contributions
     matrices: Opposite contributions and contributions matrices.
+    The list is a NegatedPair: the opposite contributions are not stored, they are
+    computed from the contributions when they are accessed.
+    Contributions of several classes (3-D array or list of matrices of the same shape)
+    are stored as a single array, in a ClassesArray.
 
     Parameters
     ----------
@@ -295,18 +302,74 @@ def adapt_contributions(case, contributions):
         pandas.DataFrame, np.ndarray or list
         contributions object modified
     """
-    # For classification with numpy arrays, we first transform the last dimension in lists
+    # For classification with numpy arrays, the last dimension is the class
     # So that we have the following format : [contributions_class_0, contributions_class_1, ...]
     if isinstance(contributions, np.ndarray) and contributions.ndim == 3:
-        contributions = [contributions[:, :, i] for i in range(contributions.shape[-1])]
+        return ClassesArray(contributions)
+    if case == "classification" and isinstance(contributions, list) and ClassesArray.can_stack(contributions):
+        return ClassesArray.from_frames(contributions)
+    if case == "classification" and scipy.sparse.issparse(contributions):
+        return NegatedPair(contributions)
     if (isinstance(contributions, pd.DataFrame) and case == "classification") or (
         isinstance(contributions, np.ndarray | list) and case == "classification" and np.array(contributions).ndim == 2
     ):
-        return [contributions * -1, contributions]
+        return NegatedPair(np.asarray(contributions) if isinstance(contributions, list) else contributions)
     else:
         return contributions
 
 
+def cast_float_values(values, dtype):
+    """
+    Cast the floating point values of contributions, predictions or probabilities to dtype.
+    The other types (labels, integer predictions...) are kept, and nothing is copied
+    when the values already have the right type.
+
+    Parameters
+    ----------
+    values : pandas.DataFrame, pandas.Series, np.ndarray, list, ClassValues or None
+        Values to cast. The DataFrames of sparse columns stay sparse.
+    dtype : str, numpy dtype or None
+        Floating point type, see check_dtype. The values are returned unchanged if None.
+
+    Returns
+    -------
+        object of the same type as values
+    """
+    if dtype is None or values is None:
+        return values
+    dtype = np.dtype(dtype)
+    if isinstance(values, NegatedPair):
+        return NegatedPair(cast_float_values(values.positive, dtype))
+    if isinstance(values, ClassesArray):
+        if values.labelled:
+            return values.with_labels(cast_float_values(values.values, dtype))
+        return ClassesArray(cast_float_values(values.values, dtype))
+    if isinstance(values, list):
+        return [cast_float_values(value, dtype) for value in values]
+    if isinstance(values, np.ndarray):
+        return values.astype(dtype, copy=False) if values.dtype.kind == "f" else values
+    if isinstance(values, pd.Series):
+        cast = _float_cast(values.dtype, dtype)
+        return values if cast is None else values.astype(cast)
+    if isinstance(values, pd.DataFrame):
+        casts = {column: _float_cast(column_dtype, dtype) for column, column_dtype in values.dtypes.items()}
+        casts = {column: cast for column, cast in casts.items() if cast is not None}
+        return values.astype(casts) if casts else values
+    return values
+
+
+def _float_cast(column_dtype, dtype):
+    """
+    Type to which a column of type column_dtype is cast, None if it is kept.
+    """
+    if isinstance(column_dtype, pd.SparseDtype):
+        if column_dtype.subtype.kind == "f" and column_dtype.subtype != dtype:
+            return pd.SparseDtype(dtype, dtype.type(0))
+    elif isinstance(column_dtype, np.dtype) and column_dtype.kind == "f" and column_dtype != dtype:
+        return dtype
+    return None
+
+
 def get_preprocessing_mapping(x_encoded, preprocessing=None):
     """
     Get the columns mapping from preprocessing.
@@ -382,16 +445,51 @@ def get_features_transform_mapping(x_init, x_encoded, preprocessing=None):
     return dict_all_cols_mapping
 
 
+def is_copy_on_write():
+    """
+    Return True if pandas copy-on-write is enabled: always with pandas >= 3.0,
+    only when the mode.copy_on_write option is set to True before.
+    """
+    if int(pd.__version__.split(".")[0]) >= 3:
+        return True
+    return pd.options.mode.copy_on_write is True
+
+
+def copy_frame(df: pd.DataFrame) -> pd.DataFrame:
+    """
+    Copy a DataFrame so that later changes of one of them are not seen by the other.
+
+    Under copy-on-write, a shallow copy is enough: the columns are shared until they are modified.
+    Otherwise the shallow copy would share its memory with df, a deep copy is returned.
+
+    Parameters
+    ----------
+    df : pd.DataFrame
+        DataFrame to copy
+
+    Returns
+    -------
+    pd.DataFrame
+    """
+    return df.copy(deep=not is_copy_on_write())
+
+
 def handle_categorical_missing(df: pd.DataFrame) -> pd.DataFrame:
     """
     Replace missing values for categorical columns
 
+    The input dataframe is returned as is when no categorical column has missing values.
+    Otherwise a copy is returned (see copy_frame), in which only the columns with missing values are replaced.
+
     Parameters
     ----------
     df : pd.DataFrame
         Pandas dataframe on which we will replace the missing values
     """
-    categorical_cols = df.select_dtypes(include=["object"]).columns
-    df_handle_missing = df.copy()
-    df_handle_missing[categorical_cols] = df_handle_missing[categorical_cols].fillna("missing")
+    categorical_cols = [col for col, values in df.select_dtypes(include=["object"]).items() if values.isna().any()]
+    if len(categorical_cols) == 0:
+        return df
+    df_handle_missing = copy_frame(df)
+    for col in categorical_cols:
+        df_handle_missing[col] = df_handle_missing[col].fillna("missing")
     return df_handle_missing
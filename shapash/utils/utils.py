@@ -3,14 +3,16 @@ Utils is a group of function for the library
 """
 
 import math
+import os
 import socket
 from pathlib import Path
 
 import numpy as np
 import pandas as pd
 
-from shapash.explainer.multi_decorator import MultiDecorator
+from shapash.explainer.multi_decorator import BinaryDecorator, ClassesArrayDecorator, MultiDecorator
 from shapash.explainer.smart_state import SmartState
+from shapash.utils.class_values import ClassesArray, NegatedPair
 
 
 def adjust_title_height(figure_height=500):
@@ -364,7 +366,29 @@ def compute_top_correlations_features(corr: pd.DataFrame, max_features: int) ->
     return list(set_features)
 
 
-def choose_state(contributions):
+def effective_n_jobs(n_jobs):
+    """
+    Number of workers corresponding to n_jobs, following the joblib convention.
+
+    Parameters
+    ----------
+    n_jobs : int or None
+        1 or None runs sequentially, -1 uses all the processors, -2 all the processors but one, and so on.
+
+    Returns
+    -------
+    int
+        Number of workers, 1 when the work is run sequentially.
+    """
+    if n_jobs is None or n_jobs == 1:
+        return 1
+    n_cpus = os.cpu_count() or 1
+    if n_jobs < 0:
+        return max(n_cpus + 1 + n_jobs, 1)
+    return n_jobs
+
+
+def choose_state(contributions, n_jobs=1):
     """
     Select implementation of the smart explainer. Typically check if it is a
     multi-class problem, in which case the implementation should be adapted
@@ -374,18 +398,62 @@ def choose_state(contributions):
     ----------
     contributions : object
         Local contributions. Could also be a list of local contributions.
+    n_jobs : int or None (default: 1)
+        Number of workers computing the classes concurrently, see MultiDecorator.
 
     Returns
     -------
     object
-        SmartState or SmartMultiState, depending on the nature of the input.
-    """
+        SmartState, MultiDecorator, BinaryDecorator (contributions of a binary
+        classification stored as a NegatedPair) or ClassesArrayDecorator (contributions
+        of several classes stored as a ClassesArray), depending on the nature of the input.
+    """
+    if isinstance(contributions, NegatedPair):
+        return BinaryDecorator(SmartState(), n_jobs=n_jobs)
+    if isinstance(contributions, ClassesArray):
+        return ClassesArrayDecorator(SmartState(), n_jobs=n_jobs)
     if isinstance(contributions, list):
-        return MultiDecorator(SmartState())
+        return MultiDecorator(SmartState(), n_jobs=n_jobs)
     else:
         return SmartState()
 
 
+def concat_rows(old, new):
+    """
+    Concatenate the rows of two objects with the same structure: DataFrames, Series,
+    arrays, or lists and dicts of them (e.g. the contributions of each class).
+
+    Parameters
+    ----------
+    old : pd.DataFrame, pd.Series, np.ndarray, list or dict
+    new : object with the same structure as old
+
+    Returns
+    -------
+    object with the same structure, None if one of them is None
+    """
+    if old is None or new is None:
+        return None
+    if isinstance(old, dict):
+        return {key: concat_rows(value, new[key]) for key, value in old.items()}
+    if isinstance(old, NegatedPair) and isinstance(new, NegatedPair):
+        return NegatedPair(concat_rows(old.positive, new.positive))
+    if isinstance(old, ClassesArray) and isinstance(new, ClassesArray):
+        return ClassesArray(np.concatenate([old.values, new.values]), old.index.append(new.index), old.columns)
+    if isinstance(old, list):
+        # Objects shared by several classes (e.g. the sorted features of a binary classification) stay shared
+        concatenated = dict()
+        for old_el, new_el in zip(old, new, strict=True):
+            if (id(old_el), id(new_el)) not in concatenated:
+                concatenated[(id(old_el), id(new_el))] = concat_rows(old_el, new_el)
+        return [concatenated[(id(old_el), id(new_el))] for old_el, new_el in zip(old, new, strict=True)]
+    if isinstance(old, np.ndarray):
+        return np.concatenate([old, np.asarray(new)])
+    if isinstance(old, pd.DataFrame | pd.Series):
+        return pd.concat([old, new])
+    raise TypeError(f"Cannot concatenate objects of type {type(old).__name__}")
+
+
 def convert_string_to_int_keys(input_dict: dict) -> dict:
     """
     Returns the dict with integer keys instead of string keys
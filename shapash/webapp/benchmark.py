@@ -0,0 +1,654 @@
+"""
+Headless latency benchmark of the SmartApp callbacks.
+
+The SmartApp is built on a synthetic SmartExplainer and its Dash callbacks are called
+through the Flask test client, without a browser. Scripted interactions (filter, click on
+a feature, change of label, clusters...) are replayed and the latency and payload size of
+every callback call are recorded.
+
+Usage as a regression gate::
+
+    python -m shapash.webapp.benchmark --rows 5000 --output baseline.json
+    python -m shapash.webapp.benchmark --rows 5000 --baseline baseline.json --tolerance 0.3
+"""
+
+import argparse
+import json
+import logging
+import sys
+import time
+from collections import defaultdict
+
+import numpy as np
+import pandas as pd
+from plotly.io.json import to_json_plotly
+from sklearn.linear_model import LinearRegression, LogisticRegression
+
+from shapash import SmartExplainer
+
+logger = logging.getLogger(__name__)
+
+WILDCARDS = (["ALL"], ["MATCH"], ["ALLSMALLER"])
+
+
+def make_synthetic_explainer(n_rows=1000, n_features=10, n_classes=2, n_groups=0, random_state=79):
+    """
+    Build a compiled SmartExplainer on synthetic data.
+
+    A linear model is fitted on random features and its exact contributions are given to
+    compile, so that the size of the explainer can be increased without computing SHAP values.
+    One feature out of three is an integer feature with a few modalities, displayed as violins.
+
+    Parameters
+    ----------
+    n_rows : int (default: 1000)
+        Number of rows
+    n_features : int (default: 10)
+        Number of features
+    n_classes : int (default: 2)
+        Number of classes, 0 for a regression
+    n_groups : int (default: 0)
+        Number of groups of features
+    random_state : int (default: 79)
+        Seed of the random generator
+
+    Returns
+    -------
+    SmartExplainer
+    """
+    if n_classes == 1 or n_classes < 0:
+        raise ValueError("n_classes must be 0 for a regression, or at least 2 for a classification.")
+    if n_groups and n_features < 2 * n_groups:
+        raise ValueError("n_features must be at least twice n_groups, each group gathers several features.")
+
+    rng = np.random.default_rng(random_state)
+    x = pd.DataFrame(rng.normal(size=(n_rows, n_features)), columns=[f"feature_{i}" for i in range(n_features)])
+    for col in x.columns[2::3]:
+        x[col] = rng.integers(0, 4, size=n_rows)
+    signal = x.to_numpy() @ rng.normal(size=n_features) + rng.normal(scale=0.5, size=n_rows)
+    centered = x - x.mean()
+
+    if n_classes == 0:
+        y = pd.Series(signal, index=x.index, name="target")
+        model = LinearRegression().fit(x, y)
+        contributions = centered * model.coef_
+    else:
+        bins = np.quantile(signal, np.linspace(0, 1, n_classes + 1)[1:-1])
+        y = pd.Series(np.digitize(signal, bins), index=x.index, name="target")
+        model = LogisticRegression(max_iter=500).fit(x, y)
+        if n_classes == 2:
+            contributions = [-centered * model.coef_[0], centered * model.coef_[0]]
+        else:
+            contributions = [centered * coef for coef in model.coef_]
+
+    features_groups = None
+    if n_groups:
+        features_groups = {
+            f"group_{i}": list(group) for i, group in enumerate(np.array_split(x.columns.to_numpy(), n_groups))
+        }
+
+    y_pred = pd.DataFrame(model.predict(x), index=x.index, columns=["pred"])
+    xpl = SmartExplainer(model=model, features_groups=features_groups)
+    xpl.compile(x=x, contributions=contributions, y_pred=y_pred, y_target=y)
+    return xpl
+
+
+class _Callback:
+    """
+    Description of a Dash callback, parsed from the app callback list.
+    """
+
+    def __init__(self, spec, func):
+        self.name = func.__name__
+        self.output = spec["output"]
+        self.multi = self.output.startswith("..")
+        outputs = self.output[2:-2].split("...") if self.multi else [self.output]
+        self.outputs = [_parse_dependency(*output.rsplit(".", 1)) for output in outputs]
+        self.inputs = [_parse_dependency(dep["id"], dep["property"]) for dep in spec["inputs"]]
+        self.state = [_parse_dependency(dep["id"], dep["property"]) for dep in spec["state"]]
+        self.prevent_initial_call = spec.get("prevent_initial_call", False)
+        self.has_match = any(_is_pattern(dep_id, ["MATCH"]) for dep_id, _ in self.inputs + self.outputs)
+
+    def triggered_by(self, key, prop, components):
+        """
+        Return True if the property of the component with the given key is an input of the callback.
+        """
+        return any(dep_prop == prop and _matches(dep_id, components[key]) for dep_id, dep_prop in self.inputs)
+
+
+def _parse_dependency(dep_id, prop):
+    if dep_id.startswith("{"):
+        dep_id = json.loads(dep_id)
+    return dep_id, prop
+
+
+def _is_pattern(dep_id, wildcard=None):
+    if not isinstance(dep_id, dict):
+        return False
+    return any(value in WILDCARDS if wildcard is None else value == wildcard for value in dep_id.values())
+
+
+def _matches(dep_id, component_id, binding=None):
+    """
+    Check that a component id matches a callback dependency, possibly with wildcards.
+    """
+    if not isinstance(dep_id, dict):
+        return dep_id == component_id
+    if not isinstance(component_id, dict) or dep_id.keys() != component_id.keys():
+        return False
+    for key, value in dep_id.items():
+        if value == ["MATCH"] and binding is not None:
+            if component_id[key] != binding[key]:
+                return False
+        elif value not in WILDCARDS and component_id[key] != value:
+            return False
+    return True
+
+
+def _id_key(component_id):
+    """
+    String identifier of a component, as used by Dash in its responses.
+    """
+    if isinstance(component_id, dict):
+        return json.dumps(component_id, sort_keys=True, separators=(",", ":"))
+    return component_id
+
+
+def _is_component(value):
+    return isinstance(value, dict) and "props" in value and "type" in value and "namespace" in value
+
+
+class CallbackReplayer:
+    """
+    Replay interactions on a SmartApp without a browser.
+
+    The replayer keeps a copy of the properties of every component of the layout,
+    including the components created by callbacks. When a property is changed, the
+    callbacks it triggers are called through the Flask test client in dependency order,
+    like the Dash renderer does, and their outputs are applied to the layout.
+
+    Parameters
+    ----------
+    smartapp : SmartApp
+        Webapp to benchmark
+    wait_jobs : bool (default: True)
+        Make the callbacks wait for background jobs (clusters) instead of returning a
+        placeholder, so that the latency includes the computation.
+
+    Attributes
+    ----------
+    records : list of dict
+        One record per callback call: step, callback, trigger, seconds, bytes and status.
+    """
+
+    def __init__(self, smartapp, wait_jobs=True):
+        self.smartapp = smartapp
+        self.app = smartapp.app
+        if wait_jobs:
+            smartapp.job_timeout = None
+        self.client = self.app.server.test_client()
+        self.url = self.app.config.requests_pathname_prefix + "_dash-update-component"
+        self.records = []
+        self.step = None
+        self._components = dict()
+        self._props = dict()
+        self._owned = defaultdict(list)
+
+        callbacks = [
+            _Callback(spec, self.app.callback_map[spec["output"]]["callback"])
+            for spec in self.app._callback_list
+            if spec.get("clientside_function") is None
+        ]
+        names = [callback.name for callback in callbacks]
+        for callback in callbacks:
+            # Several callbacks are created by the same function, e.g. the fullscreen buttons
+            if names.count(callback.name) > 1:
+                callback.name = f"{callback.name}[{_id_key(callback.outputs[0][0])}]"
+        self.callbacks = self._sort_callbacks(callbacks)
+
+        self._register(json.loads(to_json_plotly(self.app.layout)), owner=None)
+
+    def get(self, component_id, prop):
+        """
+        Return the current value of a component property.
+        """
+        return self._props.get((_id_key(component_id), prop))
+
+    def find(self, **id_values):
+        """
+        Return the dict ids of the components containing the given values, e.g. find(type="var_dropdown").
+        """
+        return [
+            cid
+            for cid in self._components.values()
+            if isinstance(cid, dict) and all(cid.get(key) == value for key, value in id_values.items())
+        ]
+
+    def load(self, step="load"):
+        """
+        Call the callbacks fired by the Dash renderer when the page is loaded.
+        """
+        self.step = step
+        return self._run(changed=set(), initial=True)
+
+    def set(self, changes, step=None):
+        """
+        Change component properties, as a user would, and call the triggered callbacks.
+
+        Parameters
+        ----------
+        changes : list of tuple
+            List of (component_id, property, value)
+        step : str, optional
+            Name of the interaction, stored in the records.
+
+        Returns
+        -------
+        list of dict
+            Records of the callback calls.
+        """
+        self.step = step if step is not None else self.step
+        changed = set()
+        for component_id, prop, value in changes:
+            key = _id_key(component_id)
+            self._components.setdefault(key, component_id)
+            self._set_prop(key, prop, value)
+            changed.add((key, prop))
+        return self._run(changed=changed)
+
+    def click(self, component_id, step=None):
+        """
+        Click on a button: increment its n_clicks property.
+        """
+        return self.set([(component_id, "n_clicks", (self.get(component_id, "n_clicks") or 0) + 1)], step=step)
+
+    def _sort_callbacks(self, callbacks):
+        """
+        Sort the callbacks so that a callback is called after the callbacks computing its inputs.
+        """
+        remaining = list(callbacks)
+        ordered = []
+        while remaining:
+            ready = [
+                cb
+                for cb in remaining
+                if not any(
+                    other is not cb and _depends_on(cb, other) and not _depends_on(other, cb) for other in remaining
+                )
+            ]
+            if not ready:
+                ready = remaining[:1]
+            ordered.extend(ready)
+            remaining = [cb for cb in remaining if cb not in ready]
+        return ordered
+
+    def _run(self, changed, initial=False):
+        records = []
+        changed = set(changed)
+        for callback in self.callbacks:
+            triggers = sorted(
+                change for change in changed if callback.triggered_by(*change, components=self._components)
+            )
+            if not triggers and (not initial or callback.prevent_initial_call):
+                continue
+            for binding in self._bindings(callback, triggers):
+                record, updated = self._call(callback, triggers, binding)
+                records.append(record)
+                changed |= updated
+        self.records.extend(records)
+        return records
+
+    def _bindings(self, callback, triggers):
+        """
+        Values of the MATCH wildcards for which a callback must be called.
+        """
+        if not callback.has_match:
+            return [None]
+        match_inputs = [dep_id for dep_id, _ in callback.inputs if _is_pattern(dep_id, ["MATCH"])]
+        triggered_ids = [self._components[key] for key, _ in triggers]
+        if not triggers or any(not isinstance(cid, dict) for cid in triggered_ids):
+            triggered_ids = list(self._components.values())
+        bindings = []
+        for cid in triggered_ids:
+            for dep_id in match_inputs:
+                if _matches(dep_id, cid):
+                    binding = {key: cid[key] for key, value in dep_id.items() if value == ["MATCH"]}
+                    if binding not in bindings:
+                        bindings.append(binding)
+        return bindings
+
+    def _resolve(self, dep_id, prop, binding, with_value=True):
+        """
+        Build the request item of a dependency: a dict, or a list of dicts for ALL wildcards.
+        """
+
+        def item(cid):
+            resolved = {"id": cid, "property": prop}
+            if with_value:
+                resolved["value"] = cid if prop == "id" else self._props.get((_id_key(cid), prop))
+            return resolved
+
+        if not _is_pattern(dep_id):
+            return item(dep_id)
+        matches = [item(cid) for cid in self._components.values() if _matches(dep_id, cid, binding)]
+        if _is_pattern(dep_id, ["MATCH"]) and not _is_pattern(dep_id, ["ALL"]):
+            return matches[0] if matches else None
+        return matches
+
+    def _call(self, callback, triggers, binding):
+        outputs = [self._resolve(dep_id, prop, binding, with_value=False) for dep_id, prop in callback.outputs]
+        body = {
+            "output": callback.output,
+            "outputs": outputs if callback.multi else outputs[0],
+            "inputs": [self._resolve(dep_id, prop, binding) for dep_id, prop in callback.inputs],
+            "state": [self._resolve(dep_id, prop, binding) for dep_id, prop in callback.state],
+            "changedPropIds": [f"{key}.{prop}" for key, prop in triggers],
+        }
+        start = time.perf_counter()
+        response = self.client.post(self.url, json=body)
+        seconds = time.perf_counter() - start
+
+        updated = set()
+        if response.status_code == 200:
+            status = "ok"
+            for key, props in response.get_json().get("response", {}).items():
+                self._components.setdefault(key, json.loads(key) if key.startswith("{") else key)
+                for prop, value in props.items():
+                    self._set_prop(key, prop, value)
+                    updated.add((key, prop))
+        elif response.status_code == 204:
+            status = "prevented"
+        else:
+            status = "error"
+            logger.warning("Callback %s failed with status %s", callback.name, response.status_code)
+        record = {
+            "step": self.step,
+            "callback": callback.name,
+            "trigger": ", ".join(f"{key}.{prop}" for key, prop in triggers),
+            "seconds": seconds,
+            "bytes": len(response.data),
+            "status": status,
+        }
+        return record, updated
+
+    def _set_prop(self, key, prop, value):
+        """
+        Set a property. Components found in the value replace the ones it contained before.
+        """
+        self._unregister((key, prop))
+        self._props[(key, prop)] = value
+        self._register(value, owner=(key, prop))
+
+    def _register(self, value, owner):
+        """
+        Store the properties of the components contained in a JSON layout.
+        """
+        if isinstance(value, list | tuple):
+            for child in value:
+                self._register(child, owner)
+        elif _is_component(value):
+            props = value["props"]
+            component_id = props.get("id")
+            if component_id is None:
+                for child in props.values():
+                    self._register(child, owner)
+                return
+            key = _id_key(component_id)
+            self._components[key] = component_id
+            if owner is not None:
+                self._owned[owner].append(key)
+            for prop, prop_value in props.items():
+                if prop != "id":
+                    self._set_prop(key, prop, prop_value)
+
+    def _unregister(self, owner):
+        """
+        Remove the components created in a property that is being replaced.
+        """
+        for key in self._owned.pop(owner, []):
+            props = [prop for component_key, prop in self._props if component_key == key]
+            for prop in props:
+                self._unregister((key, prop))
+                del self._props[(key, prop)]
+            self._components.pop(key, None)
+
+
+def _depends_on(callback, other):
+    """
+    Return True if an input of callback is an output of other.
+    """
+    return any(
+        in_prop == out_prop and _dependencies_overlap(in_id, out_id)
+        for in_id, in_prop in callback.inputs
+        for out_id, out_prop in other.outputs
+    )
+
+
+def _dependencies_overlap(dep_id, other_id):
+    if isinstance(dep_id, dict) and isinstance(other_id, dict):
+        return dep_id.keys() == other_id.keys() and all(
+            a == b or a in WILDCARDS or b in WILDCARDS for a, b in zip(dep_id.values(), other_id.values(), strict=True)
+        )
+    return dep_id == other_id
+
+
+def default_scenario(explainer):
+    """
+    Scripted interactions replayed by the benchmark.
+
+    Parameters
+    ----------
+    explainer : SmartExplainer
+        Explainer of the webapp
+
+    Returns
+    -------
+    list of tuple
+        List of (name, function) where function takes a CallbackReplayer.
+    """
+    x_init = explainer.x_init
+    feature = x_init.columns[0]
+    label = explainer.features_dict.get(feature, feature)
+    lower, upper = x_init[feature].quantile([0.25, 0.75]).tolist()
+
+    def click_feature(replayer):
+        click_data = {"points": [{"curveNumber": 0, "pointIndex": 0, "pointNumber": 0, "label": label, "y": label}]}
+        replayer.set([("global_feature_importance", "clickData", click_data)])
+
+    def filter_dataset(replayer):
+        replayer.click("add_dropdown_button")
+        dropdown = replayer.find(type="var_dropdown")[-1]
+        replayer.set([(dropdown, "value", feature)])
+        index = dropdown["index"]
+        replayer.set(
+            [
+                ({"type": "lower", "index": index}, "value", lower),
+                ({"type": "upper", "index": index}, "value", upper),
+            ]
+        )
+        replayer.click("apply_filter")
+
+    def select_point(replayer):
+        index = x_init.index[0]
+        click_data = {"points": [{"curveNumber": 1, "pointIndex": 0, "customdata": [None, index]}]}
+        replayer.set([("feature_selector", "clickData", click_data)])
+
+    def change_label(replayer):
+        current = replayer.get("select_label", "value")
+        options = [option["value"] for option in replayer.get("select_label", "options") or []]
+        others = [option for option in options if option != current]
+        if others:
+            replayer.set([("select_label", "value", others[0])])
+
+    def change_n_clusters(replayer):
+        current = replayer.get("n_clusters_slider", "value") or 3
+        replayer.set([("n_clusters_slider", "value", current + 1)])
+
+    scenario = [
+        ("click feature", click_feature),
+        ("filter", filter_dataset),
+        ("select point", select_point),
+        ("open clusters", lambda replayer: replayer.click("ember_clusters")),
+        ("change number of clusters", change_n_clusters),
+        ("reset filter", lambda replayer: replayer.click("reset_dropdown_button")),
+    ]
+    if explainer._case == "classification":
+        scenario.insert(2, ("change label", change_label))
+    return scenario
+
+
+def run_benchmark(explainer=None, scenario=None, repeat=3, settings=None, **synthetic_kwargs):
+    """
+    Build a SmartApp and replay a scenario of interactions.
+
+    Parameters
+    ----------
+    explainer : SmartExplainer, optional
+        Compiled explainer. By default, a synthetic explainer is built with make_synthetic_explainer.
+    scenario : list of tuple, optional
+        List of (name, function) interactions, see default_scenario.
+    repeat : int (default: 3)
+        Number of times the page is loaded and the scenario replayed.
+    settings : dict, optional
+        Settings of the webapp.
+    **synthetic_kwargs
+        Parameters of make_synthetic_explainer (n_rows, n_features, n_classes, n_groups).
+
+    Returns
+    -------
+    pd.DataFrame
+        One row per callback call, see summarize_records to aggregate them.
+    """
+    if explainer is None:
+        explainer = make_synthetic_explainer(**synthetic_kwargs)
+    if scenario is None:
+        scenario = default_scenario(explainer)
+
+    records = []
+    for run in range(repeat):
+        start = time.perf_counter()
+        explainer.init_app(settings)
+        records.append(
+            {
+                "step": "startup",
+                "callback": "startup",
+                "trigger": "",
+                "seconds": time.perf_counter() - start,
+                "bytes": 0,
+                "status": "ok",
+                "run": run,
+            }
+        )
+        replayer = CallbackReplayer(explainer.smartapp)
+        replayer.load()
+        for name, interaction in scenario:
+            replayer.step = name
+            interaction(replayer)
+        explainer.smartapp.jobs.shutdown()
+        records.extend({**record, "run": run} for record in replayer.records)
+    return pd.DataFrame(records)
+
+
+def summarize_records(records):
+    """
+    Aggregate the callback calls: latency percentiles and payload size per callback.
+
+    Parameters
+    ----------
+    records : pd.DataFrame
+        Output of run_benchmark
+
+    Returns
+    -------
+    pd.DataFrame
+        Indexed by callback, with columns calls, errors, p50_ms, p95_ms, max_ms, p50_bytes and max_bytes.
+    """
+    grouped = records.groupby("callback")
+    summary = pd.DataFrame(
+        {
+            "calls": grouped.size(),
+            "errors": grouped["status"].agg(lambda status: int((status == "error").sum())),
+            "p50_ms": grouped["seconds"].quantile(0.5) * 1000,
+            "p95_ms": grouped["seconds"].quantile(0.95) * 1000,
+            "max_ms": grouped["seconds"].max() * 1000,
+            "p50_bytes": grouped["bytes"].median(),
+            "max_bytes": grouped["bytes"].max(),
+        }
+    )
+    return summary.sort_values("p95_ms", ascending=False)
+
+
+def compare_to_baseline(summary, baseline, tolerance=0.25, min_delta_ms=20.0):
+    """
+    Find the callbacks slower or heavier than in a baseline summary.
+
+    Parameters
+    ----------
+    summary : pd.DataFrame
+        Output of summarize_records
+    baseline : pd.DataFrame
+        Summary of the reference version
+    tolerance : float (default: 0.25)
+        Relative increase allowed for the p95 latency and the payload size
+    min_delta_ms : float (default: 20.0)
+        Latency increases smaller than this are ignored, to be robust to timing noise
+
+    Returns
+    -------
+    pd.DataFrame
+        One row per regression, with the current and baseline values of the metric.
+    """
+    regressions = []
+    common = summary.index.intersection(baseline.index)
+    for callback in common:
+        current, reference = summary.loc[callback], baseline.loc[callback]
+        if (
+            current["p95_ms"] > reference["p95_ms"] * (1 + tolerance)
+            and current["p95_ms"] - reference["p95_ms"] > min_delta_ms
+        ):
+            regressions.append((callback, "p95_ms", current["p95_ms"], reference["p95_ms"]))
+        if current["max_bytes"] > reference["max_bytes"] * (1 + tolerance):
+            regressions.append((callback, "max_bytes", current["max_bytes"], reference["max_bytes"]))
+        if current["errors"] > reference["errors"]:
+            regressions.append((callback, "errors", current["errors"], reference["errors"]))
+    return pd.DataFrame(regressions, columns=["callback", "metric", "current", "baseline"])
+
+
+def main(argv=None):
+    """
+    Command line entry point. Return 1 if a regression is found compared to the baseline.
+    """
+    parser = argparse.ArgumentParser(description="Latency benchmark of the Shapash webapp callbacks.")
+    parser.add_argument("--rows", type=int, default=1000, help="number of rows of the synthetic explainer")
+    parser.add_argument("--features", type=int, default=10, help="number of features")
+    parser.add_argument("--classes", type=int, default=2, help="number of classes, 0 for a regression")
+    parser.add_argument("--groups", type=int, default=0, help="number of groups of features")
+    parser.add_argument("--repeat", type=int, default=3, help="number of replays of the scenario")
+    parser.add_argument("--output", help="save the summary to this JSON file")
+    parser.add_argument("--baseline", help="JSON summary to compare with")
+    parser.add_argument("--tolerance", type=float, default=0.25, help="relative increase allowed")
+    args = parser.parse_args(argv)
+
+    records = run_benchmark(
+        repeat=args.repeat,
+        n_rows=args.rows,
+        n_features=args.features,
+        n_classes=args.classes,
+        n_groups=args.groups,
+    )
+    summary = summarize_records(records)
+    print(summary.round(1).to_string())
+    if args.output:
+        summary.to_json(args.output, orient="index", indent=2)
+    if args.baseline:
+        baseline = pd.read_json(args.baseline, orient="index")
+        regressions = compare_to_baseline(summary, baseline, tolerance=args.tolerance)
+        if not regressions.empty:
+            print("\nRegressions compared to the baseline:")
+            print(regressions.round(1).to_string(index=False))
+            return 1
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -4,13 +4,18 @@ Main class of Web application Shapash
 
 import ast
 import copy
+import logging
 import random
 import re
-from math import isfinite, log10
+import time
+import uuid
+from concurrent.futures import CancelledError
+from contextlib import contextmanager
 
 import dash
 import dash_bootstrap_components as dbc
 import dash_daq as daq
+import numpy as np
 import pandas as pd
 import plotly.graph_objs as go
 from dash import ALL, MATCH, dash_table, dcc, html
@@ -45,8 +50,19 @@ from shapash.webapp.utils.callbacks import (
     update_features_to_display,
 )
 from shapash.webapp.utils.explanations import Explanations
+from shapash.webapp.utils.jobs import JobManager
 from shapash.webapp.utils.MyGraph import MyGraph
-from shapash.webapp.utils.utils import check_row, get_index_type, round_to_k
+from shapash.webapp.utils.utils import check_row, get_index_type, max_contribution, round_to_k
+
+logger = logging.getLogger(__name__)
+
+
+@contextmanager
+def _log_duration(stage):
+    """Log the time spent in a stage of the SmartApp startup."""
+    start = time.perf_counter()
+    yield
+    logger.debug("SmartApp startup - %s: %.3fs", stage, time.perf_counter() - start)
 
 
 def _create_input_modal(component_id, label, tooltip):
@@ -118,72 +134,89 @@ class SmartApp:
         self.special_cols = ["_index_", "_predict_"]
         if self.explainer.y_target is not None:
             self.special_cols.extend(["_target_", "_error_"])
-        self.explainer.features_imp = self.explainer.state.compute_features_import(self.explainer.contributions)
-        if self.explainer._case == "classification":
-            self.label = self.explainer.check_label_name(len(self.explainer._classes) - 1, "num")[1]
-            self.selected_feature = self.explainer.features_imp[-1].idxmax()
-            self.max_threshold = max(
-                [x.map(lambda x: round_to_k(x, k=1)).max().max() for x in self.explainer.contributions]
-            )
-        else:
-            self.label = None
-            self.selected_feature = self.explainer.features_imp.idxmax()
-            self.max_threshold = self.explainer.contributions.map(lambda x: round_to_k(x, k=1)).max().max()
+        with _log_duration("features importance"):
+            if self.explainer.features_imp is None:
+                self.explainer.compute_features_import()
+        with _log_duration("threshold"):
+            # round_to_k is monotonic: rounding the maximum gives the maximum of the rounded values
+            if self.explainer._case == "classification":
+                self.label = self.explainer.check_label_name(len(self.explainer._classes) - 1, "num")[1]
+                self.selected_feature = self.explainer.features_imp[-1].idxmax()
+                self.max_threshold = round_to_k(max_contribution(self.explainer.contributions), k=1)
+            else:
+                self.label = None
+                self.selected_feature = self.explainer.features_imp.idxmax()
+                self.max_threshold = round_to_k(max_contribution(self.explainer.contributions), k=1)
         self.list_index = []
         self.subset = None
         self.last_click_data = None
 
+        # JOBS
+        # Slow computations (t-SNE projection of the clusters graph) run in a background
+        # job queue so that callbacks return immediately and poll for the result.
+        self.jobs = JobManager()
+        self.job_timeout = 1.0
+
         # DATA
         self.explanations = Explanations()  # To get explanations of "?" buttons
         self.dataframe = pd.DataFrame()
         self.round_dataframe = pd.DataFrame()
         self.features_dict = copy.deepcopy(self.explainer.features_dict)
-        self.init_data()
+        with _log_duration("data"):
+            self.init_data()
 
         # COMPONENTS
         self.components = {"menu": {}, "table": {}, "graph": {}, "filter": {}, "settings": {}}
-        self.init_components()
+        with _log_duration("components"):
+            self.init_components()
 
         # LAYOUT
         self.skeleton = {"navbar": {}, "body": {}}
-        self.make_skeleton()
+        with _log_duration("layout"):
+            self.make_skeleton()
         self.app.layout = html.Div([self.skeleton["navbar"], self.skeleton["body"]])
 
         # CALLBACK
-        self.callback_fullscreen_buttons()
-        self.init_callback_settings()
-        self.callback_generator()
+        with _log_duration("callbacks"):
+            self.callback_fullscreen_buttons()
+            self.init_callback_settings()
+            self.callback_generator()
 
     def init_data(self, rows=None):
         """
         Method which initializes data from explainer object
         """
-        if hasattr(self.explainer, "y_pred"):
-            self.dataframe = self.explainer.x_init.copy()
-            if isinstance(self.explainer.y_pred, pd.Series):
-                y_pred = self.explainer.y_pred.to_frame()
-                self.predict_col = y_pred.columns.to_list()[0]
-                self.dataframe = self.dataframe.join(y_pred)
-            elif isinstance(self.explainer.y_pred, pd.DataFrame):
-                y_pred = self.explainer.y_pred
-                self.predict_col = y_pred.columns.to_list()[0]
-                self.dataframe = self.dataframe.join(y_pred)
-            elif isinstance(self.explainer.y_pred, list):
-                self.dataframe = self.dataframe.join(
-                    pd.DataFrame(
-                        data=self.explainer.y_pred, columns=[self.predict_col], index=self.explainer.x_init.index
-                    )
-                )
-            else:
-                raise TypeError("y_pred must be of type pd.Series, pd.DataFrame or list")
-        else:
+        if not hasattr(self.explainer, "y_pred"):
             raise ValueError("y_pred must be set when calling compile function.")
 
+        # Rows are sampled first so that the table is only built for the displayed subset
+        random.seed(79)
+        if rows is None:
+            rows = self.settings["rows"]
+        population = self.explainer.x_init.index.tolist()
+        self.list_index = random.sample(population=population, k=min(rows, len(population)))
+
+        self.dataframe = self.explainer.x_init.loc[self.list_index]
+        if isinstance(self.explainer.y_pred, pd.Series):
+            y_pred = self.explainer.y_pred.to_frame()
+            self.predict_col = y_pred.columns.to_list()[0]
+            self.dataframe = self.dataframe.join(y_pred)
+        elif isinstance(self.explainer.y_pred, pd.DataFrame):
+            y_pred = self.explainer.y_pred
+            self.predict_col = y_pred.columns.to_list()[0]
+            self.dataframe = self.dataframe.join(y_pred)
+        elif isinstance(self.explainer.y_pred, list):
+            self.dataframe = self.dataframe.join(
+                pd.DataFrame(data=self.explainer.y_pred, columns=[self.predict_col], index=self.explainer.x_init.index)
+            )
+        else:
+            raise TypeError("y_pred must be of type pd.Series, pd.DataFrame or list")
+
         if self.explainer.additional_data is not None:
             self.dataframe = self.dataframe.join(self.explainer.additional_data)
             self.features_dict.update(self.explainer.additional_features_dict)
 
-        self.dataframe["_index_"] = self.explainer.x_init.index
+        self.dataframe["_index_"] = self.dataframe.index
         self.dataframe.rename(columns={f"{self.predict_col}": "_predict_"}, inplace=True)
         if self.explainer.y_target is not None:
             self.dataframe = self.dataframe.join(
@@ -208,21 +241,16 @@ class SmartApp:
         else:
             columns_order = self.special_cols + self.dataframe.columns.drop(self.special_cols).tolist()
 
-        random.seed(79)
-        if rows is None:
-            rows = self.settings["rows"]
-        self.list_index = random.sample(
-            population=self.dataframe.index.tolist(), k=min(rows, len(self.dataframe.index.tolist()))
-        )
-        self.dataframe = self.dataframe[columns_order].loc[self.list_index].sort_index()
+        self.dataframe = self.dataframe[columns_order].sort_index()
         self.round_dataframe = self.dataframe.copy()
-        for col in list(self.dataframe.columns):
-            typ = self.dataframe[col].dtype
-            if typ is float:
-                std = self.dataframe[col].std()
-                if isfinite(std) and std != 0:
-                    digit = max(round(log10(1 / std) + 1) + 2, 0)
-                    self.round_dataframe[col] = self.dataframe[col].map(f"{{:.{digit}f}}".format).astype(float)
+        # Float columns are rounded according to their standard deviation, all at once
+        float_cols = [col for col in self.dataframe.columns if pd.api.types.is_float_dtype(self.dataframe[col])]
+        if float_cols:
+            std = self.dataframe[float_cols].std().to_numpy(dtype=float)
+            valid = np.isfinite(std) & (std != 0)
+            digits = np.maximum(np.round(np.log10(1 / std[valid]) + 1) + 2, 0).astype(int)
+            float_cols = [col for col, is_valid in zip(float_cols, valid, strict=True) if is_valid]
+            self.round_dataframe = self.round_dataframe.round(dict(zip(float_cols, digits, strict=True)))
         cluster_colorscale_columns = auto_columns + list(self.explainer.x_init.columns)
         cluster_colorscale_columns.remove("_index_")
         label_map = {
@@ -1145,6 +1173,12 @@ class SmartApp:
                                                                             style={"marginBottom": "14px"},
                                                                         ),
                                                                         dcc.Store(id="points_visible_store", data=True),
+                                                                        dcc.Store(id="clusters_job_channel"),
+                                                                        dcc.Interval(
+                                                                            id="clusters_job_interval",
+                                                                            interval=500,
+                                                                            disabled=True,
+                                                                        ),
                                                                         # 2) Colorscale
                                                                         html.Div(
                                                                             [
@@ -1926,6 +1960,69 @@ class SmartApp:
                         return True
             return False
 
+    def _compute_clusters_figure(self, job, params):
+        """
+        Compute the clustering by explainability figure. Run as a background job.
+        Parameters
+        ----------
+        job : Job
+            Job running the computation, used to report progress.
+        params : dict
+            Parameters of clustering_by_explainability_plot.
+        Returns
+        -------
+        dict
+            Compact figure, see MyGraph.compact_figure.
+        """
+        job.set_progress(0.1, "Computing the projection of contributions")
+        self.explainer.plot._project_clusters(
+            selection=params["selection"],
+            max_points=params["max_points"],
+            label=params["label"],
+            threshold_top_features=0.95,
+            n_clusters=params["n_clusters"],
+        )
+        if job.is_cancelled():
+            raise CancelledError()
+        job.set_progress(0.9, "Drawing clusters")
+        figure = self.explainer.plot.clustering_by_explainability_plot(**params, threshold_top_features=0.95)
+        figure["layout"].clickmode = "event+select"
+        MyGraph.adjust_graph_static(figure)
+        return MyGraph.compact_figure(figure)
+
+    @staticmethod
+    def _job_progress_figure(job, show_progress=True):
+        """
+        Placeholder figure displayed while a background job is running.
+        Parameters
+        ----------
+        job : Job
+            Running job.
+        show_progress : bool
+            Whether to append the progress percentage to the job message.
+        Returns
+        -------
+        plotly.graph_objects.Figure
+        """
+        text = job.message or "Computing"
+        if show_progress:
+            text += f"... {int(round(100 * job.progress))}%"
+        figure = go.Figure()
+        figure.update_layout(
+            xaxis={"visible": False},
+            yaxis={"visible": False},
+            annotations=[
+                {
+                    "text": text,
+                    "xref": "paper",
+                    "yref": "paper",
+                    "showarrow": False,
+                    "font": {"size": 14},
+                }
+            ],
+        )
+        return figure
+
     def callback_generator(self):
         """Generates all the app callbacks"""
         app = self.app
@@ -2330,6 +2427,7 @@ class SmartApp:
                 violin_maxf=violin,
                 max_points=points,
                 zoom=zoom_active,
+                compact=True,
             )
 
             fs_figure["layout"].clickmode = "event+select"
@@ -2340,7 +2438,7 @@ class SmartApp:
                 x_ax=truncate_str(selected_feature, 110),
                 y_ax="Contribution",
             )
-            return fs_figure
+            return MyGraph.compact_figure(fs_figure)
 
         @app.callback(
             [Output("index_id", "value"), Output("index_id", "n_submit")],
@@ -2727,7 +2825,7 @@ class SmartApp:
                 # Adjust graph with adding x and y axis titles
                 MyGraph.adjust_graph_static(figure, x_ax="True Values", y_ax="Predicted Values")
 
-            return figure, selectedData
+            return MyGraph.compact_figure(figure), selectedData
 
         @app.callback(
             Output("toggle_points_on", "outline"),
@@ -2747,6 +2845,8 @@ class SmartApp:
             Output("clusters", "figure"),
             Output("clusters", "selectedData"),
             Output("points_visible_store", "data"),
+            Output("clusters_job_interval", "disabled"),
+            Output("clusters_job_channel", "data"),
             [
                 Input("dataset", "data"),
                 Input("apply_filter", "n_clicks"),
@@ -2759,12 +2859,14 @@ class SmartApp:
                 Input("toggle_points_on", "n_clicks"),
                 Input("toggle_points_off", "n_clicks"),
                 Input("color_param_clusters", "value"),
+                Input("clusters_job_interval", "n_intervals"),
             ],
             [
                 State("points", "value"),
                 State("violin", "value"),
                 State("clusters", "selectedData"),
                 State("points_visible_store", "data"),
+                State("clusters_job_channel", "data"),
             ],
         )
         def update_clusters(
@@ -2779,14 +2881,20 @@ class SmartApp:
             n_on,
             n_off,
             color_value,
+            n_intervals,
             points,
             violin,
             selectedData,
             points_visible,
+            channel,
         ):
             """
             Update clustering plot according to label, data, filters and settings.
             Also stores ON/OFF state in points_visible_store.
+            The figure is computed in a background job: while it is running, a placeholder
+            showing the progress is returned and the interval polls the job until it is done.
+            Each browser session follows its jobs on its own channel, stored in clusters_job_channel,
+            so that a new request only cancels the previous job of the same session.
             """
 
             ctx = dash.callback_context
@@ -2812,6 +2920,7 @@ class SmartApp:
                     "reset_dropdown_button",
                     "color_param_clusters",
                     "select_label",
+                    "clusters_job_interval",
                 }
                 if trigger not in allowed:
                     raise PreventUpdate
@@ -2829,19 +2938,30 @@ class SmartApp:
                 show_points = False
                 store_update = False
 
-            figure = self.explainer.plot.clustering_by_explainability_plot(
+            params = dict(
                 selection=subset,
                 max_points=points,
                 label=label,
                 color_value=color_value,
                 show_points=show_points,
                 n_clusters=n_clusters,
-                threshold_top_features=0.95,
             )
-            figure["layout"].clickmode = "event+select"
-            MyGraph.adjust_graph_static(figure)
+            channel_update = dash.no_update
+            if channel is None:
+                channel = channel_update = uuid.uuid4().hex
+            job = self.jobs.submit(
+                self.jobs.make_key("clusters", params), self._compute_clusters_figure, params, channel=channel
+            )
+            if not job.wait(timeout=0 if trigger == "clusters_job_interval" else self.job_timeout):
+                return self._job_progress_figure(job), selectedData, store_update, False, channel_update
+            if job.status == "cancelled":
+                raise PreventUpdate
+            if job.status == "failed":
+                job.set_progress(1.0, f"Clusters could not be computed: {job.future.exception()}")
+                figure = self._job_progress_figure(job, show_progress=False)
+                return figure, selectedData, store_update, True, channel_update
 
-            return figure, selectedData, store_update
+            return job.result(), selectedData, store_update, True, channel_update
 
         @app.callback(
             Output("modal_feature_importance", "is_open"),
@@ -1,7 +1,15 @@
+import base64
 import re
 
+import numpy as np
 from dash import dcc
 
+# Trace properties sent to the browser as base64 typed arrays by MyGraph.compact_figure
+TYPED_ARRAY_PROPERTIES = ("x", "y", "z")
+TYPED_ARRAY_MARKER_PROPERTIES = ("color", "size", "opacity")
+# Largest magnitude up to which float32 represents every integer, hence the rounded values, exactly
+FLOAT32_EXACT_MAX = 2**24
+
 
 class MyGraph(dcc.Graph):
     """Class inherited from dcc.Graph. Add one method for updating graph layout."""
@@ -82,6 +90,92 @@ class MyGraph(dcc.Graph):
             title='<span style="font-size: calc(0.45rem + 0.7vw);">' + y_ax + "</span>", automargin=True
         )
 
+    @staticmethod
+    def compact_figure(figure, digits=6):
+        """
+        Convert a figure to a compact dict for the webapp.
+
+        The numeric arrays of the traces (coordinates, marker colors and sizes) are
+        rounded to the display precision and encoded as base64 float32 typed arrays,
+        which are decoded natively by plotly.js. The JSON payload is several times
+        smaller than the default list of float64 values.
+
+        Parameters
+        ----------
+        figure : plotly.graph_objects.Figure or dict
+            Figure to convert
+        digits : int (default: 6)
+            Number of significant digits kept for float values
+
+        Returns
+        -------
+        dict
+            Figure as a dict, that can be returned by a Dash callback
+        """
+        fig_dict = figure.to_plotly_json() if hasattr(figure, "to_plotly_json") else dict(figure)
+        data = []
+        for fig_trace in fig_dict.get("data", []):
+            trace = dict(fig_trace)
+            for prop in TYPED_ARRAY_PROPERTIES:
+                if prop in trace:
+                    trace[prop] = encode_typed_array(trace[prop], digits)
+            if isinstance(trace.get("marker"), dict):
+                marker = dict(trace["marker"])
+                for prop in TYPED_ARRAY_MARKER_PROPERTIES:
+                    if prop in marker:
+                        marker[prop] = encode_typed_array(marker[prop], digits)
+                trace["marker"] = marker
+            data.append(trace)
+        fig_dict["data"] = data
+        return fig_dict
+
+
+def encode_typed_array(values, digits=6):
+    """
+    Encode a 1-D numeric array as a plotly.js base64 typed array.
+
+    Integers are encoded as int32 when possible, other numbers are rounded to
+    ``digits`` significant digits and encoded as float32. Only values kept without loss
+    are encoded: integers outside the int32 range (int64 IDs, epoch timestamps...) and
+    floats whose magnitude exceeds FLOAT32_EXACT_MAX are returned unchanged, as are
+    values that are not a numeric 1-D array (strings, scalars, nested lists...).
+
+    Parameters
+    ----------
+    values : list, tuple or np.ndarray
+        Values to encode
+    digits : int (default: 6)
+        Number of significant digits kept for float values
+
+    Returns
+    -------
+    dict or object
+        ``{"dtype": ..., "bdata": ...}`` dict, or the original values
+    """
+    if not isinstance(values, list | tuple | np.ndarray):
+        return values
+    try:
+        array = np.asarray(values)
+    except ValueError:
+        return values
+    if array.ndim != 1 or array.size == 0 or array.dtype.kind not in "iuf":
+        return values
+    if array.dtype.kind in "iu":
+        if np.iinfo(np.int32).min <= array.min() and array.max() <= np.iinfo(np.int32).max:
+            return {"dtype": "i4", "bdata": base64.b64encode(array.astype("<i4").tobytes()).decode("ascii")}
+        return values
+    array = array.astype(np.float64)
+    if np.any(np.abs(array[np.isfinite(array)]) > FLOAT32_EXACT_MAX):
+        return values
+    finite = np.isfinite(array) & (array != 0)
+    magnitude = np.zeros_like(array)
+    magnitude[finite] = np.floor(np.log10(np.abs(array[finite])))
+    with np.errstate(over="ignore", invalid="ignore"):
+        scale = np.power(10.0, digits - 1 - magnitude)
+        rounded = np.round(array * scale) / scale
+    array = np.where(finite & np.isfinite(rounded), rounded, array)
+    return {"dtype": "f4", "bdata": base64.b64encode(array.astype("<f4").tobytes()).decode("ascii")}
+
 
 def split_title_and_subtitle(title: str):
     """
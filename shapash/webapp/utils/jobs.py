@@ -0,0 +1,249 @@
+"""
+Background job manager used by the webapp to run slow computations outside of Dash callbacks.
+"""
+
+import hashlib
+import json
+import threading
+from collections import OrderedDict
+from concurrent.futures import CancelledError, ThreadPoolExecutor
+
+
+class Job:
+    """
+    A unit of work submitted to the JobManager.
+
+    The function run by a job receives the job itself as first argument, so that it can
+    report its progress with ``set_progress`` and stop early when ``is_cancelled`` is True.
+
+    Attributes
+    ----------
+    key : str
+        Fingerprint of the inputs of the job. Two jobs with the same key compute the same result.
+    future : concurrent.futures.Future
+        Future returned by the executor.
+    progress : float
+        Progress of the job, between 0 and 1.
+    message : str
+        Short description of the current step of the job.
+    """
+
+    def __init__(self, key):
+        self.key = key
+        self.future = None
+        self.progress = 0.0
+        self.message = ""
+        self._cancel_event = threading.Event()
+
+    def set_progress(self, progress, message=None):
+        """
+        Update the progress of the job.
+
+        Parameters
+        ----------
+        progress : float
+            Progress of the job, clipped between 0 and 1.
+        message : str, optional
+            Description of the current step.
+        """
+        self.progress = min(max(float(progress), 0.0), 1.0)
+        if message is not None:
+            self.message = message
+
+    def is_cancelled(self):
+        """
+        Return True if the job has been cancelled and should stop as soon as possible.
+        """
+        return self._cancel_event.is_set()
+
+    def cancel(self):
+        """
+        Cancel the job. A pending job is never started, a running job is asked to stop.
+        """
+        self._cancel_event.set()
+        if self.future is not None:
+            self.future.cancel()
+
+    @property
+    def status(self):
+        """
+        Status of the job: 'pending', 'running', 'done', 'failed' or 'cancelled'.
+        """
+        if self.future is None:
+            return "pending"
+        if self.future.cancelled() or self.is_cancelled():
+            return "cancelled"
+        if self.future.done():
+            return "failed" if self.future.exception() is not None else "done"
+        if self.future.running():
+            return "running"
+        return "pending"
+
+    def wait(self, timeout=None):
+        """
+        Wait for the job to finish.
+
+        Parameters
+        ----------
+        timeout : float, optional
+            Maximum number of seconds to wait.
+
+        Returns
+        -------
+        bool
+            True if the job is finished.
+        """
+        try:
+            self.future.exception(timeout=timeout)
+        except TimeoutError:
+            return False
+        except CancelledError:
+            return True
+        return True
+
+    def result(self):
+        """
+        Return the result of a finished job. Raise the exception of the job if it failed.
+        """
+        return self.future.result(timeout=0)
+
+
+class JobManager:
+    """
+    Local background job queue for slow webapp computations.
+
+    Jobs are identified by a key computed from their inputs:
+        - identical requests (from one or several users) share the same job,
+        - finished results are kept in a bounded cache and reused,
+        - each consumer (channel) follows a single job at a time, submitting a new key on a
+          channel cancels the previous job once nobody else waits for it.
+
+    Parameters
+    ----------
+    max_workers : int (default: 1)
+        Number of worker threads. The default of 1 runs jobs one after the other, so that
+        the jobs of several sessions do not compete for the CPU.
+    max_results : int (default: 32)
+        Number of finished jobs kept in memory.
+    """
+
+    def __init__(self, max_workers=1, max_results=32):
+        self.max_workers = max_workers
+        self.max_results = max_results
+        self._executor = None
+        self._jobs = OrderedDict()
+        self._channels = dict()
+        self._lock = threading.Lock()
+
+    @staticmethod
+    def make_key(*args):
+        """
+        Compute a deterministic key from the inputs of a job.
+
+        Parameters
+        ----------
+        args : objects
+            Inputs of the job. They must be JSON serializable, other objects are converted with str.
+
+        Returns
+        -------
+        str
+            SHA-1 fingerprint of the inputs.
+        """
+        canonical = json.dumps(args, sort_keys=True, default=str)
+        return hashlib.sha1(canonical.encode("utf-8"), usedforsecurity=False).hexdigest()
+
+    def submit(self, key, func, *args, channel=None, **kwargs):
+        """
+        Submit a job, or return the existing job with the same key.
+
+        Parameters
+        ----------
+        key : str
+            Key of the job, see make_key.
+        func : callable
+            Function to run. It is called with the job as first argument, then args and kwargs.
+        channel : str, optional
+            Name of the consumer of the job. When a channel moves to a new key, the job it
+            was waiting for is cancelled if no other channel waits for it.
+
+        Returns
+        -------
+        Job
+        """
+        with self._lock:
+            job = self._jobs.get(key)
+            if job is not None and job.status in ("cancelled", "failed"):
+                del self._jobs[key]
+                job = None
+            if job is None:
+                job = Job(key)
+                if self._executor is None:
+                    self._executor = ThreadPoolExecutor(max_workers=self.max_workers, thread_name_prefix="shapash-job")
+                job.future = self._executor.submit(self._run, job, func, *args, **kwargs)
+                self._jobs[key] = job
+            self._jobs.move_to_end(key)
+            if channel is not None:
+                previous_key = self._channels.get(channel)
+                self._channels[channel] = key
+                if previous_key is not None and previous_key != key:
+                    self._cancel_if_stale(previous_key)
+            self._evict()
+        return job
+
+    def get(self, key):
+        """
+        Return the job with the given key, or None.
+        """
+        with self._lock:
+            return self._jobs.get(key)
+
+    def cancel(self, key):
+        """
+        Cancel the job with the given key, if it exists.
+        """
+        with self._lock:
+            job = self._jobs.pop(key, None)
+        if job is not None:
+            job.cancel()
+
+    def shutdown(self, wait=False):
+        """
+        Cancel all the pending jobs and stop the worker threads.
+        """
+        with self._lock:
+            for job in self._jobs.values():
+                if job.status in ("pending", "running"):
+                    job.cancel()
+            self._jobs.clear()
+            self._channels.clear()
+            executor, self._executor = self._executor, None
+        if executor is not None:
+            executor.shutdown(wait=wait, cancel_futures=True)
+
+    @staticmethod
+    def _run(job, func, *args, **kwargs):
+        if job.is_cancelled():
+            raise CancelledError()
+        result = func(job, *args, **kwargs)
+        job.set_progress(1.0)
+        return result
+
+    def _cancel_if_stale(self, key):
+        """
+        Cancel an unfinished job that no channel is waiting for. Must be called with the lock held.
+        """
+        if key in self._channels.values():
+            return
+        job = self._jobs.get(key)
+        if job is not None and job.status in ("pending", "running"):
+            job.cancel()
+            del self._jobs[key]
+
+    def _evict(self):
+        """
+        Drop the oldest finished jobs above max_results. Must be called with the lock held.
+        """
+        finished = [key for key, job in self._jobs.items() if job.future.done()]
+        for key in finished[: max(len(finished) - self.max_results, 0)]:
+            del self._jobs[key]
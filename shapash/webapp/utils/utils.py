@@ -1,6 +1,9 @@
+import numpy as np
 import pandas as pd
 from pandas.api.types import is_any_real_numeric_dtype
 
+from shapash.utils.class_values import ClassesArray, NegatedPair
+
 
 def round_to_k(x, k):
     """
@@ -25,6 +28,31 @@ def round_to_k(x, k):
     return int(new_x) if new_x % 1 == 0 else new_x
 
 
+def max_contribution(contributions):
+    """
+    Maximum of the contributions, missing values excluded, read from the way they are stored:
+    the sparse columns are not densified, the negative class of a NegatedPair is not built.
+
+    Parameters
+    ----------
+    contributions : pandas.DataFrame, list, NegatedPair or ClassesArray
+        Contributions of the explainer, or of each class.
+
+    Returns
+    -------
+    float
+    """
+    if isinstance(contributions, NegatedPair):
+        # The maximum of the negated values is the opposite of the minimum
+        return max(max_contribution(contributions.positive), -contributions.positive.min(skipna=True).min())
+    if isinstance(contributions, ClassesArray):
+        return float(np.nanmax(contributions.values))
+    if isinstance(contributions, list):
+        return max(max_contribution(frame) for frame in contributions)
+    # Reductions per column: the sparse columns are read without being densified
+    return float(contributions.max(skipna=True).max())
+
+
 def get_index_type(data):
     """
     Identify the type of the dataframe index.
@@ -62,3 +62,29 @@ class TestContributions(unittest.TestCase):
         assert pd.Index.equals(s_ord.index, expected_s_ord.index)
         assert pd.Index.equals(x_ord.index, expected_x_ord.index)
         assert pd.Index.equals(s_dict.index, expected_s_dict.index)
+
+    def test_rank_contributions_keep_top_k(self):
+        """
+        Unit test rank contributions with keep_top_k
+        """
+        dataframe_s = pd.DataFrame(
+            [[3.4, 1, -9, 4], [-45, 3, 43, -9]], columns=["Phi_" + str(i) for i in range(4)], index=["raw_1", "raw_2"]
+        )
+        dataframe_x = pd.DataFrame(
+            [["Male", "House", "Married", "PhD"], ["Female", "Flat", "Married", "Master"]],
+            columns=["X" + str(i) for i in range(4)],
+            index=["raw_1", "raw_2"],
+        )
+        ranked = rank_contributions(dataframe_s, dataframe_x)
+        s_ord, x_ord, s_dict, residual = rank_contributions(dataframe_s, dataframe_x, keep_top_k=2)
+        pd.testing.assert_frame_equal(s_ord, ranked[0].iloc[:, :2])
+        pd.testing.assert_frame_equal(x_ord, ranked[1].iloc[:, :2])
+        pd.testing.assert_frame_equal(s_dict, ranked[2].iloc[:, :2])
+        expected_residual = pd.DataFrame(
+            [[0.0, 4.4], [-9.0, 3.0]], columns=["masked_neg", "masked_pos"], index=["raw_1", "raw_2"]
+        )
+        pd.testing.assert_frame_equal(residual, expected_residual)
+
+        s_ord, x_ord, s_dict, residual = rank_contributions(dataframe_s, dataframe_x, keep_top_k=10)
+        pd.testing.assert_frame_equal(s_ord, ranked[0])
+        assert (residual.values == 0).all()
@@ -1,13 +1,19 @@
 """
 Unit test for multi decorator
 """
+import gc
+import os
+import pickle
 import unittest
+from concurrent.futures import ThreadPoolExecutor
 from unittest.mock import Mock, patch
 
 import numpy as np
 import pandas as pd
 
-from shapash.explainer.multi_decorator import MultiDecorator
+from shapash.explainer.multi_decorator import BinaryDecorator, ClassesArrayDecorator, MultiDecorator
+from shapash.explainer.smart_state import SmartState
+from shapash.utils.class_values import ClassesArray, NegatedPair
 
 
 class DummyState:
@@ -194,3 +200,231 @@ class TestMultiDecorator(unittest.TestCase):
         contrib2 = pd.DataFrame([[1, -2, 3, -4], [5, -6, 7, -8]])
         state.compute_features_import([contrib1, contrib2])
         assert backend.compute_features_import.call_count == 2
+
+    def test_delegate_n_jobs(self):
+        """
+        Unit test delegate with concurrent workers, the results keep the order of the classes
+        """
+        expected = [f"{i}+9" for i in range(10)]
+        for executor in ["thread", "process"]:
+            state = MultiDecorator(DummyState(), n_jobs=3, executor=executor)
+            assert state.delegate("dummy_function", list(range(10)), 9) == expected
+            assert state.delegate("dummy_function", [(i, 9) for i in range(10)]) == expected
+            state.shutdown()
+
+    def test_delegate_n_jobs_pool(self):
+        """
+        Unit test delegate with concurrent workers, the pool is created once and shut down with the decorator
+        """
+        state = MultiDecorator(DummyState(), n_jobs=2)
+        assert isinstance(state.get_executor(), ThreadPoolExecutor)
+        state.delegate("dummy_function", list(range(4)), 9)
+        pool = state.get_executor()
+        state.delegate("dummy_function", list(range(4)), 9)
+        assert state.get_executor() is pool
+        loaded = pickle.loads(pickle.dumps(state))
+        assert "_pool" not in loaded.__dict__
+        assert loaded._pool_lock is not state._pool_lock
+        assert MultiDecorator(DummyState())._pool_lock is not state._pool_lock
+        # A decorator pickled before the pool existed
+        old = MultiDecorator.__new__(MultiDecorator)
+        old.__setstate__({"member": DummyState()})
+        assert old.delegate("dummy_function", list(range(2)), 9) == ["0+9", "1+9"]
+        old.shutdown()
+        del state
+        gc.collect()
+        assert pool._shutdown
+
+    def test_delegate_n_jobs_state(self):
+        """
+        Unit test delegate with concurrent workers on SmartState methods
+        """
+        contrib1 = pd.DataFrame([[-1, 2, -3, 4], [-5, 6, -7, 8]])
+        contrib2 = pd.DataFrame([[1, -2, 3, -4], [5, -6, 7, -8]])
+        x_init = pd.DataFrame([[1, 2, 3, 4], [5, 6, 7, 8]])
+        sequential = MultiDecorator(SmartState())
+        parallel = MultiDecorator(SmartState(), n_jobs=-1)
+        ranked = sequential.rank_contributions([contrib1, contrib2], x_init)
+        ranked_parallel = parallel.rank_contributions([contrib1, contrib2], x_init)
+        for result, result_parallel in zip(ranked, ranked_parallel, strict=True):
+            for frame, frame_parallel in zip(result, result_parallel, strict=True):
+                pd.testing.assert_frame_equal(frame, frame_parallel)
+
+    def test_effective_n_jobs(self):
+        """
+        Unit test effective n jobs
+        """
+        n_cpus = os.cpu_count()
+        assert MultiDecorator(DummyState()).effective_n_jobs() == 1
+        assert MultiDecorator(DummyState(), n_jobs=None).effective_n_jobs() == 1
+        assert MultiDecorator(DummyState(), n_jobs=4).effective_n_jobs() == 4
+        assert MultiDecorator(DummyState(), n_jobs=-1).effective_n_jobs() == n_cpus
+        assert MultiDecorator(DummyState(), n_jobs=-n_cpus - 5).effective_n_jobs() == 1
+        with self.assertRaises(ValueError):
+            MultiDecorator(DummyState(), n_jobs=0)
+        with self.assertRaises(ValueError):
+            MultiDecorator(DummyState(), executor="dask")
+        with self.assertRaises(ValueError):
+            MultiDecorator(DummyState(), executor="auto")
+
+
+class TestBinaryDecorator(unittest.TestCase):
+    """
+    The BinaryDecorator on a NegatedPair gives the same results as the MultiDecorator on the list of both classes
+    """
+
+    def setUp(self):
+        rng = np.random.default_rng(0)
+        self.x_init = pd.DataFrame(rng.integers(0, 5, size=(20, 4)), columns=["a", "b", "c", "d"])
+        positive = pd.DataFrame(rng.normal(size=(20, 4)), columns=self.x_init.columns)
+        positive.iloc[0, 0] = 0.0
+        self.pair = NegatedPair(positive)
+        self.contributions = [-positive, positive]
+        self.binary = BinaryDecorator(SmartState())
+        self.multi = MultiDecorator(SmartState())
+
+    def assert_lists_equal(self, result, expected):
+        assert len(result) == len(expected)
+        for res, exp in zip(result, expected):
+            if isinstance(exp, pd.DataFrame):
+                pd.testing.assert_frame_equal(res, exp)
+            else:
+                pd.testing.assert_series_equal(res, exp)
+
+    def compute_mask(self, state, data, positive):
+        mask = [
+            state.init_mask(data["contrib_sorted"], True),
+            state.hide_contributions(data["var_dict"], [1]),
+            state.cap_contributions(data["contrib_sorted"], threshold=0.2),
+        ]
+        if positive is not None:
+            mask.append(state.sign_contributions(data["contrib_sorted"], positive=positive))
+        mask = state.cutoff_contributions(state.combine_masks(mask), max_contrib=2)
+        return mask, state.compute_masked_contributions(data["contrib_sorted"], mask)
+
+    def test_rank_and_mask(self):
+        data = self.binary.assign_contributions(self.binary.rank_contributions(self.pair, self.x_init))
+        expected = self.multi.assign_contributions(self.multi.rank_contributions(self.contributions, self.x_init))
+        assert isinstance(data["contrib_sorted"], NegatedPair)
+        assert data["x_sorted"][0] is data["x_sorted"][1]
+        for key in expected:
+            self.assert_lists_equal(data[key], expected[key])
+
+        for positive in [None, True, False]:
+            mask, masked = self.compute_mask(self.binary, data, positive)
+            expected_mask, expected_masked = self.compute_mask(self.multi, expected, positive)
+            assert (mask[0] is mask[1]) == (positive is None)
+            self.assert_lists_equal(mask, expected_mask)
+            self.assert_lists_equal(masked, expected_masked)
+
+    def test_features_import_and_groups(self):
+        features_import = self.binary.compute_features_import(self.pair)
+        self.assert_lists_equal(features_import, self.multi.compute_features_import(self.contributions))
+        grouped = self.binary.compute_grouped_contributions(self.pair, {"group": ["a", "b"]})
+        assert isinstance(grouped, NegatedPair)
+        self.assert_lists_equal(
+            grouped, self.multi.compute_grouped_contributions(self.contributions, {"group": ["a", "b"]})
+        )
+
+    def test_list_of_contributions(self):
+        data = self.binary.assign_contributions(self.binary.rank_contributions(self.contributions, self.x_init))
+        assert not isinstance(data["contrib_sorted"], NegatedPair)
+        assert self.binary.check_contributions(self.contributions, self.x_init)
+
+
+class TestClassesArrayDecorator(unittest.TestCase):
+    """
+    The ClassesArrayDecorator on a ClassesArray gives the same results as the MultiDecorator on the list of classes
+    """
+
+    def setUp(self):
+        rng = np.random.default_rng(0)
+        self.x_init = pd.DataFrame(
+            {
+                "a": rng.integers(0, 5, size=20),
+                "b": rng.choice(["u", "v", None], size=20),
+                "c": rng.normal(size=20),
+                "d": rng.integers(0, 5, size=20),
+            }
+        )
+        self.x_init.loc[3, "c"] = np.nan
+        self.contributions = [
+            pd.DataFrame(rng.normal(size=(20, 4)), columns=self.x_init.columns) for _ in range(3)
+        ]
+        self.classes = ClassesArray.from_frames(self.contributions)
+        self.state = ClassesArrayDecorator(SmartState())
+        self.multi = MultiDecorator(SmartState())
+
+    def assert_lists_equal(self, result, expected):
+        assert len(result) == len(expected)
+        for res, exp in zip(result, expected):
+            if isinstance(exp, pd.DataFrame):
+                pd.testing.assert_frame_equal(res, exp)
+            else:
+                pd.testing.assert_series_equal(res, exp)
+
+    def compute_mask(self, state, data, positive):
+        mask = [
+            state.init_mask(data["contrib_sorted"], True),
+            state.hide_contributions(data["var_dict"], [1]),
+            state.cap_contributions(data["contrib_sorted"], threshold=0.2),
+        ]
+        if positive is not None:
+            mask.append(state.sign_contributions(data["contrib_sorted"], positive=positive))
+        mask = state.cutoff_contributions(state.combine_masks(mask), max_contrib=2)
+        return mask, state.compute_masked_contributions(data["contrib_sorted"], mask)
+
+    def test_rank_mask_and_summarize(self):
+        data = self.state.assign_contributions(self.state.rank_contributions(self.classes, self.x_init))
+        expected = self.multi.assign_contributions(self.multi.rank_contributions(self.contributions, self.x_init))
+        for key in expected:
+            assert isinstance(data[key], ClassesArray)
+            self.assert_lists_equal(data[key], expected[key])
+
+        columns_dict = dict(enumerate(self.x_init.columns))
+        features_dict = {col: col.upper() for col in self.x_init.columns}
+        for positive in [None, True]:
+            mask, masked = self.compute_mask(self.state, data, positive)
+            expected_mask, expected_masked = self.compute_mask(self.multi, expected, positive)
+            self.assert_lists_equal(mask, expected_mask)
+            self.assert_lists_equal(masked, expected_masked)
+            summary = self.state.summarize(
+                data["contrib_sorted"], data["var_dict"], data["x_sorted"], mask, columns_dict, features_dict
+            )
+            expected_summary = self.multi.summarize(
+                expected["contrib_sorted"],
+                expected["var_dict"],
+                expected["x_sorted"],
+                expected_mask,
+                columns_dict,
+                features_dict,
+            )
+            self.assert_lists_equal(summary, expected_summary)
+
+    def test_compute_masked_contributions_missing_value(self):
+        contributions = [frame.copy() for frame in self.contributions]
+        contributions[1].iloc[2, 1] = np.nan
+        classes = ClassesArray.from_frames(contributions)
+        mask = self.state.init_mask(classes, False)
+        masked = self.state.compute_masked_contributions(classes, mask)
+        expected = self.multi.compute_masked_contributions(contributions, self.multi.init_mask(contributions, False))
+        self.assert_lists_equal(masked, expected)
+        assert masked[1].iloc[2].isna().all()
+
+    def test_features_import_and_groups(self):
+        for norm in [1, 2]:
+            features_import = self.state.compute_features_import(self.classes, norm)
+            expected = self.multi.compute_features_import(self.contributions, norm)
+            for imp, exp in zip(features_import, expected, strict=True):
+                pd.testing.assert_series_equal(imp, exp, check_names=False)
+        grouped = self.state.compute_grouped_contributions(self.classes, {"group": ["a", "c"]})
+        assert isinstance(grouped, ClassesArray)
+        self.assert_lists_equal(
+            grouped, self.multi.compute_grouped_contributions(self.contributions, {"group": ["a", "c"]})
+        )
+
+    def test_validate_and_check(self):
+        classes = self.state.validate_contributions(ClassesArray(self.classes.values), self.x_init)
+        assert classes.labelled
+        assert self.state.check_contributions(classes, self.x_init)
+        assert not self.state.check_contributions(classes, self.x_init.iloc[:5])
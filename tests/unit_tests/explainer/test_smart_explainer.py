@@ -4,6 +4,7 @@ Unit test for smart explainer
 
 import os
 import sys
+import tempfile
 import types
 import unittest
 from os import path
@@ -14,10 +15,11 @@ import catboost as cb
 import category_encoders as ce
 import numpy as np
 import pandas as pd
+import scipy.sparse
 import shap
 from catboost import CatBoostClassifier, CatBoostRegressor
 from pandas.testing import assert_frame_equal
-from sklearn.ensemble import RandomForestClassifier
+from sklearn.ensemble import RandomForestClassifier, RandomForestRegressor
 from sklearn.tree import DecisionTreeClassifier, DecisionTreeRegressor
 
 from shapash import SmartExplainer
@@ -25,6 +27,7 @@ from shapash.backend import ShapBackend
 from shapash.explainer.multi_decorator import MultiDecorator
 from shapash.explainer.smart_state import SmartState
 from shapash.utils.check import check_model
+from shapash.utils.class_values import ClassesArray, NegatedPair
 
 
 def init_sme_to_pickle_test():
@@ -314,6 +317,445 @@ class TestSmartExplainer(unittest.TestCase):
         xpl.compile(x=df[["x1", "x2"]], additional_data=df[["x3"]])
         assert len(xpl.additional_features_dict) == 1
 
+    def test_compile_cache_dir(self):
+        """
+        Unit test compile with cache_dir
+        the predictions and contributions of the second compilation come from the cache
+        """
+        np.random.seed(1)
+        df = pd.DataFrame(range(0, 21), columns=["id"])
+        df["y"] = df["id"].apply(lambda x: 1 if x < 10 else 0)
+        df["x1"] = np.random.randint(1, 123, df.shape[0])
+        df["x2"] = np.random.randint(1, 3, df.shape[0])
+        df = df.set_index("id")
+        clf = RandomForestClassifier(n_estimators=2, random_state=1).fit(df[["x1", "x2"]], df["y"])
+        with tempfile.TemporaryDirectory() as cache_dir:
+            xpl = SmartExplainer(clf)
+            xpl.compile(x=df[["x1", "x2"]], cache_dir=cache_dir)
+            assert len(os.listdir(cache_dir)) == 1
+
+            xpl2 = SmartExplainer(clf)
+            with (
+                patch.object(ShapBackend, "run_explainer", side_effect=AssertionError("not cached")),
+                patch("shapash.explainer.smart_explainer.predict", side_effect=AssertionError("not cached")),
+                patch("shapash.explainer.smart_explainer.predict_proba", side_effect=AssertionError("not cached")),
+            ):
+                xpl2.compile(x=df[["x1", "x2"]], cache_dir=cache_dir)
+            assert_frame_equal(xpl2.y_pred, xpl.y_pred)
+            assert_frame_equal(xpl2.proba_values, xpl.proba_values)
+            for contrib2, contrib in zip(xpl2.contributions, xpl.contributions, strict=True):
+                assert_frame_equal(contrib2, contrib)
+            assert type(xpl2.state) is type(xpl.state)
+
+            # A different dataset or model is a new entry
+            xpl3 = SmartExplainer(clf)
+            xpl3.compile(x=df[["x1", "x2"]].iloc[:10], cache_dir=cache_dir)
+            clf2 = RandomForestClassifier(n_estimators=3, random_state=1).fit(df[["x1", "x2"]], df["y"])
+            xpl4 = SmartExplainer(clf2)
+            xpl4.compile(x=df[["x1", "x2"]], cache_dir=cache_dir)
+            assert len(os.listdir(cache_dir)) == 3
+
+    def test_compile_cache_dir_dtype(self):
+        """
+        Unit test compile with cache_dir and dtype
+        the cache keeps the outputs of the model, an explainer with another dtype reads them unchanged
+        """
+        np.random.seed(1)
+        x = pd.DataFrame(np.random.normal(size=(30, 3)) * 1000, columns=["x1", "x2", "x3"])
+        y = pd.DataFrame({"y": x["x1"] * 1.000123})
+        model = RandomForestRegressor(n_estimators=3, random_state=1).fit(x, y["y"])
+        with tempfile.TemporaryDirectory() as cache_dir:
+            xpl32 = SmartExplainer(model, dtype="float32")
+            xpl32.compile(x=x, y_target=y, cache_dir=cache_dir)
+            assert (xpl32.y_pred.dtypes == np.float32).all()
+            xpl64 = SmartExplainer(model)
+            xpl64.compile(x=x, y_target=y, cache_dir=cache_dir)
+        xpl_ref = SmartExplainer(model)
+        xpl_ref.compile(x=x, y_target=y)
+        assert_frame_equal(xpl64.y_pred, xpl_ref.y_pred)
+        assert_frame_equal(xpl64.prediction_error, xpl_ref.prediction_error)
+        assert_frame_equal(xpl32.prediction_error, xpl_ref.prediction_error)
+
+    def test_compile_binary_negated_pair(self):
+        """
+        Unit test compile
+        binary contributions are stored once and give the same results as the list of both classes
+        """
+        np.random.seed(1)
+        df = pd.DataFrame(range(0, 21), columns=["id"])
+        df["y"] = df["id"].apply(lambda x: 1 if x < 10 else 0)
+        df["x1"] = np.random.randint(1, 123, df.shape[0])
+        df["x2"] = np.random.randint(1, 3, df.shape[0])
+        df["x3"] = np.random.normal(size=df.shape[0])
+        df = df.set_index("id")
+        x = df[["x1", "x2", "x3"]]
+        clf = cb.CatBoostClassifier(n_estimators=5, verbose=False).fit(x, df["y"])
+        xpl = SmartExplainer(clf, features_groups={"group": ["x1", "x2"]})
+        xpl.compile(x=x)
+        assert isinstance(xpl.contributions, NegatedPair)
+        assert isinstance(xpl.contributions_groups, NegatedPair)
+        assert xpl.data["var_dict"][0] is xpl.data["var_dict"][1]
+
+        xpl_list = SmartExplainer(clf, features_groups={"group": ["x1", "x2"]})
+        xpl_list.compile(x=x, contributions=list(xpl.contributions))
+        assert isinstance(xpl_list.state, MultiDecorator) and not isinstance(xpl_list.contributions, NegatedPair)
+        xpl.compute_features_import()
+        xpl_list.compute_features_import()
+        for imp, imp_list in zip(xpl.features_imp, xpl_list.features_imp, strict=True):
+            pd.testing.assert_series_equal(imp, imp_list)
+        for positive in [None, False]:
+            assert_frame_equal(
+                xpl.to_pandas(max_contrib=2, positive=positive, proba=True),
+                xpl_list.to_pandas(max_contrib=2, positive=positive, proba=True),
+            )
+
+    def test_compile_keep_top_k(self):
+        """
+        Unit test compile with keep_top_k
+        only the top contributions are ranked, the others are added to the hidden contributions
+        """
+        np.random.seed(1)
+        df = pd.DataFrame(range(0, 30), columns=["id"])
+        df["y"] = df["id"] % 3
+        for i in range(6):
+            df[f"x{i}"] = np.random.normal(size=df.shape[0])
+        df = df.set_index("id")
+        x = df[[f"x{i}" for i in range(6)]]
+        for y in [df["y"], (df["y"] == 1).astype(int)]:
+            clf = RandomForestClassifier(n_estimators=3, random_state=1).fit(x, y)
+            xpl = SmartExplainer(clf, features_groups={"group": ["x0", "x1", "x2"]})
+            xpl.compile(x=x)
+            xpl_top = SmartExplainer(clf, features_groups={"group": ["x0", "x1", "x2"]})
+            xpl_top.compile(x=x, contributions=xpl.contributions, keep_top_k=2)
+            assert xpl_top.data["contrib_sorted"][-1].shape == (30, 2)
+            assert xpl_top.data_groups["var_dict"][-1].shape == (30, 2)
+            for use_groups in [False, True]:
+                assert_frame_equal(
+                    xpl_top.to_pandas(max_contrib=2, use_groups=use_groups),
+                    xpl.to_pandas(max_contrib=2, use_groups=use_groups),
+                )
+                for masked_top, masked in zip(xpl_top.masked_contributions, xpl.masked_contributions, strict=True):
+                    assert_frame_equal(masked_top, masked, check_exact=False)
+            # The filters only apply to the top contributions, the others are always hidden
+            xpl_top.filter(positive=True)
+            for label in range(len(xpl_top.contributions)):
+                shown = xpl_top.data_groups["contrib_sorted"][label].where(xpl_top.mask[label].values, 0).sum(axis=1)
+                total = shown + xpl_top.masked_contributions[label].sum(axis=1)
+                expected = xpl_top.contributions_groups[label].sum(axis=1)
+                np.testing.assert_allclose(total.values, expected.values)
+            xpl.compute_features_import()
+            xpl_top.compute_features_import()
+            for imp_top, imp in zip(xpl_top.features_imp, xpl.features_imp, strict=True):
+                pd.testing.assert_series_equal(imp_top, imp)
+
+        with self.assertRaises(ValueError):
+            xpl_top.compile(x=x, keep_top_k=0)
+
+    def test_compile_sparse_contributions(self):
+        """
+        Unit test compile with scipy.sparse contributions
+        the results are the same as with dense contributions
+        """
+        np.random.seed(1)
+        x = pd.DataFrame(np.random.normal(size=(30, 6)), columns=[f"x{i}" for i in range(6)])
+        values = np.where(np.random.uniform(size=x.shape) < 0.3, x.values, 0.0)
+        y = (x.sum(axis=1) > 0).astype(int)
+        clf = RandomForestClassifier(n_estimators=3, random_state=1).fit(x, y)
+        xpl_dense = SmartExplainer(clf, features_groups={"group": ["x0", "x1", "x2"]})
+        xpl_dense.compile(x=x, contributions=pd.DataFrame(values, columns=x.columns))
+        xpl = SmartExplainer(clf, features_groups={"group": ["x0", "x1", "x2"]})
+        xpl.compile(x=x, contributions=scipy.sparse.csr_matrix(values))
+        assert isinstance(xpl.contributions, NegatedPair)
+        assert isinstance(xpl.contributions[1].dtypes.iloc[0], pd.SparseDtype)
+        width = xpl.data["contrib_sorted"][1].shape[1]
+        assert width == (values != 0).sum(axis=1).max()
+        contrib_col = [f"contribution_{i}" for i in range(1, width + 1)]
+        for use_groups in [False, True]:
+            assert_frame_equal(
+                xpl.to_pandas(max_contrib=width, use_groups=use_groups)[contrib_col],
+                xpl_dense.to_pandas(max_contrib=width, use_groups=use_groups)[contrib_col],
+            )
+        xpl.compute_features_import()
+        xpl_dense.compute_features_import()
+        for imp, imp_dense in zip(xpl.features_imp, xpl_dense.features_imp, strict=True):
+            pd.testing.assert_series_equal(imp, imp_dense)
+        xpl.plot.contribution_plot("x0")
+        xpl.plot.contribution_plot("group")
+
+    def test_compile_dtype(self):
+        """
+        Unit test compile with dtype
+        the contributions, rankings, masks and predictions keep the type, also when saved
+        """
+        np.random.seed(1)
+        x = pd.DataFrame(np.random.normal(size=(30, 4)), columns=[f"x{i}" for i in range(4)])
+        y = pd.DataFrame({"y": (x["x0"] > 0).astype(int)})
+        clf = RandomForestClassifier(n_estimators=3, random_state=1).fit(x, y["y"])
+        xpl = SmartExplainer(clf, features_groups={"group": ["x0", "x1"]}, dtype="float32")
+        xpl.compile(x=x, y_target=y)
+        xpl.filter(max_contrib=2)
+        for contributions in [xpl.contributions, xpl.contributions_groups, xpl.data["contrib_sorted"], xpl.masked_contributions]:
+            assert all((df.dtypes == np.float32).all() for df in contributions)
+        assert (xpl.proba_values.dtypes == np.float32).all()
+        assert xpl.prediction_error["_error_"].dtype == np.float64
+        xpl_ref = SmartExplainer(clf)
+        xpl_ref.compile(x=x, y_target=y)
+        assert_frame_equal(xpl.prediction_error, xpl_ref.prediction_error, check_exact=False, rtol=1e-6)
+        assert_frame_equal(xpl.contributions[1], xpl_ref.contributions[1].astype(np.float32))
+        xpl.plot.local_plot(row_num=0)
+        xpl.plot.contribution_plot("x0")
+        with tempfile.TemporaryDirectory() as tmp_dir:
+            xpl.save(os.path.join(tmp_dir, "xpl.pkl"))
+            xpl_loaded = SmartExplainer.load(os.path.join(tmp_dir, "xpl.pkl"))
+        assert xpl_loaded.dtype == "float32"
+        assert (xpl_loaded.contributions[1].dtypes == np.float32).all()
+        predictor = xpl.to_smartpredictor()
+        assert predictor.dtype == "float32"
+        with self.assertRaises(ValueError):
+            SmartExplainer(clf, dtype="int32")
+
+    def test_compile_n_jobs(self):
+        """
+        Unit test compile with n_jobs
+        the classes of a list of contributions are computed concurrently with the same results
+        """
+        np.random.seed(1)
+        df = pd.DataFrame(range(0, 30), columns=["id"])
+        df["y"] = df["id"] % 3
+        df["x1"] = np.random.randint(1, 123, df.shape[0])
+        df["x2"] = np.random.normal(size=df.shape[0])
+        df = df.set_index("id")
+        x = df[["x1", "x2"]]
+        clf = RandomForestClassifier(n_estimators=3, random_state=1).fit(x, df["y"])
+        xpl = SmartExplainer(clf)
+        xpl.compile(x=x)
+        xpl_jobs = SmartExplainer(clf, n_jobs=2)
+        xpl_jobs.compile(x=x)
+        assert xpl.state.n_jobs == 1
+        assert xpl_jobs.state.n_jobs == 2
+
+        contributions = [c.copy() for c in xpl.contributions]
+        xpl.state = MultiDecorator(SmartState())
+        xpl.contributions = contributions
+        xpl_jobs.state = MultiDecorator(SmartState(), n_jobs=2)
+        xpl_jobs.contributions = contributions
+        assert_frame_equal(
+            xpl.to_pandas(max_contrib=1, positive=True, proba=True),
+            xpl_jobs.to_pandas(max_contrib=1, positive=True, proba=True),
+        )
+
+    def test_compile_multiclass_classes_array(self):
+        """
+        Unit test compile
+        multiclass contributions are stored in a single array and give the same results as the list of classes
+        """
+        np.random.seed(1)
+        df = pd.DataFrame(range(0, 30), columns=["id"])
+        df["y"] = df["id"] % 3
+        df["x1"] = np.random.randint(1, 123, df.shape[0])
+        df["x2"] = np.random.randint(1, 3, df.shape[0])
+        df["x3"] = np.random.normal(size=df.shape[0])
+        df = df.set_index("id")
+        x = df[["x1", "x2", "x3"]]
+        clf = RandomForestClassifier(n_estimators=3, random_state=1).fit(x, df["y"])
+        xpl = SmartExplainer(clf, features_groups={"group": ["x1", "x2"]})
+        xpl.compile(x=x)
+        assert isinstance(xpl.contributions, ClassesArray)
+        assert isinstance(xpl.contributions_groups, ClassesArray)
+        assert isinstance(xpl.data["x_sorted"], ClassesArray)
+
+        with tempfile.TemporaryDirectory() as tmp_dir:
+            xpl.save(path.join(tmp_dir, "xpl"), format="dir")
+            xpl_loaded = SmartExplainer.load(path.join(tmp_dir, "xpl"))
+            assert isinstance(xpl_loaded.contributions, ClassesArray)
+            assert_frame_equal(xpl_loaded.contributions[2], xpl.contributions[2])
+
+        xpl_list = SmartExplainer(clf, features_groups={"group": ["x1", "x2"]})
+        xpl_list.compile(x=x, contributions=list(xpl.contributions))
+        xpl_list.backend.state = MultiDecorator(SmartState())
+        xpl_list.contributions = list(xpl_list.contributions)
+        xpl_list.contributions_groups = list(xpl_list.contributions_groups)
+        xpl.compute_features_import()
+        xpl_list.compute_features_import()
+        for imp, imp_list in zip(xpl.features_imp, xpl_list.features_imp, strict=True):
+            pd.testing.assert_series_equal(imp, imp_list)
+        for positive in [None, False]:
+            assert_frame_equal(
+                xpl.to_pandas(max_contrib=2, positive=positive, proba=True),
+                xpl_list.to_pandas(max_contrib=2, positive=positive, proba=True),
+            )
+
+    def test_compile_lazy_attributes(self):
+        """
+        Unit test compile
+        data, data_groups and features_desc are computed on first access, and again after a new compilation
+        """
+        df = pd.DataFrame({"x1": [1, 2, 3, 4], "x2": [2, 1, 2, 1], "x3": [0.5, 0.1, 0.3, 0.2]})
+        model = DecisionTreeRegressor().fit(df, [0, 1, 2, 3])
+        xpl = SmartExplainer(model, features_groups={"group": ["x2", "x3"]})
+        assert not hasattr(xpl, "data")
+        xpl.compile(x=df)
+        assert "data" not in xpl.__dict__
+        assert "data_groups" not in xpl.__dict__
+        assert "features_desc" not in xpl.__dict__
+        xpl.compute_features_import()
+        assert "data" not in xpl.__dict__
+
+        data = xpl.data
+        assert data is xpl.data
+        assert_frame_equal(
+            data["contrib_sorted"], xpl.state.rank_contributions(xpl.contributions, xpl.x_init)[0], check_names=False
+        )
+        assert xpl.data_groups["var_dict"].shape == (4, 2)
+        assert xpl.features_desc == {"x1": 4, "x2": 2, "x3": 4, "group": 1000}
+
+        xpl.compile(x=df.iloc[:2])
+        assert "data" not in xpl.__dict__
+        assert xpl.data["contrib_sorted"].shape == (2, 3)
+        assert xpl.features_desc["x1"] == 2
+
+    def test_compile_report_memory(self):
+        """
+        Unit test compile
+        report_memory returns one row per stage and x is not modified by the compilation
+        """
+        df = pd.DataFrame({"x1": [1, 2, 3, 4], "x2": ["a", np.nan, "b", "a"]}, dtype=object)
+        df["x1"] = df["x1"].astype(int)
+        df_before = df.copy()
+        model = DecisionTreeRegressor().fit(df[["x1"]], [0, 1, 2, 3])
+        xpl = SmartExplainer(model)
+        assert xpl.compile(x=df[["x1"]]) is None
+
+        contributions = pd.DataFrame(np.ones((4, 2)), columns=df.columns, index=df.index)
+        y_pred = pd.DataFrame({"pred": [0, 1, 2, 3]})
+        report = xpl.compile(x=df, contributions=contributions, y_pred=y_pred, report_memory=True)
+        stages = ["backend", "inverse_transform", "predictions", "contributions", "postprocessing", "additional_data"]
+        assert list(report.index) == stages
+        assert list(report.columns) == ["seconds", "rss_mb", "peak_rss_mb", "allocated_mb", "peak_allocated_mb"]
+        assert (report["seconds"] >= 0).all()
+        assert (report["peak_allocated_mb"] >= report["allocated_mb"]).all()
+        assert_frame_equal(df, df_before)
+        assert xpl.x_init["x2"].tolist() == ["a", "missing", "b", "a"]
+
+    def test_compile_input_modified_after_compile(self):
+        """
+        Unit test compile
+        modifying the dataset given to compile does not modify the explainer
+        """
+        x = pd.DataFrame({"x1": [1.0, 2.0, 3.0, 4.0], "x2": [2.0, 1.0, 2.0, 1.0]})
+        model = DecisionTreeRegressor().fit(x, [0, 1, 2, 3])
+        xpl = SmartExplainer(model)
+        xpl.compile(x=x)
+        x_expected = x.copy()
+        x.loc[0, "x1"] = 100.0
+        x["x2"] = 0.0
+        x.iloc[1:, 0] *= -1
+        assert_frame_equal(xpl.x_encoded, x_expected)
+        assert_frame_equal(xpl.x_init, x_expected)
+
+    def test_append(self):
+        """
+        Unit test append
+        compiling the first rows then appending the others gives the same explainer as compiling all the rows
+        """
+        np.random.seed(2)
+        df = pd.DataFrame(range(0, 40), columns=["id"])
+        df["y"] = np.random.randint(0, 3, df.shape[0])
+        df["x1"] = np.random.randint(1, 123, df.shape[0])
+        df["x2"] = np.random.randint(1, 3, df.shape[0])
+        df["x3"] = np.random.rand(df.shape[0])
+        df = df.set_index("id")
+        x = df[["x1", "x2", "x3"]]
+        clf = RandomForestClassifier(n_estimators=3, random_state=1).fit(x, df["y"])
+        params = dict(features_groups={"group": ["x2", "x3"]}, postprocessing={"x1": {"type": "suffix", "rule": "€"}})
+
+        xpl = SmartExplainer(clf, **params)
+        xpl.compile(x=x, y_target=df["y"], additional_data=df[["y"]].rename(columns={"y": "a"}))
+        xpl.filter(max_contrib=2)
+        xpl.compute_features_import(local=True)
+
+        xpl2 = SmartExplainer(clf, **params)
+        xpl2.compile(x=x.iloc[:25], y_target=df["y"].iloc[:25], additional_data=df[["y"]].iloc[:25].rename(columns={"y": "a"}))
+        xpl2.filter(max_contrib=2)
+        xpl2.compute_features_import(local=True)
+        xpl2.append(x=x.iloc[25:], y_target=df["y"].iloc[25:], additional_data=df[["y"]].iloc[25:].rename(columns={"y": "a"}))
+
+        assert_frame_equal(xpl2.x_init, xpl.x_init)
+        assert_frame_equal(xpl2.x_encoded, xpl.x_encoded)
+        assert_frame_equal(xpl2.x_contrib_plot, xpl.x_contrib_plot)
+        assert_frame_equal(xpl2.y_pred, xpl.y_pred)
+        assert_frame_equal(xpl2.proba_values, xpl.proba_values)
+        assert_frame_equal(xpl2.prediction_error, xpl.prediction_error)
+        assert_frame_equal(xpl2.additional_data, xpl.additional_data)
+        assert_frame_equal(xpl2.x_init_groups, xpl.x_init_groups)
+        assert_frame_equal(xpl2.groups_values.values["group"], xpl.groups_values.values["group"])
+        assert xpl2.features_desc == xpl.features_desc
+        for i in range(3):
+            assert_frame_equal(xpl2.contributions[i], xpl.contributions[i])
+            assert_frame_equal(xpl2.contributions_groups[i], xpl.contributions_groups[i])
+            assert_frame_equal(xpl2.mask[i], xpl.mask[i])
+            for key in xpl.data:
+                assert_frame_equal(xpl2.data[key][i], xpl.data[key][i])
+                assert_frame_equal(xpl2.data_groups[key][i], xpl.data_groups[key][i])
+            for attr in ["features_imp", "features_imp_local_lev2", "features_imp_groups"]:
+                pd.testing.assert_series_equal(
+                    getattr(xpl2, attr)[i].sort_index(), getattr(xpl, attr)[i].sort_index(), check_exact=False
+                )
+        assert_frame_equal(xpl2.to_pandas(proba=True), xpl.to_pandas(proba=True))
+
+    def test_append_errors(self):
+        """
+        Unit test append with wrong inputs
+        """
+        df = pd.DataFrame({"x1": [1, 2, 3, 4], "x2": [2, 1, 2, 1]})
+        model = DecisionTreeRegressor().fit(df, [0, 1, 2, 3])
+        xpl = SmartExplainer(model)
+        with self.assertRaises(ValueError):
+            xpl.append(x=df)
+        xpl.compile(x=df.iloc[:2])
+        with self.assertRaises(ValueError):
+            xpl.append(x=df.iloc[1:])
+        with self.assertRaises(ValueError):
+            xpl.append(x=df.iloc[2:][["x1"]])
+        with self.assertRaises(ValueError):
+            xpl.append(x=df.iloc[2:], y_target=pd.Series([1, 2], index=[2, 3]))
+        xpl.append(x=df.iloc[2:])
+        assert xpl.x_init.shape == (4, 2)
+
+    def test_append_named_y_pred(self):
+        """
+        Unit test append with a y_pred column given to compile and predictions computed by append
+        the predictions of the new rows take the name of the column
+        """
+        np.random.seed(3)
+        x = pd.DataFrame(np.random.rand(30, 3), columns=["x1", "x2", "x3"])
+        model = RandomForestRegressor(n_estimators=3, random_state=1).fit(x, x["x1"])
+        xpl = SmartExplainer(model)
+        xpl.compile(x=x.iloc[:20], y_pred=pd.DataFrame({"target": model.predict(x.iloc[:20])}, index=x.index[:20]))
+        xpl.append(x=x.iloc[20:25])
+        assert list(xpl.y_pred.columns) == ["target"]
+        assert xpl.y_pred.shape == (25, 1)
+        assert not xpl.y_pred["target"].isna().any()
+        assert xpl.x_init.shape == (25, 3)
+
+    def test_append_after_to_pandas(self):
+        """
+        Unit test append after to_pandas
+        the summary stored by to_pandas is computed again with the new rows
+        """
+        np.random.seed(4)
+        x = pd.DataFrame(np.random.rand(30, 3), columns=["x1", "x2", "x3"])
+        model = DecisionTreeRegressor().fit(x, x["x1"])
+        xpl = SmartExplainer(model, features_groups={"group": ["x2", "x3"]})
+        xpl.compile(x=x.iloc[:20])
+        xpl.to_pandas(max_contrib=2)
+        xpl.to_pandas(max_contrib=2, use_groups=True)
+        xpl.append(x=x.iloc[20:])
+        assert "summary" not in xpl.data
+        assert "summary" not in xpl.data_groups
+        assert xpl.to_pandas(max_contrib=2).shape[0] == 30
+        assert xpl.to_pandas(max_contrib=2, use_groups=True).shape[0] == 30
+
     def test_filter_0(self):
         """
         Unit test filter 0
@@ -495,6 +937,29 @@ class TestSmartExplainer(unittest.TestCase):
         expected_param_dict = {"features_to_hide": None, "threshold": 0.5, "positive": None, "max_contrib": 2}
         self.assertDictEqual(expected_param_dict, xpl.mask_params)
 
+    def test_filter_memoized(self):
+        """
+        Unit test filter
+        the masks are memoized per parameters while the ranked contributions stay the same
+        """
+        xpl = SmartExplainer(self.model)
+        contrib_sorted = pd.DataFrame(data=[[0.5, 0.4, -0.3], [0.9, -0.8, 0.7]], columns=["c1", "c2", "c3"])
+        xpl.data = {"var_dict": 1, "contrib_sorted": contrib_sorted, "x_sorted": 3}
+        xpl.state = SmartState()
+        xpl.filter(max_contrib=2)
+        mask, masked_contributions = xpl.mask, xpl.masked_contributions
+        xpl.filter(threshold=0.45, positive=True)
+        assert xpl.mask is not mask
+        xpl.filter(max_contrib=2)
+        assert xpl.mask is mask
+        assert xpl.masked_contributions is masked_contributions
+        assert xpl.mask_params["max_contrib"] == 2
+
+        xpl.data = {"var_dict": 1, "contrib_sorted": contrib_sorted.copy(), "x_sorted": 3}
+        xpl.filter(max_contrib=2)
+        assert xpl.mask is not mask
+        pd.testing.assert_frame_equal(xpl.mask, mask)
+
     def test_check_label_name_1(self):
         """
         Unit test check label name 1
@@ -671,6 +1136,33 @@ class TestSmartExplainer(unittest.TestCase):
         assert all(attrib2 in attrib_xpl for attrib2 in attrib_xpl2)
         os.remove(pkl_file)
 
+    def test_save_load_dir(self):
+        """
+        Test save + load methods with the directory format
+        """
+        _, xpl = init_sme_to_pickle_test()
+        with tempfile.TemporaryDirectory() as tmp_dir:
+            dir_path = path.join(tmp_dir, "xpl")
+            xpl.save(dir_path, format="dir")
+            assert path.exists(path.join(dir_path, "metadata.pkl"))
+            for mmap in [True, False]:
+                xpl2 = SmartExplainer.load(dir_path, mmap=mmap)
+                assert set(xpl2.__dict__.keys()) == set(xpl.__dict__.keys())
+                assert xpl2.plot._explainer is xpl2
+                assert_frame_equal(xpl2.contributions, xpl.contributions)
+                assert_frame_equal(xpl2.x_init, xpl.x_init)
+                assert_frame_equal(xpl2.data["contrib_sorted"], xpl.data["contrib_sorted"])
+                assert xpl2.mask_params == xpl.mask_params
+                assert_frame_equal(xpl2.to_pandas(max_contrib=2), xpl.to_pandas(max_contrib=2))
+
+    def test_save_wrong_format(self):
+        """
+        Test save method with an unknown format
+        """
+        pkl_file, xpl = init_sme_to_pickle_test()
+        with self.assertRaises(ValueError):
+            xpl.save(pkl_file, format="parquet")
+
     def test_predict_1(self):
         """
         Test predict method 1
@@ -996,6 +1488,29 @@ class TestSmartExplainer(unittest.TestCase):
         assert expect1.round(8).equals(xpl.features_imp[0].round(8))
         assert expect2.round(8).equals(xpl.features_imp[1].round(8))
 
+    def test_compute_features_import_local(self):
+        """
+        Unit test compute_features_import with local levels
+        """
+        xpl = SmartExplainer(self.model)
+        contributions = pd.DataFrame(
+            [[1, -2, 3, 4], [5, 6, -7, 8], [9, 10, 11, -12]],
+            columns=["contribution_0", "contribution_1", "contribution_2", "contribution_3"],
+            index=[0, 1, 2],
+        )
+        xpl.features_imp = None
+        xpl.contributions = contributions
+        xpl.backend = ShapBackend(model=DecisionTreeClassifier().fit([[0]], [[0]]))
+        xpl.backend.state = SmartState()
+        xpl.explain_data = None
+        xpl._case = "regression"
+        xpl.compute_features_import(local=True)
+        for norm, features_imp in [(1, xpl.features_imp), (3, xpl.features_imp_local_lev1), (7, xpl.features_imp_local_lev2)]:
+            expected = (contributions.abs() ** norm).sum() ** (1 / norm)
+            expected = expected.sort_values(ascending=True) / expected.sum()
+            pd.testing.assert_series_equal(features_imp, expected, rtol=1e-6)
+        assert xpl._get_importance_engine(contributions) is xpl._get_importance_engine(contributions)
+
     def test_to_smartpredictor_1(self):
         """
         Unit test 1  to_smartpredictor
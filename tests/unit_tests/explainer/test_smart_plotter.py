@@ -2,6 +2,7 @@
 Unit test smart plotter
 """
 
+import pickle
 import unittest
 from unittest.mock import patch
 
@@ -11,6 +12,7 @@ import pandas as pd
 import plotly.express as px
 import plotly.graph_objects as go
 from catboost import CatBoostClassifier
+from sklearn.cluster import KMeans
 from sklearn.ensemble import HistGradientBoostingClassifier
 from sklearn.tree import DecisionTreeClassifier, DecisionTreeRegressor
 
@@ -23,7 +25,7 @@ from shapash.plots.plot_feature_importance import _plot_features_import
 from shapash.plots.plot_line_comparison import plot_line_comparison
 from shapash.style.style_utils import get_palette
 from shapash.utils.check import check_model
-from shapash.utils.sampling import subset_sampling
+from shapash.utils.sampling import SubsetSampler, subset_sampling
 
 
 class TestSmartPlotter(unittest.TestCase):
@@ -828,6 +830,47 @@ class TestSmartPlotter(unittest.TestCase):
         assert np.array_equal(output_hovertext, np_hv)
         assert output.layout.xaxis.title.text == xpl.features_dict[col]
 
+    def test_contribution_plot_compact_scatter(self):
+        """
+        Compact hover labels built from customdata
+        """
+        col = "X2"
+        xpl = self.smart_explainer
+        xpl.y_pred = pd.DataFrame([0, 1], columns=["pred"], index=xpl.x_init.index)
+        xpl._classes = [0, 1]
+        output = xpl.plot.contribution_plot(col, violin_maxf=0, proba=False, compact=True)
+        feature_values = xpl.x_init[col].sort_values()
+        assert output.data[-1].hovertext is None
+        assert "%{customdata[1]}" in output.data[-1].hovertemplate
+        assert "%{customdata[2]}" in output.data[-1].hovertemplate
+        assert [row[1] for row in output.data[-1].customdata] == feature_values.index.tolist()
+        assert [row[2] for row in output.data[-1].customdata] == xpl.y_pred.loc[feature_values.index, "pred"].tolist()
+
+    def test_contribution_plot_compact_violin(self):
+        """
+        Compact hover labels built from customdata in violin plot
+        """
+        col = "X2"
+        xpl = self.smart_explainer
+        xpl.contributions = pd.concat([self.contrib1] * 10, ignore_index=True)
+        xpl._case = "regression"
+        xpl.state = SmartState()
+        xpl.x_init = pd.concat([xpl.x_init] * 10, ignore_index=True)
+        xpl.postprocessing_modifications = False
+        xpl.y_pred = pd.concat([pd.DataFrame([0.46989877093, 12.749302948])] * 10, ignore_index=True)
+        xpl.plot._tuning_round_digit()
+        output = xpl.plot.contribution_plot(col, compact=True)
+        expected = xpl.plot.contribution_plot(col)
+        new_index = xpl.x_init[col].sort_values().index
+        for i in [2, 5]:
+            assert output.data[i].hovertext is None
+            assert output.data[i].customdata.shape[1] == 3
+            assert "%{customdata[2]}" in output.data[i].hovertemplate
+        customdata = np.concatenate((output.data[2].customdata, output.data[5].customdata), axis=0)
+        assert customdata[:, 1].tolist() == new_index.tolist()
+        assert customdata[:, 2].tolist() == [round(y, 2) for y in xpl.y_pred.loc[new_index].iloc[:, 0]]
+        assert len(output.data) == len(expected.data)
+
     def test_contribution_plot_6(self):
         """
         Regression without pred
@@ -1125,6 +1168,43 @@ class TestSmartPlotter(unittest.TestCase):
         assert len(output.data[1].x) == 10
         self.setUp()
 
+    def test_contribution_plot_group_projection(self):
+        """
+        contribution plot with groups of features: the projections are cached on the explainer
+        """
+        xpl = self.smart_explainer
+        xpl.inv_features_dict = {}
+        xpl.contributions = pd.concat([self.contrib1] * 10, ignore_index=True)
+        xpl._case = "regression"
+        xpl.state = SmartState()
+        xpl.backend.state = SmartState()
+        xpl.x_init = pd.DataFrame({"X1": np.arange(20) % 3, "X2": np.arange(20) * 1.5})
+        xpl.x_encoded = xpl.x_init.copy()
+        xpl.postprocessing_modifications = False
+        xpl.preprocessing = None
+        xpl.features_groups = {"group1": ["X1", "X2"]}
+        xpl.contributions_groups = xpl.state.compute_grouped_contributions(xpl.contributions, xpl.features_groups)
+        xpl.features_imp_groups = None
+        xpl._update_features_dict_with_groups(features_groups=xpl.features_groups)
+
+        subset = list(range(10))
+        output = xpl.plot.contribution_plot("group1", proba=False, selection=subset, projection="pca")
+        assert len(output.data[1].x) == 10
+        assert ("group1", "pca") in xpl._group_projections
+        assert len(xpl._group_projections[("group1", "pca")]) == 20
+        projected = xpl._group_projections[("group1", "pca")]
+        xpl.plot.contribution_plot("group1", proba=False, selection=list(range(5, 15)), projection="pca")
+        assert xpl._group_projections[("group1", "pca")] is projected
+
+        xpl.plot.contribution_plot("group1", proba=False, selection=subset)
+        assert ("group1", "tsne", tuple(subset)) in xpl._group_projections
+        xpl.plot.contribution_plot("group1", proba=False, selection=subset, projection="random_projection")
+        assert len(xpl._group_projections) == 3
+
+        with self.assertRaises(ValueError):
+            xpl.plot.contribution_plot("group1", projection="umap")
+        self.setUp()
+
     def _build_nan_explainer(self, low_cardinality=False):
         rng = np.random.default_rng(0)
         n, n_nan = 60, 5
@@ -2477,6 +2557,40 @@ class TestSmartPlotter(unittest.TestCase):
         with self.assertRaises(ValueError):
             list_ind, addnote = subset_sampling(df=xpl.x_init, selection=selection, max_points=50)
 
+    def test_subset_sampler(self):
+        """
+        test SubsetSampler: same sample for the same arguments, strata computed once per column
+        """
+        rng = np.random.default_rng(0)
+        df = pd.DataFrame(
+            {"num": rng.normal(size=3000), "cat": rng.choice(["a", "b", "c"], size=3000, p=[0.9, 0.09, 0.01])},
+            index=[f"id_{i}" for i in range(3000)],
+        )
+        df.loc["id_5", "num"] = np.nan
+        sampler = SubsetSampler(df)
+        list_ind, addnote = sampler.sample(max_points=100)
+        assert len(set(list_ind)) == 100
+        assert addnote == "Length of random Subset: 100 (3%)"
+        assert sampler.sample(max_points=100)[0] == list_ind
+        assert subset_sampling(df, max_points=100)[0] == list_ind
+
+        with patch("sklearn.cluster.KMeans.fit", autospec=True, side_effect=KMeans.fit) as kmeans_fit:
+            list_ind, addnote = sampler.sample(max_points=300, col="num", col_value_count=3000)
+            assert sampler.sample(max_points=300, col="num", col_value_count=3000)[0] == list_ind
+            selection = df.index[:1000].tolist()
+            sub_ind = sampler.sample(selection, max_points=200, col="num", col_value_count=3000)[0]
+        assert kmeans_fit.call_count == 1
+        assert addnote == "Length of smart Subset: 300 (10%)"
+        assert len(set(list_ind)) == 300
+        assert set(sub_ind) <= set(selection)
+        assert sampler.get_strata("num", 3000)[5] == 100
+
+        # The rare values are favoured
+        list_ind, _ = sampler.sample(max_points=300, col="cat", col_value_count=3)
+        assert (df.loc[list_ind, "cat"] == "c").mean() > (df["cat"] == "c").mean()
+        with self.assertRaises(KeyError):
+            sampler.sample(selection + ["unknown"] * 200, max_points=200, col="cat", col_value_count=3)
+
     def test_clustering_by_explainability_plot_1_default_classification(self):
         X_train = pd.DataFrame(np.random.randint(0, 100, size=(30, 3)), columns=list("ABC"))
         y_train = pd.DataFrame(np.random.randint(0, 3, size=(30, 1)))
@@ -2502,6 +2616,43 @@ class TestSmartPlotter(unittest.TestCase):
         assert output.data[1].type == "scatter"
         assert output.data[2].type == "scatter"
 
+    def test_clustering_by_explainability_plot_projection_cache(self):
+        np.random.seed(42)
+        df = pd.DataFrame(np.random.randint(0, 100, size=(50, 4)), columns=list("ABCD"))
+        model = DecisionTreeRegressor().fit(df.iloc[:, :-1], df.iloc[:, -1])
+        xpl = SmartExplainer(model=model)
+        xpl.compile(x=df.iloc[:, :-1], y_target=df.iloc[:, -1])
+        selection = list(range(40))
+        xpl.plot.clustering_by_explainability_plot(selection=selection, n_clusters=3, projection="pca")
+        projections = xpl.plot.cluster_projections
+        assert projections.shape == (40, 2)
+        output = xpl.plot.clustering_by_explainability_plot(
+            color_value="errors", selection=selection, n_clusters=4, projection="pca", show_clusters=False
+        )
+        assert isinstance(output, go.Figure)
+        assert xpl.plot.cluster_projections is projections
+        assert len(np.unique(xpl.plot.cluster_labels)) == 4
+        xpl.plot.clustering_by_explainability_plot(selection=selection, n_clusters=3, projection="tsne_fast")
+        assert xpl.plot.cluster_projections is not projections
+        with self.assertRaises(ValueError):
+            xpl.plot.clustering_by_explainability_plot(selection=selection, projection="umap")
+
+    def test_clustering_by_explainability_plot_projected_beforehand(self):
+        np.random.seed(42)
+        df = pd.DataFrame(np.random.randint(0, 100, size=(50, 4)), columns=list("ABCD"))
+        model = DecisionTreeRegressor().fit(df.iloc[:, :-1], df.iloc[:, -1])
+        xpl = SmartExplainer(model=model)
+        xpl.compile(x=df.iloc[:, :-1], y_target=df.iloc[:, -1])
+        selection = list(range(40))
+        projections, labels, _ = xpl.plot._project_clusters(selection=selection, n_clusters=3, projection="pca")
+        xpl.plot.clustering_by_explainability_plot(selection=selection, n_clusters=3, projection="pca")
+        assert xpl.plot.cluster_projections is projections
+        assert xpl.plot.cluster_labels is labels
+        plotter = pickle.loads(pickle.dumps(xpl.plot))
+        assert "_projection_cache" not in plotter.__dict__
+        with plotter._cluster_lock:
+            pass
+
     def test_clustering_by_explainability_plot_3_default_regression(self):
         np.random.seed(42)
         df = pd.DataFrame(np.random.randint(0, 100, size=(50, 4)), columns=list("ABCD"))
@@ -3,6 +3,7 @@ Unit test smart predictor
 """
 
 import os
+import tempfile
 import types
 import unittest
 from os import path
@@ -24,6 +25,7 @@ from shapash.backend import ShapBackend
 from shapash.explainer.multi_decorator import MultiDecorator
 from shapash.explainer.smart_predictor import SmartPredictor
 from shapash.explainer.smart_state import SmartState
+from shapash.utils.load_smartpredictor import load_smartpredictor
 
 
 def init_sme_to_pickle_test():
@@ -785,6 +787,31 @@ class TestSmartPredictor(unittest.TestCase):
         assert all(contributions.index == predictor_1.data["x"].index)
         assert contributions.shape[1] == predictor_1.data["x"].shape[1] + 2
 
+    def test_detail_contributions_dtype(self):
+        """
+        Unit test of detail_contributions method with dtype.
+        """
+        clf = cb.CatBoostRegressor(n_estimators=1).fit(self.df_2[["x1", "x2"]], self.df_2["y"])
+        predictor = SmartPredictor(
+            self.features_dict_2,
+            clf,
+            self.columns_dict_2,
+            ShapBackend(model=clf),
+            self.features_types_2,
+            dtype="float32",
+        )
+        predictor.backend.state = SmartState()
+        predictor.add_input(x=self.df_2[["x1", "x2"]], ypred=pd.DataFrame(self.df_2["y"]))
+        assert (predictor.data["contributions"].dtypes == np.float32).all()
+        assert (predictor.detail_contributions()[["x1", "x2"]].dtypes == np.float32).all()
+        with tempfile.TemporaryDirectory() as tmp_dir:
+            predictor.save(tmp_dir, format="dir")
+            assert load_smartpredictor(tmp_dir).dtype == "float32"
+        with self.assertRaises(ValueError):
+            SmartPredictor(
+                self.features_dict_2, clf, self.columns_dict_2, predictor.backend, self.features_types_2, dtype="int"
+            )
+
     def test_save_1(self):
         """
         Unit test save 1
@@ -1109,6 +1136,38 @@ class TestSmartPredictor(unittest.TestCase):
 
         predictor_1.modify_mask(max_contrib=2)
 
+    def test_summarize_memoized_masks(self):
+        """
+        Unit test summarize method : the ranking and the masks are reused when switching back to earlier mask_params
+        """
+        predictor_1 = self.predictor_3
+        predictor_1.data = {
+            "x": self.df_3[["x1", "x2"]],
+            "x_preprocessed": self.df_3[["x1", "x2"]],
+            "x_postprocessed": self.df_3[["x1", "x2"]],
+            "ypred": self.df_3["y"],
+            "contributions": pd.DataFrame(
+                [[0.01, 0.094286], [0.02, -0.023571], [0.0, -0.023571], [-0.01, -0.023571], [0.03, -0.023571]],
+                columns=["x1", "x2"],
+            ),
+        }
+        predictor_1.modify_mask(max_contrib=1)
+        output_1 = predictor_1.summarize()
+        summary, mask = predictor_1.summary, predictor_1.mask
+        predictor_1.modify_mask(max_contrib=2)
+        output_2 = predictor_1.summarize()
+        assert predictor_1.summary is summary
+        assert predictor_1.mask is not mask
+        assert output_2.shape[1] == output_1.shape[1] + 3
+        predictor_1.modify_mask(max_contrib=1)
+        pd.testing.assert_frame_equal(predictor_1.summarize(), output_1)
+        assert predictor_1.mask is mask
+
+        predictor_1.data["contributions"] = predictor_1.data["contributions"] * 2
+        predictor_1.summarize()
+        assert predictor_1.summary is not summary
+        assert predictor_1.mask is not mask
+
     def test_apply_postprocessing_1(self):
         """
         Unit test apply_postprocessing 1
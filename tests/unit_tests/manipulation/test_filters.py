@@ -12,6 +12,7 @@ from shapash.manipulation.filters import (
     cutoff_contributions,
     cutoff_contributions_old,
     hide_contributions,
+    mask_params_key,
     sign_contributions,
 )
 
@@ -220,3 +221,12 @@ class TestFilter(unittest.TestCase):
             columns=["contrib_1", "contrib_2", "contrib_3"],
         )
         pd.testing.assert_frame_equal(output, expected_output)
+
+    def test_mask_params_key(self):
+        """
+        Unit test mask params key
+        """
+        assert mask_params_key() == mask_params_key(features_to_hide=[], threshold=0, max_contrib=0)
+        assert mask_params_key(["x1", "x2"], 0.1, True, 3) == (("x1", "x2"), 0.1, True, 3)
+        assert mask_params_key(positive=False) != mask_params_key()
+        hash(mask_params_key(np.array(["x1"]), 0.5))
@@ -8,7 +8,20 @@ import numpy as np
 import pandas as pd
 from pandas.testing import assert_frame_equal
 
-from shapash.manipulation.summarize import compute_corr, compute_features_import, group_contributions, summarize_el
+from shapash.utils.class_values import ClassesArray, NegatedPair
+
+from shapash.manipulation.summarize import (
+    GroupsMembership,
+    SubsetFeaturesImportance,
+    compute_corr,
+    compute_features_import,
+    create_grouped_features_references,
+    create_grouped_features_values,
+    group_contributions,
+    project_feature_values_1d,
+    project_group_values,
+    summarize_el,
+)
 
 
 class TestSummarize(unittest.TestCase):
@@ -126,6 +139,162 @@ class TestSummarize(unittest.TestCase):
         )
         assert_frame_equal(output, expected)
 
+    def test_groups_membership(self):
+        """
+        Test the membership matrix gives the same grouped contributions for all the types of contributions
+        """
+        rng = np.random.default_rng(0)
+        contrib = pd.DataFrame(rng.normal(size=(6, 5)), columns=["a", "b", "c", "d", "e"], index=list("ABCDEF"))
+        features_groups = {"group1": ["d", "a"], "group2": ["e"]}
+        membership = GroupsMembership(contrib.columns, features_groups)
+        assert membership.matrix.shape == (5, 4)
+        assert list(membership.grouped_columns) == ["b", "c", "group1", "group2"]
+        expected = pd.DataFrame(
+            {
+                "b": contrib["b"],
+                "c": contrib["c"],
+                "group1": contrib["d"] + contrib["a"],
+                "group2": contrib["e"],
+            }
+        )
+        assert_frame_equal(group_contributions(contrib, membership), expected)
+        assert_frame_equal(group_contributions(contrib.astype(np.float32), membership), expected.astype(np.float32))
+
+        pair = group_contributions(NegatedPair(contrib), membership)
+        assert isinstance(pair, NegatedPair)
+        assert_frame_equal(pair[0], -expected)
+
+        classes = group_contributions(ClassesArray.from_frames([contrib, 2 * contrib, -contrib]), membership)
+        assert isinstance(classes, ClassesArray)
+        for grouped, factor in zip(classes, [1, 2, -1]):
+            assert_frame_equal(grouped, factor * expected)
+
+        with self.assertRaises(KeyError):
+            GroupsMembership(contrib.columns, {"group1": ["a", "unknown"]})
+
+    def test_create_grouped_features_references(self):
+        """
+        Test the groups values referenced by position give the dicts of values of create_grouped_features_values
+        """
+        x_init = pd.DataFrame(
+            {"a": [1.0, 2.0, 3.0], "b": ["x", "y", "z"], "c": [4, 5, 6], "d": [0.1, 0.2, 0.3]}, index=list("ABC")
+        )
+        features_groups = {"group1": ["a", "b"], "group2": ["d"]}
+        features_dict = {"a": "Feature A", "group1": "Group 1"}
+        expected = create_grouped_features_values(
+            x_init, x_init, None, features_groups, features_dict, how="dict_of_values"
+        )
+        df, groups_values = create_grouped_features_references(
+            x_init, x_init, None, features_groups, features_dict, start=2
+        )
+        assert list(df.columns) == list(expected.columns)
+        assert_frame_equal(df["c"].to_frame(), expected["c"].to_frame())
+        assert df["group1"].tolist() == [2, 3, 4]
+        assert groups_values.n_rows == 3
+
+        previous = create_grouped_features_references(
+            x_init.iloc[:2], x_init.iloc[:2], None, features_groups, features_dict
+        )[1]
+        groups_values = previous.concat(groups_values)
+        assert groups_values.n_rows == 5
+        assert groups_values.to_dicts("group1", [4, 2]) == [expected.loc["C", "group1"], expected.loc["A", "group1"]]
+
+        summary = pd.DataFrame(
+            {"feature_1": ["Group 1", "c"], "value_1": [3, 5], "feature_2": ["group2", np.nan], "value_2": [2, np.nan]},
+            index=["B", "C"],
+        )
+        resolved = groups_values.resolve(summary, features_dict)
+        assert resolved["value_1"].tolist() == [expected.loc["B", "group1"], 5]
+        assert resolved.loc["B", "value_2"] == expected.loc["A", "group2"]
+        assert summary["value_1"].tolist() == [3, 5]
+
+    def test_project_group_values(self):
+        """
+        Test the linear projections of groups of features fitted on a sample of rows
+        """
+        rng = np.random.default_rng(0)
+        base = rng.normal(size=200)
+        values = pd.DataFrame({"a": base, "b": 10 * base + rng.normal(scale=0.1, size=200)}, index=range(100, 300))
+        projected = project_group_values(values, "group1", how="pca", fit_size=50)
+        assert projected.name == "group1"
+        assert projected.index.equals(values.index)
+        assert abs(np.corrcoef(projected, base)[0, 1]) > 0.99
+        pd.testing.assert_series_equal(projected, project_group_values(values, "group1", how="pca", fit_size=50))
+
+        projected = project_feature_values_1d(values, "group1", values, values, None, {}, how="random_projection")
+        assert projected.index.equals(values.index)
+        assert abs(np.corrcoef(projected, base)[0, 1]) > 0.9
+
+        with self.assertRaises(NotImplementedError):
+            project_group_values(values, "group1", how="tsne")
+
+
+class TestSubsetFeaturesImportance(unittest.TestCase):
+    def setUp(self):
+        rng = np.random.default_rng(0)
+        index = [f"id_{i}" for i in range(50)]
+        columns = ["col1", "col2", "col3", "col4"]
+        self.contrib_0 = pd.DataFrame(rng.normal(size=(50, 4)), index=index, columns=columns)
+        self.contrib_1 = pd.DataFrame(rng.normal(size=(50, 4)), index=index, columns=columns)
+        self.subset = ["id_3", "id_10", "id_0", "id_42"]
+
+    def test_compute_regression(self):
+        engine = SubsetFeaturesImportance(self.contrib_0)
+        assert engine.abs_contributions.dtype == np.float32
+        output = engine.compute(subset=self.subset, norms=(1, 3, 7))
+        for norm in [1, 3, 7]:
+            expected = compute_features_import(self.contrib_0.loc[self.subset], norm)
+            pd.testing.assert_series_equal(output[norm], expected, rtol=1e-6)
+        pd.testing.assert_series_equal(engine.compute()[1], compute_features_import(self.contrib_0), rtol=1e-6)
+
+    def test_compute_classification(self):
+        engine = SubsetFeaturesImportance([self.contrib_0, self.contrib_1])
+        output = engine.compute(subset=self.subset, norms=(1, 3))
+        for norm in [1, 3]:
+            assert len(output[norm]) == 2
+            for result, contrib in zip(output[norm], [self.contrib_0, self.contrib_1]):
+                expected = compute_features_import(contrib.loc[self.subset], norm)
+                pd.testing.assert_series_equal(result, expected, rtol=1e-6)
+
+    def test_compute_cache(self):
+        engine = SubsetFeaturesImportance([self.contrib_0, self.contrib_1])
+        output_1 = engine.compute(subset=self.subset)
+        output_2 = engine.compute(subset=list(self.subset), norms=(1, 3))
+        assert output_2[1] is output_1[1]
+        output_3 = engine.compute(subset=self.subset[:2])
+        assert output_3[1] is not output_1[1]
+        expected = compute_features_import(self.contrib_1.loc[self.subset[:2]])
+        pd.testing.assert_series_equal(output_3[1][1], expected, rtol=1e-6)
+
+    def test_compute_groups(self):
+        features_groups = {"group1": ["col1", "col3"]}
+        for contributions in [self.contrib_0, [self.contrib_0, self.contrib_1], NegatedPair(self.contrib_1)]:
+            columns = contributions[-1].columns if isinstance(contributions, list) else contributions.columns
+            membership = GroupsMembership(columns, features_groups)
+            engine = SubsetFeaturesImportance(contributions, groups=membership)
+            grouped = group_contributions(contributions, membership)
+            output = engine.compute(subset=self.subset, norms=(1, 3), use_groups=True)
+            for norm in [1, 3]:
+                results = output[norm] if isinstance(contributions, list) else [output[norm]]
+                frames = grouped if isinstance(contributions, list) else [grouped]
+                for result, contrib in zip(results, frames):
+                    expected = compute_features_import(contrib.loc[self.subset], norm)
+                    pd.testing.assert_series_equal(result, expected, rtol=1e-6)
+            features_output = engine.compute(subset=self.subset)[1]
+            expected = SubsetFeaturesImportance(contributions).compute(subset=self.subset)[1]
+            if isinstance(contributions, list):
+                for result, expected_result in zip(features_output, expected):
+                    pd.testing.assert_series_equal(result, expected_result)
+            else:
+                pd.testing.assert_series_equal(features_output, expected)
+        with self.assertRaises(ValueError):
+            SubsetFeaturesImportance(self.contrib_0).compute(use_groups=True)
+
+    def test_compute_unknown_index(self):
+        engine = SubsetFeaturesImportance(self.contrib_0)
+        with self.assertRaises(KeyError):
+            engine.compute(subset=["id_0", "unknown"])
+
 
 class TestComputeCorr(unittest.TestCase):
     def setUp(self):
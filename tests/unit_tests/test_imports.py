@@ -0,0 +1,31 @@
+"""
+Import-time regression tests: the serving entry points must not import the heavy dependencies.
+"""
+
+import subprocess
+import sys
+import unittest
+
+HEAVY_MODULES = ["plotly", "dash", "sklearn.manifold", "shap", "shapash.explainer.smart_explainer"]
+
+
+def imported_modules(statement):
+    """
+    Run an import statement in a fresh interpreter and return the heavy modules it imported.
+    """
+    code = f"import sys\n{statement}\nprint(','.join(m for m in {HEAVY_MODULES!r} if m in sys.modules))"
+    output = subprocess.run([sys.executable, "-c", code], capture_output=True, text=True, check=True).stdout
+    return [module for module in output.strip().split(",") if module]
+
+
+class TestLazyImports(unittest.TestCase):
+    def test_import_load_smartpredictor(self):
+        assert imported_modules("from shapash.utils.load_smartpredictor import load_smartpredictor") == []
+
+    def test_import_shapash(self):
+        assert imported_modules("import shapash") == []
+
+    def test_smart_explainer_is_imported_on_access(self):
+        modules = imported_modules("from shapash import SmartExplainer")
+        assert "shapash.explainer.smart_explainer" in modules
+        assert "plotly" in modules
@@ -23,6 +23,7 @@ from shapash.utils.check import (
     check_consistency_model_features,
     check_consistency_model_label,
     check_contribution_object,
+    check_dtype,
     check_label_dict,
     check_mask_params,
     check_model,
@@ -640,3 +641,11 @@ class TestCheck(unittest.TestCase):
         with pytest.raises(Exception) as exc_info:
             check_columns_order(columns_order)
         assert str(exc_info.value) == "All elements in columns_order must be strings."
+
+    def test_check_dtype(self):
+        assert check_dtype(None) is None
+        assert check_dtype("float32") == "float32"
+        assert check_dtype(np.float16) == "float16"
+        for dtype in ["int32", "object", "not_a_type"]:
+            with pytest.raises(ValueError):
+                check_dtype(dtype)
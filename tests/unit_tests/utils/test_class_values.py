@@ -0,0 +1,102 @@
+"""
+Unit test of class values
+"""
+
+import copy
+import pickle
+import unittest
+
+import numpy as np
+import pandas as pd
+from pandas.testing import assert_frame_equal
+
+from shapash.utils.class_values import ClassesArray, ClassValues, NegatedPair
+from shapash.utils.utils import concat_rows
+
+
+class TestClassValues(unittest.TestCase):
+    def test_abstract(self):
+        with self.assertRaises(TypeError):
+            ClassValues(2)
+
+        class Constant(ClassValues):
+            def _get(self, index):
+                return index
+
+        assert list(Constant(3)) == [0, 1, 2]
+
+
+class TestNegatedPair(unittest.TestCase):
+    def setUp(self):
+        self.positive = pd.DataFrame({"a": [1.0, -2.0], "b": [0.5, 0.0]})
+        self.pair = NegatedPair(self.positive)
+
+    def test_access(self):
+        assert isinstance(self.pair, list)
+        assert len(self.pair) == 2
+        assert self.pair[1] is self.positive
+        assert self.pair[-1] is self.positive
+        assert_frame_equal(self.pair[0], -self.positive)
+        assert_frame_equal(self.pair[-2], -self.positive)
+        first, second = self.pair
+        assert_frame_equal(first, -self.positive)
+        assert second is self.positive
+        assert [frame.shape for frame in self.pair[:]] == [(2, 2), (2, 2)]
+        with self.assertRaises(IndexError):
+            self.pair[2]
+
+    def test_read_only(self):
+        with self.assertRaises(TypeError):
+            self.pair[0] = self.positive
+        with self.assertRaises(TypeError):
+            self.pair.append(self.positive)
+
+    def test_copy_and_pickle(self):
+        for pair in [copy.copy(self.pair), copy.deepcopy(self.pair), pickle.loads(pickle.dumps(self.pair))]:
+            assert isinstance(pair, NegatedPair)
+            assert_frame_equal(pair[1], self.positive)
+            assert_frame_equal(pair[0], -self.positive)
+
+    def test_concat_rows(self):
+        result = concat_rows(self.pair, NegatedPair(self.positive))
+        assert isinstance(result, NegatedPair)
+        assert result[1].shape == (4, 2)
+        shared = concat_rows([self.positive, self.positive], [self.positive, self.positive])
+        assert shared[0] is shared[1]
+
+
+class TestClassesArray(unittest.TestCase):
+    def setUp(self):
+        self.frames = [
+            pd.DataFrame({"a": [1.0, 2.0], "b": [3.0, 4.0]}, index=["x", "y"]) * (i + 1) for i in range(3)
+        ]
+        self.classes = ClassesArray.from_frames(self.frames)
+
+    def test_access(self):
+        assert isinstance(self.classes, list)
+        assert len(self.classes) == 3
+        assert self.classes.values.shape == (2, 2, 3)
+        for frame, expected in zip(self.classes, self.frames, strict=True):
+            assert_frame_equal(frame, expected)
+        assert_frame_equal(self.classes[-1], self.frames[2])
+        # The DataFrame of a class is a view of the array
+        assert np.shares_memory(self.classes[1].to_numpy(), self.classes.values)
+        with self.assertRaises(TypeError):
+            self.classes[0] = self.frames[0]
+
+    def test_can_stack(self):
+        assert ClassesArray.can_stack(self.frames)
+        assert not ClassesArray.can_stack(self.frames[:1])
+        assert not ClassesArray.can_stack([self.frames[0], self.frames[1].set_axis(["z", "y"])])
+        assert not ClassesArray.can_stack([self.frames[0], self.frames[1].to_numpy()])
+        with self.assertRaises(ValueError):
+            ClassesArray(np.ones((2, 2)))
+
+    def test_copy_pickle_and_concat(self):
+        for classes in [copy.copy(self.classes), copy.deepcopy(self.classes), pickle.loads(pickle.dumps(self.classes))]:
+            assert isinstance(classes, ClassesArray)
+            assert_frame_equal(classes[2], self.frames[2])
+        result = concat_rows(self.classes, self.classes)
+        assert isinstance(result, ClassesArray)
+        assert result[0].shape == (4, 2)
+        assert list(result[0].index) == ["x", "y", "x", "y"]
@@ -0,0 +1,89 @@
+"""
+Unit test of clustering
+"""
+
+import unittest
+
+import numpy as np
+import pandas as pd
+
+from shapash.utils.clustering import (
+    PROJECTION_METHODS,
+    ProjectionCache,
+    compute_cluster_polygons,
+    compute_concave_hull,
+    compute_projection,
+    expand_polygons_independently,
+    move_points_towards_centroid,
+    scale_points_within_cluster,
+)
+
+
+class TestClustering(unittest.TestCase):
+    def setUp(self):
+        rng = np.random.default_rng(0)
+        self.values = pd.DataFrame(rng.normal(size=(40, 4)), columns=["a", "b", "c", "d"])
+
+    def test_compute_projection(self):
+        for method in PROJECTION_METHODS:
+            projections = compute_projection(self.values, method=method)
+            assert projections.shape == (40, 2)
+            assert np.isfinite(projections).all()
+        np.testing.assert_allclose(compute_projection(self.values, "pca"), compute_projection(self.values, "pca"))
+        assert compute_projection(self.values[["a"]], "pca").shape == (40, 2)
+        with self.assertRaises(ValueError):
+            compute_projection(self.values, method="umap")
+
+    def test_projection_cache(self):
+        cache = ProjectionCache(max_size=2)
+        contributions = self.values
+        projections, labels, centers = cache.get("key", contributions, self.values, method="pca", n_clusters=3)
+        assert len(labels) == 40
+        assert centers.shape == (3, 2)
+
+        # Only the clusters are computed for a new number of clusters
+        same_projections, labels, centers = cache.get("key", contributions, self.values, method="pca", n_clusters=4)
+        assert same_projections is projections
+        assert centers.shape == (4, 2)
+        assert cache.get("key", contributions, self.values, method="pca", n_clusters=4)[2] is centers
+
+        # New contributions compute the projection again
+        assert cache.get("key", contributions.copy(), self.values, method="pca", n_clusters=3)[0] is not projections
+
+        cache.get("other", contributions, self.values, method="pca", n_clusters=3)
+        cache.get("last", contributions, self.values, method="pca", n_clusters=3)
+        assert len(cache._entries) == 2
+        cache.clear()
+        assert len(cache._entries) == 0
+
+    def test_move_and_scale_points(self):
+        points = np.array([[0.0, 0.0], [2.0, 2.0], [10.0, 0.0], [5.0, 5.0]])
+        labels = np.array([0, 0, 1, 2])
+        centers = np.array([[1.0, 1.0], [11.0, 0.0], [5.0, 4.0]])
+        moved = move_points_towards_centroid(points, labels, centers, factor=0.5)
+        np.testing.assert_allclose(moved, [[0.5, 0.5], [1.5, 1.5], [10.5, 0.0], [5.0, 4.5]])
+
+        # The points of the clusters without polygon are not moved
+        scaled = scale_points_within_cluster(points, labels, centers, np.array([2.0, 3.0]), {0: 0, 1: 1})
+        np.testing.assert_allclose(scaled, [[-1.0, -1.0], [3.0, 3.0], [8.0, 0.0], [5.0, 5.0]])
+
+    def test_compute_cluster_polygons(self):
+        rng = np.random.default_rng(0)
+        points = np.vstack([rng.normal(loc=(0, 0), size=(3000, 2)), rng.normal(loc=(20, 0), size=(500, 2))])
+        points = np.vstack([points, [[50.0, 50.0], [51.0, 50.0]]])
+        labels = np.repeat([0, 1, 2], [3000, 500, 2])
+
+        hull = compute_concave_hull(points[:3000], alpha=5, max_points=500)
+        full_hull = compute_concave_hull(points[:3000], alpha=5)
+        assert hull.is_valid
+        assert abs(hull.area - full_hull.area) / full_hull.area < 0.1
+
+        polys, centroids, valid_labels = compute_cluster_polygons(points, labels, max_points=500, n_jobs=2)
+        assert valid_labels.tolist() == [0, 1]
+        np.testing.assert_allclose(centroids[1], points[3000:3500].mean(axis=0))
+        sequential = compute_cluster_polygons(points, labels, max_points=500, n_jobs=1)[0]
+        assert all(poly.equals(other) for poly, other in zip(polys, sequential))
+
+        expanded, scales = expand_polygons_independently(polys, centroids, eps=0.05, max_iter=100)
+        assert (scales > 1).all()
+        assert not expanded[0].intersects(expanded[1])
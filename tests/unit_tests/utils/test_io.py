@@ -0,0 +1,91 @@
+"""
+Unit tests of the directory persistence of shapash.utils.io
+"""
+
+import os
+import tempfile
+import unittest
+from os import path
+
+import numpy as np
+import pandas as pd
+from pandas.testing import assert_frame_equal, assert_series_equal
+
+from shapash.utils.io import load_dir, save_dir
+
+
+def is_memory_mapped(array):
+    while array is not None:
+        if isinstance(array, np.memmap):
+            return True
+        array = array.base
+    return False
+
+
+class TestSaveLoadDir(unittest.TestCase):
+    def setUp(self):
+        self.tmp_dir = tempfile.TemporaryDirectory()
+        self.path = path.join(self.tmp_dir.name, "saved")
+        self.attributes = {
+            "numeric": pd.DataFrame(np.arange(6.0).reshape(3, 2), columns=["a", "b"], index=["x", "y", "z"]),
+            "mixed": pd.DataFrame({"a": [1, 2, 3], "b": ["u", "v", "w"]}, index=[10, 20, 30]),
+            "columns": pd.DataFrame(
+                {
+                    "int": [1, 2, 3],
+                    "cat": pd.Categorical(["u", "v", "u"]),
+                    "float": [0.5, 1.5, 2.5],
+                    "bool": [True, False, True],
+                    "date": pd.to_datetime(["2024-01-01", "2024-01-02", "2024-01-03"]),
+                },
+                index=["x", "y", "z"],
+            ),
+            "series": pd.Series([1, 0, 1], name="pred", index=[10, 20, 30]),
+            "contributions": [pd.DataFrame([[0.1, -0.2]]), pd.DataFrame([[-0.1, 0.2]])],
+            "array": np.array([[1, 2], [3, 4]]),
+            "dict": {"nested": pd.DataFrame({0: [1.5]})},
+            "other": {"label": 1, "names": ("a", "b")},
+            "empty": None,
+        }
+
+    def tearDown(self):
+        self.tmp_dir.cleanup()
+
+    def check_attributes(self, loaded):
+        assert set(loaded.keys()) == set(self.attributes.keys())
+        assert_frame_equal(loaded["numeric"], self.attributes["numeric"])
+        assert_frame_equal(loaded["mixed"], self.attributes["mixed"], check_dtype=False)
+        assert_frame_equal(loaded["columns"], self.attributes["columns"])
+        assert_series_equal(loaded["series"], self.attributes["series"])
+        for loaded_contrib, contrib in zip(loaded["contributions"], self.attributes["contributions"], strict=True):
+            assert_frame_equal(loaded_contrib, contrib)
+        np.testing.assert_array_equal(loaded["array"], self.attributes["array"])
+        assert_frame_equal(loaded["dict"]["nested"], self.attributes["dict"]["nested"])
+        assert loaded["other"] == self.attributes["other"]
+        assert loaded["empty"] is None
+
+    def test_save_load_dir(self):
+        save_dir(self.attributes, self.path)
+        self.check_attributes(load_dir(self.path, mmap=False))
+
+    def test_save_load_dir_mmap(self):
+        save_dir(self.attributes, self.path)
+        loaded = load_dir(self.path, mmap=True)
+        self.check_attributes(loaded)
+        # The mapping is copy-on-write: the saved files are not modified
+        loaded["numeric"].iloc[0, 0] = 100.0
+        assert load_dir(self.path)["numeric"].iloc[0, 0] == 0.0
+        # The numeric columns of the DataFrames with several types are mapped too
+        for col in ["int", "float", "bool", "date"]:
+            assert is_memory_mapped(loaded["columns"][col].to_numpy())
+        assert not is_memory_mapped(loaded["columns"]["cat"].cat.codes.to_numpy())
+
+    def test_save_dir_overwrite(self):
+        save_dir(self.attributes, self.path)
+        save_dir({"numeric": self.attributes["numeric"]}, self.path)
+        loaded = load_dir(self.path)
+        assert list(loaded.keys()) == ["numeric"]
+        assert len(os.listdir(self.path)) == 2
+
+    def test_save_dir_non_empty_directory(self):
+        with self.assertRaises(ValueError):
+            save_dir(self.attributes, self.tmp_dir.name + "/..")
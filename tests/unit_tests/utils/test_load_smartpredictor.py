@@ -172,3 +172,91 @@ class TestSmartPredictorManifest(unittest.TestCase):
         manifest = _build_predictor_manifest(predictor)
         recomputed = _compute_schema_fingerprint(predictor)
         assert manifest["schema_fingerprint"] == recomputed
+
+
+class TestSmartPredictorArtifact(unittest.TestCase):
+    """
+    Tests for the SmartPredictor directory artifact.
+    """
+
+    def _make_predictor(self, model):
+        dataframe_x = pd.DataFrame(
+            [[1, 2, 4], [1, 2, 3], [2, 1, 3], [3, 1, 2]] * 5, columns=["a", "b", "c"], index=range(100, 120)
+        )
+        y_pred = pd.DataFrame(data=np.array([0, 1, 1, 0] * 5), columns=["pred"], index=dataframe_x.index)
+        model = model.fit(dataframe_x, y_pred["pred"])
+        xpl = SmartExplainer(model=model, features_dict={"a": "Feature A"}, label_dict={0: "no", 1: "yes"})
+        xpl.compile(x=dataframe_x, y_pred=y_pred)
+        return xpl.to_smartpredictor(), dataframe_x
+
+    def test_save_load_dir(self):
+        predictor, dataframe_x = self._make_predictor(cb.CatBoostClassifier(n_estimators=2, verbose=0))
+        with tempfile.TemporaryDirectory() as tmp:
+            artifact = os.path.join(tmp, "predictor")
+            predictor.save(artifact, format="dir")
+            assert sorted(os.listdir(artifact)) == [
+                "backend.pkl",
+                "model.cbm",
+                "objects.pkl",
+                "predictor.manifest.json",
+                "schema.json",
+            ]
+            with warnings.catch_warnings():
+                warnings.simplefilter("error")
+                loaded = load_smartpredictor(artifact)
+            assert "model" not in loaded.__dict__
+            assert "backend" not in loaded.__dict__
+            assert loaded.features_dict == predictor.features_dict
+            assert loaded.columns_dict == predictor.columns_dict
+            assert loaded.label_dict == predictor.label_dict
+            assert loaded._classes == predictor._classes
+
+            predictor.add_input(x=dataframe_x)
+            loaded.add_input(x=dataframe_x)
+            assert loaded.backend.model is loaded.model
+            assert loaded.backend._explainer is not None
+            pd.testing.assert_frame_equal(loaded.data["contributions"], predictor.data["contributions"])
+            pd.testing.assert_frame_equal(loaded.predict_proba(), predictor.predict_proba())
+
+    def test_load_dir_with_schema_fingerprint_mismatch_raises(self):
+        predictor, _ = self._make_predictor(cb.CatBoostClassifier(n_estimators=2, verbose=0))
+        with tempfile.TemporaryDirectory() as tmp:
+            artifact = os.path.join(tmp, "predictor")
+            predictor.save(artifact, format="dir")
+            schema_path = os.path.join(artifact, "schema.json")
+            with open(schema_path, encoding="utf-8") as f:
+                schema = json.load(f)
+            schema["features_dict"] = [["a", "Tampered"]]
+            with open(schema_path, "w", encoding="utf-8") as f:
+                json.dump(schema, f)
+            with pytest.raises(ValueError, match="schema fingerprint mismatch"):
+                load_smartpredictor(artifact)
+
+    def test_save_load_dir_xgboost(self):
+        xgb = pytest.importorskip("xgboost")
+        predictor, dataframe_x = self._make_predictor(xgb.XGBClassifier(n_estimators=2))
+        with tempfile.TemporaryDirectory() as tmp:
+            artifact = os.path.join(tmp, "predictor")
+            predictor.save(artifact, format="dir")
+            assert os.path.exists(os.path.join(artifact, "model.json"))
+            loaded = load_smartpredictor(artifact)
+            predictor.add_input(x=dataframe_x)
+            loaded.add_input(x=dataframe_x)
+            pd.testing.assert_frame_equal(loaded.predict_proba(), predictor.predict_proba())
+
+    def test_pickle_lazy_predictor(self):
+        predictor, dataframe_x = self._make_predictor(cb.CatBoostClassifier(n_estimators=2, verbose=0))
+        with tempfile.TemporaryDirectory() as tmp:
+            artifact = os.path.join(tmp, "predictor")
+            predictor.save(artifact, format="dir")
+            loaded = load_smartpredictor(artifact)
+            pkl = os.path.join(tmp, "predictor.pkl")
+            loaded.save(pkl)
+            loaded2 = load_smartpredictor(pkl)
+            loaded2.add_input(x=dataframe_x)
+            assert loaded2.data["contributions"].shape == (20, 3)
+
+    def test_save_wrong_format(self):
+        predictor, _ = self._make_predictor(cb.CatBoostClassifier(n_estimators=2, verbose=0))
+        with pytest.raises(ValueError):
+            predictor.save("predictor.parquet", format="parquet")
@@ -0,0 +1,33 @@
+"""
+Unit test of memory report
+"""
+
+import tracemalloc
+import unittest
+
+import numpy as np
+
+from shapash.utils.memory import MemoryReport, get_peak_rss
+
+
+class TestMemoryReport(unittest.TestCase):
+    def test_memory_report(self):
+        with MemoryReport() as memory:
+            array = np.ones((1000, 1000))
+            memory.checkpoint("allocation")
+            del array
+            memory.checkpoint("release")
+        report = memory.report
+        assert list(report.index) == ["allocation", "release"]
+        assert 7 < report.loc["allocation", "allocated_mb"] < 9
+        assert report.loc["release", "allocated_mb"] < 0
+        assert not tracemalloc.is_tracing()
+
+    def test_memory_report_disabled(self):
+        with MemoryReport(enabled=False) as memory:
+            memory.checkpoint("stage")
+        assert memory.report is None
+        assert memory.stages == []
+
+    def test_get_peak_rss(self):
+        assert get_peak_rss() > 0
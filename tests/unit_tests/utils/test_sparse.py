@@ -0,0 +1,73 @@
+"""
+Unit test of sparse
+"""
+
+import unittest
+
+import numpy as np
+import pandas as pd
+import scipy.sparse
+from pandas.testing import assert_frame_equal
+
+from shapash.decomposition.contributions import rank_contributions
+from shapash.utils.sparse import is_sparse_frame, rank_sparse_contributions, sparse_frame, sparse_power_sums, to_dense
+
+
+class TestSparse(unittest.TestCase):
+    def setUp(self):
+        self.values = np.array(
+            [
+                [0.0, -3.0, 1.0, 0.0],
+                [2.0, 0.0, 0.0, -0.5],
+                [0.0, 0.0, 0.0, 0.0],
+                [1.0, -2.0, 4.0, 0.5],
+            ]
+        )
+        self.index = pd.Index(["a", "b", "c", "d"])
+        self.columns = pd.Index(["x1", "x2", "x3", "x4"])
+        self.s_df = sparse_frame(scipy.sparse.csr_matrix(self.values), self.index, self.columns)
+        self.x_df = pd.DataFrame(np.arange(16.0).reshape(4, 4), index=self.index, columns=self.columns)
+
+    def test_sparse_frame(self):
+        assert is_sparse_frame(self.s_df)
+        assert not is_sparse_frame(self.x_df)
+        assert all(dtype.fill_value == 0 for dtype in self.s_df.dtypes)
+        expected = pd.DataFrame(self.values, index=self.index, columns=self.columns)
+        assert_frame_equal(to_dense(self.s_df), expected)
+        assert_frame_equal(to_dense(self.x_df), self.x_df)
+        pd.testing.assert_series_equal(to_dense(self.s_df["x1"]), expected["x1"])
+
+    def test_sparse_power_sums(self):
+        np.testing.assert_allclose(sparse_power_sums(self.s_df), np.abs(self.values).sum(axis=0))
+        np.testing.assert_allclose(sparse_power_sums(self.s_df, 2), (self.values**2).sum(axis=0))
+
+    def test_rank_sparse_contributions(self):
+        dense = pd.DataFrame(self.values, index=self.index, columns=self.columns)
+        sorted_contrib, sorted_features, var_dict = rank_sparse_contributions(self.s_df, self.x_df)
+        expected = rank_contributions(dense, self.x_df)
+        # Only the largest number of non-zero contributions of a row is ranked
+        assert sorted_contrib.shape == (4, 4)
+        assert_frame_equal(sorted_contrib, expected[0])
+        # The rows with fewer non-zero contributions are completed in the order of the columns
+        assert var_dict.loc["a"].tolist() == [1, 2, 0, 3]
+        assert var_dict.loc["c"].tolist() == [0, 1, 2, 3]
+        assert_frame_equal(var_dict.loc[["b", "d"]], expected[2].loc[["b", "d"]])
+        np.testing.assert_array_equal(sorted_features.values, np.take_along_axis(self.x_df.values, var_dict.values, 1))
+
+    def test_rank_sparse_contributions_keep_top_k(self):
+        x_sparse = sparse_frame(scipy.sparse.csr_matrix(self.values), self.index, self.columns)
+        sorted_contrib, sorted_features, var_dict, residual = rank_sparse_contributions(
+            self.s_df, x_sparse, keep_top_k=2
+        )
+        assert sorted_contrib.shape == (4, 2)
+        assert var_dict.loc["d"].tolist() == [2, 1]
+        np.testing.assert_array_equal(sorted_features.values, sorted_contrib.values)
+        assert residual.loc["d"].tolist() == [0.0, 1.5]
+        assert residual.loc["b"].tolist() == [0.0, 0.0]
+        np.testing.assert_allclose(sorted_contrib.sum(axis=1) + residual.sum(axis=1), self.values.sum(axis=1))
+        # The dense ranking gives the same result
+        dense = pd.DataFrame(self.values, index=self.index, columns=self.columns)
+        assert_frame_equal(
+            rank_contributions(self.s_df, self.x_df, keep_top_k=2)[3],
+            rank_contributions(dense, self.x_df, keep_top_k=2)[3],
+        )
@@ -2,6 +2,7 @@
 Unit test of transform module.
 """
 import unittest
+from unittest.mock import patch
 
 import category_encoders as ce
 import numpy as np
@@ -10,7 +11,10 @@ import sklearn.preprocessing as skp
 from pandas.testing import assert_frame_equal
 from sklearn.compose import ColumnTransformer
 
+from shapash.utils.class_values import ClassesArray, NegatedPair
 from shapash.utils.transform import (
+    cast_float_values,
+    copy_frame,
     get_features_transform_mapping,
     get_preprocessing_mapping,
     handle_categorical_missing,
@@ -270,3 +274,51 @@ class TestInverseTransformCaterogyEncoder(unittest.TestCase):
         )
 
         assert_frame_equal(df_test, df_expected)
+
+    def test_handle_categorical_missing_without_missing(self):
+        """
+        test handle_categorical_missing returns its input when there is nothing to replace
+        """
+        df_test = pd.DataFrame({"city": ["paris", "chicago"], "other": [np.nan, 1.0]})
+        assert handle_categorical_missing(df_test) is df_test
+
+    def test_copy_frame(self):
+        """
+        test copy_frame shares the columns only under copy-on-write
+        """
+        df_test = pd.DataFrame({"a": [1.0, 2.0], "b": ["x", "y"]})
+        with patch("shapash.utils.transform.is_copy_on_write", return_value=False):
+            df_copy = copy_frame(df_test)
+        assert not np.shares_memory(df_copy["a"].to_numpy(), df_test["a"].to_numpy())
+        with patch("shapash.utils.transform.is_copy_on_write", return_value=True):
+            df_copy = copy_frame(df_test)
+        df_copy.loc[0, "a"] = 10.0
+        assert df_test.loc[0, "a"] == 1.0
+        assert_frame_equal(df_copy.iloc[1:], df_test.iloc[1:])
+
+    def test_cast_float_values(self):
+        """
+        test cast_float_values casts the floating point values only
+        """
+        df_test = pd.DataFrame({"a": [1.0, -2.0], "b": [1, 2], "c": ["x", "y"]})
+        df_cast = cast_float_values(df_test, "float32")
+        assert df_cast.dtypes.tolist() == [np.float32, np.int64, df_test["c"].dtype]
+        assert cast_float_values(df_cast, "float32") is df_cast
+        assert cast_float_values(df_test, None) is df_test
+        assert cast_float_values(df_test["a"], "float32").dtype == np.float32
+
+        pair = cast_float_values(NegatedPair(df_test[["a"]]), "float32")
+        assert isinstance(pair, NegatedPair)
+        assert pair.negative["a"].dtype == np.float32
+
+        values = ClassesArray(np.zeros((2, 3, 3)), index=df_test.index, columns=["a", "b", "c"])
+        values_cast = cast_float_values(values, "float32")
+        assert isinstance(values_cast, ClassesArray)
+        assert values_cast.values.dtype == np.float32
+        assert values_cast.columns.equals(values.columns)
+        assert values_cast.labelled
+        assert not cast_float_values(ClassesArray(np.zeros((2, 3, 3))), "float32").labelled
+
+        sparse = df_test[["a"]].astype(pd.SparseDtype(np.float64, 0.0))
+        sparse_cast = cast_float_values(sparse, "float32")
+        assert sparse_cast.dtypes.iloc[0] == pd.SparseDtype(np.float32, np.float32(0))
@@ -1,3 +1,4 @@
+import os
 import unittest
 
 import numpy as np
@@ -8,6 +9,7 @@ from shapash.utils.utils import (
     compute_digit_number,
     compute_sorted_variables_interactions_list_indices,
     compute_top_correlations_features,
+    effective_n_jobs,
     inclusion,
     is_nested_list,
     maximum_difference_sort_value,
@@ -160,3 +162,11 @@ class TestUtils(unittest.TestCase):
         list_features = compute_top_correlations_features(corr=corr, max_features=5)
 
         assert len(list_features) == 5
+
+    def test_effective_n_jobs(self):
+        n_cpus = os.cpu_count()
+        assert effective_n_jobs(None) == 1
+        assert effective_n_jobs(1) == 1
+        assert effective_n_jobs(4) == 4
+        assert effective_n_jobs(-1) == n_cpus
+        assert effective_n_jobs(-n_cpus - 5) == 1
@@ -0,0 +1,79 @@
+import unittest
+
+import pandas as pd
+
+from shapash.webapp.benchmark import (
+    CallbackReplayer,
+    compare_to_baseline,
+    make_synthetic_explainer,
+    run_benchmark,
+    summarize_records,
+)
+
+
+class TestBenchmark(unittest.TestCase):
+    def test_make_synthetic_explainer(self):
+        xpl = make_synthetic_explainer(n_rows=50, n_features=6, n_classes=3, n_groups=2)
+        assert xpl.x_init.shape == (50, 6)
+        assert len(xpl.contributions) == 3
+        assert list(xpl.features_groups.keys()) == ["group_0", "group_1"]
+
+        xpl = make_synthetic_explainer(n_rows=50, n_features=4, n_classes=0)
+        assert xpl._case == "regression"
+
+        with self.assertRaises(ValueError):
+            make_synthetic_explainer(n_classes=1)
+        with self.assertRaises(ValueError):
+            make_synthetic_explainer(n_features=3, n_groups=2)
+
+    def test_replayer_filter(self):
+        xpl = make_synthetic_explainer(n_rows=100, n_features=4, n_classes=0)
+        xpl.init_app()
+        replayer = CallbackReplayer(xpl.smartapp)
+        replayer.load()
+        assert len(replayer.get("dataset", "data")) == 100
+
+        replayer.click("add_dropdown_button", step="filter")
+        dropdown = replayer.find(type="var_dropdown")[-1]
+        replayer.set([(dropdown, "value", "feature_0")])
+        assert replayer.find(type="lower", index=dropdown["index"])
+        replayer.set(
+            [
+                ({"type": "lower", "index": dropdown["index"]}, "value", -100),
+                ({"type": "upper", "index": dropdown["index"]}, "value", 0),
+            ]
+        )
+        records = replayer.click("apply_filter")
+        assert "update_feature_selector" in [record["callback"] for record in records]
+        expected = (xpl.x_init["feature_0"] <= 0).sum()
+        assert len(replayer.get("dataset", "data")) == expected
+
+        replayer.click("reset_dropdown_button")
+        assert replayer.find(type="var_dropdown") == []
+        assert len(replayer.get("dataset", "data")) == 100
+        xpl.smartapp.jobs.shutdown()
+
+    def test_run_benchmark(self):
+        records = run_benchmark(repeat=1, n_rows=100, n_features=4, n_classes=2)
+        assert set(records["step"]) >= {"startup", "load", "click feature", "filter", "change label", "reset filter"}
+        assert (records["status"] != "error").all()
+
+        summary = summarize_records(records)
+        assert list(summary.columns) == ["calls", "errors", "p50_ms", "p95_ms", "max_ms", "p50_bytes", "max_bytes"]
+        assert summary.loc["update_feature_selector", "calls"] >= 2
+        assert summary.loc["update_feature_selector", "p50_bytes"] > 0
+
+    def test_compare_to_baseline(self):
+        baseline = pd.DataFrame(
+            {"p95_ms": [100.0, 10.0], "max_bytes": [1000, 100], "errors": [0, 0]}, index=["slow", "fast"]
+        )
+        summary = pd.DataFrame(
+            {"p95_ms": [200.0, 20.0], "max_bytes": [1000, 200], "errors": [0, 1]}, index=["slow", "fast"]
+        )
+        regressions = compare_to_baseline(summary, baseline, tolerance=0.25, min_delta_ms=20)
+        assert regressions[["callback", "metric"]].values.tolist() == [
+            ["slow", "p95_ms"],
+            ["fast", "max_bytes"],
+            ["fast", "errors"],
+        ]
+        assert compare_to_baseline(baseline, baseline).empty
@@ -30,6 +30,7 @@ from shapash.webapp.utils.callbacks import (
     update_click_data_on_subset_changes,
     update_features_to_display,
 )
+from shapash.webapp.utils.utils import round_to_k
 
 
 class TestCallbacks(unittest.TestCase):
@@ -102,6 +103,19 @@ class TestCallbacks(unittest.TestCase):
         self.smart_app.init_data(3)
         assert len(self.smart_app.round_dataframe) == 3
 
+    def test_round_float_columns_init_data(self):
+        xpl = copy.deepcopy(self.xpl)
+        xpl.x_init["column3"] = [1.123456, 3.323456, 2.223456, 4.423456, 5.523456]
+        smart_app = SmartApp(xpl)
+        expected = pd.Series([1.123, 3.323, 2.223, 4.423, 5.523], name="column3")
+        pd.testing.assert_series_equal(expected, smart_app.round_dataframe["column3"])
+        pd.testing.assert_series_equal(xpl.x_init["column3"], smart_app.dataframe["column3"])
+
+    def test_max_threshold(self):
+        contributions = self.xpl.contributions[-1]
+        expected = max(round_to_k(x, k=1) for x in contributions.to_numpy().ravel())
+        assert self.smart_app.max_threshold == expected
+
     def test_select_data_from_prediction_picking(self):
         selected_data = {"points": [{"customdata": 0}, {"customdata": 2}]}
         expected_result = pd.DataFrame(
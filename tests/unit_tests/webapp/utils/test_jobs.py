@@ -0,0 +1,142 @@
+import threading
+import unittest
+from concurrent.futures import CancelledError
+
+from shapash.webapp.utils.jobs import JobManager
+
+
+class TestJobManager(unittest.TestCase):
+    def setUp(self):
+        self.jobs = JobManager()
+
+    def tearDown(self):
+        self.jobs.shutdown()
+
+    def test_make_key(self):
+        key_1 = JobManager.make_key("clusters", {"label": 1, "selection": [1, 2]})
+        key_2 = JobManager.make_key("clusters", {"selection": [1, 2], "label": 1})
+        key_3 = JobManager.make_key("clusters", {"selection": [1, 3], "label": 1})
+        assert key_1 == key_2
+        assert key_1 != key_3
+
+    def test_submit_result_and_progress(self):
+        def func(job, x):
+            job.set_progress(0.5, "half")
+            return x * 2
+
+        job = self.jobs.submit("a", func, 21)
+        assert job.wait(timeout=5)
+        assert job.status == "done"
+        assert job.result() == 42
+        assert job.progress == 1.0
+        assert job.message == "half"
+
+    def test_identical_requests_are_deduplicated(self):
+        calls = []
+        release = threading.Event()
+
+        def func(job):
+            calls.append(1)
+            release.wait(5)
+            return "ok"
+
+        job_1 = self.jobs.submit("a", func, channel="user_1")
+        job_2 = self.jobs.submit("a", func, channel="user_2")
+        release.set()
+        assert job_1 is job_2
+        assert job_1.wait(timeout=5)
+        job_3 = self.jobs.submit("a", func)
+        assert job_3 is job_1
+        assert len(calls) == 1
+
+    def test_stale_job_is_cancelled(self):
+        release = threading.Event()
+
+        def blocking(job):
+            release.wait(5)
+            return "first"
+
+        def fast(job):
+            return "second"
+
+        running = self.jobs.submit("first", blocking, channel="clusters")
+        pending = self.jobs.submit("pending", fast, channel="clusters")
+        last = self.jobs.submit("last", fast, channel="clusters")
+        assert running.is_cancelled()
+        assert pending.status == "cancelled"
+        release.set()
+        assert last.wait(timeout=5)
+        assert last.result() == "second"
+        assert self.jobs.get("first") is None
+        assert self.jobs.get("pending") is None
+
+    def test_job_shared_by_another_channel_is_not_cancelled(self):
+        release = threading.Event()
+
+        def blocking(job):
+            release.wait(5)
+            return "shared"
+
+        shared = self.jobs.submit("shared", blocking, channel="user_1")
+        self.jobs.submit("shared", blocking, channel="user_2")
+        self.jobs.submit("other", lambda job: None, channel="user_1")
+        assert not shared.is_cancelled()
+        release.set()
+        assert shared.wait(timeout=5)
+        assert shared.result() == "shared"
+
+    def test_channels_of_two_sessions_are_independent(self):
+        release = threading.Event()
+
+        def blocking(job):
+            release.wait(5)
+            return "first"
+
+        first = self.jobs.submit("first", blocking, channel="session_1")
+        self.jobs.submit("second", lambda job: "second", channel="session_2")
+        assert not first.is_cancelled()
+        release.set()
+        assert first.wait(timeout=5)
+        assert first.result() == "first"
+
+    def test_job_stopped_after_cancel_is_cancelled(self):
+        started = threading.Event()
+        release = threading.Event()
+
+        def steps(job):
+            started.set()
+            release.wait(5)
+            if job.is_cancelled():
+                raise CancelledError()
+            return "done"
+
+        job = self.jobs.submit("steps", steps, channel="session_1")
+        started.wait(5)
+        self.jobs.submit("other", lambda job: None, channel="session_1")
+        release.set()
+        assert job.wait(timeout=5)
+        assert job.status == "cancelled"
+
+    def test_failed_job_is_resubmitted(self):
+        def fail(job):
+            raise ValueError("error")
+
+        job = self.jobs.submit("a", fail)
+        assert job.wait(timeout=5)
+        assert job.status == "failed"
+        with self.assertRaises(ValueError):
+            job.result()
+        new_job = self.jobs.submit("a", lambda job: 1)
+        assert new_job is not job
+        assert new_job.wait(timeout=5)
+        assert new_job.result() == 1
+
+    def test_finished_jobs_are_evicted(self):
+        jobs = JobManager(max_results=2)
+        try:
+            for i in range(4):
+                assert jobs.submit(str(i), lambda job: None).wait(timeout=5)
+            assert jobs.get("0") is None
+            assert jobs.get("3") is not None
+        finally:
+            jobs.shutdown()
@@ -0,0 +1,63 @@
+import base64
+import unittest
+
+import numpy as np
+import plotly.graph_objects as go
+from plotly.io.json import to_json_plotly
+
+from shapash.webapp.utils.MyGraph import MyGraph, encode_typed_array
+
+
+def decode_typed_array(typed_array):
+    return np.frombuffer(base64.b64decode(typed_array["bdata"]), dtype="<" + typed_array["dtype"])
+
+
+class TestMyGraph(unittest.TestCase):
+    def test_encode_typed_array_float(self):
+        values = np.array([0.123456789, -12345.6789, 0.0, np.nan, 1e-12])
+        output = encode_typed_array(values, digits=4)
+        assert output["dtype"] == "f4"
+        decoded = decode_typed_array(output)
+        expected = np.array([0.1235, -12350.0, 0.0, np.nan, 1e-12], dtype=np.float32)
+        np.testing.assert_array_equal(decoded, expected)
+
+    def test_encode_typed_array_int(self):
+        output = encode_typed_array([3, 1, 2])
+        assert output["dtype"] == "i4"
+        np.testing.assert_array_equal(decode_typed_array(output), [3, 1, 2])
+
+    def test_encode_typed_array_unchanged(self):
+        for values in [["a", "b"], [1, None], np.array([[1.0, 2.0]]), [], "abc", 1.5, [True, False]]:
+            assert encode_typed_array(values) is values
+
+    def test_encode_typed_array_out_of_float32_range(self):
+        ids = np.array([2**40, 2**40 + 1, 3], dtype=np.int64)
+        assert encode_typed_array(ids) is ids
+        timestamps = [1.7e9, 1.7e9 + 1.0, np.nan]
+        assert encode_typed_array(timestamps) is timestamps
+        output = encode_typed_array([123456.0, -1.5, np.inf])
+        assert output["dtype"] == "f4"
+        np.testing.assert_array_equal(decode_typed_array(output), [123456.0, -1.5, np.inf])
+
+    def test_compact_figure(self):
+        x = np.linspace(0, 1, 50)
+        y = np.sin(x)
+        fig = go.Figure(
+            data=[
+                go.Scatter(x=x, y=y, marker={"color": y, "size": 5}, customdata=np.stack((x, y), axis=-1)),
+                go.Bar(x=["a", "b"], y=[1, 2]),
+            ]
+        )
+        fig.update_layout(title="title")
+        output = MyGraph.compact_figure(fig)
+        scatter, bar = output["data"]
+        np.testing.assert_allclose(decode_typed_array(scatter["x"]), x, rtol=1e-5)
+        np.testing.assert_allclose(decode_typed_array(scatter["y"]), y, rtol=1e-5)
+        np.testing.assert_allclose(decode_typed_array(scatter["marker"]["color"]), y, rtol=1e-5)
+        assert scatter["marker"]["size"] == 5
+        assert np.array_equal(scatter["customdata"], fig.data[0].customdata)
+        assert list(bar["x"]) == ["a", "b"]
+        assert output["layout"]["title"]["text"] == "title"
+        # The original figure is not modified
+        np.testing.assert_array_equal(fig.data[0].x, x)
+        assert len(to_json_plotly(output)) < len(fig.to_json())
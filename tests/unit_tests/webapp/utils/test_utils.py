@@ -1,6 +1,11 @@
 import unittest
 
-from shapash.webapp.utils.utils import round_to_k
+import numpy as np
+import pandas as pd
+import scipy.sparse
+
+from shapash.utils.class_values import ClassesArray, NegatedPair
+from shapash.webapp.utils.utils import max_contribution, round_to_k
 
 
 class TestUtils(unittest.TestCase):
@@ -33,3 +38,13 @@ class TestUtils(unittest.TestCase):
         x = 0.0000123456789
         expected_r_x = 0.0000123
         assert round_to_k(x, 3) == expected_r_x
+
+    def test_max_contribution(self):
+        df = pd.DataFrame({"a": [1.0, np.nan, -3.0], "b": [0.5, 0.0, 2.0]})
+        assert max_contribution(df) == 2.0
+        assert max_contribution([df, -df]) == 3.0
+        assert max_contribution(NegatedPair(df)) == 3.0
+        assert max_contribution(ClassesArray(np.stack([df.to_numpy(), -df.to_numpy()], axis=2))) == 3.0
+        sparse = pd.DataFrame.sparse.from_spmatrix(scipy.sparse.csc_matrix(np.array([[0.0, -4.0], [1.5, 0.0]])))
+        assert max_contribution(sparse) == 1.5
+        assert max_contribution(NegatedPair(sparse)) == 4.0